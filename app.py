@@ -0,0 +1,194 @@
+"""
+app.py - Application logic of the ESP32 LVGL Weather Station.
+This module coordinates the display, Wi-Fi, NTP, and sensor data.
+
+It is started by the thin loader in `main.py`, so it can be deployed as
+precompiled bytecode (`app.mpy`, see `scripts/build_mpy.py`).
+
+Modules that are only needed during setup (`display_setup`) are imported when
+they are used and released afterwards; the network modules are imported on
+first use. The first frame is
+rendered right after the UI is created, before the network setup starts.
+"""
+
+import gc
+import sys
+
+import lvgl as lv
+
+import display
+import history
+import power
+from own_timers import start_timer_tasks
+from scheduler import Scheduler
+from system_tasks import register_system_tasks
+from wifi import connect_wifi, enable_modem_sleep, is_connected
+
+# --- Power Management ---
+# If True, the main loop puts the ESP32 into light sleep between task deadlines
+# and enables Wi-Fi modem sleep. If False, it waits with a regular sleep.
+POWER_SAVE_MODE = True
+
+# --- Status Endpoint ---
+# If True, a small HTTP server serves the device status as JSON on port 8080
+# (see status_server.py). The main loop then runs on asyncio and waits with
+# regular sleeps instead of light sleep, so the server can accept connections.
+STATUS_SERVER = False
+
+
+def _release_module(name: str) -> None:
+    """Drops a setup-only module from the module cache, so the GC can reclaim it."""
+    sys.modules.pop(name, None)
+    gc.collect()
+
+
+async def _run_with_status_server(sched, clock) -> None:
+    """Runs the scheduler loop and the status server on one asyncio event loop."""
+    import status_server
+
+    await status_server.start(sched)
+    await power.run_loop_async(sched, clock)
+
+
+def main() -> None:
+    """
+    Main entry point and logic for the application.
+    Initializes hardware, creates the UI, connects to the network,
+    synchronizes time, and starts the main application loop.
+    """
+    print("\n" + "=" * 50)
+    print("ESP32 LVGL Weather Station Started")
+    print("=" * 50 + "\n")
+
+    # ========================================
+    # STEP 1: Initialize Display Hardware
+    # ========================================
+    print("[1/6] Initializing display hardware...")
+    import display_setup
+
+    ok = display_setup.init_display_driver()
+    del display_setup
+    _release_module("display_setup")
+    if not ok:
+        print("FATAL: Display hardware initialization failed!")
+        print("Check SPI wiring and pin configurations.")
+        return
+
+    print("✓ Display hardware OK\n")
+    gc.collect()
+
+    # ========================================
+    # STEP 2: Create LVGL UI
+    # ========================================
+    print("[2/6] Creating user interface...")
+
+    # Register the file system driver for LVGL
+    from fs_driver import fs_register
+
+    fs_drv = lv.fs_drv_t()
+    fs_register(fs_drv, "S")
+
+    try:
+        display.create_ui()
+        display.display_handler()  # Show the UI before the network setup
+        print("✓ UI created and initialized")
+        print(f"✓ First frame {display.first_frame_ms} ms after boot\n")
+    except Exception as e:
+        print(f"FATAL: UI creation failed: {e}")
+        sys.print_exception(e)
+        return
+
+    gc.collect()
+
+    # ========================================
+    # STEP 3: Wi-Fi Connection
+    # ========================================
+    print("[3/6] Connecting to Wi-Fi...")
+    import watchdog
+
+    # The watchdog may still be running from before a soft reset (see watchdog.py)
+    connect_wifi(timeout_ms=watchdog.BOOT_WIFI_TIMEOUT_MS)
+
+    if not is_connected():
+        print("WARNING: No Wi-Fi connection!")
+        print("Displaying time only (without NTP sync).")
+        print("Weather data will not be available.\n")
+        # Continue without Wi-Fi to at least show the time
+    else:
+        print("✓ Wi-Fi connected\n")
+
+    gc.collect()
+
+    # ========================================
+    # STEP 4: NTP Time Synchronization
+    # ========================================
+    if is_connected():
+        print("[4/6] Synchronizing time via NTP...")
+        from ntp import set_rtc_from_ntp
+
+        try:
+            set_rtc_from_ntp()
+            print("✓ Time synchronized\n")
+        except Exception as e:
+            print(f"WARNING: NTP sync failed: {e}")
+            print("Using system time.\n")
+            sys.print_exception(e)
+    else:
+        print("[4/6] Skipping NTP (no Wi-Fi)\n")
+
+    gc.collect()
+
+    # ========================================
+    # STEP 5: Register Scheduled Tasks
+    # ========================================
+    print("[5/6] Registering scheduled tasks...")
+    clock = power.MachineClock(light_sleep=POWER_SAVE_MODE and not STATUS_SERVER)
+    sched = Scheduler(clock)
+    try:
+        start_timer_tasks(sched)
+        register_system_tasks(sched)
+        print("✓ Tasks registered:")
+        print("  - Display update: every 1s")
+        print("  - Weather update: every 15min")
+        print("  - Wi-Fi check: every 30s, NTP sync: every 6h\n")
+    except Exception as e:
+        print(f"FATAL: Task registration failed: {e}")
+        sys.print_exception(e)
+        return
+
+    watchdog.start(sched, before_reset=history.flush)
+
+    if POWER_SAVE_MODE and enable_modem_sleep():
+        print("✓ Wi-Fi modem sleep enabled\n")
+
+    gc.collect()
+
+    # ========================================
+    # STEP 6: Main Loop
+    # ========================================
+    print("[6/6] Starting main loop...")
+    print("=" * 50)
+    print("System is running! Press CTRL+C to exit.")
+    print("=" * 50 + "\n")
+
+    try:
+        # Runs every task at its deadline and sleeps until the next one.
+        if STATUS_SERVER:
+            import asyncio
+
+            asyncio.run(_run_with_status_server(sched, clock))
+        else:
+            power.run_loop(sched, clock)
+
+    except KeyboardInterrupt:
+        history.flush()
+        print("\n" + "=" * 50)
+        print("Program terminated by user (CTRL+C)")
+        print("=" * 50)
+
+    except Exception as e:
+        print("\n" + "=" * 50)
+        print("FATAL: Unexpected error in main loop:")
+        print(f"  {e}")
+        print("=" * 50)
+        sys.print_exception(e)
@@ -0,0 +1,191 @@
+"""
+This module provides a circuit breaker for calls to an unreliable remote service.
+
+After a failure the breaker "opens" and rejects calls without touching the
+network until a backoff time has passed. The backoff doubles with every
+consecutive failure, up to `MAX_BACKOFF_MS`. When it has passed, the breaker is
+"half-open" and lets exactly one probe call through: a success closes the
+breaker, a failure opens it again with the next backoff step. Other calls are
+rejected while the probe is in flight. A probe that is not recorded within
+`PROBE_TIMEOUT_MS` counts as failed, so a lost probe cannot block the breaker.
+
+A server can set the minimum wait itself with a `Retry-After` header (for
+example with HTTP 429), and an authentication error (HTTP 401) waits for the
+maximum backoff, since retrying with the same API key cannot succeed.
+
+Usage:
+    if breaker.allow():
+        try:
+            response = ...
+            breaker.record_success()
+        except OSError:
+            breaker.record_failure()
+"""
+
+try:
+    from time import ticks_add, ticks_diff, ticks_ms
+except ImportError:  # CPython, for running on a host
+    from time import monotonic
+
+    def ticks_ms():
+        return int(monotonic() * 1000)
+
+    def ticks_add(ticks, delta):
+        return ticks + delta
+
+    def ticks_diff(new, old):
+        return new - old
+
+# --- States ---
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half-open"
+
+# --- Backoff Configuration ---
+BASE_BACKOFF_MS = 30 * 1000  # 30 seconds after the first failure
+MAX_BACKOFF_MS = 30 * 60 * 1000  # 30 minutes
+FAILURE_THRESHOLD = 1  # Consecutive failures before the breaker opens
+PROBE_TIMEOUT_MS = 60 * 1000  # A probe not recorded by then counts as failed
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker with exponential backoff and a half-open probe state.
+
+    Args:
+        name (str): Name used in log output.
+        base_backoff_ms (int): Backoff after the failure that opened the breaker.
+        max_backoff_ms (int): Upper limit of the backoff.
+        failure_threshold (int): Consecutive failures before the breaker opens.
+
+    Attributes:
+        state (str): CLOSED, OPEN or HALF_OPEN.
+        successes (int): Number of successful calls.
+        failures (int): Number of failed calls.
+        consecutive_failures (int): Failures since the last success.
+        rejected (int): Calls rejected while the breaker was open or probing.
+        opened (int): How often the breaker has opened from the closed state.
+        last_status: HTTP status or error text of the last failure.
+    """
+
+    def __init__(
+        self,
+        name,
+        base_backoff_ms=BASE_BACKOFF_MS,
+        max_backoff_ms=MAX_BACKOFF_MS,
+        failure_threshold=FAILURE_THRESHOLD,
+    ):
+        self.name = name
+        self.base_backoff_ms = base_backoff_ms
+        self.max_backoff_ms = max_backoff_ms
+        self.failure_threshold = failure_threshold
+        self.state = CLOSED
+        self.successes = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.rejected = 0
+        self.opened = 0
+        self.last_status = None
+        self._retry_at_ms = 0
+        self._backoff_ms = 0
+        self._probe_at_ms = 0
+
+    def retry_in_ms(self, now_ms=None):
+        """Returns the time until the next call is allowed (0 if it is allowed now)."""
+        if self.state != OPEN:
+            return 0
+        if now_ms is None:
+            now_ms = ticks_ms()
+        return max(ticks_diff(self._retry_at_ms, now_ms), 0)
+
+    def allow(self, now_ms=None):
+        """
+        Checks whether a call may be made now.
+
+        When the backoff of an open breaker has passed, the breaker becomes
+        half-open and this call is the probe. Until the probe is recorded with
+        `record_success()` or `record_failure()`, other calls are rejected.
+
+        Args:
+            now_ms (int, optional): Current time in ticks_ms. Defaults to now.
+
+        Returns:
+            bool: True if the call may be made.
+        """
+        if now_ms is None:
+            now_ms = ticks_ms()
+        if self.state == HALF_OPEN and ticks_diff(now_ms, self._probe_at_ms) >= PROBE_TIMEOUT_MS:
+            self.record_failure("probe lost", now_ms=now_ms)
+        if self.state == OPEN:
+            if self.retry_in_ms(now_ms) > 0:
+                self.rejected += 1
+                return False
+            self.state = HALF_OPEN
+            self._probe_at_ms = now_ms
+            print(f"Breaker '{self.name}': half-open, probing...")
+            return True
+        if self.state == HALF_OPEN:
+            self.rejected += 1  # The probe is still in flight
+            return False
+        return True
+
+    def record_success(self):
+        """Records a successful call and closes the breaker."""
+        self.successes += 1
+        self.consecutive_failures = 0
+        self._backoff_ms = 0
+        if self.state != CLOSED:
+            print(f"Breaker '{self.name}': closed.")
+            self.state = CLOSED
+
+    def record_failure(self, status=None, retry_after_s=None, now_ms=None):
+        """
+        Records a failed call and opens the breaker if needed.
+
+        Args:
+            status: HTTP status code or a short error description.
+            retry_after_s (int, optional): Value of the server's Retry-After header.
+            now_ms (int, optional): Current time in ticks_ms. Defaults to now.
+        """
+        self.failures += 1
+        self.consecutive_failures += 1
+        self.last_status = status
+        if self.state != HALF_OPEN and self.consecutive_failures < self.failure_threshold:
+            return
+
+        if status == 401:
+            backoff_ms = self.max_backoff_ms  # The API key is wrong, retrying will not help
+        elif self._backoff_ms:
+            backoff_ms = min(self._backoff_ms * 2, self.max_backoff_ms)
+        else:
+            backoff_ms = self.base_backoff_ms
+        self._backoff_ms = backoff_ms
+        if retry_after_s:
+            backoff_ms = max(backoff_ms, retry_after_s * 1000)
+
+        if now_ms is None:
+            now_ms = ticks_ms()
+        self._retry_at_ms = ticks_add(now_ms, backoff_ms)
+        if self.state == CLOSED:
+            self.opened += 1
+        self.state = OPEN
+        print(f"Breaker '{self.name}': open after {status}, retry in {backoff_ms // 1000} s.")
+
+    def stats(self):
+        """
+        Returns the breaker state and counters for instrumentation.
+
+        Returns:
+            dict: {"state", "successes", "failures", "consecutive_failures",
+                   "rejected", "opened", "last_status", "retry_in_ms"}
+        """
+        return {
+            "state": self.state,
+            "successes": self.successes,
+            "failures": self.failures,
+            "consecutive_failures": self.consecutive_failures,
+            "rejected": self.rejected,
+            "opened": self.opened,
+            "last_status": self.last_status,
+            "retry_in_ms": self.retry_in_ms(),
+        }
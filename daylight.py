@@ -0,0 +1,176 @@
+"""
+This module switches the weather icon between its day and night variant at sunrise and sunset.
+
+OWM's icon codes come in a day ("01d") and a night ("01n") variant. On its
+own, the display only learns about the change from the first fetch after the
+transition, up to an hour later with the adaptive fetch interval, and then
+reads the new icon file during the UI tick. Instead, `weather.get_data()`
+keeps the sunrise and sunset of each response, and this module:
+- schedules a task for the next transition,
+- reads the icon for after the transition into RAM `PRELOAD_LEAD_MS` before
+  it (`display.preload_weather_icon()`), outside the display tick,
+- publishes that icon exactly at the transition, so the first display tick
+  after it shows the new variant from RAM, without a fetch or a file read,
+- corrects the icon of each fetch to the current state of the sun, since the
+  fetched data can be some minutes old around a transition.
+
+Times are compared in UTC (`ntp.unix_time_ms()`), so nothing is scheduled
+until the clock was set by NTP. The sunrise and sunset of the last fetch are
+taken to repeat every 24 hours until the next fetch updates them; they shift
+by a few minutes per day at most. In multi-location mode and with the compact
+payload, which carry no sun times, the icon changes with the fetches as before.
+"""
+
+import sys
+
+import display
+from weather_state import ICON
+
+# --- Configuration ---
+DAYLIGHT_ICONS = True
+PRELOAD_LEAD_MS = 60000  # Read the icon into RAM one minute before the transition
+DAY_MS = 24 * 60 * 60 * 1000
+
+# --- Sun State ---
+sunrise_ms = None  # Sunrise and sunset of the last fetch (UTC, ms since 1970)
+sunset_ms = None
+next_transition_ms = None  # The scheduled transition (UTC, ms since 1970)
+next_is_day = None  # True if it is a sunrise
+transitions = 0
+_preloaded = False  # The icon for the scheduled transition was preloaded
+_sched = None
+_task = None
+
+
+def _now_ms():
+    """Returns the UTC time in ms since 1970, or None if the clock was never set by NTP."""
+    ntp = sys.modules.get("ntp")
+    if ntp is None or ntp.last_offset_us is None:
+        return None
+    return ntp.unix_time_ms()
+
+
+def is_day(now_ms, sunrise_ms, sunset_ms):
+    """
+    Tells whether the sun is up at `now_ms`, with the sunrise and sunset
+    repeating every 24 hours.
+    """
+    return (now_ms - sunrise_ms) % DAY_MS < sunset_ms - sunrise_ms
+
+
+def next_transition(now_ms, sunrise_ms, sunset_ms):
+    """
+    Finds the next sunrise or sunset after `now_ms`.
+
+    Returns:
+        tuple: (time of the transition, True if it is a sunrise).
+    """
+    since_sunrise_ms = (now_ms - sunrise_ms) % DAY_MS
+    day_ms = sunset_ms - sunrise_ms
+    if since_sunrise_ms < day_ms:
+        return now_ms + day_ms - since_sunrise_ms, False
+    return now_ms + DAY_MS - since_sunrise_ms, True
+
+
+def variant(icon_code, day):
+    """Returns the day or night variant of an OWM icon code, e.g. "10d" -> "10n"."""
+    if not icon_code or icon_code[-1] not in "dn":
+        return icon_code
+    return icon_code[:-1] + ("d" if day else "n")
+
+
+def _cancel():
+    global next_transition_ms, next_is_day, _preloaded, _task
+    next_transition_ms = next_is_day = None
+    _preloaded = False
+    if _task is not None:
+        _sched.cancel(_task)
+        _task = None
+
+
+def _plan(now_ms):
+    """Schedules the preload of the next transition, or the swap if it was preloaded."""
+    global next_transition_ms, next_is_day, _preloaded, _task
+    at_ms, day = next_transition(now_ms, sunrise_ms, sunset_ms)
+    if at_ms != next_transition_ms:
+        _preloaded = False
+    next_transition_ms, next_is_day = at_ms, day
+
+    delay_ms = at_ms - now_ms
+    if not _preloaded:
+        delay_ms -= PRELOAD_LEAD_MS
+    delay_ms = max(delay_ms, 0)
+    if _task is None:
+        _task = _sched.add("daylight", DAY_MS, _step, delay_ms=delay_ms, coalesce=False)
+    else:
+        _sched.reschedule(_task, DAY_MS, delay_ms=delay_ms)
+
+
+def _step():
+    """Preloads the icon before a transition and shows it at the transition."""
+    global _preloaded, transitions
+    now_ms = _now_ms()
+    if now_ms is None or next_transition_ms is None:
+        return
+    icon_code = variant(display.weather_state.snapshot()[ICON], next_is_day)
+
+    if not _preloaded:
+        _preloaded = True
+        display.preload_weather_icon(icon_code)
+        _sched.reschedule(_task, DAY_MS, delay_ms=max(next_transition_ms - now_ms, 0))
+        return
+    if now_ms < next_transition_ms:
+        # The scheduler's clock ran ahead of the RTC
+        _sched.reschedule(_task, DAY_MS, delay_ms=next_transition_ms - now_ms)
+        return
+
+    display.set_weather_icon(icon_code)
+    transitions += 1
+    print(f"✓ Weather icon switched to {icon_code} at {'sunrise' if next_is_day else 'sunset'}.")
+    _plan(now_ms)
+
+
+def update(sunrise_s, sunset_s, icon_code):
+    """
+    Takes the sun times of a fetch and plans the next transition.
+
+    Args:
+        sunrise_s (int): Sunrise in UTC seconds since 1970 (`weather.sunrise`), or None.
+        sunset_s (int): Sunset in UTC seconds since 1970 (`weather.sunset`), or None.
+        icon_code (str): The fetched OWM icon code.
+
+    Returns:
+        str: The icon code, in the variant for the current state of the sun.
+    """
+    global sunrise_ms, sunset_ms
+    if not DAYLIGHT_ICONS or _sched is None:
+        return icon_code
+    if not sunrise_s or not sunset_s or not 0 < sunset_s - sunrise_s < DAY_MS // 1000:
+        # No sun times (compact payload) or no sunrise or sunset today (polar regions)
+        sunrise_ms = sunset_ms = None
+        _cancel()
+        return icon_code
+
+    sunrise_ms = sunrise_s * 1000
+    sunset_ms = sunset_s * 1000
+    now_ms = _now_ms()
+    if now_ms is None:
+        return icon_code
+    _plan(now_ms)
+    if _preloaded:
+        # The fetch may have changed the icon after it was preloaded
+        display.preload_weather_icon(variant(icon_code, next_is_day))
+    return variant(icon_code, is_day(now_ms, sunrise_ms, sunset_ms))
+
+
+def start(sched):
+    """
+    Enables the day/night icon switching. The transition task is registered
+    by the first fetch that brings sun times (see `update()`).
+
+    Args:
+        sched (scheduler.Scheduler): The application's scheduler.
+    """
+    global _sched
+    if DAYLIGHT_ICONS:
+        _sched = sched
@@ -11,6 +11,9 @@ import utime as time
 
 import lvgl as lv
 
+import sensor
+from weather_state import DATA, FIELD_COUNT, ICON, LOCATION, STALE, UPDATED_MS, WeatherState
+
 # --- UI Colors ---
 COLOR_BG = 0x0A0E27
 COLOR_CARD_BG = 0x1A1F3A
@@ -20,10 +23,102 @@ COLOR_TEXT_PRIMARY = 0xFFFFFF
 COLOR_TEXT_SECONDARY = 0xA0A0C0
 COLOR_ACCENT = 0xFFB800
 
+# --- Themes ---
+# Each theme maps the color roles of the UI to colors. Switching the theme
+# only changes the shared styles, not the individual widgets.
+THEMES = {
+    "dark": {
+        "bg": COLOR_BG,
+        "card_bg": COLOR_CARD_BG,
+        "primary": COLOR_PRIMARY,
+        "secondary": COLOR_SECONDARY,
+        "accent": COLOR_ACCENT,
+        "text_primary": COLOR_TEXT_PRIMARY,
+        "text_secondary": COLOR_TEXT_SECONDARY,
+    },
+    "light": {
+        "bg": 0xE8ECF4,
+        "card_bg": 0xFFFFFF,
+        "primary": 0x0077B6,
+        "secondary": 0x6A1FD0,
+        "accent": 0xD98E00,
+        "text_primary": 0x101426,
+        "text_secondary": 0x505470,
+    },
+}
+DEFAULT_THEME = "dark"
+
+# --- Static Background Cache ---
+# If True, the static chrome (background, cards, shadows, tile titles) is rendered
+# once into a snapshot image that is used as the screen background. Per-tick
+# redraws then only blit parts of that image behind the changed labels instead
+# of re-rendering shadows and rounded corners. The snapshot needs 150 KB
+# (240x320 RGB565), so a board with PSRAM is recommended.
+STATIC_BG_CACHE = False
+
+# If True, the widgets get the properties of the shared styles as local style
+# properties, as before the styles were shared, so `ui_heap_bytes` can be
+# compared between both (`scripts/render_benchmark.py --styles local`). Theme
+# changes and the static background cache do not reach local properties.
+LOCAL_STYLES = False
+
+# Print the render time statistics every N display ticks
+RENDER_STATS_INTERVAL = 60
+
+# Width of one character cell of the clock in pixels. Must fit the widest digit of the font.
+# Only used with the built-in font; with a loaded clock font it is derived from the glyphs.
+CLOCK_CELL_WIDTH = 10
+
+# --- Fonts ---
+# Glyph-minimal subset fonts generated by `scripts/make_fonts.py`, loaded through
+# the "S:" file system driver. Roles whose file is missing use LVGL's built-in font.
+FONT_FILES = {
+    "clock": "S:/fonts/clock_28.bin",
+    "date": "S:/fonts/date_16.bin",
+    "value": "S:/fonts/value_22.bin",
+    "text": "S:/fonts/text_14.bin",
+}
+
+# --- Pages ---
+# Besides the weather page, which is always resident, the pages are built when
+# they are first shown. Pages that are not shown are kept for a fast return
+# while their heap (measured when they were built) fits into PAGE_HEAP_BUDGET;
+# beyond that, the least recently shown ones are deleted and rebuilt on demand.
+PAGE_TITLES = {
+    "weather": "Weather",
+    "forecast": "Outlook",
+    "history": "History",
+    "system": "System",
+}
+PAGE_HEAP_BUDGET = 16 * 1024  # Bytes of heap for pages that are not shown
+# A page change reveals the new page in bands from top to bottom, one band per
+# step, so it costs about one frame of rendering in total instead of a full
+# frame per animation step. The steps are run by `own_timers.py`.
+PAGE_WIPE_BANDS = 8
+HISTORY_CHART_POINTS = 48  # Hours
+
+# --- Icons ---
+# LVGL binary image header of the icon files (see scripts/convert_icons.py):
+# magic, color format, flags, width, height, stride, reserved
+ICON_HEADER = "<BBHHHHH"
+ICON_HEADER_SIZE = 12
+
 # --- Global State ---
-# These variables hold the data to be displayed.
-weather_data = (None,) * 6
-weather_icon_code = "01d"  # Default icon
+# The weather data to be displayed, its icon, the location name and its
+# freshness (time of the last successful fetch, and whether the fetches since
+# then have failed; stale data stays visible with its age). Written by the
+# weather tasks, read by the display tick through `_weather`.
+weather_state = WeatherState()
+_weather = [None] * FIELD_COUNT  # Snapshot of the display tick, reused every tick
+
+# Weather icon read into RAM ahead of a day/night transition (see daylight.py):
+# (icon code, image descriptor, pixel data), shown without file access
+_preloaded_icon = None
+
+# Multi-location mode: compact records from `weather.get_group_data()`
+# and the index of the location currently shown.
+location_records = []
+location_index = 0
 
 
 class UI:
@@ -34,24 +129,313 @@ class UI:
     main_screen = None
     # Header
     date_label = None
-    time_label = None
+    clock = None
     wifi_icon = None
     # Status
+    location_label = None
     desc_label = None
+    local_label = None  # Local sensor values (see sensor.py)
     weather_icon = None
     # Weather Tiles
     temp_value_label = None
     hum_value_label = None
     wind_value_label = None
     press_value_label = None
+    # Static chrome: cards and tile titles, and the cached background image
+    cards = None
+    static_labels = None
+    bg_image = None
+    bg_snapshot = None
     # Cache for icon paths to avoid unnecessary UI updates
     _current_weather_icon = ""
+    _weather_icon_src = None  # Preloaded icon on the screen; keeps its pixel data alive
     _current_wifi_icon = ""
+    _current_location = ""
+    _current_date = None
+    _current_desc = ""
+    _weather_seq = -1  # Sequence of the weather state that is on the screen
+    _sensor_seq = -1  # Sequence of the local sensor reading that is on the screen
 
 
 ui = UI()
 
 
+class RenderStats:
+    """
+    Render statistics of the display ticks.
+
+    The render times are measured around `lv.refr_now()` in `display_handler()`.
+    The clock counters hold the pixels invalidated by the date and time widgets,
+    and for comparison the pixels that re-setting the full labels would invalidate.
+    """
+    count = 0
+    total_us = 0
+    max_us = 0
+    last_us = 0
+    clock_px_total = 0
+    clock_px_last = 0
+    clock_px_full_total = 0
+
+
+render_stats = RenderStats()
+
+
+class FlushStats:
+    """
+    Timing of the draw buffer transfers, to show how much of the SPI transfer
+    runs in parallel with rendering (see `BUFFER_PROFILES` in display_setup.py).
+
+    Per frame, `render_us` is the refresh time minus the time LVGL waited for a
+    draw buffer to become free, `flush_us` the time the stripes spent on the
+    SPI bus, and `frame_us` the time from the start of the refresh to the end
+    of the last transfer. If rendering and transfers ran one after the other,
+    `frame_us` would be their sum; `overlap_us()` is the time they overlapped.
+
+    `transfer_done()` is called from the DMA completion interrupt, so it only
+    updates preallocated small-integer fields. The totals are updated at the
+    start of the next frame.
+    """
+
+    def __init__(self):
+        self.frames = 0
+        self.stripes = 0
+        self.render_us = 0
+        self.flush_us = 0
+        self.frame_us = 0
+        # Current frame
+        self._pending = False
+        self._refr_start_us = 0
+        self._refr_us = 0
+        self._wait_start_us = 0
+        self._wait_us = 0
+        self._transfer_start_us = 0
+        self._transfer_us = 0
+        self._transfers = 0
+        self._last_done_us = 0
+
+    def refr_start(self):
+        """Called before the display refresh."""
+        self.finish()
+        self._refr_start_us = time.ticks_us()
+        self._wait_us = 0
+        self._transfer_us = 0
+        self._transfers = 0
+
+    def refr_done(self):
+        """Called after the display refresh."""
+        self._refr_us = time.ticks_diff(time.ticks_us(), self._refr_start_us)
+        self._pending = True
+
+    def wait_start(self, event=None):
+        self._wait_start_us = time.ticks_us()
+
+    def wait_done(self, event=None):
+        self._wait_us += time.ticks_diff(time.ticks_us(), self._wait_start_us)
+
+    def transfer_start(self):
+        self._transfer_start_us = time.ticks_us()
+
+    def transfer_done(self):
+        now = time.ticks_us()
+        self._transfer_us += time.ticks_diff(now, self._transfer_start_us)
+        self._transfers += 1
+        self._last_done_us = now
+
+    def finish(self):
+        """Adds the last frame to the totals. Frames without transfers are not counted."""
+        if not self._pending:
+            return
+        self._pending = False
+        if not self._transfers:
+            return
+        self.frames += 1
+        self.stripes += self._transfers
+        self.render_us += self._refr_us - self._wait_us
+        self.flush_us += self._transfer_us
+        self.frame_us += max(time.ticks_diff(self._last_done_us, self._refr_start_us), self._refr_us)
+
+    def overlap_us(self):
+        """Returns the total time rendering and transfers ran in parallel."""
+        return max(self.render_us + self.flush_us - self.frame_us, 0)
+
+    def summary(self):
+        """
+        Returns the per-frame averages.
+
+        Returns:
+            dict: {"frames", "stripes", "render_us", "flush_us", "frame_us", "overlap_us"}
+        """
+        n = self.frames or 1
+        return {
+            "frames": self.frames,
+            "stripes": self.stripes // n,
+            "render_us": self.render_us // n,
+            "flush_us": self.flush_us // n,
+            "frame_us": self.frame_us // n,
+            "overlap_us": self.overlap_us() // n,
+        }
+
+
+flush_stats = FlushStats()
+
+
+class Styles:
+    """
+    Registry of the shared `lv.style_t` objects of the UI.
+
+    Every style is built once and attached to the widgets with `add_style()`,
+    so widgets do not carry their own local style property lists (unless
+    `LOCAL_STYLES` is set for a comparison).
+    """
+    theme = ""
+    screen = None
+    card = None
+    card_cached = None
+    clock_cell = None
+    transparent = None
+    text_primary = None
+    text_secondary = None
+    # Title styles of the weather tiles, by color role
+    title = None
+    # Font styles and the loaded subset fonts, by font role
+    font = None
+    fonts = {}
+
+
+styles = Styles()
+
+# Heap used by `create_ui()` in bytes (for instrumentation)
+ui_heap_bytes = 0
+
+# Time since boot when the first frame was rendered, in ms (for instrumentation)
+first_frame_ms = None
+
+
+def _build_styles():
+    """Creates the shared styles with their theme-independent properties."""
+    styles.screen = lv.style_t()
+    styles.screen.init()
+
+    styles.card = lv.style_t()
+    styles.card.init()
+    styles.card.set_radius(10)
+    styles.card.set_border_width(0)
+    styles.card.set_shadow_width(10)
+    styles.card.set_shadow_opa(80)
+    styles.card.set_pad_all(0)
+
+    # Replaces the card style once the chrome is part of the cached background
+    styles.card_cached = lv.style_t()
+    styles.card_cached.init()
+    styles.card_cached.set_bg_opa(0)
+    styles.card_cached.set_shadow_width(0)
+
+    styles.clock_cell = lv.style_t()
+    styles.clock_cell.init()
+    styles.clock_cell.set_text_align(lv.TEXT_ALIGN.CENTER)
+
+    styles.transparent = lv.style_t()
+    styles.transparent.init()
+    styles.transparent.set_bg_opa(0)
+    styles.transparent.set_border_width(0)
+
+    styles.text_primary = lv.style_t()
+    styles.text_primary.init()
+    styles.text_secondary = lv.style_t()
+    styles.text_secondary.init()
+
+    styles.title = {}
+    for role in ("primary", "secondary", "accent"):
+        style = lv.style_t()
+        style.init()
+        styles.title[role] = style
+
+    styles.font = {}
+    for role, path in FONT_FILES.items():
+        font = _load_font(path)
+        style = lv.style_t()
+        style.init()
+        if font:
+            style.set_text_font(font)
+            styles.fonts[role] = font
+        styles.font[role] = style
+
+
+# The properties set on the shared styles, copied to the widgets with LOCAL_STYLES
+_STYLE_PROPS = (
+    "BG_COLOR", "BG_OPA", "RADIUS", "BORDER_WIDTH", "SHADOW_WIDTH", "SHADOW_OPA",
+    "PAD_TOP", "PAD_BOTTOM", "PAD_LEFT", "PAD_RIGHT", "TEXT_COLOR", "TEXT_FONT", "TEXT_ALIGN",
+)
+
+
+def _add_style(obj, style):
+    """
+    Attaches a shared style to a widget, or with `LOCAL_STYLES` copies its
+    properties into the widget's local style.
+    """
+    if not LOCAL_STYLES:
+        obj.add_style(style, 0)
+        return
+    value = lv.style_value_t()
+    for name in _STYLE_PROPS:
+        prop = getattr(lv.STYLE, name)
+        if style.get_prop(prop, value) == lv.STYLE_RES.FOUND:
+            obj.set_local_style_prop(prop, value, 0)
+
+
+def _load_font(path):
+    """
+    Loads a binary LVGL font from the file system.
+
+    Characters missing from the subset fall back to the built-in font.
+
+    Args:
+        path (str): LVGL path of the font file, e.g. "S:/fonts/clock_28.bin".
+
+    Returns:
+        lv.font_t or None: The font, or None if it could not be loaded.
+    """
+    try:
+        font = lv.binfont_create(path)
+    except Exception as e:
+        print(f"Font {path} not loaded: {e}")
+        return None
+    if not font:
+        print(f"Font {path} not found, using the built-in font.")
+        return None
+    font.fallback = lv.font_default()
+    return font
+
+
+def set_theme(name):
+    """
+    Applies a color theme by updating the shared styles.
+
+    All widgets using the styles are refreshed by LVGL; no widget is touched
+    individually.
+
+    Args:
+        name (str): A key of `THEMES`.
+    """
+    colors = THEMES[name]
+    if styles.card is None:
+        _build_styles()
+
+    styles.screen.set_bg_color(lv.color_hex(colors["bg"]))
+    styles.card.set_bg_color(lv.color_hex(colors["card_bg"]))
+    styles.text_primary.set_text_color(lv.color_hex(colors["text_primary"]))
+    styles.text_secondary.set_text_color(lv.color_hex(colors["text_secondary"]))
+    for role in styles.title:
+        styles.title[role].set_text_color(lv.color_hex(colors[role]))
+    styles.theme = name
+
+    # Let LVGL re-resolve the changed styles on all objects
+    lv.obj.report_style_change(None)
+
+    if ui.bg_image:
+        _cache_static_background()
+
+
 def set_weather_data(data, icon_code=None):
     """
     Updates the global weather data from an external source (e.g., weather module).
@@ -60,13 +444,114 @@ def set_weather_data(data, icon_code=None):
         data (tuple): A tuple containing weather information.
         icon_code (str, optional): The icon code for the current weather. Defaults to None.
     """
-    global weather_data, weather_icon_code
-    weather_data = data
-    if icon_code:
-        weather_icon_code = icon_code
+    weather_state.set_data(data, icon_code)
+
+
+def set_weather_status(ok):
+    """
+    Records the outcome of a weather fetch.
+
+    A failed fetch keeps the last good data on the display, marked with its age.
+
+    Args:
+        ok (bool): True if the fetch succeeded and new data was set.
+    """
+    weather_state.set_status(ok, time.ticks_ms())
+
+
+def set_weather_icon(icon_code):
+    """
+    Shows another icon for the current weather data, e.g. its night variant at sunset.
+
+    Args:
+        icon_code (str): The OWM icon code.
+    """
+    current = weather_state.snapshot()
+    if current[ICON] != icon_code:
+        weather_state.set_data(current[DATA], icon_code)
+
+
+def preload_weather_icon(icon_code):
+    """
+    Reads a weather icon into RAM, so the display tick can show it later
+    without reading the file.
+
+    Args:
+        icon_code (str): The OWM icon code.
+
+    Returns:
+        bool: True if the icon is preloaded.
+    """
+    global _preloaded_icon
+    import struct
+
+    if _preloaded_icon and _preloaded_icon[0] == icon_code:
+        return True
+    try:
+        with open(f"/icons/{icon_code}.bin", "rb") as f:
+            magic, cf, flags, w, h, stride, _ = struct.unpack(ICON_HEADER, f.read(ICON_HEADER_SIZE))
+            pixels = f.read()
+    except (OSError, ValueError) as e:
+        print(f"ERROR: Failed to preload icon {icon_code}: {e}")
+        return False
+    dsc = lv.image_dsc_t()
+    dsc.header.magic = magic
+    dsc.header.cf = cf
+    dsc.header.flags = flags
+    dsc.header.w = w
+    dsc.header.h = h
+    dsc.header.stride = stride
+    dsc.data_size = len(pixels)
+    dsc.data = pixels
+    _preloaded_icon = (icon_code, dsc, pixels)
+    return True
+
+
+def _age_suffix():
+    """Returns the age of stale weather data for the description label, e.g. " (25 min ago)"."""
+    if not _weather[STALE] or _weather[UPDATED_MS] is None:
+        return ""
+    age_min = time.ticks_diff(time.ticks_ms(), _weather[UPDATED_MS]) // 60000
+    if age_min >= 120:
+        return f" ({age_min // 60} h ago)"
+    return f" ({age_min} min ago)"
+
+
+def set_locations(records):
+    """
+    Stores the weather records of several locations and shows the first one.
+
+    Args:
+        records (list): Records as returned by `weather.get_group_data()`.
+    """
+    global location_records, location_index
+    location_records = records
+    location_index = 0
+    _apply_location()
+
+
+def show_next_location():
+    """
+    Switches the display to the next stored location.
+
+    Uses the cached records only; no data is fetched.
+    """
+    global location_index
+    if len(location_records) < 2:
+        return
+    location_index = (location_index + 1) % len(location_records)
+    _apply_location()
+
+
+def _apply_location():
+    """Copies the record of the current location into the global display state."""
+    if not location_records:
+        return
+    record = location_records[location_index]
+    weather_state.set_data(record[:6], record[6], record[7] or "")
 
 
-def _create_card(parent, x, y, width, height):
+def _create_card(parent, x, y, width, height, cached=True):
     """
     Helper function to create a styled card object.
 
@@ -76,6 +561,7 @@ def _create_card(parent, x, y, width, height):
         y (int): Y position.
         width (int): Card width.
         height (int): Card height.
+        cached (bool): Part of the static background cache. Only for cards of the weather page.
 
     Returns:
         lv.obj: The created card object.
@@ -83,16 +569,80 @@ def _create_card(parent, x, y, width, height):
     card = lv.obj(parent)
     card.set_size(width, height)
     card.set_pos(x, y)
-    card.set_style_bg_color(lv.color_hex(COLOR_CARD_BG), 0)
-    card.set_style_radius(10, 0)
-    card.set_style_border_width(0, 0)
-    card.set_style_shadow_width(10, 0)
-    card.set_style_shadow_opa(80, 0)
+    _add_style(card, styles.card)
     card.set_scrollbar_mode(lv.SCROLLBAR_MODE.OFF)
-    card.set_style_pad_all(0, 0)
+    if cached:
+        ui.cards.append(card)
     return card
 
 
+class DigitClock:
+    """
+    An "HH:MM:SS" clock built from one fixed-width label per character.
+
+    Only the cells whose character changed are updated, so usually just the
+    last seconds digit is invalidated instead of the whole time string.
+
+    Args:
+        parent (lv.obj): The parent object of the clock.
+        cell_width (int): Width of one character cell in pixels.
+    """
+
+    def __init__(self, parent, cell_width=None):
+        if cell_width is None:
+            cell_width = _clock_cell_width()
+        self.container = lv.obj(parent)
+        _add_style(self.container, styles.transparent)
+        self.container.set_style_pad_all(0, 0)
+        self.container.set_scrollbar_mode(lv.SCROLLBAR_MODE.OFF)
+        self.container.set_size(8 * cell_width, lv.SIZE_CONTENT)
+
+        self.cells = []
+        self._chars = list("--:--:--")
+        for i in range(8):
+            cell = lv.label(self.container)
+            _add_style(cell, styles.title["primary"])
+            _add_style(cell, styles.clock_cell)
+            _add_style(cell, styles.font["clock"])
+            cell.set_width(cell_width)
+            cell.set_pos(i * cell_width, 0)
+            cell.set_text(self._chars[i])
+            self.cells.append(cell)
+        self._cell_width = cell_width
+        self._cell_px = 0
+
+    def cell_pixels(self):
+        """Returns the area of one cell in pixels."""
+        if not self._cell_px:
+            self.container.update_layout()
+            self._cell_px = self._cell_width * self.cells[0].get_height()
+        return self._cell_px
+
+    def set_time(self, hour, minute, second):
+        """
+        Shows the given time, updating only the changed cells.
+
+        Returns:
+            int: The number of pixels invalidated by this update.
+        """
+        text = f"{hour:02d}:{minute:02d}:{second:02d}"
+        changed = 0
+        for i in (0, 1, 3, 4, 6, 7):
+            if text[i] != self._chars[i]:
+                self.cells[i].set_text(text[i])
+                self._chars[i] = text[i]
+                changed += 1
+        return changed * self.cell_pixels()
+
+
+def _clock_cell_width():
+    """Returns the clock cell width that fits the widest digit of the clock font."""
+    font = styles.fonts.get("clock")
+    if not font:
+        return CLOCK_CELL_WIDTH
+    return max(font.get_glyph_width(ord(c), 0) for c in "0123456789:") + 2
+
+
 def _create_header(parent):
     """Creates the header section with Wi-Fi icon, date, and time."""
     header_card = _create_card(parent, 5, 5, 230, 60)
@@ -104,21 +654,19 @@ def _create_header(parent):
     time_container = lv.obj(header_card)
     time_container.set_size(170, 58)
     time_container.align(lv.ALIGN.RIGHT_MID, 0, 0)
-    time_container.set_style_bg_opa(0, 0)
-    time_container.set_style_border_width(0, 0)
+    _add_style(time_container, styles.transparent)
     time_container.set_scrollbar_mode(lv.SCROLLBAR_MODE.OFF)
 
     ui.date_label = lv.label(time_container)
     ui.date_label.set_text("--.--.----")
-    ui.date_label.set_style_text_color(lv.color_hex(COLOR_TEXT_SECONDARY), 0)
+    _add_style(ui.date_label, styles.text_secondary)
+    _add_style(ui.date_label, styles.font["date"])
     ui.date_label.center()
     ui.date_label.set_y(-12)
 
-    ui.time_label = lv.label(time_container)
-    ui.time_label.set_text("--:--:--")
-    ui.time_label.set_style_text_color(lv.color_hex(COLOR_PRIMARY), 0)
-    ui.time_label.center()
-    ui.time_label.set_y(12)
+    ui.clock = DigitClock(time_container)
+    ui.clock.container.center()
+    ui.clock.container.set_y(12)
 
 
 def _create_status_section(parent):
@@ -126,18 +674,33 @@ def _create_status_section(parent):
     status_card = _create_card(parent, 5, 70, 230, 80)
 
     ui.weather_icon = lv.image(status_card)
-    ui.weather_icon.set_src(f"S:/icons/{weather_icon_code}.bin")
+    ui.weather_icon.set_src(f"S:/icons/{weather_state.snapshot()[ICON]}.bin")
     ui.weather_icon.align(lv.ALIGN.RIGHT_MID, -10, 0)
 
     ui.desc_label = lv.label(status_card)
     ui.desc_label.set_text("Loading...")
-    ui.desc_label.set_style_text_color(lv.color_hex(COLOR_TEXT_SECONDARY), 0)
+    _add_style(ui.desc_label, styles.text_secondary)
+    _add_style(ui.desc_label, styles.font["text"])
     ui.desc_label.align(lv.ALIGN.LEFT_MID, 10, 0)
     ui.desc_label.set_long_mode(ui.desc_label.LONG_MODE.WRAP)
     ui.desc_label.set_width(140)
 
+    # Only filled in multi-location mode
+    ui.location_label = lv.label(status_card)
+    ui.location_label.set_text("")
+    _add_style(ui.location_label, styles.title["primary"])
+    _add_style(ui.location_label, styles.font["text"])
+    ui.location_label.align(lv.ALIGN.TOP_LEFT, 10, 6)
+
+    # Only filled if a local sensor is connected
+    ui.local_label = lv.label(status_card)
+    ui.local_label.set_text("")
+    _add_style(ui.local_label, styles.text_secondary)
+    _add_style(ui.local_label, styles.font["text"])
+    ui.local_label.align(lv.ALIGN.BOTTOM_LEFT, 10, -6)
 
-def _create_weather_tile(parent, x, y, title, initial_value, color):
+
+def _create_weather_tile(parent, x, y, title, initial_value, color_role):
     """
     Creates a single weather data tile.
 
@@ -147,7 +710,7 @@ def _create_weather_tile(parent, x, y, title, initial_value, color):
         y (int): Y position.
         title (str): The title text for the tile (e.g., "Temp").
         initial_value (str): The initial value to display (e.g., "--°C").
-        color (int): The LVGL color hex value for the title.
+        color_role (str): The theme color role of the title ("primary", "secondary" or "accent").
 
     Returns:
         lv.label: The LVGL label object for the value, allowing it to be updated.
@@ -156,12 +719,15 @@ def _create_weather_tile(parent, x, y, title, initial_value, color):
 
     title_label = lv.label(card)
     title_label.set_text(title)
-    title_label.set_style_text_color(lv.color_hex(color), 0)
+    _add_style(title_label, styles.title[color_role])
+    _add_style(title_label, styles.font["text"])
     title_label.align(lv.ALIGN.TOP_MID, 0, 8)
+    ui.static_labels.append(title_label)
 
     value_label = lv.label(card)
     value_label.set_text(initial_value)
-    value_label.set_style_text_color(lv.color_hex(COLOR_TEXT_PRIMARY), 0)
+    _add_style(value_label, styles.text_primary)
+    _add_style(value_label, styles.font["value"])
     value_label.align(lv.ALIGN.TOP_MID, 0, 40)
     return value_label
 
@@ -171,72 +737,220 @@ def create_ui():
     Creates the complete user interface, including all widgets.
     This function should be called once at startup.
     """
+    global ui_heap_bytes
+    gc.collect()
+    heap_before = gc.mem_alloc()
+    start_us = time.ticks_us()
+
+    set_theme(DEFAULT_THEME)
+
     ui.main_screen = lv.obj()
-    ui.main_screen.set_style_bg_color(lv.color_hex(COLOR_BG), 0)
+    _add_style(ui.main_screen, styles.screen)
     lv.screen_load(ui.main_screen)
+    ui.cards = []
+    ui.static_labels = []
 
     _create_header(ui.main_screen)
     _create_status_section(ui.main_screen)
 
     # --- Weather Tiles ---
-    ui.temp_value_label = _create_weather_tile(ui.main_screen, 5, 155, "Temp", "--°C", COLOR_ACCENT)
-    ui.hum_value_label = _create_weather_tile(ui.main_screen, 125, 155, "Humid", "--%", COLOR_PRIMARY)
-    ui.wind_value_label = _create_weather_tile(ui.main_screen, 5, 240, "Wind", "--m/s", COLOR_ACCENT)
-    ui.press_value_label = _create_weather_tile(ui.main_screen, 125, 240, "Bar", "---hPa", COLOR_SECONDARY)
+    ui.temp_value_label = _create_weather_tile(ui.main_screen, 5, 155, "Temp", "--°C", "accent")
+    ui.hum_value_label = _create_weather_tile(ui.main_screen, 125, 155, "Humid", "--%", "primary")
+    ui.wind_value_label = _create_weather_tile(ui.main_screen, 5, 240, "Wind", "--m/s", "accent")
+    ui.press_value_label = _create_weather_tile(ui.main_screen, 125, 240, "Bar", "---hPa", "secondary")
+
+    if STATIC_BG_CACHE:
+        _cache_static_background()
+    ui._weather_seq = -1  # Draw the current weather state on the new widgets
+    ui._sensor_seq = -1
 
-    print("✓ UI created")
+    page = pages["weather"]
+    page.build_us = time.ticks_diff(time.ticks_us(), start_us)
+    gc.collect()
+    ui_heap_bytes = gc.mem_alloc() - heap_before
+    page.screen = ui.main_screen
+    page.heap_bytes = ui_heap_bytes
+    page.builds += 1
+    page.last_shown_ms = time.ticks_ms()
+    print(f"✓ UI created (heap used: {ui_heap_bytes} bytes)")
     # Perform an initial update to show something immediately
     update_time_display()
     update_weather_display()
+    update_local_display()
+
+
+def _cache_static_background():
+    """
+    Renders the static chrome into a snapshot and uses it as the screen background.
+
+    The dynamic widgets are hidden while the snapshot is taken. Afterwards the
+    cards keep their layout role but are drawn transparent and without shadow,
+    and the tile titles are hidden, since both are part of the background image.
+    Can be called again (e.g. after a theme change) to refresh the image.
+    """
+    dynamic = (
+        ui.wifi_icon, ui.weather_icon, ui.date_label, ui.clock.container, ui.desc_label,
+        ui.location_label, ui.local_label, ui.temp_value_label, ui.hum_value_label,
+        ui.wind_value_label, ui.press_value_label,
+    )
+
+    # Show the chrome as it looks without the cache
+    old_image = ui.bg_image
+    if old_image:
+        old_image.add_flag(lv.obj.FLAG.HIDDEN)
+    for card in ui.cards:
+        card.remove_style(styles.card_cached, 0)
+    for label in ui.static_labels:
+        label.remove_flag(lv.obj.FLAG.HIDDEN)
+    for obj in dynamic:
+        obj.add_flag(lv.obj.FLAG.HIDDEN)
+
+    try:
+        snapshot = lv.snapshot_take(ui.main_screen, lv.COLOR_FORMAT.RGB565)
+    except (AttributeError, MemoryError) as e:
+        snapshot = None
+        print(f"Static background cache not available: {e}")
+
+    for obj in dynamic:
+        obj.remove_flag(lv.obj.FLAG.HIDDEN)
+    if not snapshot:
+        if old_image:
+            old_image.remove_flag(lv.obj.FLAG.HIDDEN)
+        return
+
+    if old_image:
+        old_snapshot = ui.bg_snapshot
+        old_image.set_src(snapshot)
+        old_image.remove_flag(lv.obj.FLAG.HIDDEN)
+        old_snapshot.destroy()
+    else:
+        ui.bg_image = lv.image(ui.main_screen)
+        ui.bg_image.set_src(snapshot)
+        ui.bg_image.set_pos(0, 0)
+        ui.bg_image.move_background()
+    ui.bg_snapshot = snapshot
+
+    for card in ui.cards:
+        card.add_style(styles.card_cached, 0)
+    for label in ui.static_labels:
+        label.add_flag(lv.obj.FLAG.HIDDEN)
+    print("✓ Static background cached")
+
+
+def print_render_stats():
+    """Prints the render time statistics of the display ticks."""
+    if render_stats.count:
+        print(
+            f"Render stats: {render_stats.count} frames, "
+            f"avg {render_stats.total_us // render_stats.count} us, "
+            f"max {render_stats.max_us} us, last {render_stats.last_us} us "
+            f"(static background cache {'on' if ui.bg_image else 'off'})"
+        )
+        print(
+            f"Clock invalidation: avg {render_stats.clock_px_total // render_stats.count} px/s "
+            f"(full labels: {render_stats.clock_px_full_total // render_stats.count} px/s)"
+        )
+    if flush_stats.frames:
+        fs = flush_stats.summary()
+        hidden = fs["overlap_us"] * 100 // fs["flush_us"] if fs["flush_us"] else 0
+        print(
+            f"Flush stats: {fs['frames']} frames, {fs['stripes']} stripes/frame, "
+            f"render {fs['render_us']} us + SPI {fs['flush_us']} us in {fs['frame_us']} us "
+            f"(overlap {fs['overlap_us']} us, {hidden}% of the transfer hidden)"
+        )
 
 
 def update_time_display():
-    """Updates the date and time labels on the display."""
-    if ui.date_label and ui.time_label:
+    """
+    Updates the date and time on the display.
+
+    The clock only touches the digits that changed; the date label is only
+    re-set when the day rolls over.
+    """
+    if ui.date_label and ui.clock:
         now = time.localtime()
-        ui.date_label.set_text(f"{now[2]:02d}.{now[1]:02d}.{now[0]:04d}")
-        ui.time_label.set_text(f"{now[3]:02d}:{now[4]:02d}:{now[5]:02d}")
+        pixels = ui.clock.set_time(now[3], now[4], now[5])
+
+        date_px = ui.date_label.get_width() * ui.date_label.get_height()
+        if now[:3] != ui._current_date:
+            ui.date_label.set_text(f"{now[2]:02d}.{now[1]:02d}.{now[0]:04d}")
+            ui._current_date = now[:3]
+            pixels += date_px
+
+        render_stats.clock_px_last = pixels
+        render_stats.clock_px_total += pixels
+        # What re-setting both full labels every second would invalidate
+        render_stats.clock_px_full_total += 8 * ui.clock.cell_pixels() + date_px
+
+
+def _set_weather_icon_src(icon_code):
+    """Shows an icon from RAM if it was preloaded, otherwise from its file."""
+    global _preloaded_icon
+    preloaded = _preloaded_icon
+    if preloaded and preloaded[0] == icon_code:
+        ui.weather_icon.set_src(preloaded[1])
+        ui._weather_icon_src = preloaded
+        _preloaded_icon = None
+    else:
+        ui.weather_icon.set_src(f"S:/icons/{icon_code}.bin")
+        ui._weather_icon_src = None
 
 
 def update_weather_display():
     """
     Updates all weather-related data and icons on the display.
-    This function only changes widgets if their values have changed.
+
+    The widgets are only touched when the weather state has a new sequence
+    number. In between, only the age of stale data is updated.
     """
     if not ui.main_screen:
         return
 
     try:
+        seq = weather_state.read_into(_weather)
+        if seq == ui._weather_seq:
+            if _weather[STALE]:
+                _update_description(_weather[DATA])
+            return
+        ui._weather_seq = seq
+        weather_data = _weather[DATA]
+
         # Check if weather data is valid (not all None)
         data_is_valid = weather_data and all(val is not None for val in weather_data)
 
         # Update Weather Icon
         # Show a default "mist" icon (50d) if data is not valid
-        new_weather_icon = weather_icon_code if data_is_valid else "50d"
+        new_weather_icon = _weather[ICON] if data_is_valid else "50d"
         if new_weather_icon != ui._current_weather_icon:
-            path = f"S:/icons/{new_weather_icon}.bin"
-            ui.weather_icon.set_src(path)
+            _set_weather_icon_src(new_weather_icon)
             ui._current_weather_icon = new_weather_icon
             print(f"✓ Weather icon updated to: {new_weather_icon}")
 
         # Update Wi-Fi Icon
         # The weather data validity is a good proxy for Wi-Fi/API health.
-        new_wifi_status = "on" if data_is_valid else "off"
+        new_wifi_status = "on" if data_is_valid and not _weather[STALE] else "off"
         if new_wifi_status != ui._current_wifi_icon:
             path = f"S:/icons/wifi_{new_wifi_status}.bin"
             ui.wifi_icon.set_src(path)
             ui._current_wifi_icon = new_wifi_status
             print(f"✓ Wi-Fi icon updated to: {new_wifi_status}")
 
+        # Update Location Name
+        location_name = _weather[LOCATION]
+        if location_name != ui._current_location:
+            ui.location_label.set_text(location_name)
+            ui._current_location = location_name
+
         # Update Text Labels
         if data_is_valid:
+            _update_description(weather_data)
             ui.temp_value_label.set_text(f"{weather_data[0]:.1f}°C")
-            ui.desc_label.set_text(str(weather_data[5]))
             ui.press_value_label.set_text(f"{weather_data[1]}hPa")
             ui.hum_value_label.set_text(f"{weather_data[2]:.0f}%")
             ui.wind_value_label.set_text(f"{weather_data[3]:.1f}m/s")
         else:
             ui.desc_label.set_text("No data")
+            ui._current_desc = "No data"
             ui.temp_value_label.set_text("--°C")
             ui.press_value_label.set_text("---hPa")
             ui.hum_value_label.set_text("--%")
@@ -247,19 +961,409 @@ def update_weather_display():
         sys.print_exception(e)
 
 
-def display_handler(timer=None):
+def update_local_display():
+    """
+    Shows the averaged local temperature and humidity below the OWM description.
+
+    The label is only touched when the sensor has a new sample, or when its
+    readings turn stale (the line is then cleared).
+    """
+    if not ui.main_screen:
+        return
+    local = sensor.reading()
+    seq = sensor.seq if local else -2
+    if seq == ui._sensor_seq:
+        return
+    ui._sensor_seq = seq
+    if local:
+        ui.local_label.set_text(f"Indoor {local[0]:.1f}°C {local[2]:.0f}%")
+    else:
+        ui.local_label.set_text("")
+
+
+def _update_description(weather_data):
+    """Sets the description label, with the age of stale data, if its text changed."""
+    if weather_data[5] is None:
+        return
+    desc = str(weather_data[5]) + _age_suffix()
+    if desc != ui._current_desc:
+        ui.desc_label.set_text(desc)
+        ui._current_desc = desc
+
+
+class Page:
+    """
+    A screen of the UI that is built when it is first shown.
+
+    Args:
+        name (str): Page name, a key of `PAGE_TITLES`.
+        build (callable): Creates the widgets on the page's screen; called with the page.
+        refresh (callable, optional): Updates the widgets; called with the page
+                                      whenever it is shown.
+        live (bool): Also refresh the page on every display tick while it is shown.
+
+    Attributes:
+        screen (lv.obj): The page's screen, or None while it is not built.
+        widgets (dict): The widgets the refresh function updates.
+        heap_bytes (int): Heap used by the last build.
+        build_us (int): Duration of the last build.
+        builds (int): How often the page was built.
+        last_shown_ms (int): ticks_ms of the last time the page was shown.
+    """
+
+    def __init__(self, name, build=None, refresh=None, live=False):
+        self.name = name
+        self.build = build
+        self.refresh = refresh
+        self.live = live
+        self.screen = None
+        self.widgets = {}
+        self.heap_bytes = 0
+        self.build_us = 0
+        self.builds = 0
+        self.last_shown_ms = 0
+
+
+def _create_page_title(page):
+    """Creates the title card of a page and returns the card."""
+    card = _create_card(page.screen, 5, 5, 230, 40, cached=False)
+    title = lv.label(card)
+    title.set_text(PAGE_TITLES[page.name])
+    _add_style(title, styles.title["primary"])
+    _add_style(title, styles.font["value"])
+    title.center()
+    return card
+
+
+def _create_text(parent, x, y, width, style_role="text_secondary"):
+    """Creates a wrapping text label on a page."""
+    label = lv.label(parent)
+    label.set_pos(x, y)
+    label.set_width(width)
+    label.set_long_mode(label.LONG_MODE.WRAP)
+    _add_style(label, getattr(styles, style_role))
+    _add_style(label, styles.font["text"])
+    label.set_text("")
+    return label
+
+
+def _build_forecast_page(page):
+    """Barometric outlook from the pressure trend of the weather history."""
+    _create_page_title(page)
+    card = _create_card(page.screen, 5, 50, 230, 265, cached=False)
+    page.widgets["outlook"] = _create_text(card, 10, 10, 210, "text_primary")
+    _add_style(page.widgets["outlook"], styles.font["value"])
+    page.widgets["details"] = _create_text(card, 10, 110, 210)
+
+
+def _refresh_forecast_page(page):
+    """
+    Derives the outlook from the hourly pressure means of the last 3 hours,
+    using the usual barometric tendency classes.
     """
-    Timer callback for all display updates. Called periodically.
+    import history
+
+    records = history.last("hourly", 24)
+    if len(records) < 4:
+        page.widgets["outlook"].set_text("Not enough data yet")
+        page.widgets["details"].set_text("The outlook needs 3 hours of weather history.")
+        return
+
+    latest = records[-1]
+    earlier = records[-4]
+    hours = (latest[0] - earlier[0]) / 3600
+    trend = (latest[2] - earlier[2]) / 10 / hours * 3  # hPa per 3 hours
+    if trend <= -3:
+        outlook = "Rain and wind likely"
+    elif trend <= -1:
+        outlook = "Unsettled, clouds increasing"
+    elif trend < 1:
+        outlook = "No change expected"
+    elif trend < 3:
+        outlook = "Improving"
+    else:
+        outlook = "Clearing, becoming windy"
+
+    temps = [r[1] for r in records]
+    page.widgets["outlook"].set_text(outlook)
+    page.widgets["details"].set_text(
+        f"Pressure {latest[2] / 10:.0f} hPa, {trend:+.1f} hPa in 3 h\n"
+        f"Last {len(records)} h: {min(temps) / 100:.1f} to {max(temps) / 100:.1f}°C"
+    )
+
+
+def _build_history_page(page):
+    """Charts of the hourly temperature and pressure means."""
+    _create_page_title(page)
+    colors = THEMES[styles.theme]
+    for key, y, color_role in (("temp", 50, "accent"), ("pressure", 185, "secondary")):
+        card = _create_card(page.screen, 5, y, 230, 130, cached=False)
+        label = _create_text(card, 8, 4, 214)
+        chart = lv.chart(card)
+        chart.set_size(214, 96)
+        chart.set_pos(8, 26)
+        chart.set_type(lv.chart.TYPE.LINE)
+        chart.set_update_mode(lv.chart.UPDATE_MODE.SHIFT)
+        chart.set_div_line_count(3, 0)
+        _add_style(chart, styles.transparent)
+        chart.set_style_size(0, 0, lv.PART.INDICATOR)  # No point markers
+        series = chart.add_series(lv.color_hex(colors[color_role]), lv.chart.AXIS.PRIMARY_Y)
+        page.widgets[key] = (label, chart, series)
+
+
+def _refresh_history_page(page):
+    """Loads the last `HISTORY_CHART_POINTS` hourly means into the charts."""
+    import history
+
+    for key, unit in (("temp", "°C"), ("pressure", "hPa")):
+        label, chart, series = page.widgets[key]
+        values = list(history.values("hourly", HISTORY_CHART_POINTS, key))
+        scale = history.FIELD_SCALE[key]
+        if not values:
+            label.set_text(f"{key.capitalize()}: no history yet")
+            continue
+        low, high = min(values), max(values)
+        margin = max((high - low) // 10, scale // 2)
+        chart.set_point_count(len(values))
+        chart.set_axis_range(lv.chart.AXIS.PRIMARY_Y, low - margin, high + margin)
+        for value in values:
+            chart.set_next_value(series, value)
+        label.set_text(
+            f"{key.capitalize()}, {len(values)} h: {low / scale:.1f} to {high / scale:.1f}{unit}"
+        )
+
+
+def _build_system_page(page):
+    """Heap, render and connection statistics."""
+    _create_page_title(page)
+    card = _create_card(page.screen, 5, 50, 230, 265, cached=False)
+    page.widgets["text"] = _create_text(card, 10, 10, 210)
+
+
+def _refresh_system_page(page):
+    """Updates the statistics; runs on every display tick while the page is shown."""
+    uptime_s = time.ticks_ms() // 1000
+    lines = [
+        f"Uptime {uptime_s // 86400} d {uptime_s // 3600 % 24:02d}:{uptime_s // 60 % 60:02d}",
+        f"Heap {gc.mem_free() // 1024} KB free, {gc.mem_alloc() // 1024} KB used",
+    ]
+    if render_stats.count:
+        lines.append(
+            f"Render avg {render_stats.total_us // render_stats.count // 1000} ms, "
+            f"max {render_stats.max_us // 1000} ms"
+        )
+    if flush_stats.frames:
+        fs = flush_stats.summary()
+        hidden = fs["overlap_us"] * 100 // fs["flush_us"] if fs["flush_us"] else 0
+        lines.append(f"SPI {fs['flush_us'] // 1000} ms/frame, {hidden}% hidden")
+    resident = [p for p in pages.values() if p.screen is not None]
+    lines.append(
+        f"Pages {len(resident)} built, {_offscreen_heap() // 1024} KB off-screen"
+    )
+    wifi = sys.modules.get("wifi")
+    if wifi is not None and wifi.is_connected():
+        try:
+            lines.append(f"Wi-Fi {wifi.wlan.status('rssi')} dBm")
+        except (AttributeError, ValueError, OSError):
+            lines.append("Wi-Fi connected")
+    else:
+        lines.append("Wi-Fi off")
+    weather = sys.modules.get("weather")
+    if weather is not None:
+        lines.append(f"Weather API {weather.breaker.state}")
+    page.widgets["text"].set_text("\n".join(lines))
+
+
+# --- Page Manager State ---
+pages = {
+    "weather": Page("weather"),  # Built by create_ui()
+    "forecast": Page("forecast", _build_forecast_page, _refresh_forecast_page),
+    "history": Page("history", _build_history_page, _refresh_history_page),
+    "system": Page("system", _build_system_page, _refresh_system_page, live=True),
+}
+active_page = pages["weather"]
+_wipe_screen = None  # Screen being revealed
+_wipe_row = 0  # First row not revealed yet
+
+
+def _build_page(page):
+    """Builds a page's screen and records its construction time and heap."""
+    gc.collect()
+    heap_before = gc.mem_alloc()
+    start_us = time.ticks_us()
+    page.screen = lv.obj()
+    _add_style(page.screen, styles.screen)
+    page.screen.set_scrollbar_mode(lv.SCROLLBAR_MODE.OFF)
+    page.build(page)
+    page.build_us = time.ticks_diff(time.ticks_us(), start_us)
+    gc.collect()
+    page.heap_bytes = gc.mem_alloc() - heap_before
+    page.builds += 1
+    print(
+        f"✓ Page '{page.name}' built in {page.build_us // 1000} ms "
+        f"({page.heap_bytes} bytes of heap)"
+    )
+
+
+def _offscreen_heap():
+    """Returns the heap of the built pages that are not shown (not counting the weather page)."""
+    return sum(
+        p.heap_bytes for p in pages.values()
+        if p.screen is not None and p.build and p is not active_page
+    )
+
+
+def _evict_pages():
+    """Deletes the least recently shown pages until the others fit into `PAGE_HEAP_BUDGET`."""
+    while _offscreen_heap() > PAGE_HEAP_BUDGET:
+        candidates = [
+            p for p in pages.values() if p.screen is not None and p.build and p is not active_page
+        ]
+        oldest = candidates[0]
+        for p in candidates:
+            if time.ticks_diff(p.last_shown_ms, oldest.last_shown_ms) < 0:
+                oldest = p
+        oldest.screen.delete()
+        oldest.screen = None
+        oldest.widgets = {}
+        gc.collect()
+        print(f"Page '{oldest.name}' released ({oldest.heap_bytes} bytes)")
+
+
+def _finish_wipe():
+    """Reveals the rest of a running page wipe at once."""
+    global _wipe_screen
+    if _wipe_screen is None:
+        return
+    disp = lv.display_get_default()
+    area = lv.area_t()
+    area.x1 = 0
+    area.y1 = _wipe_row
+    area.x2 = disp.get_horizontal_resolution() - 1
+    area.y2 = disp.get_vertical_resolution() - 1
+    _wipe_screen.invalidate_area(area)
+    _wipe_screen = None
+
+
+def show_page(name):
+    """
+    Shows a page, building it first if needed.
+
+    The screen is switched with invalidation disabled, so nothing is redrawn
+    yet; `page_wipe_step()` then reveals the new page band by band. Without
+    invalidation control (older LVGL), the page is shown at once.
 
     Args:
-        timer (object, optional): The timer object that triggered the call. Not used.
+        name (str): A key of `pages`.
+
+    Returns:
+        bool: True if a wipe was started and `page_wipe_step()` should be called
+              until it returns False.
+    """
+    global active_page, _wipe_screen, _wipe_row
+    page = pages[name]
+    if page is active_page or (page.screen is None and page.build is None):
+        return False
+    _finish_wipe()
+
+    disp = lv.display_get_default()
+    wipe = hasattr(disp, "enable_invalidation")
+    if wipe:
+        disp.enable_invalidation(False)
+    try:
+        if page.screen is None:
+            _build_page(page)
+        if page.refresh:
+            page.refresh(page)
+        lv.screen_load(page.screen)
+        page.screen.update_layout()
+    finally:
+        if wipe:
+            disp.enable_invalidation(True)
+
+    page.last_shown_ms = time.ticks_ms()
+    active_page = page
+    _evict_pages()
+    if not wipe:
+        return False
+    _wipe_screen = page.screen
+    _wipe_row = 0
+    return True
+
+
+def page_wipe_step():
+    """
+    Reveals the next band of the page being shown and refreshes the display.
+
+    Returns:
+        bool: True while more bands remain.
     """
+    global _wipe_screen, _wipe_row
+    if _wipe_screen is None:
+        return False
+    disp = lv.display_get_default()
+    height = disp.get_vertical_resolution()
+    band = (height + PAGE_WIPE_BANDS - 1) // PAGE_WIPE_BANDS
+    area = lv.area_t()
+    area.x1 = 0
+    area.y1 = _wipe_row
+    area.x2 = disp.get_horizontal_resolution() - 1
+    area.y2 = min(_wipe_row + band, height) - 1
+    _wipe_screen.invalidate_area(area)
+    _wipe_row += band
+    if _wipe_row >= height:
+        _wipe_screen = None
+    lv.refr_now(None)
+    return _wipe_screen is not None
+
+
+def page_stats():
+    """
+    Returns the construction statistics of the pages.
+
+    Returns:
+        dict: {page: {"built", "builds", "build_ms", "heap_bytes"}} and the
+              name of the active page under "active".
+    """
+    result = {"active": active_page.name}
+    for name, page in pages.items():
+        result[name] = {
+            "built": page.screen is not None,
+            "builds": page.builds,
+            "build_ms": page.build_us // 1000,
+            "heap_bytes": page.heap_bytes,
+        }
+    return result
+
+
+def display_handler():
+    """
+    Scheduled task for all display updates. Called periodically.
+    """
+    global first_frame_ms
     try:
         gc.collect()
         update_time_display()
         update_weather_display()
+        update_local_display()
+        if active_page.live and active_page.screen is not None:
+            active_page.refresh(active_page)
         # lv.task_handler() is called by the main loop or another timer if needed
+        flush_stats.refr_start()
+        start_us = time.ticks_us()
         lv.refr_now(None) # Force immediate refresh of the display
+        elapsed_us = time.ticks_diff(time.ticks_us(), start_us)
+        flush_stats.refr_done()
+        if first_frame_ms is None:
+            first_frame_ms = time.ticks_ms()
+
+        render_stats.count += 1
+        render_stats.total_us += elapsed_us
+        render_stats.last_us = elapsed_us
+        if elapsed_us > render_stats.max_us:
+            render_stats.max_us = elapsed_us
+        if render_stats.count % RENDER_STATS_INTERVAL == 0:
+            print_render_stats()
     except Exception as e:
         print(f"ERROR in display_handler: {e}")
         sys.print_exception(e)
\ No newline at end of file
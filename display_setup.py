@@ -3,6 +3,12 @@ display_setup.py - Display Driver Initialization
 
 This module handles the low-level initialization of the ST7789 display
 and the SPI bus required for LVGL.
+
+The draw buffers are chosen with a named profile (`BUFFER_PROFILES`). With two
+buffers in DMA-capable RAM the flush is asynchronous: the SPI transfer of one
+stripe runs by DMA and completes from an interrupt, while LVGL renders the next
+stripe into the other buffer. The driver times the transfers for
+`display.flush_stats`, which shows how much of them overlaps with rendering.
 """
 
 import gc
@@ -12,6 +18,8 @@ import lvgl as lv
 import machine
 import st7789
 
+from display import flush_stats
+
 # --- Pin Definitions ---
 # The display is 240x320, but we rotate it by 180 degrees (set_rotation(2)),
 # so the logical width and height are swapped for portrait mode.
@@ -37,14 +45,98 @@ _LCD_FREQ = 40000000  # 40 MHz
 BL_STATE_HIGH = st7789.STATE_HIGH
 RESET_STATE_LOW = st7789.STATE_LOW
 
+# --- Draw Buffer Profiles ---
+# Name -> (lines per buffer, number of buffers, memory).
+# A line is one row of RGB565 pixels (480 bytes). With one buffer, LVGL waits
+# for every transfer before rendering the next stripe; with two, rendering and
+# transfer overlap. "internal" buffers are allocated in internal, DMA-capable
+# RAM. "psram" buffers are allocated in PSRAM, which saves internal RAM on
+# boards that have it; the SPI DMA of the original ESP32 cannot read PSRAM, so
+# the bus driver has to copy the data, and this profile mainly suits an ESP32-S3.
+BUFFER_PROFILES = {
+    "minimal": (16, 1, "internal"),  # 7.5 KB
+    "balanced": (32, 2, "internal"),  # 2 x 15 KB
+    "fast": (64, 2, "internal"),  # 2 x 30 KB
+    "psram": (_HEIGHT, 2, "psram"),  # 2 full frames of 150 KB
+}
+BUFFER_PROFILE = "balanced"
+# If a profile does not fit, its buffers are halved down to this many lines,
+# then a single buffer is used.
+MIN_BUFFER_LINES = 8
+_BYTES_PER_PIXEL = 2  # RGB565
+
+
+class _TimedST7789(st7789.ST7789):
+    """ST7789 driver that reports the start and end of every transfer to `flush_stats`."""
+
+    def _flush_cb(self, disp_drv, area, color_p):
+        flush_stats.transfer_start()
+        st7789.ST7789._flush_cb(self, disp_drv, area, color_p)
+
+    def _flush_ready_cb(self, *args):
+        # Runs in the DMA completion interrupt: no allocations.
+        flush_stats.transfer_done()
+        st7789.ST7789._flush_ready_cb(self, *args)
+
+
+def _allocate_buffers(display_bus, profile):
+    """
+    Allocates the draw buffers of a profile, shrinking them if memory is short.
 
-def init_display_driver() -> bool:
+    Args:
+        display_bus (lcd_bus.SPIBus): The bus that allocates the buffers.
+        profile (str): A key of `BUFFER_PROFILES`.
+
+    Returns:
+        tuple: (first buffer, second buffer or None, lines per buffer).
+    """
+    lines, count, memory = BUFFER_PROFILES[profile]
+    if memory == "psram":
+        caps = lcd_bus.MEMORY_SPIRAM
+    else:
+        caps = lcd_bus.MEMORY_INTERNAL | lcd_bus.MEMORY_DMA
+
+    while True:
+        size = _WIDTH * lines * _BYTES_PER_PIXEL
+        buffers = []
+        try:
+            for _ in range(count):
+                buffers.append(display_bus.allocate_framebuffer(size, caps))
+            if count == 1:
+                buffers.append(None)
+            return buffers[0], buffers[1], lines
+        except MemoryError:
+            for buf in buffers:
+                display_bus.free_framebuffer(buf)
+            gc.collect()
+        if lines > MIN_BUFFER_LINES:
+            lines //= 2
+        elif count > 1:
+            count = 1
+        else:
+            raise MemoryError("No memory for the draw buffer")
+
+
+def _register_wait_events():
+    """Times how long LVGL waits for a free draw buffer, if LVGL reports it."""
+    events = lv.EVENT
+    if not hasattr(events, "FLUSH_WAIT_START"):
+        return
+    disp = lv.display_get_default()
+    disp.add_event_cb(flush_stats.wait_start, events.FLUSH_WAIT_START, None)
+    disp.add_event_cb(flush_stats.wait_done, events.FLUSH_WAIT_FINISH, None)
+
+
+def init_display_driver(profile: str = BUFFER_PROFILE) -> bool:
     """
     Initializes the SPI bus and the ST7789 driver for LVGL.
 
-    This function sets up the physical SPI connection, configures the
-    display driver with the correct dimensions and pin settings, and
-    initializes the display for use.
+    This function sets up the physical SPI connection, allocates the draw
+    buffers, configures the display driver with the correct dimensions and
+    pin settings, and initializes the display for use.
+
+    Args:
+        profile (str): The draw buffer profile, a key of `BUFFER_PROFILES`.
 
     Returns:
         bool: True if initialization was successful, False otherwise.
@@ -66,11 +158,20 @@ def init_display_driver() -> bool:
             freq=_LCD_FREQ
         )
 
-        # 3. Instantiate the ST7789 driver
-        display_driver = st7789.ST7789(
+        # 3. Allocate the draw buffers
+        buf1, buf2, lines = _allocate_buffers(display_bus, profile)
+        print(
+            f"Draw buffers: {2 if buf2 else 1} x {len(buf1)} bytes ({lines} lines, "
+            f"profile '{profile}', {BUFFER_PROFILES[profile][2]} RAM)"
+        )
+
+        # 4. Instantiate the ST7789 driver
+        display_driver = _TimedST7789(
             data_bus=display_bus,
             display_width=_WIDTH,
             display_height=_HEIGHT,
+            frame_buffer1=buf1,
+            frame_buffer2=buf2,
             backlight_pin=_BL,
             reset_pin=_RST,
             reset_state=RESET_STATE_LOW,
@@ -81,10 +182,11 @@ def init_display_driver() -> bool:
             offset_y=0,
         )
 
-        # 4. Initialize, rotate, and turn on the display
+        # 5. Initialize, rotate, and turn on the display
         display_driver.init()
         display_driver.set_rotation(2)  # Rotate 180 degrees for portrait view
         display_driver.set_backlight(100)
+        _register_wait_events()
 
         print("LVGL display driver initialized successfully.")
         return True
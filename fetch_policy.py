@@ -0,0 +1,150 @@
+"""
+This module adapts the weather fetch interval to how fast the weather changes.
+
+A fixed 15-minute interval wastes API calls and radio time on calm nights and
+samples passing fronts too coarsely. `FetchPolicy` looks at the recent results
+of the weather fetches and derives an activity level from:
+
+- the pressure trend in hPa per 3 hours (the usual synoptic measure; a change
+  of 3 hPa or more in 3 hours indicates a front),
+- the temperature slope in °C per hour,
+- a change of the weather condition (the icon, ignoring day/night).
+
+The interval moves between `MIN_FETCH_INTERVAL_MS` (high activity) and
+`MAX_FETCH_INTERVAL_MS` (calm). It shortens at once when the weather starts
+changing, but grows by at most `GROWTH_FACTOR` per fetch, so a single calm
+sample does not stretch the interval. The lower bound never falls below the
+interval that keeps a station within `DAILY_CALL_BUDGET` API calls per day.
+
+The policy only sees timestamps passed to it, so it can be run on a host
+against a simulated weather trace (see `scripts/simulate_fetch_policy.py`).
+"""
+
+# --- Interval Bounds ---
+MIN_FETCH_INTERVAL_MS = 5 * 60 * 1000  # 5 minutes while the weather changes fast
+DEFAULT_FETCH_INTERVAL_MS = 15 * 60 * 1000  # 15 minutes until there is a trend
+MAX_FETCH_INTERVAL_MS = 60 * 60 * 1000  # 1 hour when it is calm
+GROWTH_FACTOR = 1.5  # Maximum lengthening per fetch
+
+# --- OWM Rate Limit ---
+# The free plan allows 1,000,000 calls per month and 60 per minute for the whole
+# account. Several stations share a key, so each one stays well below that.
+DAILY_CALL_BUDGET = 288  # Every 5 minutes at most
+
+# --- Change Thresholds (activity 1.0) ---
+PRESSURE_RAPID_HPA_3H = 3.0
+TEMP_RAPID_C_PER_H = 4.0  # Well above the daily cycle of about 1.5 °C/h
+# Trends are fitted to the samples of this time window. OWM reports the pressure
+# in whole hPa, so a trend needs a minimum span to not mistake a rounding step
+# for a front.
+TREND_WINDOW_MS = 3 * 60 * 60 * 1000
+MIN_TREND_SPAN_MS = 90 * 60 * 1000
+MAX_SAMPLES = 48  # Enough for the trend window at the shortest interval
+
+
+class FetchPolicy:
+    """
+    Computes the next weather fetch interval from the recent weather samples.
+
+    Args:
+        min_ms (int): Shortest interval.
+        max_ms (int): Longest interval.
+        default_ms (int): Interval until a trend can be measured.
+        daily_budget (int): Maximum number of fetches per day.
+
+    Attributes:
+        interval_ms (int): The current fetch interval.
+        activity (float): The last activity level between 0.0 (calm) and 1.0.
+        pressure_trend (float): Pressure change in hPa per 3 hours, or None.
+        temp_slope (float): Temperature change in °C per hour, or None.
+    """
+
+    def __init__(
+        self,
+        min_ms=MIN_FETCH_INTERVAL_MS,
+        max_ms=MAX_FETCH_INTERVAL_MS,
+        default_ms=DEFAULT_FETCH_INTERVAL_MS,
+        daily_budget=DAILY_CALL_BUDGET,
+    ):
+        # Respect the rate limit even if the configured minimum is lower.
+        self.min_ms = max(min_ms, 24 * 60 * 60 * 1000 // daily_budget)
+        self.max_ms = max(max_ms, self.min_ms)
+        self.interval_ms = min(max(default_ms, self.min_ms), self.max_ms)
+        self.activity = 0.0
+        self.pressure_trend = None
+        self.temp_slope = None
+        # (time in ms, temperature, pressure, condition), oldest first
+        self._samples = []
+
+    def _trend(self, index, scale_ms):
+        """
+        Returns the least-squares slope of a sample field per `scale_ms`, or None
+        if the samples span less than `MIN_TREND_SPAN_MS`.
+        """
+        samples = self._samples
+        t0 = samples[0][0]
+        if samples[-1][0] - t0 < MIN_TREND_SPAN_MS:
+            return None
+        n = len(samples)
+        mean_t = sum(s[0] - t0 for s in samples) / n
+        mean_v = sum(s[index] for s in samples) / n
+        num = 0.0
+        den = 0.0
+        for s in samples:
+            dt = s[0] - t0 - mean_t
+            num += dt * (s[index] - mean_v)
+            den += dt * dt
+        return num / den * scale_ms
+
+    def update(self, now_ms, temp, pressure, icon_code):
+        """
+        Adds a weather sample and recomputes the fetch interval.
+
+        Args:
+            now_ms (int): Monotonic time of the sample in milliseconds.
+            temp (float): Temperature in °C.
+            pressure (float): Pressure in hPa.
+            icon_code (str): OWM icon code, e.g. "10d".
+
+        Returns:
+            int: The new fetch interval in milliseconds.
+        """
+        if temp is None or pressure is None:
+            return self.interval_ms
+
+        condition = icon_code[:2] if icon_code else None
+        condition_changed = bool(self._samples) and condition != self._samples[-1][3]
+
+        samples = self._samples
+        samples.append((now_ms, temp, pressure, condition))
+        while len(samples) > MAX_SAMPLES or (
+            len(samples) > 2 and now_ms - samples[1][0] >= TREND_WINDOW_MS
+        ):
+            samples.pop(0)
+
+        self.pressure_trend = self._trend(2, 3 * 60 * 60 * 1000)
+        self.temp_slope = self._trend(1, 60 * 60 * 1000)
+
+        activity = 1.0 if condition_changed else 0.0
+        if self.pressure_trend is not None:
+            activity = max(activity, abs(self.pressure_trend) / PRESSURE_RAPID_HPA_3H)
+            activity = max(activity, abs(self.temp_slope) / TEMP_RAPID_C_PER_H)
+        self.activity = min(activity, 1.0)
+
+        if self.pressure_trend is None and not condition_changed:
+            return self.interval_ms  # Not enough data for a trend yet
+
+        target = int(self.max_ms - (self.max_ms - self.min_ms) * self.activity)
+        if target > self.interval_ms:
+            target = min(target, int(self.interval_ms * GROWTH_FACTOR))
+        self.interval_ms = min(max(target, self.min_ms), self.max_ms)
+        return self.interval_ms
+
+    def describe(self):
+        """Returns a short summary for the log output."""
+        trend = "n/a" if self.pressure_trend is None else f"{self.pressure_trend:+.1f} hPa/3h"
+        slope = "n/a" if self.temp_slope is None else f"{self.temp_slope:+.1f} °C/h"
+        return (
+            f"pressure {trend}, temperature {slope}, activity {self.activity:.2f}, "
+            f"next fetch in {self.interval_ms // 60000} min"
+        )
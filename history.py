@@ -0,0 +1,426 @@
+"""
+This module keeps a flash-backed weather history for trend graphs.
+
+Every fetched weather sample is stored as a fixed-size, fixed-point binary
+record. Records are written to three levels:
+
+- "raw": every sample (about 6 days at a 15-minute fetch interval),
+- "hourly": hourly means (about 30 days),
+- "daily": daily means (more than a year).
+
+The hourly and daily aggregates are built in RAM from the raw samples and
+written when the hour or day is complete. After a reset, `init()` rebuilds
+them from the records of the level below that were already written, so a
+reset does not lose the samples of the current day.
+
+Each level is a ring of `FILES_PER_LEVEL` files of fixed size. Records are
+collected in a RAM buffer of one `BLOCK_SIZE` block, and the buffer is always
+written as a whole block at a block-aligned offset. A partly filled block is
+padded with empty records and rewritten in place until it is full. When a file
+is full, the ring moves on to the next file and truncates it. Flash writes are
+therefore limited to one block per level and hour, and the oldest data is
+dropped one file at a time. Raw samples that are not yet flushed (at most the
+current hour) are lost on a reset.
+
+Reading the last N points of a level does not scan the files: the position of
+every record follows from the ring position, so `last()` needs one seek and one
+read per file it touches.
+
+Usage:
+    history.append(owm_data, icon_code)
+    for value in history.values("hourly", 48, "temp"):
+        chart.set_next_value(series, value)
+"""
+
+import os
+import struct
+import time
+
+# --- Record Format ---
+# timestamp (s), temperature (0.01 °C), pressure (0.1 hPa), humidity (%),
+# icon (see _encode_icon), wind speed (0.01 m/s), number of samples, padding
+RECORD_FORMAT = "<IhHBBHHxx"
+RECORD_SIZE = struct.calcsize(RECORD_FORMAT)  # 16 bytes
+
+# Field name -> index in a decoded record, for `values()`
+FIELDS = {"ts": 0, "temp": 1, "pressure": 2, "humidity": 3, "icon": 4, "wind": 5, "count": 6}
+# Divide a stored value by this to get the unit of the OWM data
+FIELD_SCALE = {"temp": 100, "pressure": 10, "humidity": 1, "wind": 100}
+
+# --- Storage Configuration ---
+HISTORY_DIR = "/history"
+BLOCK_SIZE = 256  # Bytes per write; a multiple of RECORD_SIZE
+RECORDS_PER_BLOCK = BLOCK_SIZE // RECORD_SIZE
+FILES_PER_LEVEL = 4
+
+# Level name -> (blocks per file, aggregation bucket in seconds or None for raw samples)
+# Of each ring, at least FILES_PER_LEVEL - 1 files are complete. With a 15-minute
+# fetch interval that is: raw 3 x 192 samples (6 days), hourly 3 x 256 hours
+# (32 days), daily 3 x 128 days.
+LEVELS = {
+    "raw": (12, None),
+    "hourly": (16, 3600),
+    "daily": (8, 86400),
+}
+
+# Samples with an earlier timestamp are not logged, because the RTC has not
+# been synchronized yet (2024-01-01 in the ESP32's epoch of 2000).
+MIN_VALID_TIME = 757382400
+
+
+def _encode_icon(icon_code):
+    """Encodes an OWM icon code like "10n" as (10 << 1) | night."""
+    if not icon_code or len(icon_code) < 3:
+        return 0
+    try:
+        return (int(icon_code[:2]) << 1) | (icon_code[2] == "n")
+    except ValueError:
+        return 0
+
+
+def decode_icon(value):
+    """Returns the OWM icon code of an encoded icon, or None if no icon was stored."""
+    if not value:
+        return None
+    return f"{value >> 1:02d}{'n' if value & 1 else 'd'}"
+
+
+class _Aggregate:
+    """Running sums of the records in one time bucket."""
+
+    def __init__(self, bucket_s):
+        self.bucket_s = bucket_s
+        self.bucket = None
+        self.reset()
+
+    def reset(self):
+        self.temp = 0
+        self.pressure = 0
+        self.humidity = 0
+        self.wind = 0
+        self.count = 0
+        self.icon = 0
+
+    def add(self, record):
+        """Adds a record, weighted by its sample count."""
+        n = record[6]
+        self.temp += record[1] * n
+        self.pressure += record[2] * n
+        self.humidity += record[3] * n
+        self.wind += record[5] * n
+        self.count += n
+        self.icon = record[4]
+
+    def mean(self):
+        """Returns the aggregate record of the bucket, stamped with the bucket start."""
+        n = self.count
+        return (
+            self.bucket * self.bucket_s,
+            (self.temp + n // 2) // n,
+            (self.pressure + n // 2) // n,
+            (self.humidity + n // 2) // n,
+            self.icon,
+            (self.wind + n // 2) // n,
+            min(n, 0xFFFF),
+        )
+
+
+class _Level:
+    """
+    One ring of history files.
+
+    Args:
+        name (str): The level name, used as the file name prefix.
+        file_blocks (int): Blocks per file.
+    """
+
+    def __init__(self, name, file_blocks):
+        self.name = name
+        self.file_blocks = file_blocks
+        self.buf = bytearray(BLOCK_SIZE)
+        self.used = 0  # Records in buf
+        self.dirty = False
+        self.file_index = 0  # File that contains the current block
+        self.block_index = 0  # Position of the current block in the file
+        # Number of records in each file, not counting the current block
+        self.sizes = [0] * FILES_PER_LEVEL
+        self.writes = 0
+
+    def path(self, index):
+        return f"{HISTORY_DIR}/{self.name}_{index}.bin"
+
+    def recover(self):
+        """Restores the ring position and the last partial block from flash."""
+        newest_ts = -1
+        for i in range(FILES_PER_LEVEL):
+            try:
+                size = os.stat(self.path(i))[6]
+            except OSError:
+                continue
+            self.sizes[i] = size // RECORD_SIZE
+            if size >= RECORD_SIZE:
+                with open(self.path(i), "rb") as f:
+                    ts = struct.unpack(RECORD_FORMAT, f.read(RECORD_SIZE))[0]
+                # Files are started in ring order, so the newest start is the current file.
+                if ts > newest_ts:
+                    newest_ts = ts
+                    self.file_index = i
+
+        blocks = self.sizes[self.file_index] // RECORDS_PER_BLOCK
+        if newest_ts < 0 or blocks == 0:
+            return
+        # Reload the last block of the current file; it may be padded.
+        with open(self.path(self.file_index), "rb") as f:
+            f.seek((blocks - 1) * BLOCK_SIZE)
+            f.readinto(self.buf)
+        used = 0
+        while used < RECORDS_PER_BLOCK and struct.unpack_from("<I", self.buf, used * RECORD_SIZE)[0]:
+            used += 1
+        if used == RECORDS_PER_BLOCK:
+            self.block_index = blocks
+            self.buf[:] = bytes(BLOCK_SIZE)
+        else:
+            self.block_index = blocks - 1
+            self.used = used
+        self.sizes[self.file_index] = self.block_index * RECORDS_PER_BLOCK
+
+    def append(self, record):
+        """Adds a record to the RAM block. A full block is written immediately."""
+        if self.block_index >= self.file_blocks:
+            # Move on to the next file of the ring, dropping its old records.
+            self.file_index = (self.file_index + 1) % FILES_PER_LEVEL
+            self.block_index = 0
+            self.sizes[self.file_index] = 0
+        struct.pack_into(RECORD_FORMAT, self.buf, self.used * RECORD_SIZE, *record)
+        self.used += 1
+        self.dirty = True
+        if self.used == RECORDS_PER_BLOCK:
+            self.flush()
+
+    def flush(self):
+        """Writes the current block (padded if partial) at its block-aligned offset."""
+        if not self.dirty:
+            return
+        path = self.path(self.file_index)
+        # The first block of a file truncates it, the others are written in place.
+        with open(path, "wb" if self.block_index == 0 else "r+b") as f:
+            f.seek(self.block_index * BLOCK_SIZE)
+            f.write(self.buf)
+        self.writes += 1
+        self.dirty = False
+        if self.used == RECORDS_PER_BLOCK:
+            self.block_index += 1
+            self.sizes[self.file_index] = self.block_index * RECORDS_PER_BLOCK
+            self.used = 0
+            self.buf[:] = bytes(BLOCK_SIZE)
+
+    def count(self):
+        """Returns the number of records available in the ring."""
+        return sum(self.sizes) + self.used
+
+    def last(self, n):
+        """Returns up to `n` of the newest records, oldest first."""
+        remaining = min(n, self.count())
+        # Collected newest first: the RAM block, then the files backwards through the ring.
+        take = min(remaining, self.used)
+        parts = [[
+            struct.unpack_from(RECORD_FORMAT, self.buf, i * RECORD_SIZE)
+            for i in range(self.used - take, self.used)
+        ]]
+        remaining -= take
+        index = self.file_index
+        while remaining > 0:
+            size = self.sizes[index]
+            take = min(remaining, size)
+            if take:
+                data = bytearray(take * RECORD_SIZE)
+                with open(self.path(index), "rb") as f:
+                    f.seek((size - take) * RECORD_SIZE)
+                    f.readinto(data)
+                parts.append([
+                    struct.unpack_from(RECORD_FORMAT, data, i * RECORD_SIZE) for i in range(take)
+                ])
+                remaining -= take
+            index = (index - 1) % FILES_PER_LEVEL
+            if index == self.file_index:
+                break
+
+        records = []
+        for part in reversed(parts):
+            records.extend(part)
+        return records
+
+
+# --- Module State ---
+_levels = {}
+_aggregates = {}
+
+
+def init():
+    """
+    Creates the history directory if needed and restores the ring positions.
+    Called automatically on first use.
+    """
+    if _levels:
+        return
+    try:
+        os.mkdir(HISTORY_DIR)
+    except OSError:
+        pass  # Already exists
+    for name in LEVELS:
+        file_blocks, bucket_s = LEVELS[name]
+        level = _Level(name, file_blocks)
+        level.recover()
+        _levels[name] = level
+        if bucket_s:
+            _aggregates[name] = _Aggregate(bucket_s)
+    _restore_aggregate("hourly", "raw")
+    _restore_aggregate("daily", "hourly")
+    counts = ", ".join(f"{name}: {level.count()}" for name, level in _levels.items())
+    print(f"✓ History loaded ({counts} records)")
+
+
+def _restore_aggregate(name, source):
+    """
+    Rebuilds the running aggregate of a level from the records of the level
+    below that belong to a bucket newer than the level's last record.
+    """
+    agg = _aggregates[name]
+    done = _levels[name].last(1)
+    done_bucket = done[0][0] // agg.bucket_s if done else -1
+    n = RECORDS_PER_BLOCK
+    while True:
+        records = _levels[source].last(n)
+        if not records:
+            return
+        bucket = records[-1][0] // agg.bucket_s
+        if bucket <= done_bucket:
+            return
+        # Read further back until the records start before the bucket.
+        if len(records) < n or records[0][0] // agg.bucket_s != bucket:
+            break
+        n *= 2
+    agg.bucket = bucket
+    for record in records:
+        if record[0] // agg.bucket_s == bucket:
+            agg.add(record)
+
+
+def _feed(name, record):
+    """
+    Adds a record to the running aggregate of a level. When the record starts a
+    new time bucket, the previous bucket's mean is written first. Completed
+    hourly means are fed to the daily level.
+
+    Returns:
+        bool: True if a bucket was completed.
+    """
+    agg = _aggregates[name]
+    bucket = record[0] // agg.bucket_s
+    completed = False
+    if bucket != agg.bucket and agg.count:
+        mean = agg.mean()
+        _levels[name].append(mean)
+        if name == "hourly":
+            _feed("daily", mean)
+        agg.reset()
+        completed = True
+    agg.bucket = bucket
+    agg.add(record)
+    return completed
+
+
+def append(data, icon_code=None, ts=None):
+    """
+    Logs a weather sample.
+
+    Args:
+        data (tuple): The weather data as returned by `weather.get_data()`:
+                      (temperature, pressure, humidity, wind_speed, ...).
+        icon_code (str, optional): The OWM icon code.
+        ts (int, optional): Timestamp in seconds. Defaults to `time.time()`.
+
+    Returns:
+        bool: True if the sample was logged, False if it was incomplete or the
+              RTC has not been synchronized yet.
+    """
+    temp, pressure, humidity, wind = data[:4]
+    if temp is None or pressure is None or humidity is None or wind is None:
+        return False
+    if ts is None:
+        ts = time.time()
+    if ts < MIN_VALID_TIME:
+        return False
+    init()
+
+    record = (
+        ts,
+        round(temp * 100),
+        round(pressure * 10),
+        round(humidity),
+        _encode_icon(icon_code),
+        round(wind * 100),
+        1,
+    )
+    _levels["raw"].append(record)
+    if _feed("hourly", record):
+        flush()  # Once an hour, so at most one hour of samples is lost on a reset
+    return True
+
+
+def flush():
+    """Writes the partly filled blocks of all levels to flash."""
+    for level in _levels.values():
+        level.flush()
+
+
+def last(level, n):
+    """
+    Returns the newest records of a level.
+
+    Args:
+        level (str): "raw", "hourly" or "daily".
+        n (int): Maximum number of records.
+
+    Returns:
+        list: Records, oldest first, as tuples
+              (timestamp, temp, pressure, humidity, icon, wind, count) in the
+              fixed-point units of `RECORD_FORMAT`.
+    """
+    init()
+    return _levels[level].last(n)
+
+
+def values(level, n, field):
+    """
+    Yields one field of the newest records of a level, oldest first.
+
+    The values are the stored fixed-point integers (see `FIELD_SCALE`), which
+    can be passed to `lv.chart` directly.
+
+    Args:
+        level (str): "raw", "hourly" or "daily".
+        n (int): Maximum number of points.
+        field (str): A key of `FIELDS`, e.g. "temp" or "pressure".
+    """
+    index = FIELDS[field]
+    for record in last(level, n):
+        yield record[index]
+
+
+def stats():
+    """
+    Returns the state of each level.
+
+    Returns:
+        dict: {level: {"records": int, "file": int, "block": int, "writes": int}}
+    """
+    return {
+        name: {
+            "records": level.count(),
+            "file": level.file_index,
+            "block": level.block_index,
+            "writes": level.writes,
+        }
+        for name, level in _levels.items()
+    }
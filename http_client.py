@@ -0,0 +1,389 @@
+"""
+This module provides a small persistent HTTP/1.1 client for MicroPython.
+
+Compared to `urequests`, it keeps the TCP connection to a host open between
+requests (HTTP keep-alive) and caches DNS results for `DNS_CACHE_TTL_MS`. A
+connection that was closed by the server while idle is re-opened transparently.
+Each request records per-phase timings (DNS, connect, first byte, body) in
+`HTTPClient.timings`.
+
+Usage:
+    response = http_client.get("http://api.example.com/path?x=1")
+    if response.status_code == 200:
+        data = response.json()
+    response.close()  # Returns the connection to the pool
+"""
+
+import json
+import socket
+
+try:
+    from time import ticks_diff, ticks_ms
+except ImportError:  # CPython, for running on a host
+    from time import monotonic
+
+    def ticks_ms():
+        return int(monotonic() * 1000)
+
+    def ticks_diff(new, old):
+        return new - old
+
+# --- Configuration ---
+DNS_CACHE_TTL_MS = 10 * 60 * 1000  # 10 minutes
+DEFAULT_TIMEOUT_S = 10
+MAX_DRAIN_BYTES = 4096  # Larger unread bodies close the connection instead of being drained
+USER_AGENT = "ESP32-Weather-Station"
+
+# --- DNS Cache ---
+# host -> (address, expiry in ticks_ms)
+_dns_cache = {}
+
+# --- Connection Pool ---
+# (host, port) -> HTTPClient
+_clients = {}
+
+
+def resolve(host, port):
+    """
+    Resolves a host name, using the cache while the entry is fresh.
+
+    Args:
+        host (str): The host name.
+        port (int): The TCP port.
+
+    Returns:
+        The socket address for `socket.connect()`.
+    """
+    now = ticks_ms()
+    entry = _dns_cache.get((host, port))
+    if entry and ticks_diff(entry[1], now) > 0:
+        return entry[0]
+    addr = socket.getaddrinfo(host, port, 0, socket.SOCK_STREAM)[0][-1]
+    _dns_cache[(host, port)] = (addr, now + DNS_CACHE_TTL_MS)
+    return addr
+
+
+class _BodyReader:
+    """Stream over a response body framed by Content-Length, chunks or connection close."""
+
+    def __init__(self, response, stream, length, chunked):
+        self._response = response
+        self._stream = stream
+        self._remaining = length  # None: read until the connection closes
+        self._chunked = chunked
+        self._chunk_left = 0
+        self.done = length == 0
+
+    def _next_chunk(self):
+        line = self._stream.readline()
+        self._chunk_left = int(line.split(b";")[0].strip() or b"0", 16)
+        if self._chunk_left == 0:
+            # Skip trailers up to the empty line.
+            while self._stream.readline() not in (b"\r\n", b"\n", b""):
+                pass
+            self._finish()
+
+    def _finish(self):
+        self.done = True
+        self._response._body_done()
+
+    def read(self, size=-1):
+        if self.done:
+            return b""
+        if size is None or size < 0:
+            parts = []
+            while not self.done:
+                parts.append(self.read(1024))
+            return b"".join(parts)
+
+        if self._chunked:
+            if self._chunk_left == 0:
+                self._next_chunk()
+                if self.done:
+                    return b""
+            data = self._stream.read(min(size, self._chunk_left))
+            self._chunk_left -= len(data)
+            if self._chunk_left == 0:
+                self._stream.readline()  # CRLF after the chunk
+        else:
+            if self._remaining is not None:
+                size = min(size, self._remaining)
+            data = self._stream.read(size)
+            if self._remaining is not None:
+                self._remaining -= len(data)
+                if self._remaining == 0:
+                    self._finish()
+
+        if not data:
+            # Connection closed by the server
+            self._response._keep_alive = False
+            self._finish()
+        return data
+
+    def readinto(self, buf):
+        """
+        Reads the rest of the body into `buf`. A body framed by Content-Length
+        is read directly into the buffer, without allocating it as bytes.
+
+        Returns:
+            int: The number of bytes read.
+
+        Raises:
+            ValueError: If the body does not fit into `buf`.
+        """
+        mv = memoryview(buf)
+        n = 0
+        while not self.done:
+            if n == len(buf):
+                raise ValueError("response body larger than the buffer")
+            if self._chunked or self._remaining is None:
+                data = self.read(len(buf) - n)
+                mv[n:n + len(data)] = data
+                n += len(data)
+                continue
+            got = self._stream.readinto(mv[n:n + min(len(buf) - n, self._remaining)])
+            if not got:
+                # Connection closed by the server
+                self._response._keep_alive = False
+                self._finish()
+                break
+            n += got
+            self._remaining -= got
+            if self._remaining == 0:
+                self._finish()
+        return n
+
+
+class Response:
+    """
+    The response to a request made with `HTTPClient`.
+
+    Attributes:
+        status_code (int): The HTTP status code.
+        headers (dict): Response headers with lower-case names.
+        raw (stream): The body as a stream with a `read(size)` method.
+    """
+
+    def __init__(self, client, status_code, headers, stream, keep_alive):
+        self._client = client
+        self.status_code = status_code
+        self.headers = headers
+        self._keep_alive = keep_alive
+        self._closed = False
+
+        length = headers.get("content-length")
+        chunked = "chunked" in headers.get("transfer-encoding", "")
+        if length is None and not chunked:
+            self._keep_alive = False
+        self.raw = _BodyReader(self, stream, None if length is None else int(length), chunked)
+        if self.raw.done:
+            self._body_done()
+
+    def _body_done(self):
+        self._client._record("body_ms")
+
+    @property
+    def content(self):
+        """The complete body as bytes."""
+        return self.raw.read()
+
+    @property
+    def text(self):
+        """The complete body as text."""
+        return str(self.content, "utf-8")
+
+    def json(self):
+        """Parses the complete body as JSON."""
+        return json.loads(self.content)
+
+    def close(self):
+        """
+        Finishes the response and returns the connection to the client.
+
+        A small unread remainder of the body is drained so the connection can be
+        reused. Otherwise, or if the server does not allow keep-alive, the
+        connection is closed.
+        """
+        if self._closed:
+            return
+        self._closed = True
+        drained = 0
+        while self._keep_alive and not self.raw.done and drained < MAX_DRAIN_BYTES:
+            try:
+                drained += len(self.raw.read(256))
+            except OSError:
+                self._keep_alive = False
+        if not self._keep_alive or not self.raw.done:
+            self._client.close()
+
+
+class HTTPClient:
+    """
+    A keep-alive HTTP/1.1 connection to one host.
+
+    Args:
+        host (str): The host name.
+        port (int): The TCP port.
+        timeout_s (int): Socket timeout for connecting and reading.
+
+    Attributes:
+        timings (dict): Phase durations of the last request in milliseconds:
+                        "dns_ms", "connect_ms", "first_byte_ms", "body_ms",
+                        and "reused" (True if an open connection was used).
+    """
+
+    def __init__(self, host, port=80, timeout_s=DEFAULT_TIMEOUT_S):
+        self.host = host
+        self.port = port
+        self.timeout_s = timeout_s
+        self.timings = {}
+        self.requests = 0
+        self.connects = 0
+        self._sock = None
+        self._stream = None
+        self._phase_start = 0
+
+    def _record(self, phase):
+        now = ticks_ms()
+        self.timings[phase] = ticks_diff(now, self._phase_start)
+        self._phase_start = now
+
+    def _connect(self):
+        self._phase_start = ticks_ms()
+        addr = resolve(self.host, self.port)
+        self._record("dns_ms")
+
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout_s)
+        try:
+            sock.connect(addr)
+        except OSError:
+            sock.close()
+            # The cached address may be stale.
+            _dns_cache.pop((self.host, self.port), None)
+            raise
+        self._record("connect_ms")
+        self._sock = sock
+        self._stream = sock.makefile("rb")
+        self.connects += 1
+
+    def close(self):
+        """Closes the connection. The next request opens a new one."""
+        if self._sock:
+            self._sock.close()
+        self._sock = None
+        self._stream = None
+
+    def _send(self, method, path, headers):
+        lines = [f"{method} {path} HTTP/1.1", f"Host: {self.host}", f"User-Agent: {USER_AGENT}"]
+        if headers:
+            for name in headers:
+                lines.append(f"{name}: {headers[name]}")
+        lines.append("\r\n")
+        self._sock.sendall("\r\n".join(lines).encode())
+
+    def _read_head(self):
+        status_line = self._stream.readline()
+        if not status_line:
+            raise OSError("connection closed by server")
+        self._record("first_byte_ms")
+        parts = status_line.split(None, 2)
+        version = parts[0]
+        status_code = int(parts[1])
+
+        headers = {}
+        while True:
+            line = self._stream.readline()
+            if not line or line in (b"\r\n", b"\n"):
+                break
+            name, _, value = line.decode().partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        connection = headers.get("connection", "").lower()
+        if version == b"HTTP/1.0":
+            keep_alive = connection == "keep-alive"
+        else:
+            keep_alive = connection != "close"
+        return status_code, headers, keep_alive
+
+    def request(self, method, path, headers=None):
+        """
+        Sends a request and reads the response head.
+
+        If the request on a reused connection fails (for example because the
+        server closed it while idle), it is retried once on a new connection.
+
+        Args:
+            method (str): The HTTP method, e.g. "GET".
+            path (str): The request path including the query string.
+            headers (dict, optional): Additional request headers.
+
+        Returns:
+            Response: The response. Its body must be read or the response closed
+                      before the next request is made.
+        """
+        for attempt in range(2):
+            reused = self._sock is not None
+            self.timings = {"dns_ms": 0, "connect_ms": 0, "reused": reused}
+            try:
+                if not reused:
+                    self._connect()
+                self._phase_start = ticks_ms()
+                self._send(method, path, headers)
+                status_code, resp_headers, keep_alive = self._read_head()
+            except OSError:
+                self.close()
+                if reused and attempt == 0:
+                    continue
+                raise
+            self.requests += 1
+            return Response(self, status_code, resp_headers, self._stream, keep_alive)
+
+    def get(self, path, headers=None):
+        """Sends a GET request. See `request()`."""
+        return self.request("GET", path, headers)
+
+
+def _split_url(url):
+    """Splits an http:// URL into (host, port, path)."""
+    if not url.startswith("http://"):
+        raise ValueError("only http:// URLs are supported")
+    rest = url[7:]
+    host, sep, path = rest.partition("/")
+    path = "/" + path if sep else "/"
+    port = 80
+    if ":" in host:
+        host, port = host.split(":", 1)
+        port = int(port)
+    return host, port, path
+
+
+def get_client(host, port=80):
+    """Returns the pooled `HTTPClient` for a host, creating it on first use."""
+    client = _clients.get((host, port))
+    if client is None:
+        client = HTTPClient(host, port)
+        _clients[(host, port)] = client
+    return client
+
+
+def get(url, headers=None):
+    """
+    Sends a GET request over the pooled keep-alive connection for the URL's host.
+
+    Args:
+        url (str): An http:// URL.
+        headers (dict, optional): Additional request headers.
+
+    Returns:
+        Response: The response. Call `close()` when done with it.
+    """
+    host, port, path = _split_url(url)
+    return get_client(host, port).get(path, headers)
+
+
+def last_timings(url):
+    """Returns the phase timings of the last request to the URL's host."""
+    host, port, _ = _split_url(url)
+    client = _clients.get((host, port))
+    return client.timings if client else {}
@@ -1,54 +1,326 @@
 """
 This module handles NTP time synchronization for MicroPython.
 
-It provides a function to set the ESP32's Real-Time Clock (RTC) to the
-correct local time for Central European Time (CET/CEST), including daylight
-saving adjustments.
+It queries several NTP servers concurrently over non-blocking UDP sockets and
+picks the sample with the smallest round-trip delay. The clock offset is
+computed from the four NTP timestamps, so network latency is compensated. The
+ESP32's Real-Time Clock (RTC) is then set to the correct local time for Central
+European Time (CET/CEST), including daylight saving adjustments.
+
+The DNS lookups count against the same timeout: resolved addresses are
+cached, and a name whose lookup failed is skipped for `DNS_RETRY_MS`, so a dead
+DNS server delays at most one sync, by at most one lookup.
+
+Every sync also measures how far the RTC drifted since the previous one. The
+estimated drift rate is used to stretch or shorten the resync interval.
 """
 
+import select
+import socket
+import struct
 import time
 
-import ntptime
-from machine import RTC
+# --- NTP Configuration ---
+NTP_SERVERS = ("0.pool.ntp.org", "1.pool.ntp.org", "2.pool.ntp.org")
+NTP_PORT = 123
+NTP_TIMEOUT_MS = 1500  # Total time for the DNS lookups and the answers of all servers
+NTP_MIN_WAIT_MS = 250  # Time left for the answers if slow DNS lookups used up the timeout
+DNS_RETRY_MS = 60 * 60 * 1000  # Skip a server whose name could not be resolved for 1 hour
+
+# Seconds between the NTP era (1900-01-01) and the epoch of `time.time()`.
+# MicroPython on the ESP32 counts from 2000-01-01, CPython from 1970-01-01.
+NTP_DELTA = 3155673600 if time.gmtime(0)[0] == 2000 else 2208988800
+UNIX_DELTA = 2208988800  # Seconds between the NTP era and 1970-01-01
+
+# --- Adaptive Resync Configuration ---
+MAX_CLOCK_ERROR_MS = 500  # Resync before the estimated drift exceeds this
+NTP_SYNC_MIN_INTERVAL_MS = 60 * 60 * 1000  # 1 hour
+NTP_SYNC_MAX_INTERVAL_MS = 24 * 60 * 60 * 1000  # 24 hours
+MIN_DRIFT_SAMPLE_MS = 10 * 60 * 1000  # Shorter gaps are dominated by network jitter
+
+# --- Sync State ---
+last_offset_us = None  # Correction applied by the last sync
+last_delay_us = None  # Round-trip delay of the chosen sample
+last_server = None  # Server of the chosen sample
+drift_ppb = None  # Estimated RTC drift (positive: RTC runs slow)
+_last_sync_local_us = None  # Local clock reading right after the last sync
+_rtc_utc_offset_s = 0  # Timezone offset currently applied to the RTC
+
+# --- DNS Cache ---
+# (server, port) -> address; dropped when the server does not answer, so the pool can rotate
+_addresses = {}
+# server -> time of the failed lookup (ms of `time.time_ns()`)
+_dns_failed = {}
+
+
+def _local_ntp_us():
+    """Returns the local clock as UTC microseconds since the NTP era."""
+    return time.time_ns() // 1000 + (NTP_DELTA - _rtc_utc_offset_s) * 1000000
+
+
+def _to_ntp(us):
+    """Converts microseconds since the NTP era to (seconds, fraction)."""
+    return (us // 1000000) & 0xFFFFFFFF, ((us % 1000000) << 32) // 1000000
 
 
-def set_rtc_from_ntp():
+def _from_ntp(data, offset):
+    """Reads a 64-bit NTP timestamp from `data` and returns microseconds."""
+    seconds, fraction = struct.unpack_from("!II", data, offset)
+    return seconds * 1000000 + ((fraction * 1000000) >> 32)
+
+
+def _resolve(server, port, deadline_us):
     """
-    Fetches time from an NTP server, calculates the corresponding CET/CEST local time,
-    and sets the ESP32's hardware RTC to that local time.
+    Returns the address of a server from the cache or a DNS lookup, or None if
+    the server is skipped.
+
+    A lookup cannot be interrupted, so uncached names are only resolved while
+    time is left before `deadline_us`. A failed lookup is remembered for
+    `DNS_RETRY_MS`.
     """
+    addr = _addresses.get((server, port))
+    if addr is not None:
+        return addr
+    now_us = time.time_ns() // 1000
+    failed_ms = _dns_failed.get(server)
+    if failed_ms is not None and 0 <= now_us // 1000 - failed_ms < DNS_RETRY_MS:
+        return None
+    if now_us >= deadline_us:
+        print(f"NTP: No time left to resolve {server}")
+        return None
     try:
-        # 1. Synchronize the system time to UTC from an NTP server.
-        # This updates time.time() and time.localtime() to UTC.
-        ntptime.settime()
+        addr = socket.getaddrinfo(server, port, 0, socket.SOCK_DGRAM)[0][-1]
+    except OSError as e:
+        print(f"NTP: Could not resolve {server}: {e}")
+        _dns_failed[server] = time.time_ns() // 1000000
+        return None
+    _dns_failed.pop(server, None)
+    _addresses[(server, port)] = addr
+    return addr
+
+
+def query_servers(servers=NTP_SERVERS, port=NTP_PORT, timeout_ms=NTP_TIMEOUT_MS):
+    """
+    Queries several NTP servers concurrently.
+
+    The servers are resolved first (see `_resolve()`), then one request is
+    sent to every server and all sockets are polled until every server has
+    answered or the timeout expires. The requests are only sent after the
+    lookups, so a blocking lookup cannot delay reading an answer and distort its
+    round-trip time. The timeout covers the lookups, so a slow DNS server or
+    unreachable NTP servers cannot delay the result by more than `timeout_ms`
+    plus one lookup and `NTP_MIN_WAIT_MS`.
+
+    Args:
+        servers (tuple): Host names or IP addresses of the NTP servers.
+        port (int): UDP port of the servers.
+        timeout_ms (int): Maximum time for the lookups and the answers.
 
-        # 2. Get the correct local time tuple using the cettime logic.
-        local_time_tuple = cettime()
+    Returns:
+        list: One (server, offset_us, delay_us, stratum) tuple per valid answer.
+              `offset_us` is the amount the local clock is behind the server.
+    """
+    poller = select.poll()
+    pending = []  # [socket, server, t1, transmit timestamp bytes]
+    samples = []
 
-        # 3. Set the hardware RTC to the calculated local time.
+    deadline_us = time.time_ns() // 1000 + timeout_ms * 1000
+    addresses = []
+    for server in servers:
+        addr = _resolve(server, port, deadline_us)
+        if addr is not None:
+            addresses.append((server, addr))
+    deadline_us = max(deadline_us, time.time_ns() // 1000 + NTP_MIN_WAIT_MS * 1000)
+
+    for server, addr in addresses:
+        sock = None
+        try:
+            sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            sock.setblocking(False)
+            packet = bytearray(48)
+            packet[0] = 0x23  # LI = 0, Version = 4, Mode = 3 (client)
+            t1 = _local_ntp_us()
+            struct.pack_into("!II", packet, 40, *_to_ntp(t1))
+            sock.sendto(packet, addr)
+        except OSError as e:
+            print(f"NTP: Request to {server} failed: {e}")
+            if sock:
+                sock.close()
+            continue
+        poller.register(sock, select.POLLIN)
+        pending.append([sock, server, t1, bytes(packet[40:48])])
+
+    try:
+        while pending:
+            # Rounded up, so the poll does not return just before the deadline.
+            remaining_ms = -(-(deadline_us - time.time_ns() // 1000) // 1000)
+            if remaining_ms <= 0:
+                break
+            for event in poller.poll(remaining_ms):
+                # MicroPython reports the socket object, CPython its file descriptor.
+                obj = event[0]
+                for entry in pending:
+                    if entry[0] is obj or (isinstance(obj, int) and entry[0].fileno() == obj):
+                        break
+                else:
+                    continue
+                sock, server, t1, transmit = entry
+                try:
+                    data = sock.recv(48)
+                except OSError:
+                    continue
+                t4 = _local_ntp_us()
+                poller.unregister(sock)
+                pending.remove(entry)
+                sock.close()
+
+                # Reject answers that are not a server reply to our request.
+                if len(data) < 48 or data[0] & 0x07 != 4 or not 1 <= data[1] <= 15:
+                    print(f"NTP: Invalid answer from {server}")
+                    _addresses.pop((server, port), None)
+                    continue
+                if data[24:32] != transmit:
+                    print(f"NTP: Unexpected answer from {server}")
+                    continue
+
+                t2 = _from_ntp(data, 32)
+                t3 = _from_ntp(data, 40)
+                offset_us = ((t2 - t1) + (t3 - t4)) // 2
+                delay_us = (t4 - t1) - (t3 - t2)
+                samples.append((server, offset_us, delay_us, data[1]))
+    finally:
+        for entry in pending:
+            print(f"NTP: No answer from {entry[1]} within {timeout_ms} ms")
+            entry[0].close()
+            _addresses.pop((entry[1], port), None)
+
+    return samples
+
+
+def best_sample(samples):
+    """
+    Picks the most accurate sample, the one with the smallest round-trip delay.
+
+    Args:
+        samples (list): Samples as returned by `query_servers()`.
+
+    Returns:
+        tuple or None: The chosen sample, or None if the list is empty.
+    """
+    best = None
+    for sample in samples:
+        if best is None or sample[2] < best[2]:
+            best = sample
+    return best
+
+
+def _update_drift(offset_us):
+    """Updates the drift estimate from the offset accumulated since the last sync."""
+    global drift_ppb
+    if _last_sync_local_us is None:
+        return
+    elapsed_ms = (_local_ntp_us() - _last_sync_local_us) // 1000
+    if elapsed_ms < MIN_DRIFT_SAMPLE_MS:
+        return
+    sample_ppb = offset_us * 1000000 // elapsed_ms
+    if drift_ppb is None:
+        drift_ppb = sample_ppb
+    else:
+        # Exponential moving average to smooth out network jitter
+        drift_ppb = (3 * drift_ppb + sample_ppb) // 4
+
+
+def next_sync_interval_ms():
+    """
+    Calculates the resync interval from the estimated drift rate.
+
+    The interval is chosen so that the drift stays below `MAX_CLOCK_ERROR_MS`,
+    limited to `NTP_SYNC_MIN_INTERVAL_MS`..`NTP_SYNC_MAX_INTERVAL_MS`.
+
+    Returns:
+        int or None: The interval in milliseconds, or None while no drift estimate exists.
+    """
+    if drift_ppb is None:
+        return None
+    if drift_ppb == 0:
+        return NTP_SYNC_MAX_INTERVAL_MS
+    interval_ms = MAX_CLOCK_ERROR_MS * 1000000000 // abs(drift_ppb)
+    return max(NTP_SYNC_MIN_INTERVAL_MS, min(NTP_SYNC_MAX_INTERVAL_MS, interval_ms))
+
+
+def set_rtc_from_ntp(servers=NTP_SERVERS):
+    """
+    Fetches time from several NTP servers, calculates the corresponding CET/CEST
+    local time, and sets the ESP32's hardware RTC to that local time.
+
+    Args:
+        servers (tuple): Host names or IP addresses of the NTP servers.
+
+    Raises:
+        OSError: If no server sent a valid answer.
+    """
+    global last_offset_us, last_delay_us, last_server
+    global _last_sync_local_us, _rtc_utc_offset_s
+
+    from machine import RTC
+
+    try:
+        # 1. Query all servers and choose the sample with the lowest delay.
+        sample = best_sample(query_servers(servers))
+        if sample is None:
+            raise OSError("no NTP server answered")
+        server, offset_us, delay_us, _ = sample
+
+        # 2. Learn the drift rate from the error accumulated since the last sync.
+        _update_drift(offset_us)
+
+        # 3. Get the correct local time tuple using the cettime logic.
+        utc_us = _local_ntp_us() + offset_us - NTP_DELTA * 1000000
+        now_utc = utc_us // 1000000
+        tz_offset_s = cet_offset_s(now_utc)
+        local_time_tuple = cettime(now_utc)
+
+        # 4. Set the hardware RTC to the calculated local time.
         rtc = RTC()
-        rtc.datetime(local_time_tuple)
+        rtc.datetime(local_time_tuple[:7] + (utc_us % 1000000,))
+        _rtc_utc_offset_s = tz_offset_s
+        _last_sync_local_us = _local_ntp_us()
 
-        print("RTC successfully synchronized to local time (CET/CEST).")
+        last_offset_us = offset_us
+        last_delay_us = delay_us
+        last_server = server
+        print(
+            f"RTC successfully synchronized to local time (CET/CEST) via {server} "
+            f"(offset {offset_us // 1000} ms, delay {delay_us // 1000} ms)."
+        )
     except Exception as e:
         print(f"Failed to set RTC from NTP: {e}")
         # Re-raise the exception or handle it as appropriate for the application
         raise
 
 
-def cettime():
+def unix_time_ms():
     """
-    Calculates the current Central European Time (CET/CEST) including daylight saving.
+    Returns the current UTC time in milliseconds since 1970-01-01, the time base
+    of Unix timestamps such as the sunrise and sunset in OWM responses.
+
+    Independent of the epoch of `time.time()` and of the timezone offset applied
+    to the RTC. Only meaningful after a successful `set_rtc_from_ntp()`.
+    """
+    return _local_ntp_us() // 1000 - UNIX_DELTA * 1000
 
-    This function assumes the system clock has been previously set to UTC
-    (e.g., by `ntptime.settime()`).
+
+def cet_offset_s(now_utc):
+    """
+    Returns the CET/CEST offset to UTC in seconds for the given UTC time.
+
+    Args:
+        now_utc (int): UTC time in seconds since the epoch of `time.time()`.
 
     Returns:
-        tuple: A tuple formatted for `machine.RTC().datetime()`:
-               (year, month, day, weekday, hour, minute, second, subsecond)
-               Note: weekday is 1-7 (Monday-Sunday) for RTC.datetime().
+        int: 7200 during daylight saving time (CEST), 3600 otherwise (CET).
     """
-    year = time.localtime()[0]
+    year = time.localtime(now_utc)[0]
 
     # Determine DST start and end times for the current year in Europe.
     # DST starts on the last Sunday of March (at 1:00 UTC, which is 2:00 CET)
@@ -62,25 +334,39 @@ def cettime():
         (year, 10, (31 - (int(5 * year / 4 + 1)) % 7), 1, 0, 0, 0, 0)
     )
 
-    now_utc = time.time()
-
     # Apply timezone offset based on whether DST is active
     if dst_start_utc <= now_utc < dst_end_utc:
         # CEST: Central European Summer Time (UTC+2 hours)
-        offset_seconds = 7200
-    else:
-        # CET: Central European Time (UTC+1 hour)
-        offset_seconds = 3600
+        return 7200
+    # CET: Central European Time (UTC+1 hour)
+    return 3600
+
+
+def cettime(now_utc=None):
+    """
+    Calculates the current Central European Time (CET/CEST) including daylight saving.
+
+    Args:
+        now_utc (int, optional): UTC time in seconds since the epoch of `time.time()`.
+            Defaults to `time.time()`, which assumes the system clock is set to UTC.
+
+    Returns:
+        tuple: A tuple formatted for `machine.RTC().datetime()`:
+               (year, month, day, weekday, hour, minute, second, subsecond)
+               Note: weekday is 1-7 (Monday-Sunday) for RTC.datetime().
+    """
+    if now_utc is None:
+        now_utc = time.time()
 
     # Convert UTC time to local time with the determined offset
-    cet_tuple = time.localtime(now_utc + offset_seconds)
+    cet_tuple = time.localtime(now_utc + cet_offset_s(now_utc))
 
     # `time.localtime()` returns: (year, month, mday, hour, minute, second, weekday_0_6, yearday)
     # `machine.RTC.datetime()` expects: (year, month, mday, weekday_1_7, hour, minute, second, microsecond)
     # Note: `time.localtime()` weekday is 0-6 (Monday=0, Sunday=6).
     # `machine.RTC.datetime()` expects 1-7 (Monday=1, Sunday=7).
 
-    year, month, day, hour, minute, second, weekday_0_6, _ = cet_tuple
+    year, month, day, hour, minute, second, weekday_0_6, _ = cet_tuple[:8]
 
     # Adjust weekday format for the RTC
     weekday_1_7 = weekday_0_6 + 1
@@ -88,4 +374,4 @@ def cettime():
     # Create the tuple in the format expected by RTC.datetime()
     rtc_tuple = (year, month, day, weekday_1_7, hour, minute, second, 0)
 
-    return rtc_tuple
\ No newline at end of file
+    return rtc_tuple
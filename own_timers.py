@@ -1,72 +1,230 @@
 """
-This module configures and starts hardware timers for periodic tasks
-within the ESP32 LVGL Weather Station application.
-"""
+This module registers the application's periodic tasks (display updates and
+weather fetches) with the scheduler of the ESP32 LVGL Weather Station.
+
+The `weather` module, and with it the HTTP client, is imported by the first
+weather fetch, so it does not cost RAM or boot time before the first frame.
+
+With `ADAPTIVE_FETCH_INTERVAL`, the weather fetch interval follows
+`fetch_policy.FetchPolicy`: shorter while the pressure, temperature or
+conditions change, longer when the weather is calm.
 
-from machine import Timer
+The UI pages (see `display.pages`) are shown in turn according to
+`PAGE_ROTATION`; a short-lived task runs the wipe of each page change.
+"""
 
+import daylight
 import display
-import weather
+import fetch_policy
+import history
+import sensor
 import wifi
 
+# --- Task Intervals ---
+DISPLAY_UPDATE_INTERVAL_MS = 1000  # 1 second (clock updates)
+WEATHER_FETCH_INTERVAL_MS = 900000  # 15 minutes (initial interval if adaptive)
+WEATHER_FETCH_JITTER_MS = 30000  # +/- 30 seconds, spreads fleet requests to the API
+LOCATION_ROTATE_INTERVAL_MS = 10000  # Multi-location mode: show each location for 10 seconds
+
+# Adapt the weather fetch interval to the weather (bounds in fetch_policy.py)
+ADAPTIVE_FETCH_INTERVAL = True
+
+# --- Page Rotation ---
+# (page, display time in ms) in the order they are shown. With a single
+# entry, only the weather page is shown.
+PAGE_ROTATION = (
+    ("weather", 30000),
+    ("forecast", 10000),
+    ("history", 10000),
+    ("system", 10000),
+)
+PAGE_WIPE_STEP_MS = 40  # Interval of the bands of a page change
 
-def weather_wrapper(timer):
+# --- Registered Tasks ---
+_sched = None
+_weather_task = None
+_rotate_task = None
+_fetch_policy = None
+_page_task = None
+_wipe_task = None
+_page_index = 0
+
+
+def weather_wrapper():
     """
-    Timer callback for periodic weather data updates.
+    Scheduled task for periodic weather data updates.
 
     This function fetches weather data from the OpenWeatherMap API if Wi-Fi is connected,
-    then updates the display module with the new data and icon code.
-    It's designed to be called by a hardware timer.
+    then updates the display module with the new data and icon code. If the fetch
+    fails, the last good data is kept (see `fetch_failed()`).
+    """
+    import weather
+
+    if weather.load_config():
+        # Multi-location mode
+        locations_wrapper()
+        return
+
+    if not wifi.is_connected():
+        print("Task: Skipping weather data fetch, no WiFi connection.")
+        fetch_failed()
+        return
+
+    print("Task: Fetching weather data from API...")
+    try:
+        owm_data = weather.get_data()  # This should return 7 values
+    except Exception as e:
+        print(f"ERROR: Failed to fetch weather data: {e}")
+        owm_data = None
+
+    # The icon code (last value in the tuple) is missing if the fetch failed.
+    if not owm_data or owm_data[6] is None:
+        fetch_failed()
+        return
+    # Day or night variant as of now, and the next switch between them (see daylight.py)
+    icon_code = daylight.update(weather.sunrise, weather.sunset, owm_data[6])
+    owm_data = owm_data[:6]  # Keep only the first 6 values for data
+
+    # Update the display module's state with the new data and icon code
+    display.set_weather_data(owm_data, icon_code)
+    display.set_weather_status(True)
+    record_sample(owm_data, icon_code)
+
+
+def fetch_failed():
+    """
+    Handles a failed or skipped weather fetch.
+
+    The last good data stays on the display, marked with its age. If the
+    circuit breaker is open, the next attempt is scheduled for when its backoff
+    has passed (the regular interval applies if that is shorter).
+    """
+    import weather
+
+    display.set_weather_status(False)
+    retry_ms = weather.breaker.retry_in_ms()
+    if retry_ms and _weather_task and retry_ms < _weather_task.period_ms:
+        # Jitter is added to the deadline, so wait for it on top of the backoff.
+        _sched.reschedule(
+            _weather_task, _weather_task.period_ms, delay_ms=retry_ms + WEATHER_FETCH_JITTER_MS
+        )
+
+
+def record_sample(owm_data, icon_code):
+    """
+    Logs a fetched weather sample to the flash history and adapts the fetch
+    interval to it. Storage errors are only logged.
 
     Args:
-        timer: The timer object that triggered this callback (not directly used).
+        owm_data (tuple): (temperature, pressure, humidity, wind_speed, description, main_weather).
+        icon_code (str): The OWM icon code.
+    """
+    try:
+        history.append(owm_data, icon_code)
+    except OSError as e:
+        print(f"ERROR: Failed to write weather history: {e}")
+
+    if _fetch_policy is None or owm_data[0] is None:
+        return
+    interval_ms = _fetch_policy.update(_sched.now_ms(), owm_data[0], owm_data[1], icon_code)
+    if interval_ms != _weather_task.period_ms:
+        print(f"Task: Weather fetch interval adapted ({_fetch_policy.describe()}).")
+        _sched.reschedule(_weather_task, interval_ms)
+
+
+def locations_wrapper():
     """
-    owm_data = (None,) * 7  # Initialize with 7 None values (including icon_code)
-    icon_code = None
+    Fetches the weather of all configured locations with a single group request
+    and hands the records to the display, which cycles through them.
 
+    The rotation task is registered once the first response with more than
+    one location arrives.
+    """
+    global _rotate_task
+    import weather
+
+    records = []
     if wifi.is_connected():
-        print("Task: Fetching weather data from API...")
-        try:
-            owm_data = weather.get_data()  # This should return 7 values
-            # Extract icon code (last value in the tuple)
-            if owm_data and owm_data[6] is not None:
-                icon_code = owm_data[6]
-                owm_data = owm_data[:6]  # Keep only the first 6 values for data
-            else:
-                owm_data = (None,) * 6
-                icon_code = None  # Ensure no old icon code is used
-        except Exception as e:
-            print(f"ERROR: Failed to fetch weather data: {e}")
-            owm_data = (None,) * 6
-            icon_code = None
+        print(f"Task: Fetching weather data for {len(weather.CITY_IDS)} locations...")
+        records = weather.get_group_data()
     else:
         print("Task: Skipping weather data fetch, no WiFi connection.")
-        owm_data = (None,) * 6
-        icon_code = None
 
-    # Update the display module's state with the new data and icon code
-    display.set_weather_data(owm_data, icon_code)
+    if records:
+        display.set_locations(records)
+        display.set_weather_status(True)
+        # The history follows the first configured location.
+        record_sample(records[0][:6], records[0][6])
+        if len(records) > 1 and _rotate_task is None and _sched:
+            _rotate_task = _sched.add(
+                "location_rotate", LOCATION_ROTATE_INTERVAL_MS, display.show_next_location
+            )
+            print(f"✓ Location rotation registered ({len(records)} locations).")
+    else:
+        fetch_failed()
 
 
-def start_timer_tasks():
+def rotate_page():
+    """
+    Shows the next page of `PAGE_ROTATION` and sets the time until the next change.
     """
-    Initializes and starts all hardware timers required for the application.
+    global _page_index, _wipe_task
+    _page_index = (_page_index + 1) % len(PAGE_ROTATION)
+    name, duration_ms = PAGE_ROTATION[_page_index]
+    _sched.reschedule(_page_task, duration_ms)
+    if display.show_page(name) and _wipe_task is None:
+        _wipe_task = _sched.add(
+            "page_wipe", PAGE_WIPE_STEP_MS, wipe_step, delay_ms=0, coalesce=False
+        )
 
-    - A 1-second periodic timer for updating the LVGL display (time, weather).
-    - A 15-minute periodic timer for fetching new weather data.
+
+def wipe_step():
+    """Runs one band of a page change and removes itself when the page is complete."""
+    global _wipe_task
+    if not display.page_wipe_step():
+        _sched.cancel(_wipe_task)
+        _wipe_task = None
+
+
+def start_timer_tasks(sched):
     """
-    # Perform an initial data fetch immediately upon startup
-    print("Performing initial data fetch...")
-    weather_wrapper(None)
-
-    # Timer for updating the LVGL display (every second for clock updates)
-    display_timer = Timer(0)
-    display_timer.init(
-        period=1000, mode=Timer.PERIODIC, callback=display.display_handler
+    Registers the display and weather tasks with the scheduler.
+
+    - A 1-second task for updating the LVGL display (time, weather). It is never
+      run early, so the clock does not skip seconds.
+    - A 15-minute task for fetching new weather data, first run immediately
+      after the first display update.
+    - A task that switches the UI pages, if `PAGE_ROTATION` has more than one page.
+    - The local sensor task, if a BME280 is connected (see `sensor.py`).
+    - The day/night icon switching at sunrise and sunset (see `daylight.py`);
+      its task is added by the first weather fetch.
+
+    Args:
+        sched (scheduler.Scheduler): The application's scheduler.
+    """
+    global _sched, _weather_task, _fetch_policy, _page_task
+    _sched = sched
+    sched.add(
+        "display", DISPLAY_UPDATE_INTERVAL_MS, display.display_handler, delay_ms=0, coalesce=False
+    )
+    print("✓ Display update task registered (1s interval).")
+
+    _weather_task = sched.add(
+        "weather", WEATHER_FETCH_INTERVAL_MS, weather_wrapper, delay_ms=0,
+        jitter_ms=WEATHER_FETCH_JITTER_MS,
     )
-    print("✓ Display update timer started (1s interval).")
+    if ADAPTIVE_FETCH_INTERVAL:
+        _fetch_policy = fetch_policy.FetchPolicy(default_ms=WEATHER_FETCH_INTERVAL_MS)
+        print(
+            f"✓ Weather fetch task registered (15min interval, adaptive "
+            f"{_fetch_policy.min_ms // 60000}-{_fetch_policy.max_ms // 60000}min)."
+        )
+    else:
+        print("✓ Weather fetch task registered (15min interval).")
+
+    if len(PAGE_ROTATION) > 1:
+        _page_task = sched.add("page_rotate", PAGE_ROTATION[0][1], rotate_page)
+        print(f"✓ Page rotation registered ({len(PAGE_ROTATION)} pages).")
 
-    # Timer for fetching weather data (every 15 minutes)
-    weather_fetch_timer = Timer(1)
-    weather_fetch_timer.init(period=900000, mode=Timer.PERIODIC, callback=weather_wrapper)
-    print("✓ Weather fetch timer started (15min interval).")
\ No newline at end of file
+    sensor.start(sched)
+    daylight.start(sched)
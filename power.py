@@ -0,0 +1,134 @@
+"""
+This module implements the power-managed main loop of the ESP32 LVGL Weather Station.
+
+Instead of polling with a fixed `utime.sleep_ms(500)`, the loop asks the
+`scheduler.Scheduler` for the next deadline (UI tick, system tasks, weather fetch)
+and puts the ESP32 into light sleep until then. Together with Wi-Fi modem sleep this
+keeps the CPU and radio powered down for most of each second.
+
+The clock is passed in, so the scheduling logic can be run on a host with
+`VirtualClock`, which reports how much time would have been spent asleep
+(see `scripts/simulate_power.py`).
+"""
+
+# Entering and leaving light sleep costs a few milliseconds, so shorter
+# pauses are done with a regular `utime.sleep_ms()` instead.
+LIGHT_SLEEP_MIN_MS = 10
+
+# Sleep duration if no task is registered at all.
+IDLE_SLEEP_MS = 1000
+
+
+class MachineClock:
+    """
+    Clock backed by `utime` ticks that sleeps with `machine.lightsleep()`.
+
+    Args:
+        light_sleep (bool): If False, always use `utime.sleep_ms()` (useful while
+                            debugging over USB, as light sleep pauses the REPL).
+
+    Attributes:
+        slept_ms (int): Total time spent in light sleep.
+    """
+
+    def __init__(self, light_sleep=True):
+        import machine
+        import utime
+
+        self._machine = machine
+        self._utime = utime
+        self.light_sleep = light_sleep
+        self.slept_ms = 0
+
+    def ticks_ms(self):
+        return self._utime.ticks_ms()
+
+    def ticks_diff(self, new, old):
+        return self._utime.ticks_diff(new, old)
+
+    def sleep_ms(self, ms):
+        if self.light_sleep and ms >= LIGHT_SLEEP_MIN_MS:
+            self._machine.lightsleep(ms)
+            self.slept_ms += ms
+        else:
+            self._utime.sleep_ms(ms)
+
+
+class VirtualClock:
+    """
+    Simulated clock for running the loop on a host.
+
+    Time only advances when `sleep_ms()` or `advance()` is called, so a test can
+    model the duration of each task and read back the time spent asleep. Every
+    `sleep_ms()` counts as light sleep.
+    """
+
+    def __init__(self, start_ms=0):
+        self.now_ms = start_ms
+        self.slept_ms = 0
+        self.sleep_count = 0
+
+    def ticks_ms(self):
+        return self.now_ms
+
+    def ticks_diff(self, new, old):
+        return new - old
+
+    def sleep_ms(self, ms):
+        self.now_ms += ms
+        self.slept_ms += ms
+        self.sleep_count += 1
+
+    def advance(self, ms):
+        """Simulates `ms` milliseconds of CPU work."""
+        self.now_ms += ms
+
+
+def run_loop(sched, clock, max_iterations=None):
+    """
+    Runs the scheduler's due tasks and sleeps until the next deadline.
+
+    Args:
+        sched (scheduler.Scheduler): The scheduler holding all periodic tasks.
+        clock: A `MachineClock` on the device or a `VirtualClock` on the host.
+               Must be the clock the scheduler was created with.
+        max_iterations (int, optional): Stop after this many wake-ups. Runs forever if None.
+    """
+    iterations = 0
+    while max_iterations is None or iterations < max_iterations:
+        iterations += 1
+        sched.run_due()
+
+        sleep_ms = sched.next_deadline_ms()
+        if sleep_ms is None:
+            sleep_ms = IDLE_SLEEP_MS
+        if sleep_ms > 0:
+            clock.sleep_ms(sleep_ms)
+
+
+async def run_loop_async(sched, clock, max_iterations=None):
+    """
+    Asyncio variant of `run_loop()`, for running next to other coroutines such
+    as the status server (`status_server.py`).
+
+    The wait until the next deadline is an `asyncio.sleep()`, so the event loop
+    can serve network connections in the meantime. Light sleep is not used in
+    this mode, since it would stop the event loop.
+
+    Args:
+        sched (scheduler.Scheduler): The scheduler holding all periodic tasks.
+        clock: The clock the scheduler was created with.
+        max_iterations (int, optional): Stop after this many wake-ups. Runs forever if None.
+    """
+    import asyncio
+
+    iterations = 0
+    while max_iterations is None or iterations < max_iterations:
+        iterations += 1
+        sched.run_due()
+
+        sleep_ms = sched.next_deadline_ms()
+        if sleep_ms is None:
+            sleep_ms = IDLE_SLEEP_MS
+        await asyncio.sleep(sleep_ms / 1000)
+
@@ -0,0 +1,259 @@
+"""
+This module provides the deadline-based task scheduler of the ESP32 LVGL Weather Station.
+
+All periodic work (UI ticks, Wi-Fi checks, NTP sync, weather fetches) registers
+with a single `Scheduler`. Pending runs are kept in a min-heap ordered by their
+deadline, so finding the next deadline is O(1) and every run or reschedule costs
+O(log n). The main loop asks the scheduler how long it may sleep instead of
+polling at a fixed rate.
+
+Features:
+- Jitter: a random offset per run, so a fleet of stations does not hit the
+  same server at the same second.
+- Coalescing: tasks that are due within `coalesce_ms` of a wake-up are run
+  early on that wake-up instead of waking the CPU again shortly afterwards.
+- Missed-deadline accounting: if a task runs more than a full period late, the
+  skipped runs are counted and the task keeps its phase instead of bursting.
+- Monitoring: an optional `monitor` object is told when each task starts (and
+  how late) and when it finishes (and how long it ran), see `watchdog.py`.
+"""
+
+import heapq
+import random
+
+# Default window within which due tasks are pulled forward to share a wake-up.
+COALESCE_WINDOW_MS = 500
+
+
+class Task:
+    """
+    A periodic task registered with the `Scheduler`.
+
+    Attributes:
+        name (str): Name used in log output and statistics.
+        period_ms (int): Interval between two runs. Can be changed with `Scheduler.reschedule()`.
+        callback (callable): Function called without arguments.
+        jitter_ms (int): Maximum random offset (+/-) applied to each deadline.
+        coalesce (bool): If False, the task never runs before its deadline.
+        runs (int): Number of completed runs.
+        missed (int): Number of whole periods that were skipped because the task ran late.
+        max_late_ms (int): Largest observed lateness of a run.
+        last_run_ms (int): Duration of the last run of the callback.
+        max_run_ms (int): Longest run of the callback.
+        total_run_ms (int): Total time spent in the callback.
+    """
+
+    def __init__(self, name, period_ms, callback, jitter_ms=0, coalesce=True):
+        self.name = name
+        self.period_ms = period_ms
+        self.callback = callback
+        self.jitter_ms = jitter_ms
+        self.coalesce = coalesce
+        self.runs = 0
+        self.missed = 0
+        self.max_late_ms = 0
+        self.last_run_ms = 0
+        self.max_run_ms = 0
+        self.total_run_ms = 0
+        self.cancelled = False
+        # Deadline without jitter; keeps the task in phase across runs.
+        self._base_ms = 0
+        # Incremented on every reschedule; heap entries with an older
+        # generation are stale and dropped when they reach the top.
+        self._gen = 0
+
+
+class Scheduler:
+    """
+    Min-heap scheduler driven by a clock object (see `power.MachineClock`).
+
+    Deadlines are stored as milliseconds since the scheduler was created. This
+    value is accumulated from `ticks_diff()` and never wraps, unlike `ticks_ms()`.
+
+    Args:
+        clock: Object providing `ticks_ms()` and `ticks_diff(new, old)`.
+        coalesce_ms (int): Window for pulling due tasks forward (see module docstring).
+    """
+
+    def __init__(self, clock, coalesce_ms=COALESCE_WINDOW_MS):
+        self._clock = clock
+        self.coalesce_ms = coalesce_ms
+        self._last_ticks = clock.ticks_ms()
+        self._now_ms = 0
+        self._heap = []
+        self._seq = 0
+        # Object with task_started(task, late_ms) and task_finished(task, run_ms), or None
+        self.monitor = None
+
+    def now_ms(self):
+        """Returns the monotonic scheduler time in milliseconds."""
+        ticks = self._clock.ticks_ms()
+        self._now_ms += self._clock.ticks_diff(ticks, self._last_ticks)
+        self._last_ticks = ticks
+        return self._now_ms
+
+    def _push(self, task, base_ms, jitter=True):
+        task._base_ms = base_ms
+        due_ms = base_ms
+        if jitter and task.jitter_ms:
+            due_ms += random.getrandbits(16) % (2 * task.jitter_ms + 1) - task.jitter_ms
+        self._seq += 1
+        # The sequence number breaks ties, so tasks themselves are never compared.
+        heapq.heappush(self._heap, (due_ms, self._seq, task, task._gen))
+
+    def add(self, name, period_ms, callback, delay_ms=None, jitter_ms=0, coalesce=True):
+        """
+        Registers a new periodic task.
+
+        Args:
+            name (str): Name of the task.
+            period_ms (int): Interval between two runs.
+            callback (callable): Function called without arguments.
+            delay_ms (int, optional): Time until the first run. Defaults to one period.
+                                      An explicit delay is not jittered.
+            jitter_ms (int): Maximum random offset (+/-) applied to each deadline.
+            coalesce (bool): If False, the task never runs before its deadline.
+
+        Returns:
+            Task: The registered task.
+        """
+        task = Task(name, period_ms, callback, jitter_ms, coalesce)
+        if delay_ms is None:
+            self._push(task, self.now_ms() + period_ms)
+        else:
+            self._push(task, self.now_ms() + delay_ms, jitter=False)
+        return task
+
+    def cancel(self, task):
+        """Removes a task. Its heap entry is discarded lazily."""
+        task.cancelled = True
+
+    def reschedule(self, task, period_ms, delay_ms=None):
+        """
+        Changes the period of a task and moves its next deadline.
+
+        Args:
+            task (Task): The task to change.
+            period_ms (int): The new interval.
+            delay_ms (int, optional): Time until the next run. Defaults to one new period.
+        """
+        task.period_ms = period_ms
+        task._gen += 1
+        if delay_ms is None:
+            delay_ms = period_ms
+        self._push(task, self.now_ms() + delay_ms)
+
+    def _discard_stale(self):
+        heap = self._heap
+        while heap and (heap[0][2].cancelled or heap[0][3] != heap[0][2]._gen):
+            heapq.heappop(heap)
+
+    def next_deadline_ms(self):
+        """
+        Returns the time until the earliest deadline.
+
+        Returns:
+            int or None: Milliseconds until the next task is due (0 if overdue),
+                         or None if no tasks are registered.
+        """
+        self._discard_stale()
+        if not self._heap:
+            return None
+        return max(0, self._heap[0][0] - self.now_ms())
+
+    def run_due(self):
+        """
+        Runs every task whose deadline has passed, plus coalescable tasks due
+        within the coalescing window.
+
+        Returns:
+            int: The number of tasks that were run.
+        """
+        heap = self._heap
+        now = self.now_ms()
+        horizon = now + self.coalesce_ms
+        # Entries are pushed back only after the pass, so a task never runs
+        # twice in one pass even if its period is shorter than the window.
+        held_back = []
+        next_bases = []
+        count = 0
+
+        while heap:
+            due_ms, _, task, gen = heap[0]
+            if due_ms > horizon:
+                break
+            heapq.heappop(heap)
+            if task.cancelled or gen != task._gen:
+                continue
+            if due_ms > now and not task.coalesce:
+                held_back.append((due_ms, task, gen))
+                continue
+
+            late_ms = now - due_ms
+            if late_ms > task.max_late_ms:
+                task.max_late_ms = late_ms
+
+            monitor = self.monitor
+            if monitor:
+                monitor.task_started(task, late_ms)
+            started = self._clock.ticks_ms()
+            try:
+                task.callback()
+            except Exception as e:
+                print(f"ERROR in scheduled task '{task.name}': {e}")
+            run_ms = self._clock.ticks_diff(self._clock.ticks_ms(), started)
+            task.last_run_ms = run_ms
+            task.total_run_ms += run_ms
+            if run_ms > task.max_run_ms:
+                task.max_run_ms = run_ms
+            task.runs += 1
+            count += 1
+            if monitor:
+                monitor.task_finished(task, run_ms)
+
+            if task.cancelled or gen != task._gen:
+                # The callback cancelled or rescheduled its own task.
+                continue
+
+            # Skip whole periods that have already passed to keep the phase.
+            next_base = task._base_ms + task.period_ms
+            now = self.now_ms()
+            if next_base < now:
+                skipped = (now - next_base) // task.period_ms + 1
+                task.missed += skipped
+                next_base += skipped * task.period_ms
+            next_bases.append((task, next_base, gen))
+
+        # If a callback of this pass rescheduled or cancelled one of these tasks,
+        # its new entry (if any) stays the only one.
+        for due_ms, task, gen in held_back:
+            self._seq += 1
+            heapq.heappush(heap, (due_ms, self._seq, task, gen))
+        for task, next_base, gen in next_bases:
+            if gen == task._gen and not task.cancelled:
+                self._push(task, next_base)
+
+        return count
+
+    def stats(self):
+        """
+        Collects the counters of all active tasks.
+
+        Returns:
+            dict: Task name -> {"period_ms", "runs", "missed", "max_late_ms",
+                  "last_run_ms", "max_run_ms", "avg_run_ms"}.
+        """
+        result = {}
+        for _, _, task, gen in self._heap:
+            if task.cancelled or gen != task._gen:
+                continue
+            result[task.name] = {
+                "period_ms": task.period_ms,
+                "runs": task.runs,
+                "missed": task.missed,
+                "max_late_ms": task.max_late_ms,
+                "last_run_ms": task.last_run_ms,
+                "max_run_ms": task.max_run_ms,
+                "avg_run_ms": task.total_run_ms // task.runs if task.runs else 0,
+            }
+        return result
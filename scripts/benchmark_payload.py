@@ -0,0 +1,210 @@
+"""
+This script compares the weather payload formats: OWM's JSON, the proxy's trimmed JSON and the compact binary payload.
+
+For a single city and for a multi-location group of 20 cities, it measures:
+- the bytes on the wire (body only),
+- the time to turn the received body into the station's records, the way
+  `weather.py` does it: `json.loads()` and `_extract()` for a single city, the
+  stream parser `_iter_list_items()` for a group, and for the compact payload
+  a copy into the preallocated receive buffer followed by `weather_codec`'s
+  `decode_record()`,
+- the heap used while doing so. On MicroPython this is the number of bytes
+  allocated with the garbage collector disabled (an upper bound of the peak),
+  on CPython the peak traced by `tracemalloc`.
+
+It runs on CPython, on the Unix port of MicroPython, and on the ESP32
+(`mpremote run`, with `weather.py`, `weather_codec.py` and
+`circuit_breaker.py` on the device), where the numbers matter.
+
+Usage:
+    python3 scripts/benchmark_payload.py [--iterations N]
+    micropython scripts/benchmark_payload.py [--iterations N]
+"""
+
+import gc
+import io
+import json
+import sys
+import time
+
+SCRIPT_DIR = sys.argv[0].rsplit("/", 1)[0] if "/" in sys.argv[0] else "."
+sys.path.insert(0, SCRIPT_DIR + "/..")
+
+import weather  # noqa: E402
+import weather_codec  # noqa: E402
+
+# --- CONFIGURATION ---
+DEFAULT_ITERATIONS = 200
+GROUP_CITIES = 20
+
+# A current weather response as OWM sends it
+OWM_CITY = (
+    '{"coord":{"lon":13.4105,"lat":52.5244},"weather":[{"id":500,"main":"Rain",'
+    '"description":"light rain","icon":"10d"}],"base":"stations","main":{"temp":12.54,'
+    '"feels_like":11.91,"temp_min":11.67,"temp_max":13.44,"pressure":1012,"humidity":81,'
+    '"sea_level":1012,"grnd_level":1006},"visibility":10000,"wind":{"speed":4.12,"deg":240,'
+    '"gust":7.2},"rain":{"1h":0.31},"clouds":{"all":75},"dt":1736946000,"sys":{"type":2,'
+    '"id":2011538,"country":"DE","sunrise":1736924856,"sunset":1736954392},"timezone":3600,'
+    '"id":2950159,"name":"Berlin","cod":200}'
+)
+
+if hasattr(time, "ticks_us"):
+    ticks_us = time.ticks_us
+    ticks_diff = time.ticks_diff
+else:  # CPython
+    def ticks_us():
+        return time.perf_counter_ns() // 1000
+
+    def ticks_diff(new, old):
+        return new - old
+
+
+def dumps(obj):
+    """JSON without spaces, like OWM and the proxy send it."""
+    try:
+        return json.dumps(obj, separators=(",", ":"))
+    except TypeError:  # MicroPython without the separators argument
+        return json.dumps(obj)
+
+
+def trimmed(city):
+    """The object the proxy serves for a city (see `owm_proxy.trim()`)."""
+    main = city["main"]
+    info = city["weather"][0]
+    return {
+        "main": {"temp": main["temp"], "pressure": main["pressure"], "humidity": main["humidity"]},
+        "wind": {"speed": city["wind"]["speed"]},
+        "weather": [{"description": info["description"], "main": info["main"], "icon": info["icon"]}],
+        "sys": {"sunrise": city["sys"]["sunrise"], "sunset": city["sys"]["sunset"]},
+        "name": city["name"],
+    }
+
+
+def make_payloads():
+    """
+    Builds the test bodies.
+
+    Returns:
+        dict: case -> {format -> body bytes}
+    """
+    city = json.loads(OWM_CITY)
+    cities = []
+    for i in range(GROUP_CITIES):
+        c = json.loads(OWM_CITY)
+        c["id"] = 2950159 + i
+        c["name"] = "City " + str(i)
+        c["main"]["temp"] = round(city["main"]["temp"] + i / 10, 2)
+        cities.append(c)
+    records = [weather._extract(c) + (c["name"],) for c in cities]
+    return {
+        "single": {
+            "owm_json": OWM_CITY.encode(),
+            "trimmed_json": dumps(trimmed(city)).encode(),
+            "compact": weather_codec.encode([weather._extract(city) + (city["name"],)]),
+        },
+        "group": {
+            "owm_json": dumps({"cnt": len(cities), "list": cities}).encode(),
+            "trimmed_json": dumps({"cnt": len(cities), "list": [trimmed(c) for c in cities]}).encode(),
+            "compact": weather_codec.encode(records),
+        },
+    }
+
+
+_buf = bytearray(weather_codec.MAX_PAYLOAD_BYTES)
+
+
+def parse_json(case, body):
+    if case == "single":
+        # response.json() reads the body into a new bytes object first
+        return [weather._extract(json.loads(bytes(body)))]
+    records = []
+    for raw in weather._iter_list_items(io.BytesIO(body)):
+        data = json.loads(raw)
+        records.append(weather._extract(data) + (data.get("name"),))
+    return records
+
+
+def parse_compact(case, body):
+    length = len(body)
+    _buf[:length] = body  # What response.raw.readinto() does
+    offset = weather_codec.HEADER_SIZE
+    records = []
+    for _ in range(weather_codec.record_count(_buf, length)):
+        record, offset = weather_codec.decode_record(_buf, offset, length)
+        records.append(record)
+    return records
+
+
+def measure_time_us(fn, iterations):
+    gc.collect()
+    start = ticks_us()
+    for _ in range(iterations):
+        fn()
+    return ticks_diff(ticks_us(), start) / iterations
+
+
+def measure_heap(fn):
+    gc.collect()
+    if hasattr(gc, "mem_alloc"):  # MicroPython
+        gc.disable()
+        before = gc.mem_alloc()
+        fn()
+        used = gc.mem_alloc() - before
+        gc.enable()
+        return used
+    import tracemalloc
+
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak
+
+
+def parse_args(argv):
+    iterations = DEFAULT_ITERATIONS
+    if len(argv) == 3 and argv[1] == "--iterations":
+        iterations = int(argv[2])
+    elif len(argv) != 1:
+        print(__doc__)
+        sys.exit(2)
+    return iterations
+
+
+def main() -> None:
+    """
+    Main function to run the benchmark and print the results.
+    """
+    iterations = parse_args(sys.argv)
+    payloads = make_payloads()
+    print("Runtime: " + sys.implementation.name + ", " + str(iterations) + " iterations")
+
+    failed = False
+    for case in ("single", "group"):
+        bodies = payloads[case]
+        reference = parse_json(case, bodies["owm_json"])
+        print("\n" + case + " (" + str(len(reference)) + " cities)")
+        print("  format           bytes   parse us   heap bytes")
+        for fmt in ("owm_json", "trimmed_json", "compact"):
+            body = bodies[fmt]
+            parse = parse_compact if fmt == "compact" else parse_json
+            got = parse(case, body)
+            if case == "single":
+                got = [r[:7] for r in got]  # get_data() has no name
+            if got != reference:
+                print("ERROR: " + fmt + " decodes differently: " + str(got[0]) + " != " + str(reference[0]))
+                failed = True
+
+            def run():
+                parse(case, body)
+
+            us = measure_time_us(run, iterations)
+            heap = measure_heap(run)
+            print("  {:<14} {:>7} {:>10.1f} {:>12}".format(fmt, len(body), us, heap))
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+"""
+This script cross-compiles the weather station modules to MicroPython bytecode (.mpy).
+
+Precompiled modules load faster on the ESP32 and avoid the compiler's heap peak
+during boot. `main.py` stays a source file (MicroPython always runs it from
+source) and only imports `app`, so nearly all code is loaded as bytecode.
+
+Every generated file is checked against the bytecode format of the bundled
+firmware (LVGL 9.4 / MicroPython 1.26.1, .mpy version 6.3).
+
+Requirements:
+    pip install mpy-cross==1.26.1
+"""
+
+import argparse
+import os
+import re
+import subprocess
+import sys
+
+# --- CONFIGURATION ---
+PROJECT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+OUTPUT_DIR = "build"  # Directory where the .mpy files will be saved
+
+# Files that must stay source files on the device
+SOURCE_ONLY = {"main.py", "boot.py", "secrets.py"}
+
+# Bytecode format of the bundled firmware (see firmware/README.MD)
+FIRMWARE_MICROPYTHON_VERSION = "1.26"
+MPY_VERSION = 6
+MPY_SUB_VERSION = 3
+
+# Native architectures as encoded in the .mpy header (0 = bytecode only)
+MPY_ARCH_XTENSAWIN = 9
+
+
+def find_modules(project_dir: str) -> list:
+    """
+    Lists the device modules that can be precompiled.
+
+    Args:
+        project_dir (str): The project root directory.
+
+    Returns:
+        list: The file names of the modules.
+    """
+    return sorted(
+        f for f in os.listdir(project_dir)
+        if f.endswith(".py") and f not in SOURCE_ONLY
+    )
+
+
+def check_mpy_cross() -> bool:
+    """
+    Checks that `mpy-cross` is installed and matches the firmware version.
+
+    Returns:
+        bool: True if a matching `mpy-cross` was found.
+    """
+    try:
+        result = subprocess.run(
+            [sys.executable, "-m", "mpy_cross", "--version"],
+            capture_output=True, text=True, check=True,
+        )
+    except (FileNotFoundError, subprocess.CalledProcessError):
+        print("ERROR: mpy-cross not found. Install it with: pip install mpy-cross==1.26.1")
+        return False
+
+    version = result.stdout.strip()
+    print(f"Using {version}")
+    match = re.search(r"v(\d+)\.(\d+)", version.split("emitting")[-1])
+    if not version.startswith(f"MicroPython v{FIRMWARE_MICROPYTHON_VERSION}") or not match:
+        print(f"ERROR: mpy-cross must match MicroPython {FIRMWARE_MICROPYTHON_VERSION}.x")
+        return False
+    if (int(match.group(1)), int(match.group(2))) != (MPY_VERSION, MPY_SUB_VERSION):
+        print(f"ERROR: mpy-cross emits .mpy v{match.group(1)}.{match.group(2)}, "
+              f"firmware expects v{MPY_VERSION}.{MPY_SUB_VERSION}")
+        return False
+    return True
+
+
+def verify_mpy(path: str, native: bool) -> bool:
+    """
+    Checks the header of a .mpy file against the firmware's bytecode format.
+
+    Header layout: b"M", version, (arch << 2) | sub-version, small int bits.
+
+    Args:
+        path (str): Path of the .mpy file.
+        native (bool): True if the file was built for the ESP32's native architecture.
+
+    Returns:
+        bool: True if the firmware can load the file.
+    """
+    with open(path, "rb") as f:
+        header = f.read(4)
+
+    if len(header) < 4 or header[0] != ord("M"):
+        print(f"ERROR: {path} is not a .mpy file")
+        return False
+    version = header[1]
+    sub_version = header[2] & 0x03
+    arch = header[2] >> 2
+    if (version, sub_version) != (MPY_VERSION, MPY_SUB_VERSION):
+        print(f"ERROR: {path} has .mpy v{version}.{sub_version}, "
+              f"firmware expects v{MPY_VERSION}.{MPY_SUB_VERSION}")
+        return False
+    if arch not in (0, MPY_ARCH_XTENSAWIN) or (native and arch != MPY_ARCH_XTENSAWIN):
+        print(f"ERROR: {path} targets native architecture {arch}, expected xtensawin")
+        return False
+    return True
+
+
+def compile_module(filename: str, opt_level: int, native: bool) -> bool:
+    """
+    Compiles one module with `mpy-cross` and verifies the result.
+
+    Args:
+        filename (str): File name of the module in the project directory.
+        opt_level (int): Optimisation level passed as `-O<n>` (0 keeps line numbers).
+        native (bool): Pass `-march=xtensawin` to allow @micropython.native code.
+
+    Returns:
+        bool: True if the module was compiled and verified successfully.
+    """
+    source_path = os.path.join(PROJECT_DIR, filename)
+    output_path = os.path.join(OUTPUT_DIR, os.path.splitext(filename)[0] + ".mpy")
+    cmd = [sys.executable, "-m", "mpy_cross", f"-O{opt_level}", "-o", output_path, source_path]
+    if native:
+        cmd.insert(3, "-march=xtensawin")
+
+    try:
+        subprocess.run(cmd, check=True)
+    except subprocess.CalledProcessError as e:
+        print(f"ERROR compiling {filename}: {e}")
+        return False
+    if not verify_mpy(output_path, native):
+        return False
+
+    src_size = os.path.getsize(source_path)
+    mpy_size = os.path.getsize(output_path)
+    print(f"  ✓ {filename} → {output_path} ({src_size} → {mpy_size} bytes)")
+    return True
+
+
+def main() -> None:
+    """
+    Main function to orchestrate the build.
+
+    It compiles all device modules except the source-only files and copies
+    `main.py` and `boot.py` next to the .mpy files, so the output directory can
+    be uploaded as is.
+    """
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("-O", dest="opt_level", type=int, default=0,
+                        help="optimisation level (default 0, keeps line numbers in tracebacks)")
+    parser.add_argument("--native", action="store_true",
+                        help="build for the ESP32's native architecture (xtensawin)")
+    args = parser.parse_args()
+
+    if not check_mpy_cross():
+        sys.exit(1)
+
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    modules = find_modules(PROJECT_DIR)
+    print(f"\nCompiling {len(modules)} modules to '{OUTPUT_DIR}'...")
+
+    ok = True
+    for filename in modules:
+        ok &= compile_module(filename, args.opt_level, args.native)
+    if not ok:
+        print("\nBuild failed.")
+        sys.exit(1)
+
+    for filename in ("main.py", "boot.py"):
+        with open(os.path.join(PROJECT_DIR, filename), "rb") as f_in:
+            with open(os.path.join(OUTPUT_DIR, filename), "wb") as f_out:
+                f_out.write(f_in.read())
+
+    print(f"\nBuild complete! Upload the contents of '{OUTPUT_DIR}' to your ESP32 (or use deploy.py).")
+    print("Remove the old .py versions of these modules from the device:")
+    print("MicroPython imports a .py file in preference to a .mpy file of the same name.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,496 @@
+"""
+This script deploys the weather station to one or more ESP32s over serial, uploading only the files that changed.
+
+Each device keeps a manifest (`/.deploy_manifest`, JSON) with the SHA-256 of
+every file this script uploaded to it. A deploy:
+1. precompiles the modules to .mpy with `build_mpy.py` (only modules whose
+   source is newer than their .mpy are compiled again),
+2. interrupts the running application and enters the raw REPL,
+3. reads the manifest and compares it with the hashes of the local files,
+4. uploads the changed files in chunks: one raw-REPL command per
+   `FILE_CHUNK_BYTES` of data (base64), written to the port in
+   `SERIAL_CHUNK_BYTES` pieces so the device's UART buffer does not overflow.
+   Each file is written to a temporary file, checked against its hash on the
+   device and only then renamed over the old one,
+5. removes the files that were deployed before but are no longer part of the
+   build, and the .py files that would shadow a deployed .mpy (and vice versa),
+6. writes the new manifest and resets the station.
+
+The manifest is written last, so an interrupted deploy is completed by the
+next one. With `--verify` the hashes are computed on the device instead of
+read from the manifest, e.g. after files were changed with another tool.
+Files the script did not deploy (the weather history, for example) are never
+touched.
+
+The application's watchdog keeps running after CTRL+C (see `watchdog.py`), so
+every command feeds it. Several ports are deployed in parallel, one thread per
+port. `scripts/simulate_deploy.py` runs the deploy against simulated devices.
+
+Requirements:
+    pip install pyserial mpy-cross==1.26.1
+
+Usage:
+    python3 scripts/deploy.py --port /dev/ttyUSB0 [--port /dev/ttyUSB1 ...]
+    python3 scripts/deploy.py --port /dev/ttyUSB0 --dry-run   # list the changes only
+    python3 scripts/deploy.py --port /dev/ttyUSB0 --source    # upload .py instead of .mpy
+"""
+
+import argparse
+import base64
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import build_mpy  # noqa: E402
+
+# --- CONFIGURATION ---
+PROJECT_DIR = build_mpy.PROJECT_DIR
+ASSET_DIRS = ("icons", "fonts")  # Uploaded with their .bin files to /icons and /fonts
+MANIFEST_PATH = "/.deploy_manifest"
+BAUDRATE = 115200
+FILE_CHUNK_BYTES = 1024  # File data per raw-REPL command
+SERIAL_CHUNK_BYTES = 256  # Written to the port at a time
+SERIAL_CHUNK_DELAY_S = 0.01  # Pause after each piece, so the device can empty its UART buffer
+TIMEOUT_S = 10
+INTERRUPT_ATTEMPTS = 10  # A CTRL+C is lost while the station is in light sleep
+
+RAW_REPL_BANNER = b"raw REPL; CTRL-B to exit\r\n>"
+
+# Defined on the device at the start of a deploy
+DEVICE_HELPERS = """
+import os, sys, hashlib, binascii
+_wd = sys.modules.get('watchdog')
+_feed = getattr(_wd and _wd.supervisor, 'feed', None) or (lambda: None)
+def _hash(path):
+    _feed()
+    h = hashlib.sha256()
+    buf = bytearray(512)
+    mv = memoryview(buf)
+    with open(path, 'rb') as f:
+        while True:
+            n = f.readinto(buf)
+            if not n:
+                break
+            h.update(mv[:n])
+    return binascii.hexlify(h.digest()).decode()
+def _makedirs(path):
+    p = ''
+    for part in path.split('/')[1:-1]:
+        p += '/' + part
+        try:
+            os.mkdir(p)
+        except OSError:
+            pass
+def _replace(tmp, path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+    os.rename(tmp, path)
+"""
+
+
+class DeployError(Exception):
+    """Raised when a device does not answer as expected or a command fails on it."""
+
+
+class RawREPL:
+    """
+    Runs code on a MicroPython device through its raw REPL.
+
+    Args:
+        port: An open `serial.Serial`, or an object with the same `read()`, `write()`
+              and `in_waiting` (see `simulate_deploy.py`).
+        timeout_s (float): How long to wait for an answer of the device.
+        chunk_delay_s (float): Pause after each `SERIAL_CHUNK_BYTES` written.
+    """
+
+    def __init__(self, port, timeout_s=TIMEOUT_S, chunk_delay_s=SERIAL_CHUNK_DELAY_S):
+        self._port = port
+        self._timeout_s = timeout_s
+        self._chunk_delay_s = chunk_delay_s
+        self._buffer = bytearray()  # Received, not yet consumed
+        self.bytes_sent = 0
+        self.commands = 0
+
+    def _write(self, data):
+        for i in range(0, len(data), SERIAL_CHUNK_BYTES):
+            self._port.write(data[i:i + SERIAL_CHUNK_BYTES])
+            if self._chunk_delay_s:
+                time.sleep(self._chunk_delay_s)
+        self.bytes_sent += len(data)
+
+    def _read_until(self, ending, timeout_s=None):
+        deadline = time.monotonic() + (timeout_s or self._timeout_s)
+        while True:
+            index = self._buffer.find(ending)
+            if index >= 0:
+                end = index + len(ending)
+                data = bytes(self._buffer[:end])
+                del self._buffer[:end]
+                return data
+            if time.monotonic() > deadline:
+                raise DeployError(
+                    f"No answer from the device (waiting for {ending!r}, got {bytes(self._buffer[-40:])!r})"
+                )
+            chunk = self._port.read(max(1, self._port.in_waiting))
+            if chunk:
+                self._buffer += chunk
+            else:
+                time.sleep(0.001)
+
+    def _drain(self):
+        time.sleep(0.05)
+        while self._port.in_waiting:
+            self._port.read(self._port.in_waiting)
+        self._buffer = bytearray()
+
+    def enter(self):
+        """Interrupts the running program and enters the raw REPL."""
+        for _ in range(INTERRUPT_ATTEMPTS):
+            self._port.write(b"\r\x03\x03")
+            self._drain()
+            self._port.write(b"\r\x01")
+            try:
+                self._read_until(RAW_REPL_BANNER, timeout_s=1)
+                return
+            except DeployError:
+                continue
+        raise DeployError("Could not enter the raw REPL")
+
+    def exec(self, code):
+        """
+        Runs `code` on the device.
+
+        Returns:
+            str: What the code printed.
+
+        Raises:
+            DeployError: If the code raised an exception on the device.
+        """
+        self._write(code.encode() + b"\x04")
+        self.commands += 1
+        self._read_until(b"OK")
+        out = self._read_until(b"\x04")[:-1]
+        err = self._read_until(b"\x04")[:-1]
+        self._read_until(b">")
+        if err:
+            raise DeployError(err.decode(errors="replace").strip().splitlines()[-1])
+        return out.decode()
+
+    def exit(self):
+        """Leaves the raw REPL."""
+        self._port.write(b"\x02")
+
+    def reset(self):
+        """Resets the device, which then boots into the application."""
+        self._write(b"import machine\nmachine.reset()\x04")
+        self._read_until(b"OK")
+
+
+def file_hash(data):
+    """Returns the SHA-256 of `data` as hex, like `_hash()` on the device."""
+    return hashlib.sha256(data).hexdigest()
+
+
+def collect_files(source=False):
+    """
+    Lists the files to deploy.
+
+    Args:
+        source (bool): Deploy the modules as .py instead of the precompiled .mpy.
+
+    Returns:
+        dict: Device path -> local path.
+    """
+    files = {}
+    for filename in build_mpy.find_modules(PROJECT_DIR):
+        if source:
+            files["/" + filename] = os.path.join(PROJECT_DIR, filename)
+        else:
+            name = os.path.splitext(filename)[0] + ".mpy"
+            files["/" + name] = os.path.join(build_mpy.OUTPUT_DIR, name)
+    for filename in sorted(build_mpy.SOURCE_ONLY):
+        path = os.path.join(PROJECT_DIR, filename)
+        if os.path.exists(path):  # secrets.py is not part of the repository
+            files["/" + filename] = path
+    for directory in ASSET_DIRS:
+        local_dir = os.path.join(PROJECT_DIR, directory)
+        if os.path.isdir(local_dir):
+            for filename in sorted(os.listdir(local_dir)):
+                if filename.endswith(".bin"):
+                    files[f"/{directory}/{filename}"] = os.path.join(local_dir, filename)
+    return files
+
+
+def shadowed_paths(files):
+    """
+    Returns the device paths that would shadow or duplicate a deployed module:
+    `/x.py` for a deployed `/x.mpy` (MicroPython prefers the .py) and `/x.mpy`
+    for a deployed `/x.py`.
+    """
+    paths = []
+    for path in files:
+        if path.count("/") != 1:
+            continue
+        base, ext = os.path.splitext(path)
+        if ext == ".mpy":
+            paths.append(base + ".py")
+        elif ext == ".py" and path[1:] not in build_mpy.SOURCE_ONLY:
+            paths.append(base + ".mpy")
+    return [p for p in paths if p not in files]
+
+
+def precompile(opt_level, native, rebuild=False):
+    """
+    Compiles the modules whose .mpy is missing or older than their source.
+
+    Args:
+        opt_level (int): Optimisation level for `mpy-cross`.
+        native (bool): Build for the ESP32's native architecture.
+        rebuild (bool): Compile all modules, e.g. after changing the options.
+
+    Returns:
+        bool: True if all modules are up to date.
+    """
+    modules = build_mpy.find_modules(PROJECT_DIR)
+    stale = []
+    for filename in modules:
+        source = os.path.join(PROJECT_DIR, filename)
+        output = os.path.join(build_mpy.OUTPUT_DIR, os.path.splitext(filename)[0] + ".mpy")
+        if rebuild or not os.path.exists(output) or os.path.getmtime(output) < os.path.getmtime(source):
+            stale.append(filename)
+    if not stale:
+        print(f"✓ All {len(modules)} modules are up to date in '{build_mpy.OUTPUT_DIR}'")
+        return True
+    if not build_mpy.check_mpy_cross():
+        return False
+
+    os.makedirs(build_mpy.OUTPUT_DIR, exist_ok=True)
+    print(f"Compiling {len(stale)} of {len(modules)} modules to '{build_mpy.OUTPUT_DIR}'...")
+    ok = True
+    for filename in stale:
+        ok &= build_mpy.compile_module(filename, opt_level, native)
+    return ok
+
+
+def _read_manifest(repl):
+    out = repl.exec(
+        "try:\n"
+        f"    with open({MANIFEST_PATH!r}) as f:\n"
+        "        print(f.read())\n"
+        "except OSError:\n"
+        "    print('{}')\n"
+    )
+    try:
+        return json.loads(out)
+    except ValueError:
+        return {}
+
+
+def _hash_on_device(repl, paths):
+    out = repl.exec(
+        f"for p in {tuple(paths)!r}:\n"
+        "    try:\n"
+        "        print(p, _hash(p))\n"
+        "    except OSError:\n"
+        "        pass\n"
+    )
+    hashes = {}
+    for line in out.splitlines():
+        path, _, digest = line.rpartition(" ")
+        hashes[path] = digest
+    return hashes
+
+
+def _remove(repl, paths):
+    if not paths:
+        return []
+    out = repl.exec(
+        f"for p in {tuple(paths)!r}:\n"
+        "    try:\n"
+        "        os.remove(p)\n"
+        "        print(p)\n"
+        "    except OSError:\n"
+        "        pass\n"
+    )
+    return out.split()
+
+
+def upload(repl, path, data):
+    """
+    Writes `data` to `path` on the device, through a temporary file that is
+    checked against the hash of `data` before it replaces the old file.
+
+    Raises:
+        DeployError: If the upload fails or the file arrived corrupted.
+    """
+    tmp = path + ".tmp"
+    repl.exec(f"_makedirs({path!r})\n_f = open({tmp!r}, 'wb')")
+    for i in range(0, len(data), FILE_CHUNK_BYTES):
+        chunk = base64.b64encode(data[i:i + FILE_CHUNK_BYTES])
+        repl.exec(f"_feed()\n_f.write(binascii.a2b_base64({chunk!r}))")
+    digest = repl.exec(f"_f.close()\nprint(_hash({tmp!r}))").strip()
+    if digest != file_hash(data):
+        repl.exec(f"os.remove({tmp!r})")
+        raise DeployError(f"{path} arrived corrupted")
+    repl.exec(f"_replace({tmp!r}, {path!r})")
+
+
+def deploy(repl, files, verify=False, dry_run=False, reset=True, log=print):
+    """
+    Brings the device up to date with the local files.
+
+    Args:
+        repl (RawREPL): Connection to the device.
+        files (dict): Device path -> local path, see `collect_files()`.
+        verify (bool): Hash the files on the device instead of trusting the manifest.
+        dry_run (bool): Only report what would change.
+        reset (bool): Reset the device afterwards, so it runs the new version.
+        log (callable): Receives the progress messages.
+
+    Returns:
+        dict: {"uploaded": [paths], "removed": [paths], "unchanged": count,
+               "upload_bytes": file bytes uploaded}
+    """
+    contents = {}
+    for path, local_path in files.items():
+        with open(local_path, "rb") as f:
+            contents[path] = f.read()
+    hashes = {path: file_hash(data) for path, data in contents.items()}
+
+    repl.enter()
+    repl.exec(DEVICE_HELPERS)
+    manifest = _read_manifest(repl)
+    device_hashes = _hash_on_device(repl, list(files)) if verify else manifest
+
+    changed = [path for path in files if device_hashes.get(path) != hashes[path]]
+    stale = [path for path in manifest if path not in files and path != MANIFEST_PATH]
+    result = {"uploaded": [], "removed": [], "unchanged": len(files) - len(changed), "upload_bytes": 0}
+    log(f"{len(changed)} changed, {result['unchanged']} unchanged, {len(stale)} to remove")
+    if dry_run:
+        for path in changed:
+            log(f"  would upload {path} ({len(contents[path])} bytes)")
+        for path in stale:
+            log(f"  would remove {path}")
+        repl.exit()
+        return result
+
+    for path in changed:
+        upload(repl, path, contents[path])
+        result["uploaded"].append(path)
+        result["upload_bytes"] += len(contents[path])
+        log(f"  ✓ {path} ({len(contents[path])} bytes)")
+
+    result["removed"] = _remove(repl, stale + shadowed_paths(files))
+    for path in result["removed"]:
+        log(f"  ✓ removed {path}")
+
+    if changed or result["removed"] or manifest.keys() != hashes.keys():
+        upload(repl, MANIFEST_PATH, json.dumps(hashes, sort_keys=True).encode())
+
+    if reset:
+        repl.reset()
+    else:
+        repl.exit()
+    return result
+
+
+def deploy_all(targets, files, verify=False, dry_run=False, reset=True, timeout_s=TIMEOUT_S,
+               chunk_delay_s=SERIAL_CHUNK_DELAY_S):
+    """
+    Deploys to several devices in parallel.
+
+    Args:
+        targets (list): (name, open_port) pairs; `open_port()` returns the open port.
+        files (dict): Device path -> local path, see `collect_files()`.
+        verify, dry_run, reset: See `deploy()`.
+        timeout_s, chunk_delay_s: See `RawREPL`.
+
+    Returns:
+        dict: Name -> result of `deploy()` plus "seconds", "bytes_sent" and
+              "commands", or {"error": message}.
+    """
+    lock = threading.Lock()
+
+    def log(name, msg):
+        with lock:
+            print(f"[{name}] {msg}")
+
+    def run(target):
+        name, open_port = target
+        started = time.monotonic()
+        port = None
+        try:
+            port = open_port()
+            repl = RawREPL(port, timeout_s, chunk_delay_s)
+            result = deploy(repl, files, verify, dry_run, reset, log=lambda msg: log(name, msg))
+            result["seconds"] = time.monotonic() - started
+            result["bytes_sent"] = repl.bytes_sent
+            result["commands"] = repl.commands
+            return name, result
+        except (DeployError, OSError) as e:
+            log(name, f"ERROR: {e}")
+            return name, {"error": str(e)}
+        finally:
+            if port is not None and hasattr(port, "close"):
+                port.close()
+
+    with ThreadPoolExecutor(max_workers=max(1, len(targets))) as pool:
+        return dict(pool.map(run, targets))
+
+
+def main() -> None:
+    """
+    Main function to parse the arguments, build and deploy.
+    """
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--port", action="append", required=True,
+                        help="serial port of a station; repeat to deploy to several in parallel")
+    parser.add_argument("--baudrate", type=int, default=BAUDRATE)
+    parser.add_argument("--source", action="store_true", help="upload the .py modules instead of .mpy")
+    parser.add_argument("-O", dest="opt_level", type=int, default=0, help="optimisation level for mpy-cross")
+    parser.add_argument("--native", action="store_true", help="build for xtensawin (see build_mpy.py)")
+    parser.add_argument("--rebuild", action="store_true", help="compile all modules, not only changed ones")
+    parser.add_argument("--verify", action="store_true", help="hash the files on the device")
+    parser.add_argument("--dry-run", action="store_true", help="only list the changes")
+    parser.add_argument("--no-reset", dest="reset", action="store_false", help="do not reset the stations")
+    args = parser.parse_args()
+
+    try:
+        import serial
+    except ImportError:
+        print("ERROR: pyserial not found. Install it with: pip install pyserial")
+        sys.exit(1)
+
+    if not args.source and not precompile(args.opt_level, args.native, args.rebuild):
+        print("\nBuild failed.")
+        sys.exit(1)
+
+    files = collect_files(args.source)
+    print(f"\nDeploying {len(files)} files to {len(args.port)} station(s)...")
+    targets = [(port, lambda port=port: serial.Serial(port, args.baudrate, timeout=0.1)) for port in args.port]
+    results = deploy_all(targets, files, args.verify, args.dry_run, args.reset)
+
+    print()
+    failed = False
+    for name, result in results.items():
+        if "error" in result:
+            print(f"ERROR: {name}: {result['error']}")
+            failed = True
+            continue
+        print(f"✓ {name}: {len(result['uploaded'])} uploaded ({result['upload_bytes']} bytes), "
+              f"{len(result['removed'])} removed, {result['unchanged']} unchanged "
+              f"in {result['seconds']:.1f} s")
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+"""
+This script tests the multi-location fetch (`weather.get_group_data()`) against a local stub HTTP server.
+
+The stub answers OWM group requests with a fixed response whose city objects
+contain nested objects and arrays, escaped quotes, backslashes and brackets
+inside strings. The body is sent with chunked transfer encoding, cut into
+chunks of a different size for each request (down to single bytes), so the
+chunk boundaries fall inside strings, escape sequences and nested objects. One
+request gets a Content-Length body instead.
+
+The script checks that:
+- every fetch returns every city record with the expected values,
+- all fetches go over one kept-alive connection (the stub counts the accepted
+  connections, `http_client` its connects),
+- the circuit breaker records every fetch as a success.
+
+Usage:
+    python3 scripts/group_fetch_test.py
+"""
+
+import json
+import os
+import socket
+import sys
+import threading
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import http_client  # noqa: E402
+import weather  # noqa: E402
+
+# --- CONFIGURATION ---
+CHUNK_SIZES = (1, 3, 7, 64, 1000, None)  # One request per size; None: Content-Length body
+
+CITIES = [
+    {
+        "coord": {"lon": 13.41, "lat": 52.52},
+        "sys": {"country": "DE", "timezone": 3600, "sunrise": 1773985954, "sunset": 1774030025},
+        "weather": [{"id": 500, "main": "Rain", "description": "light rain", "icon": "10d"}],
+        "main": {"temp": 7.5, "feels_like": 4.9, "temp_min": 6.1, "temp_max": 8.3,
+                 "pressure": 1009, "humidity": 87},
+        "visibility": 10000,
+        "wind": {"speed": 4.6, "deg": 240},
+        "clouds": {"all": 75},
+        "dt": 1774000000,
+        "id": 2950159,
+        "name": "Berlin",
+    },
+    {
+        "coord": {"lon": 11.58, "lat": 48.14},
+        "sys": {"country": "DE", "timezone": 3600, "sunrise": 1773984412, "sunset": 1774028311},
+        "weather": [
+            {"id": 803, "main": "Clouds", "description": "broken \"clouds\" {and} [more]", "icon": "04n"},
+            {"id": 701, "main": "Mist", "description": "mist", "icon": "50n"},
+        ],
+        "main": {"temp": -2.25, "pressure": 1021, "humidity": 64},
+        "wind": {"speed": 1.03, "deg": 90, "gust": 2.1},
+        "rain": {},
+        "id": 2867714,
+        "name": "München \\ \"City\"",
+    },
+    {
+        "coord": {"lon": 9.99, "lat": 53.55},
+        "sys": {"country": "DE"},
+        "weather": [{"id": 800, "main": "Clear", "description": "clear sky \\\\", "icon": "01d"}],
+        "main": {"temp": 12, "pressure": 1015, "humidity": 50},
+        "wind": {"speed": 0},
+        "extra": {"nested": {"deeper": [[1, 2], {"x": "}]"}]}},
+        "id": 2911298,
+        "name": "Hamburg {\"x\": [1]}",
+    },
+]
+
+
+def expected_records():
+    """The records `get_group_data()` should return for `CITIES`."""
+    return [
+        (
+            city["main"]["temp"], city["main"]["pressure"], city["main"]["humidity"],
+            city["wind"]["speed"], city["weather"][0]["description"], city["weather"][0]["main"],
+            city["weather"][0]["icon"], city["name"],
+        )
+        for city in CITIES
+    ]
+
+
+class StubServer(threading.Thread):
+    """
+    An HTTP/1.1 server that answers every request on a connection with the
+    group response, cut into chunks of the next size of `CHUNK_SIZES`.
+    """
+
+    def __init__(self):
+        super().__init__(daemon=True)
+        self.body = json.dumps({"cnt": len(CITIES), "list": CITIES}).encode()
+        self.connections = 0
+        self.requests = []
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.sock.bind(("127.0.0.1", 0))
+        self.sock.listen(4)
+        self.port = self.sock.getsockname()[1]
+
+    def run(self):
+        while True:
+            conn, _ = self.sock.accept()
+            self.connections += 1
+            threading.Thread(target=self._serve, args=(conn,), daemon=True).start()
+
+    def _serve(self, conn):
+        stream = conn.makefile("rb")
+        with conn:
+            while True:
+                request_line = stream.readline()
+                if not request_line:
+                    return
+                while stream.readline() not in (b"\r\n", b""):
+                    pass
+                self.requests.append(request_line.split()[1].decode())
+                chunk_size = CHUNK_SIZES[(len(self.requests) - 1) % len(CHUNK_SIZES)]
+                if chunk_size is None:
+                    conn.sendall(
+                        b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+                        b"Content-Length: %d\r\n\r\n" % len(self.body) + self.body
+                    )
+                    continue
+                conn.sendall(b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\nTransfer-Encoding: chunked\r\n\r\n")
+                for i in range(0, len(self.body), chunk_size):
+                    chunk = self.body[i:i + chunk_size]
+                    conn.sendall(b"%x\r\n" % len(chunk) + chunk + b"\r\n")
+                conn.sendall(b"0\r\n\r\n")
+
+
+def main() -> None:
+    """
+    Main function to run the test and print the results.
+    """
+    failed = []
+    server = StubServer()
+    server.start()
+
+    # Configure weather.py directly, without a secrets.py
+    weather.API_BASE_URL = f"http://127.0.0.1:{server.port}"
+    weather.API_KEY = "test"
+    weather.CITY_IDS = [city["id"] for city in CITIES]
+    expected = expected_records()
+
+    for chunk_size in CHUNK_SIZES:
+        records = weather.get_group_data()
+        framing = f"{chunk_size}-byte chunks" if chunk_size else "Content-Length"
+        wrong = [i for i, (got, want) in enumerate(zip(records, expected)) if got != want]
+        print(f"{framing}: {len(records)} of {len(expected)} records, wrong: {wrong}")
+        for i in wrong:
+            print(f"  got  {records[i]}\n  want {expected[i]}")
+        if len(records) != len(expected) or wrong:
+            failed.append(f"records with {framing}")
+
+    client = http_client.get_client("127.0.0.1", server.port)
+    print(
+        f"\n{len(server.requests)} requests over {server.connections} connection(s) "
+        f"(client connects: {client.connects}), request path: {server.requests[0]}"
+    )
+    if server.connections != 1 or client.connects != 1 or len(server.requests) != len(CHUNK_SIZES):
+        failed.append("keep-alive")
+    if not server.requests[0].startswith("/data/2.5/group?id=2950159,2867714,2911298&"):
+        failed.append("request path")
+    stats = weather.breaker.stats()
+    if stats["successes"] != len(CHUNK_SIZES) or stats["failures"]:
+        failed.append("breaker")
+
+    if failed:
+        print(f"\nERROR: Checks failed: {', '.join(failed)}")
+        sys.exit(1)
+    print("\nAll group fetch checks passed.")
+
+
+if __name__ == "__main__":
+    main()
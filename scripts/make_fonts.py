@@ -0,0 +1,170 @@
+"""
+This script generates glyph-minimal LVGL binary fonts (.bin) for the weather station.
+
+It scans the string literals of the UI (`display.py`) and the OpenWeatherMap
+weather description vocabulary, collects the characters that can actually be
+shown, and calls `lv_font_conv` to emit a subset font for each text role at the
+size it needs. The clock, for example, only gets the digits and the colon.
+
+Requirements:
+    npm install -g lv_font_conv
+    A TrueType font, e.g. Montserrat-Medium.ttf from https://fonts.google.com/specimen/Montserrat
+"""
+
+import ast
+import os
+import subprocess
+import sys
+
+# --- CONFIGURATION ---
+TTF_FONT = "Montserrat-Medium.ttf"  # Source font (path relative to the working directory)
+UI_SOURCE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "display.py")
+OUTPUT_DIR = "fonts"  # Directory where the .bin fonts will be saved
+BPP = 4  # Bits per pixel (anti-aliasing levels)
+
+# English weather descriptions returned by OWM (`weather[0].description` and `main`)
+# See https://openweathermap.org/weather-conditions
+OWM_VOCABULARY = [
+    "Thunderstorm", "Drizzle", "Rain", "Snow", "Mist", "Smoke", "Haze", "Dust",
+    "Fog", "Sand", "Ash", "Squall", "Tornado", "Clear", "Clouds",
+    "thunderstorm with light rain", "thunderstorm with rain", "thunderstorm with heavy rain",
+    "light thunderstorm", "heavy thunderstorm", "ragged thunderstorm",
+    "thunderstorm with light drizzle", "thunderstorm with drizzle",
+    "thunderstorm with heavy drizzle", "light intensity drizzle", "drizzle",
+    "heavy intensity drizzle", "light intensity drizzle rain", "drizzle rain",
+    "heavy intensity drizzle rain", "shower rain and drizzle",
+    "heavy shower rain and drizzle", "shower drizzle", "light rain", "moderate rain",
+    "heavy intensity rain", "very heavy rain", "extreme rain", "freezing rain",
+    "light intensity shower rain", "shower rain", "heavy intensity shower rain",
+    "ragged shower rain", "light snow", "snow", "heavy snow", "sleet",
+    "light shower sleet", "shower sleet", "light rain and snow", "rain and snow",
+    "light shower snow", "shower snow", "heavy shower snow", "mist", "smoke", "haze",
+    "sand/dust whirls", "fog", "sand", "dust", "volcanic ash", "squalls", "tornado",
+    "clear sky", "few clouds", "scattered clouds", "broken clouds", "overcast clouds",
+]
+
+DIGITS = "0123456789"
+
+# Font roles: name -> (size in px, characters)
+# The "text" role is filled from the scanned UI strings and the OWM vocabulary.
+FONT_ROLES = {
+    "clock": (28, DIGITS + ":-"),
+    "date": (16, DIGITS + ".-"),
+    "value": (22, DIGITS + ".-°C%hPam/s"),
+    "text": (14, ""),
+}
+
+
+def collect_ui_strings(path: str) -> set:
+    """
+    Collects all characters of the string literals in a Python source file.
+
+    Constant parts of f-strings are included as well. Docstrings, file paths and
+    the arguments of `print()` calls are skipped, since they are never rendered.
+
+    Args:
+        path (str): Path of the Python source file.
+
+    Returns:
+        set: The characters found.
+    """
+    with open(path, encoding="utf-8") as f:
+        tree = ast.parse(f.read())
+
+    skipped = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Call) and getattr(node.func, "id", None) == "print":
+            skipped.update(id(child) for child in ast.walk(node))
+
+    chars = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Constant) and isinstance(node.value, str):
+            if id(node) in skipped or "\n" in node.value or node.value.startswith("S:"):
+                continue
+            chars.update(node.value)
+    return chars
+
+
+def build_charset(role: str, ui_chars: set) -> str:
+    """
+    Returns the sorted, printable character set of a font role.
+
+    Args:
+        role (str): A key of `FONT_ROLES`.
+        ui_chars (set): Characters collected from the UI source.
+
+    Returns:
+        str: The characters to include in the font.
+    """
+    chars = set(FONT_ROLES[role][1])
+    if role == "text":
+        chars |= ui_chars
+        for word in OWM_VOCABULARY:
+            chars.update(word)
+        chars.update(DIGITS)
+    return "".join(sorted(c for c in chars if c.isprintable()))
+
+
+def convert_font(role: str, size: int, charset: str) -> bool:
+    """
+    Runs `lv_font_conv` for one font role.
+
+    Args:
+        role (str): Name of the font role, used for the file name.
+        size (int): Font size in pixels.
+        charset (str): The characters to include.
+
+    Returns:
+        bool: True if the font was generated successfully.
+    """
+    output_path = os.path.join(OUTPUT_DIR, f"{role}_{size}.bin")
+    cmd = [
+        "lv_font_conv",
+        "--font", TTF_FONT,
+        "--size", str(size),
+        "--bpp", str(BPP),
+        "--format", "bin",
+        "--no-compress",
+        "--symbols", charset,
+        "-o", output_path,
+    ]
+    print(f"Generating {output_path} ({len(charset)} glyphs)...")
+    try:
+        subprocess.run(cmd, check=True)
+    except FileNotFoundError:
+        print("ERROR: lv_font_conv not found. Install it with: npm install -g lv_font_conv")
+        return False
+    except subprocess.CalledProcessError as e:
+        print(f"ERROR generating {output_path}: {e}")
+        return False
+
+    print(f"-> Success: {output_path} ({os.path.getsize(output_path)} bytes)")
+    return True
+
+
+def main() -> None:
+    """
+    Main function to orchestrate the font generation.
+
+    It scans the UI strings and generates one subset font per role.
+    """
+    if not os.path.exists(TTF_FONT):
+        print(f"Source font '{TTF_FONT}' not found.")
+        print("Download Montserrat from Google Fonts and place the TTF file here.")
+        sys.exit(1)
+
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+
+    ui_chars = collect_ui_strings(UI_SOURCE)
+    print(f"Found {len(ui_chars)} distinct characters in the UI strings.")
+
+    ok = True
+    for role, (size, _) in FONT_ROLES.items():
+        ok &= convert_font(role, size, build_charset(role, ui_chars))
+
+    if ok:
+        print(f"\nFont generation complete! Copy the '{OUTPUT_DIR}' folder to your ESP32 (/fonts).")
+
+
+if __name__ == "__main__":
+    main()
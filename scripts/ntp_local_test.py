@@ -0,0 +1,198 @@
+"""
+This script tests the NTP client (`ntp.query_servers()`) against local UDP stand-in servers.
+
+The stand-ins listen on loopback addresses (127.0.0.x, one port) and answer
+like an NTP server whose clock is `SERVER_OFFSET_MS` ahead of the host. Each
+one simulates a network path: half of its delay passes before the request is
+received, the other half after the answer is sent. The test names resolve to
+these addresses through a wrapped `socket.getaddrinfo`, which also counts the
+lookups and can stall like a DNS server that does not answer.
+
+The script checks that:
+- the offset of every answer matches the stand-in's clock and its delay the
+  simulated path, and the sample with the smallest delay is chosen,
+- a silent server and one that answers too late cost no more than the timeout,
+- a stalled DNS lookup counts against the timeout: the servers after it are
+  skipped, the server before it still gets `ntp.NTP_MIN_WAIT_MS` to answer
+  (with an undistorted offset), and the next query skips the failed name
+  instead of waiting for the lookup again,
+- resolved addresses are cached, and the address of a server that did not
+  answer is looked up again.
+
+Usage:
+    python3 scripts/ntp_local_test.py
+"""
+
+import os
+import socket
+import struct
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import ntp  # noqa: E402
+
+# --- CONFIGURATION ---
+SERVER_OFFSET_MS = 2500  # The stand-ins' clock is ahead of the host by this
+TIMEOUT_MS = 600
+DNS_STALL_MS = 900
+OFFSET_TOLERANCE_MS = 5
+DELAY_TOLERANCE_MS = 15
+
+# name -> (loopback address, path delay in ms; None: silent)
+SERVERS = {
+    "near.ntp.test": ("127.0.0.1", 20),
+    "far.ntp.test": ("127.0.0.2", 120),
+    "silent.ntp.test": ("127.0.0.3", None),
+    "late.ntp.test": ("127.0.0.4", 3 * TIMEOUT_MS),
+}
+STALLED_NAME = "stalled.dns.test"
+
+
+class StandInServer(threading.Thread):
+    """
+    An NTP server on a loopback address that answers after `delay_ms` of simulated
+    network delay, with its clock `SERVER_OFFSET_MS` ahead. With `delay_ms` None
+    it never answers.
+    """
+
+    def __init__(self, address, port, delay_ms):
+        super().__init__(daemon=True)
+        self.delay_ms = delay_ms
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind((address, port))
+        self.port = self.sock.getsockname()[1]
+
+    def run(self):
+        while True:
+            try:
+                data, client = self.sock.recvfrom(48)
+            except OSError:
+                return
+            if self.delay_ms is None:
+                continue
+            threading.Thread(target=self._answer, args=(data, client), daemon=True).start()
+
+    def _answer(self, data, client):
+        time.sleep(self.delay_ms / 2000)  # Outbound half of the path
+        received_us = ntp._local_ntp_us() + SERVER_OFFSET_MS * 1000
+        reply = bytearray(48)
+        reply[0] = 0x24  # LI = 0, Version = 4, Mode = 4 (server)
+        reply[1] = 2  # Stratum
+        reply[24:32] = data[40:48]  # Originate timestamp: the client's transmit timestamp
+        struct.pack_into("!II", reply, 32, *ntp._to_ntp(received_us))
+        struct.pack_into("!II", reply, 40, *ntp._to_ntp(ntp._local_ntp_us() + SERVER_OFFSET_MS * 1000))
+        time.sleep(self.delay_ms / 2000)  # Return half
+        try:
+            self.sock.sendto(reply, client)
+        except OSError:
+            pass
+
+
+def start_servers():
+    """Starts one stand-in per entry of `SERVERS` on a common port. Returns (servers, port)."""
+    servers = {}
+    port = 0
+    for name, (address, delay_ms) in SERVERS.items():
+        server = StandInServer(address, port, delay_ms)
+        port = server.port
+        server.start()
+        servers[name] = server
+    return servers, port
+
+
+def wrap_dns(lookups):
+    """Resolves the test names to the stand-ins, counting the lookups in `lookups`."""
+    real_getaddrinfo = socket.getaddrinfo
+
+    def getaddrinfo(host, port, *args):
+        lookups[host] = lookups.get(host, 0) + 1
+        if host == STALLED_NAME:
+            time.sleep(DNS_STALL_MS / 1000)
+            raise OSError(-3, "DNS timeout")
+        if host in SERVERS:
+            host = SERVERS[host][0]
+        return real_getaddrinfo(host, port, *args)
+
+    socket.getaddrinfo = getaddrinfo
+
+
+def query(servers, port):
+    """Runs `ntp.query_servers()`. Returns (samples by server name, duration in ms)."""
+    started = time.perf_counter_ns()
+    samples = ntp.query_servers(servers, port=port, timeout_ms=TIMEOUT_MS)
+    return {s[0]: s for s in samples}, (time.perf_counter_ns() - started) // 1000000
+
+
+def main() -> None:
+    """
+    Main function to run the tests and print the results.
+    """
+    failed = []
+    _, port = start_servers()
+    lookups = {}
+    wrap_dns(lookups)
+
+    # All four servers: two answer, one is silent and one answers too late
+    samples, duration_ms = query(tuple(SERVERS), port)
+    print(f"Four servers (timeout {TIMEOUT_MS} ms): {len(samples)} answers in {duration_ms} ms")
+    for name, (_, delay_ms) in SERVERS.items():
+        sample = samples.get(name)
+        if sample is None:
+            print(f"  {name}: no answer")
+            if delay_ms is not None and delay_ms < TIMEOUT_MS:
+                failed.append(f"answer of {name}")
+            continue
+        _, offset_us, delay_us, stratum = sample
+        print(f"  {name}: offset {offset_us / 1000:.1f} ms, delay {delay_us / 1000:.1f} ms, stratum {stratum}")
+        if abs(offset_us / 1000 - SERVER_OFFSET_MS) > OFFSET_TOLERANCE_MS:
+            failed.append(f"offset of {name}")
+        if abs(delay_us / 1000 - delay_ms) > DELAY_TOLERANCE_MS:
+            failed.append(f"delay of {name}")
+    best = ntp.best_sample(list(samples.values()))
+    print(f"  Chosen: {best and best[0]}")
+    if best is None or best[0] != "near.ntp.test":
+        failed.append("best sample")
+    # The client's deadline is on the wall clock, which may tick slightly
+    # differently from the performance counter.
+    if not TIMEOUT_MS - 1 <= duration_ms < TIMEOUT_MS + 100:
+        failed.append("timeout")
+
+    # The addresses of the answering servers are cached, the others are looked up again
+    lookups.clear()
+    query(tuple(SERVERS), port)
+    print(f"\nSecond query, DNS lookups: {sorted(lookups)}")
+    if sorted(lookups) != ["late.ntp.test", "silent.ntp.test"]:
+        failed.append("DNS cache")
+
+    # A stalled DNS lookup between two servers
+    servers = ("near.ntp.test", STALLED_NAME, "far.ntp.test")
+    ntp._addresses.clear()
+    samples, duration_ms = query(servers, port)
+    print(
+        f"\nDNS lookup of {STALLED_NAME} stalls for {DNS_STALL_MS} ms: answers from {sorted(samples)} "
+        f"in {duration_ms} ms, far.ntp.test skipped: {'far.ntp.test' not in samples}"
+    )
+    near = samples.get("near.ntp.test")
+    if near:
+        print(f"  near.ntp.test: offset {near[1] / 1000:.1f} ms, delay {near[2] / 1000:.1f} ms")
+    if sorted(samples) != ["near.ntp.test"] or abs(near[1] / 1000 - SERVER_OFFSET_MS) > OFFSET_TOLERANCE_MS \
+            or duration_ms > DNS_STALL_MS + ntp.NTP_MIN_WAIT_MS + 100:
+        failed.append("stalled DNS")
+    lookups.clear()
+    samples, duration_ms = query(servers, port)
+    print(f"Next query: answers from {sorted(samples)} in {duration_ms} ms, DNS lookups: {sorted(lookups)}")
+    if sorted(samples) != ["far.ntp.test", "near.ntp.test"] or STALLED_NAME in lookups \
+            or duration_ms > SERVERS["far.ntp.test"][1] + 100:
+        failed.append("failed name skipped")
+
+    if failed:
+        print(f"\nERROR: Checks failed: {', '.join(failed)}")
+        sys.exit(1)
+    print("\nAll NTP checks passed.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,420 @@
+"""
+This script runs a caching proxy for the OpenWeatherMap API, for a fleet of weather stations.
+
+Stations in the same city ask OWM for the same data. With the proxy, each city
+is fetched from OWM at most once per `--ttl` seconds, however many stations
+ask for it:
+- responses are cached per city (a city name query or a city ID) for the TTL,
+- concurrent requests for a city that is being fetched wait for that fetch
+  instead of starting their own,
+- a group request (multi-location mode) is answered from the cache where
+  possible; only the missing cities are fetched, with one group request.
+
+The proxy serves the same paths as OWM (`/data/2.5/weather` and
+`/data/2.5/group`), so a station only needs `weather_base_url` in its
+`secrets.py`. The responses are trimmed to the fields `weather.py` reads
+(about a quarter of the OWM payload), and the connections are kept alive for
+the stations' `http_client`. With `mode=compact` in the query (stations with
+`"weather_format": "compact"`), the proxy answers with the binary payload of
+`weather_codec.py` instead, about 40 bytes per city.
+
+If `--api-key` (or the environment variable `OWM_API_KEY`) is set, the proxy
+uses its own key for OWM and the stations' keys are ignored. Errors from OWM
+are passed on and not cached; after a 429 the proxy sends no requests to OWM
+until its `Retry-After` has passed. `GET /stats` returns the proxy's counters.
+
+Usage:
+    python3 scripts/owm_proxy.py [--port 8090] [--ttl 600] [--api-key KEY]
+        [--upstream http://api.openweathermap.org]
+
+    # secrets.py on the stations
+    "weather_base_url": "http://<proxy-host>:8090",
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import weather_codec  # noqa: E402
+
+# --- CONFIGURATION ---
+DEFAULT_UPSTREAM = "http://api.openweathermap.org"
+DEFAULT_PORT = 8090
+DEFAULT_TTL_S = 600  # OWM updates its current weather about every 10 minutes
+UPSTREAM_TIMEOUT_S = 10
+IDLE_TIMEOUT_S = 30  # Keep-alive connections of the stations
+MAX_REQUEST_BYTES = 2048
+MAX_CACHE_ENTRIES = 10000
+GROUP_MAX_CITIES = 20  # Limit of the OWM group endpoint
+DEFAULT_RETRY_AFTER_S = 60
+
+WEATHER_PATH = "/data/2.5/weather"
+GROUP_PATH = "/data/2.5/group"
+JSON_TYPE = "application/json; charset=utf-8"
+COMPACT_TYPE = "application/octet-stream"
+
+
+def trim(data):
+    """
+    Reduces an OWM current weather object to the fields `weather.py` uses.
+
+    Args:
+        data (dict): A parsed OWM current weather object.
+
+    Returns:
+        dict: The trimmed object, with the same structure as the original.
+    """
+    main = data.get("main", {})
+    weather_info = data.get("weather", [{}])[0]
+    return {
+        "main": {
+            "temp": main.get("temp"),
+            "pressure": main.get("pressure"),
+            "humidity": main.get("humidity"),
+        },
+        "wind": {"speed": data.get("wind", {}).get("speed")},
+        "weather": [{
+            "description": weather_info.get("description"),
+            "main": weather_info.get("main"),
+            "icon": weather_info.get("icon"),
+        }],
+        "sys": {"sunrise": data.get("sys", {}).get("sunrise"), "sunset": data.get("sys", {}).get("sunset")},
+        "name": data.get("name"),
+    }
+
+
+def encode(obj):
+    return json.dumps(obj, separators=(",", ":")).encode()
+
+
+def record(obj):
+    """Returns the record of a trimmed object, as `weather.get_group_data()` returns it."""
+    main = obj["main"]
+    weather_info = obj["weather"][0]
+    return (
+        main["temp"], main["pressure"], main["humidity"], obj["wind"]["speed"],
+        weather_info["description"], weather_info["main"], weather_info["icon"], obj["name"],
+    )
+
+
+class UpstreamError(Exception):
+    """An error response from OWM (or a failed request, with status 502)."""
+
+    def __init__(self, status, body, retry_after_s=None):
+        super().__init__(f"HTTP {status}")
+        self.status = status
+        self.body = body
+        self.retry_after_s = retry_after_s
+
+
+class Proxy:
+    """
+    Per-city cache with request deduplication in front of the OWM API.
+
+    Args:
+        upstream (str): Scheme and host of the API.
+        ttl_s (float): How long a city's weather is served from the cache.
+        api_key (str, optional): Key used for all upstream requests. If None, the
+                                 key of the station's request is passed on.
+        clock (callable): Time source in seconds.
+    """
+
+    def __init__(self, upstream=DEFAULT_UPSTREAM, ttl_s=DEFAULT_TTL_S, api_key=None,
+                 clock=time.monotonic):
+        self.upstream = upstream.rstrip("/")
+        self.ttl_s = ttl_s
+        self.api_key = api_key
+        self.clock = clock
+        self._cache = {}  # key -> (expiry, trimmed object)
+        self._inflight = {}  # key -> future of the trimmed object
+        self._blocked_until = 0
+        self.stats = {
+            "requests": 0, "hits": 0, "misses": 0, "coalesced": 0,
+            "upstream_requests": 0, "upstream_errors": 0, "bytes_sent": 0,
+            "upstream_bytes": 0,
+        }
+
+    # --- Cache ---
+
+    def _cached(self, key):
+        entry = self._cache.get(key)
+        if entry and entry[0] > self.clock():
+            return entry[1]
+        return None
+
+    def _store(self, key, value):
+        now = self.clock()
+        if len(self._cache) >= MAX_CACHE_ENTRIES:
+            for k in [k for k, (expiry, _) in self._cache.items() if expiry <= now]:
+                del self._cache[k]
+        self._cache[key] = (now + self.ttl_s, value)
+
+    # --- Upstream ---
+
+    def _fetch_blocking(self, path, params):
+        url = f"{self.upstream}{path}?{urllib.parse.urlencode(params, safe=',')}"
+        try:
+            with urllib.request.urlopen(url, timeout=UPSTREAM_TIMEOUT_S) as response:
+                body = response.read()
+        except urllib.error.HTTPError as e:
+            retry_after = e.headers.get("Retry-After")
+            raise UpstreamError(
+                e.code, e.read() or encode({"cod": e.code}),
+                int(retry_after) if retry_after and retry_after.isdigit() else None,
+            )
+        except OSError as e:
+            raise UpstreamError(502, encode({"cod": 502, "message": f"upstream: {e}"}))
+        return body
+
+    async def _fetch(self, path, params):
+        """Sends one request to OWM, unless a 429 told the proxy to wait."""
+        wait_s = self._blocked_until - self.clock()
+        if wait_s > 0:
+            raise UpstreamError(429, encode({"cod": 429, "message": "rate limited"}), int(wait_s) + 1)
+        if self.api_key:
+            params["appid"] = self.api_key
+        self.stats["upstream_requests"] += 1
+        try:
+            body = await asyncio.to_thread(self._fetch_blocking, path, params)
+        except UpstreamError as e:
+            self.stats["upstream_errors"] += 1
+            if e.status == 429:
+                self._blocked_until = self.clock() + (e.retry_after_s or DEFAULT_RETRY_AFTER_S)
+            raise
+        self.stats["upstream_bytes"] += len(body)
+        return json.loads(body)
+
+    def _start(self, keys):
+        """Registers futures for keys that are about to be fetched."""
+        loop = asyncio.get_running_loop()
+        for key in keys:
+            future = loop.create_future()
+            future.add_done_callback(_consume_exception)
+            self._inflight[key] = future
+
+    def _finish(self, key, value=None, error=None):
+        future = self._inflight.pop(key)
+        if error is None:
+            self._store(key, value)
+            future.set_result(value)
+        else:
+            future.set_exception(error)
+
+    async def _lookup(self, keys, fetch_missing):
+        """
+        Returns the trimmed objects for `keys`, from the cache, from fetches in
+        flight, or by calling `fetch_missing(keys)` for the rest. Cities that OWM
+        does not know are left out.
+        """
+        results = {}
+        waiting = {}
+        missing = []
+        for key in keys:
+            value = self._cached(key)
+            if value is not None:
+                results[key] = value
+                self.stats["hits"] += 1
+            elif key in self._inflight:
+                waiting[key] = self._inflight[key]
+                self.stats["coalesced"] += 1
+            elif key not in missing:
+                missing.append(key)
+                self.stats["misses"] += 1
+
+        if missing:
+            self._start(missing)
+            try:
+                fetched = await fetch_missing(missing)
+            except UpstreamError as e:
+                for key in missing:
+                    self._finish(key, error=e)
+                raise
+            for key in missing:
+                value = fetched.get(key)
+                if value is None:
+                    self._finish(key, error=UpstreamError(
+                        404, encode({"cod": "404", "message": "city not found"})
+                    ))
+                else:
+                    self._finish(key, value)
+                    results[key] = value
+
+        for key, future in waiting.items():
+            try:
+                results[key] = await future
+            except UpstreamError as e:
+                if e.status != 404:
+                    raise
+        return results
+
+    async def weather(self, params):
+        """Serves `/data/2.5/weather` (a city name query)."""
+        q = params.get("q", "")
+        units = params.get("units", "standard")
+        lang = params.get("lang", "en")
+        key = ("q", q.strip().lower(), units, lang)
+
+        async def fetch(keys):
+            data = await self._fetch(WEATHER_PATH, dict(params))
+            return {key: trim(data)}
+
+        results = await self._lookup([key], fetch)
+        if key not in results:
+            raise UpstreamError(404, encode({"cod": "404", "message": "city not found"}))
+        return results[key]
+
+    async def group(self, params):
+        """Serves `/data/2.5/group` (a list of city IDs)."""
+        ids = [i for i in params.get("id", "").split(",") if i.strip()][:GROUP_MAX_CITIES]
+        units = params.get("units", "standard")
+        lang = params.get("lang", "en")
+        keys = [("id", i.strip(), units, lang) for i in ids]
+
+        async def fetch(missing):
+            upstream_params = dict(params, id=",".join(key[1] for key in missing))
+            data = await self._fetch(GROUP_PATH, upstream_params)
+            return {
+                ("id", str(item.get("id")), units, lang): trim(item)
+                for item in data.get("list", [])
+            }
+
+        results = await self._lookup(keys, fetch)
+        items = [results[key] for key in keys if key in results]
+        return {"cnt": len(items), "list": items}
+
+    # --- HTTP Server ---
+
+    async def route(self, target):
+        """
+        Answers one request target.
+
+        Returns:
+            tuple: (status, content type, body, extra headers)
+        """
+        path, _, query = target.partition("?")
+        params = dict(urllib.parse.parse_qsl(query))
+        if path == "/stats":
+            return 200, JSON_TYPE, encode(self.stats_snapshot()), ""
+        self.stats["requests"] += 1
+        compact = params.pop("mode", None) == "compact"
+        try:
+            if path == WEATHER_PATH:
+                obj = await self.weather(params)
+                if compact:
+                    return 200, COMPACT_TYPE, weather_codec.encode([record(obj)]), ""
+                return 200, JSON_TYPE, encode(obj), ""
+            if path == GROUP_PATH:
+                obj = await self.group(params)
+                if compact:
+                    records = [record(item) for item in obj["list"]]
+                    return 200, COMPACT_TYPE, weather_codec.encode(records), ""
+                return 200, JSON_TYPE, encode(obj), ""
+        except UpstreamError as e:
+            extra = f"Retry-After: {e.retry_after_s}\r\n" if e.retry_after_s else ""
+            return e.status, JSON_TYPE, e.body, extra
+        return 404, JSON_TYPE, encode({"cod": "404", "message": "not found"}), ""
+
+    def stats_snapshot(self):
+        """Returns the counters and the number of cached cities."""
+        return dict(self.stats, cached=len(self._cache), inflight=len(self._inflight))
+
+    async def handle(self, reader, writer):
+        """Serves the requests of one keep-alive connection."""
+        try:
+            while True:
+                try:
+                    head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), IDLE_TIMEOUT_S)
+                except (asyncio.TimeoutError, asyncio.IncompleteReadError,
+                        asyncio.LimitOverrunError, ConnectionError):
+                    return
+                if len(head) > MAX_REQUEST_BYTES:
+                    return
+                lines = head.decode("latin-1").split("\r\n")
+                parts = lines[0].split()
+                headers = {}
+                for line in lines[1:]:
+                    name, _, value = line.partition(":")
+                    headers[name.strip().lower()] = value.strip().lower()
+
+                if len(parts) < 3 or parts[0] != "GET":
+                    status, content_type, extra = 400, JSON_TYPE, ""
+                    body = encode({"cod": "400", "message": "bad request"})
+                    keep_alive = False
+                else:
+                    status, content_type, body, extra = await self.route(parts[1])
+                    if parts[2] == "HTTP/1.0":
+                        keep_alive = headers.get("connection") == "keep-alive"
+                    else:
+                        keep_alive = headers.get("connection") != "close"
+
+                writer.write(
+                    (
+                        f"HTTP/1.1 {status} {'OK' if status == 200 else 'Error'}\r\n"
+                        f"Content-Type: {content_type}\r\n"
+                        f"Content-Length: {len(body)}\r\n"
+                        f"{extra}"
+                        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+                    ).encode() + body
+                )
+                await writer.drain()
+                self.stats["bytes_sent"] += len(body)
+                if not keep_alive:
+                    return
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+
+def _consume_exception(future):
+    # Errors reach the waiting requests; without waiters they must not be logged as unhandled.
+    if not future.cancelled():
+        future.exception()
+
+
+async def start(proxy, host="0.0.0.0", port=DEFAULT_PORT):
+    """
+    Starts the proxy's HTTP server on the running event loop.
+
+    Returns:
+        The asyncio server object.
+    """
+    return await asyncio.start_server(proxy.handle, host, port, backlog=512)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Caching proxy for the OpenWeatherMap API.")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--ttl", type=float, default=DEFAULT_TTL_S, help="cache time per city in s")
+    parser.add_argument("--upstream", default=DEFAULT_UPSTREAM)
+    parser.add_argument("--api-key", default=os.environ.get("OWM_API_KEY"))
+    return parser.parse_args()
+
+
+async def main() -> None:
+    """
+    Main function to run the proxy until it is interrupted.
+    """
+    args = parse_args()
+    proxy = Proxy(args.upstream, args.ttl, args.api_key)
+    server = await start(proxy, args.host, args.port)
+    print(f"OWM proxy on port {args.port} -> {proxy.upstream} (TTL {args.ttl:g} s, "
+          f"{'own API key' if args.api_key else 'stations API keys'})")
+    async with server:
+        await server.serve_forever()
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
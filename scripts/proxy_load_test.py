@@ -0,0 +1,334 @@
+"""
+This script load-tests the OWM caching proxy (`owm_proxy.py`) with a simulated fleet of stations.
+
+A local stand-in for the OpenWeatherMap API answers the city name and group
+requests with full-size OWM payloads after a configurable latency, and counts
+the requests per city. The proxy runs in front of it, and hundreds of simulated
+stations fetch their city's weather through the proxy:
+- every station uses its own `http_client.HTTPClient` (keep-alive, like on
+  the device) and parses the responses with `weather.py`'s functions,
+- some stations use the multi-location mode (group requests), and some the
+  compact binary payload (`weather_codec.py`),
+- all stations start within a few milliseconds (the whole fleet booting after
+  a power cut), then fetch at the regular interval with jitter.
+
+Time is compressed: by default a 15-minute fetch interval becomes 3 seconds
+and the proxy's 10-minute TTL becomes 2 seconds.
+
+The script prints the requests the stations made and those that reached the
+stand-in, the latency percentiles, and the payload sizes. It exits with an
+error if a station got an error or an incomplete record, if a city was fetched
+more than once per TTL, or if the simultaneous start was not deduplicated.
+
+Usage:
+    python3 scripts/proxy_load_test.py [--stations N] [--seconds N] [--latency-ms N]
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import http_client  # noqa: E402
+import owm_proxy  # noqa: E402
+import weather  # noqa: E402
+import weather_codec  # noqa: E402
+
+# --- CONFIGURATION ---
+CITIES = [
+    (2950159, "Berlin", "DE"), (2867714, "Munich", "DE"), (2911298, "Hamburg", "DE"),
+    (2886242, "Cologne", "DE"), (2925533, "Frankfurt am Main", "DE"), (2825297, "Stuttgart", "DE"),
+    (2934246, "Dusseldorf", "DE"), (2879139, "Leipzig", "DE"), (2935517, "Dortmund", "DE"),
+    (2928810, "Essen", "DE"), (2944388, "Bremen", "DE"), (2935022, "Dresden", "DE"),
+]
+DEFAULT_STATIONS = 300
+DEFAULT_SECONDS = 12
+DEFAULT_LATENCY_MS = 150  # Round trip to the OWM API
+FETCH_INTERVAL_S = 3.0  # 15 minutes, compressed
+FETCH_JITTER_S = 0.1  # 30 seconds, compressed
+TTL_S = 2.0  # 10 minutes, compressed
+BOOT_SPREAD_S = 0.02  # All stations start within this window
+GROUP_SHARE = 0.2  # Share of stations in multi-location mode
+GROUP_SIZE = 3
+COMPACT_SHARE = 0.3  # Share of stations that ask for the compact payload
+
+
+class FakeOWM:
+    """
+    Local stand-in for the OWM API with full-size payloads.
+
+    Args:
+        latency_s (float): Delay before each response.
+    """
+
+    def __init__(self, latency_s):
+        self.latency_s = latency_s
+        self.by_name = {name.lower(): (city_id, name, country) for city_id, name, country in CITIES}
+        self.by_id = {str(city_id): (city_id, name, country) for city_id, name, country in CITIES}
+        self.requests = 0
+        self.fetches = {}  # ("q" or "id", city ID) -> list of fetch times
+        self.payload_bytes = []
+
+    def city(self, city_id, name, country):
+        """Returns a full current weather object, as OWM sends it."""
+        now = int(time.time())
+        temp = round(10 + 5 * math.sin(now / 60 + city_id % 7), 2)
+        return {
+            "coord": {"lon": 13.4105, "lat": 52.5244},
+            "weather": [{"id": 500, "main": "Rain", "description": "light rain", "icon": "10d"}],
+            "base": "stations",
+            "main": {
+                "temp": temp, "feels_like": temp - 1.2, "temp_min": temp - 0.8,
+                "temp_max": temp + 0.9, "pressure": 1012, "humidity": 81,
+                "sea_level": 1012, "grnd_level": 1006,
+            },
+            "visibility": 10000,
+            "wind": {"speed": 4.12, "deg": 240, "gust": 7.2},
+            "rain": {"1h": 0.31},
+            "clouds": {"all": 75},
+            "dt": now,
+            "sys": {"type": 2, "id": 2011538, "country": country, "sunrise": now - 20000,
+                    "sunset": now + 10000},
+            "timezone": 7200,
+            "id": city_id,
+            "name": name,
+            "cod": 200,
+        }
+
+    def _record(self, kind, city):
+        self.fetches.setdefault((kind, city[0]), []).append(time.monotonic())
+
+    async def handle(self, reader, writer):
+        try:
+            head = await reader.readuntil(b"\r\n\r\n")
+            target = head.split(b" ", 2)[1].decode()
+            path, _, query = target.partition("?")
+            params = dict(p.split("=", 1) for p in query.split("&") if "=" in p)
+            self.requests += 1
+            await asyncio.sleep(self.latency_s)
+
+            status = 200
+            if path == owm_proxy.WEATHER_PATH:
+                city = self.by_name.get(params.get("q", "").split(",")[0].replace("+", " ").lower())
+                if city:
+                    self._record("q", city)
+                    body = self.city(*city)
+                else:
+                    status, body = 404, {"cod": "404", "message": "city not found"}
+            elif path == owm_proxy.GROUP_PATH:
+                cities = [self.by_id[i] for i in params.get("id", "").split(",") if i in self.by_id]
+                for city in cities:
+                    self._record("id", city)
+                body = {"cnt": len(cities), "list": [self.city(*city) for city in cities]}
+            else:
+                status, body = 404, {"cod": "404", "message": "not found"}
+
+            data = json.dumps(body).encode()
+            if status == 200 and path == owm_proxy.WEATHER_PATH:
+                self.payload_bytes.append(len(data))
+            writer.write(
+                f"HTTP/1.1 {status} X\r\nContent-Type: application/json\r\n"
+                f"Content-Length: {len(data)}\r\nConnection: close\r\n\r\n".encode() + data
+            )
+            await writer.drain()
+        finally:
+            writer.close()
+
+
+class Station:
+    """
+    A simulated station that fetches through the proxy with its own keep-alive connection.
+
+    Args:
+        port (int): Port of the proxy.
+        city_ids (list): One city (single mode) or several (multi-location mode).
+        group (bool): Use group requests.
+        compact (bool): Ask for the compact payload.
+    """
+
+    def __init__(self, port, city_ids, group, compact):
+        self.client = http_client.HTTPClient("127.0.0.1", port)
+        self.city_ids = city_ids
+        self.group = group
+        self.compact = compact
+        # Like weather._payload_buf, but one per station thread
+        self.buf = bytearray(weather_codec.MAX_PAYLOAD_BYTES)
+        self.latencies_ms = []
+        self.errors = []
+        self.bytes = 0
+
+    def read_compact(self, response):
+        length = response.raw.readinto(self.buf)
+        if not self.group:
+            self.bytes = length
+        offset = weather_codec.HEADER_SIZE
+        records = []
+        for _ in range(weather_codec.record_count(self.buf, length)):
+            record, offset = weather_codec.decode_record(self.buf, offset, length)
+            records.append(record[:7])
+        return records
+
+    def path(self):
+        if self.group:
+            path = weather.GROUP_API_URL.format(",".join(map(str, self.city_ids)), "stationkey")
+        else:
+            _, name, country = next(c for c in CITIES if c[0] == self.city_ids[0])
+            path = weather.API_URL.format(name.replace(" ", "+"), country, "stationkey")
+        return path + weather.COMPACT_PARAM if self.compact else path
+
+    def fetch(self):
+        start = time.perf_counter()
+        try:
+            response = self.client.get(self.path())
+            try:
+                if response.status_code != 200:
+                    self.errors.append(f"HTTP {response.status_code}")
+                    return
+                if self.compact:
+                    records = self.read_compact(response)
+                    expected = len(self.city_ids)
+                elif self.group:
+                    records = [weather._extract(json.loads(raw))
+                               for raw in weather._iter_list_items(response.raw)]
+                    response.raw.read()
+                    expected = len(self.city_ids)
+                else:
+                    body = response.content
+                    self.bytes = len(body)
+                    records = [weather._extract(json.loads(body))]
+                    expected = 1
+            finally:
+                response.close()
+        except (OSError, ValueError) as e:
+            self.errors.append(str(e))
+            return
+        self.latencies_ms.append((time.perf_counter() - start) * 1000)
+        if len(records) != expected or any(v is None for r in records for v in r):
+            self.errors.append(f"incomplete records: {records}")
+
+    def run(self, start_at, stop_at):
+        next_at = start_at
+        while True:
+            delay = next_at - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            if time.monotonic() >= stop_at:
+                break
+            self.fetch()
+            next_at += FETCH_INTERVAL_S + random.uniform(-FETCH_JITTER_S, FETCH_JITTER_S)
+        self.client.close()
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p / 100))]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Load test for the OWM caching proxy.")
+    parser.add_argument("--stations", type=int, default=DEFAULT_STATIONS)
+    parser.add_argument("--seconds", type=float, default=DEFAULT_SECONDS)
+    parser.add_argument("--latency-ms", type=float, default=DEFAULT_LATENCY_MS)
+    return parser.parse_args()
+
+
+def main() -> None:
+    """
+    Main function to run the load test and check the results.
+    """
+    args = parse_args()
+    random.seed(1)
+
+    # Stand-in and proxy run on one event loop in a background thread
+    loop = asyncio.new_event_loop()
+    owm = FakeOWM(args.latency_ms / 1000)
+    proxy_ready = threading.Event()
+    ports = {}
+
+    async def serve():
+        owm_server = await asyncio.start_server(owm.handle, "127.0.0.1", 0, backlog=512)
+        ports["owm"] = owm_server.sockets[0].getsockname()[1]
+        proxy = owm_proxy.Proxy(f"http://127.0.0.1:{ports['owm']}", TTL_S, api_key="proxykey")
+        proxy_server = await owm_proxy.start(proxy, "127.0.0.1", 0)
+        ports["proxy"] = proxy_server.sockets[0].getsockname()[1]
+        ports["instance"] = proxy
+        proxy_ready.set()
+        await asyncio.Event().wait()
+
+    threading.Thread(target=loop.run_until_complete, args=(serve(),), daemon=True).start()
+    proxy_ready.wait()
+    proxy = ports["instance"]
+
+    stations = []
+    for i in range(args.stations):
+        compact = random.random() < COMPACT_SHARE
+        if random.random() < GROUP_SHARE:
+            city_ids = [c[0] for c in random.sample(CITIES, GROUP_SIZE)]
+            stations.append(Station(ports["proxy"], city_ids, True, compact))
+        else:
+            city_ids = [CITIES[i % len(CITIES)][0]]
+            stations.append(Station(ports["proxy"], city_ids, False, compact))
+
+    boot = time.monotonic() + 0.5
+    stop_at = boot + args.seconds
+    threads = [
+        threading.Thread(target=s.run, args=(boot + random.uniform(0, BOOT_SPREAD_S), stop_at))
+        for s in stations
+    ]
+    print(f"{args.stations} stations, {len(CITIES)} cities, {args.seconds:g} s "
+          f"(fetch every {FETCH_INTERVAL_S:g} s, TTL {TTL_S:g} s, OWM latency {args.latency_ms:g} ms)")
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    latencies = [ms for s in stations for ms in s.latencies_ms]
+    errors = [e for s in stations for e in s.errors]
+    requests = len(latencies) + len(errors)
+    stats = proxy.stats_snapshot()
+    trimmed = max(s.bytes for s in stations if not s.compact)
+    compact = max(s.bytes for s in stations if s.compact)
+    full = max(owm.payload_bytes) if owm.payload_bytes else 0
+
+    print(f"\nStation requests:     {requests} ({len(errors)} errors)")
+    print(f"Requests to OWM:      {owm.requests} ({stats['hits']} cache hits, "
+          f"{stats['coalesced']} joined a fetch in flight, {stats['misses']} misses)")
+    print(f"Latency:              p50 {percentile(latencies, 50):.1f} ms, "
+          f"p95 {percentile(latencies, 95):.1f} ms, max {max(latencies):.1f} ms")
+    print(f"Payload per city:     {trimmed} bytes JSON, {compact} bytes compact (OWM: {full} bytes)")
+
+    failed = []
+    if errors:
+        print(f"First errors: {errors[:3]}")
+        failed.append("station errors")
+
+    # Each city may be fetched once per TTL by name and once by ID (the proxy
+    # caches both separately, it cannot know a name's ID before the response).
+    windows = math.ceil(args.seconds / TTL_S) + 1
+    too_often = {key: len(times) for key, times in owm.fetches.items() if len(times) > windows}
+    if too_often:
+        print(f"Fetched too often: {too_often}")
+        failed.append("cache")
+    first = [sum(1 for t in times if t < boot + TTL_S / 2) for times in owm.fetches.values()]
+    if max(first) > 1:
+        print(f"Simultaneous start: up to {max(first)} fetches of one city")
+        failed.append("deduplication")
+    if not full or trimmed > full / 2 or not compact or compact > trimmed / 2:
+        failed.append("payload size")
+
+    if failed:
+        print(f"\nERROR: Checks failed: {', '.join(failed)}")
+        sys.exit(1)
+    print("\nLoad test passed.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,440 @@
+"""
+This script benchmarks the rendering of the real UI (`display.py`) without a device.
+
+It runs under the Unix port of lvgl_micropython (no SDL needed) and replaces
+the ST7789 with a memory framebuffer display of the same size, color format
+and draw buffer size. The clock of `display.py` is simulated, so every run
+renders exactly the same frames.
+
+Measured scenarios:
+- "create_ui": `display.create_ui()` (time and heap),
+- "first_frame": the first full frame,
+- "second": the per-second clock tick (partial frame),
+- "minute": a minute rollover (partial frame),
+- "weather": a weather data update (partial frame),
+- "full": a full redraw of the screen,
+- "page_<name>": changing to a page with its wipe, including the first build
+  of the page (time, flushed pixels, and the page's build time and heap).
+
+For each frame, the script records the `lv.refr_now()` time (the number
+`display.render_stats` reports on the device), the time of the whole
+`display_handler()` call, the invalidated areas and pixels, and the flushed
+stripes. The framebuffer can be saved as PNG files for visual comparison.
+
+`--styles local` builds the UI with the properties of the shared styles as
+local style properties on every widget (`display.LOCAL_STYLES`), as before
+the styles were shared. Saving one run as the baseline of the other shows the
+heap of `create_ui()` and of each page for both, and the CRCs show that both
+render the same pixels.
+
+Host timings are not ESP32 timings, so a run is compared with a baseline
+recorded on the same machine: with `--baseline` the script exits with an error
+if a scenario got slower than the tolerance allows, or if a frame's pixels
+changed (CRC of the framebuffer).
+
+The fonts and icons are loaded from `--root` (the directory that is uploaded
+to the device, with `fonts/` and `icons/`); missing files fall back to the
+built-in font and empty images, as on the device.
+
+Usage:
+    micropython scripts/render_benchmark.py [--frames N] [--lines N] [--png DIR]
+        [--root DIR] [--save FILE] [--baseline FILE] [--tolerance PERCENT]
+        [--styles shared|local]
+"""
+
+import binascii
+import gc
+import json
+import struct
+import sys
+import time
+
+import lvgl as lv
+
+SCRIPT_DIR = sys.argv[0].rsplit("/", 1)[0] if "/" in sys.argv[0] else "."
+sys.path.insert(0, SCRIPT_DIR + "/..")
+
+import display  # noqa: E402
+import fs_driver  # noqa: E402
+
+# --- CONFIGURATION ---
+WIDTH = 240  # Same as display_setup.py
+HEIGHT = 320
+BYTES_PER_PIXEL = 2  # RGB565
+DEFAULT_LINES = 32  # Draw buffer lines of the "balanced" profile
+DEFAULT_FRAMES = 60
+DEFAULT_TOLERANCE = 20  # Percent
+START_TIME = (2025, 1, 15, 13, 58, 30, 2, 15)  # Simulated local time at the start
+SAMPLE_WEATHER = [
+    ((12.5, 1013, 80, 3.2, "light rain", "Rain"), "10d"),
+    ((13.1, 1012, 76, 4.8, "broken clouds", "Clouds"), "04d"),
+]
+
+# Options and their defaults
+OPTIONS = {
+    "--frames": DEFAULT_FRAMES,
+    "--lines": DEFAULT_LINES,
+    "--png": None,
+    "--root": ".",
+    "--save": None,
+    "--baseline": None,
+    "--tolerance": DEFAULT_TOLERANCE,
+    "--styles": "shared",
+}
+
+
+class SimTime:
+    """
+    Stands in for the `time` module in `display.py`: ticks come from the real
+    clock, the local time from a simulated clock that the benchmark advances.
+    """
+
+    def __init__(self, start):
+        self.seconds = time.mktime(start)
+
+    def advance(self, seconds):
+        self.seconds += seconds
+
+    def localtime(self, secs=None):
+        return time.localtime(self.seconds if secs is None else secs)
+
+    def ticks_ms(self):
+        return time.ticks_ms()
+
+    def ticks_us(self):
+        return time.ticks_us()
+
+    def ticks_diff(self, new, old):
+        return time.ticks_diff(new, old)
+
+
+class MemoryDisplay:
+    """
+    LVGL display that flushes into a full RGB565 framebuffer in RAM.
+
+    Args:
+        lines (int): Lines per draw buffer. Two buffers are used, as on the device.
+
+    Attributes:
+        framebuffer (bytearray): The displayed image.
+        areas (int): Invalidated areas since the last `reset_counters()`.
+        area_pixels (int): Pixels of the invalidated areas.
+        stripes (int): Flushed stripes.
+        flushed_pixels (int): Pixels of the flushed stripes.
+    """
+
+    def __init__(self, lines):
+        self.framebuffer = bytearray(WIDTH * HEIGHT * BYTES_PER_PIXEL)
+        size = WIDTH * lines * BYTES_PER_PIXEL
+        self._buf1 = bytearray(size)
+        self._buf2 = bytearray(size)
+        self.disp = lv.display_create(WIDTH, HEIGHT)
+        self.disp.set_color_format(lv.COLOR_FORMAT.RGB565)
+        self.disp.set_buffers(self._buf1, self._buf2, size, lv.DISPLAY_RENDER_MODE.PARTIAL)
+        self.disp.set_flush_cb(self._flush_cb)
+        self.disp.add_event_cb(self._invalidate_cb, lv.EVENT.INVALIDATE_AREA, None)
+        self.reset_counters()
+
+    def reset_counters(self):
+        self.areas = 0
+        self.area_pixels = 0
+        self.stripes = 0
+        self.flushed_pixels = 0
+
+    def _invalidate_cb(self, event):
+        area = lv.area_t.__cast__(event.get_param())
+        self.areas += 1
+        self.area_pixels += (area.x2 - area.x1 + 1) * (area.y2 - area.y1 + 1)
+
+    def _flush_cb(self, disp, area, px_map):
+        width = area.x2 - area.x1 + 1
+        height = area.y2 - area.y1 + 1
+        row_bytes = width * BYTES_PER_PIXEL
+        data = px_map.__dereference__(row_bytes * height)
+        fb = self.framebuffer
+        for row in range(height):
+            dst = ((area.y1 + row) * WIDTH + area.x1) * BYTES_PER_PIXEL
+            src = row * row_bytes
+            fb[dst:dst + row_bytes] = data[src:src + row_bytes]
+        self.stripes += 1
+        self.flushed_pixels += width * height
+        disp.flush_ready()
+
+    def crc(self):
+        """Returns the CRC32 of the framebuffer, for detecting pixel changes."""
+        return binascii.crc32(self.framebuffer) & 0xFFFFFFFF
+
+    def save_png(self, path):
+        """
+        Saves the framebuffer as an RGB PNG file.
+
+        The image data is stored in uncompressed deflate blocks, so no zlib
+        compressor is needed on the Unix port.
+        """
+        fb = self.framebuffer
+        raw = bytearray((WIDTH * 3 + 1) * HEIGHT)
+        out = 0
+        for y in range(HEIGHT):
+            raw[out] = 0  # Filter type "None"
+            out += 1
+            for x in range(WIDTH):
+                i = (y * WIDTH + x) * 2
+                v = fb[i] | (fb[i + 1] << 8)
+                r = (v >> 11) & 0x1F
+                g = (v >> 5) & 0x3F
+                b = v & 0x1F
+                raw[out] = (r << 3) | (r >> 2)
+                raw[out + 1] = (g << 2) | (g >> 4)
+                raw[out + 2] = (b << 3) | (b >> 2)
+                out += 3
+
+        with open(path, "wb") as f:
+            f.write(b"\x89PNG\r\n\x1a\n")
+            _write_chunk(f, b"IHDR", struct.pack(">IIBBBBB", WIDTH, HEIGHT, 8, 2, 0, 0, 0))
+            _write_chunk(f, b"IDAT", _zlib_stored(raw))
+            _write_chunk(f, b"IEND", b"")
+
+
+def _write_chunk(f, kind, data):
+    f.write(struct.pack(">I", len(data)))
+    f.write(kind)
+    f.write(data)
+    f.write(struct.pack(">I", binascii.crc32(data, binascii.crc32(kind)) & 0xFFFFFFFF))
+
+
+def _zlib_stored(data):
+    """Wraps data in a zlib stream of uncompressed deflate blocks."""
+    out = bytearray(b"\x78\x01")
+    pos = 0
+    while True:
+        block = data[pos:pos + 0xFFFF]
+        pos += len(block)
+        last = pos >= len(data)
+        out += struct.pack("<BHH", 1 if last else 0, len(block), len(block) ^ 0xFFFF)
+        out += block
+        if last:
+            break
+    a, b = 1, 0
+    for byte in data:
+        a = (a + byte) % 65521
+        b = (b + a) % 65521
+    out += struct.pack(">I", (b << 16) | a)
+    return bytes(out)
+
+
+def register_fs(root):
+    """Registers the "S:" drive of the UI, with its paths below `root`."""
+
+    def open_cb(drv, path, mode):
+        return fs_driver.fs_open_cb(drv, root + path, mode)
+
+    fs_drv = lv.fs_drv_t()
+    fs_drv.init()
+    fs_drv.letter = ord("S")
+    fs_drv.cache_size = 500
+    fs_drv.open_cb = open_cb
+    fs_drv.close_cb = fs_driver.fs_close_cb
+    fs_drv.read_cb = fs_driver.fs_read_cb
+    fs_drv.write_cb = fs_driver.fs_write_cb
+    fs_drv.seek_cb = fs_driver.fs_seek_cb
+    fs_drv.tell_cb = fs_driver.fs_tell_cb
+    fs_drv.register()
+    return fs_drv
+
+
+def parse_args(argv):
+    """Parses `--option value` pairs into a copy of `OPTIONS`."""
+    options = dict(OPTIONS)
+    i = 1
+    while i < len(argv):
+        name = argv[i]
+        if name not in options or i + 1 >= len(argv):
+            print(__doc__)
+            sys.exit(2)
+        value = argv[i + 1]
+        options[name] = int(value) if isinstance(OPTIONS[name], int) else value
+        i += 2
+    return options
+
+
+def run_frame(screen, name, frame, png_dir):
+    """
+    Runs one display tick and records its counters.
+
+    Returns:
+        dict: {"render_us", "handler_us", "areas", "area_px", "stripes", "flushed_px", "crc"}
+    """
+    screen.reset_counters()
+    start_us = time.ticks_us()
+    display.display_handler()
+    handler_us = time.ticks_diff(time.ticks_us(), start_us)
+    result = {
+        "render_us": display.render_stats.last_us,
+        "handler_us": handler_us,
+        "areas": screen.areas,
+        "area_px": screen.area_pixels,
+        "stripes": screen.stripes,
+        "flushed_px": screen.flushed_pixels,
+        "crc": screen.crc(),
+    }
+    if png_dir and frame == 0:
+        screen.save_png(f"{png_dir}/{name}.png")
+    return result
+
+
+def summarize(frames):
+    """Returns the averages and maxima of a scenario's frames."""
+    n = len(frames)
+    return {
+        "frames": n,
+        "render_us": sum(f["render_us"] for f in frames) // n,
+        "render_max_us": max(f["render_us"] for f in frames),
+        "handler_us": sum(f["handler_us"] for f in frames) // n,
+        "areas": sum(f["areas"] for f in frames) / n,
+        "area_px": sum(f["area_px"] for f in frames) // n,
+        "stripes": sum(f["stripes"] for f in frames) / n,
+        "flushed_px": sum(f["flushed_px"] for f in frames) // n,
+        "crc": frames[0]["crc"],
+    }
+
+
+def run_scenarios(screen, sim_time, options):
+    """
+    Runs all scenarios.
+
+    Returns:
+        dict: Scenario name -> summary (see `summarize()`).
+    """
+    results = {}
+    count = options["--frames"]
+    png_dir = options["--png"]
+
+    gc.collect()
+    start_us = time.ticks_us()
+    display.create_ui()
+    results["create_ui"] = {
+        "time_us": time.ticks_diff(time.ticks_us(), start_us),
+        "heap_bytes": display.ui_heap_bytes,
+    }
+
+    display.set_weather_data(*SAMPLE_WEATHER[0])
+    display.set_weather_status(True)
+    results["first_frame"] = summarize([run_frame(screen, "first_frame", 0, png_dir)])
+
+    def second(i):
+        sim_time.advance(1)
+
+    def minute(i):
+        sim_time.advance(60)
+
+    def weather(i):
+        sim_time.advance(1)
+        display.set_weather_data(*SAMPLE_WEATHER[(i + 1) % len(SAMPLE_WEATHER)])
+        display.set_weather_status(True)
+
+    def full(i):
+        sim_time.advance(1)
+        display.ui.main_screen.invalidate()
+
+    for name, step in (("second", second), ("minute", minute), ("weather", weather), ("full", full)):
+        frames = []
+        for i in range(count):
+            step(i)
+            frames.append(run_frame(screen, name, i, png_dir))
+        results[name] = summarize(frames)
+
+    for name in ("forecast", "history", "system", "weather"):
+        screen.reset_counters()
+        start_us = time.ticks_us()
+        wiping = display.show_page(name)
+        while wiping:
+            wiping = display.page_wipe_step()
+        page = display.pages[name]
+        results["page_" + name] = {
+            "time_us": time.ticks_diff(time.ticks_us(), start_us),
+            "stripes": screen.stripes,
+            "flushed_px": screen.flushed_pixels,
+            "build_us": page.build_us,
+            "heap_bytes": page.heap_bytes,
+        }
+        if png_dir:
+            screen.save_png(f"{png_dir}/page_{name}.png")
+    return results
+
+
+def print_results(results):
+    ui = results["create_ui"]
+    print(f"create_ui: {ui['time_us']} us, {ui['heap_bytes']} bytes of heap")
+    print(f"{'scenario':<12} {'render':>9} {'max':>9} {'handler':>9} {'areas':>6} "
+          f"{'area px':>8} {'stripes':>7} {'flushed px':>10}  crc")
+    for name, r in results.items():
+        if "render_us" not in r:
+            continue
+        print(f"{name:<12} {r['render_us']:>6} us {r['render_max_us']:>6} us {r['handler_us']:>6} us "
+              f"{r['areas']:>6.1f} {r['area_px']:>8} {r['stripes']:>7.1f} {r['flushed_px']:>10}  "
+              f"{r['crc']:08x}")
+    for name, r in results.items():
+        if name.startswith("page_"):
+            print(f"{name}: {r['time_us']} us, {r['stripes']} stripes, {r['flushed_px']} px flushed "
+                  f"(build {r['build_us']} us, {r['heap_bytes']} bytes of heap)")
+
+
+def compare(results, baseline, tolerance):
+    """
+    Compares the results with a baseline.
+
+    Returns:
+        bool: True if no scenario got slower than the tolerance allows and no frame changed.
+    """
+    ok = True
+    for name, base in baseline.items():
+        current = results.get(name)
+        if current is None:
+            continue
+        if "heap_bytes" in base:
+            print(f"{name}: {current['heap_bytes']} bytes of heap (baseline {base['heap_bytes']} bytes)")
+        key = "time_us" if "time_us" in base else "render_us"
+        limit = base[key] * (100 + tolerance) // 100
+        if current[key] > limit:
+            print(f"ERROR: '{name}' got slower: {current[key]} us (baseline {base[key]} us, "
+                  f"limit {limit} us)")
+            ok = False
+        if "crc" in base and current["crc"] != base["crc"]:
+            print(f"ERROR: '{name}' renders different pixels (crc {current['crc']:08x}, "
+                  f"baseline {base['crc']:08x})")
+            ok = False
+    return ok
+
+
+def main():
+    """
+    Main function to set up the headless display, run the scenarios and check the results.
+    """
+    options = parse_args(sys.argv)
+
+    lv.init()
+    screen = MemoryDisplay(options["--lines"])
+    register_fs(options["--root"])
+    sim_time = SimTime(START_TIME)
+    display.time = sim_time
+    display.RENDER_STATS_INTERVAL = 1 << 30  # Keep the statistics out of the output
+    display.LOCAL_STYLES = options["--styles"] == "local"
+
+    results = run_scenarios(screen, sim_time, options)
+    print_results(results)
+
+    if options["--save"]:
+        with open(options["--save"], "w") as f:
+            json.dump(results, f)
+        print(f"Baseline saved to {options['--save']}")
+
+    if options["--baseline"]:
+        with open(options["--baseline"]) as f:
+            baseline = json.load(f)
+        if not compare(results, baseline, options["--tolerance"]):
+            sys.exit(1)
+        print(f"\nWithin {options['--tolerance']}% of the baseline, no pixel changes.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+"""
+This script checks the circuit breaker (`circuit_breaker.py`) on the host with an injected clock.
+
+Every call of the breaker gets the simulated time as `now_ms`, so no real time
+passes. A client tries a call every `STEP_MS` against a simulated API that is
+down for three hours; the other cases drive single breakers step by step.
+
+The script checks that:
+- the breaker goes from CLOSED to OPEN at the first failure and from OPEN to
+  HALF_OPEN when the backoff has passed, and closes again at the first
+  successful probe after the outage,
+- the backoff starts at `BASE_BACKOFF_MS`, doubles with every failed probe and
+  stays at `MAX_BACKOFF_MS`, and calls in between are rejected,
+- a `Retry-After` longer than the backoff sets the wait, a shorter one does
+  not shorten it,
+- an HTTP 401 waits for `MAX_BACKOFF_MS` at once,
+- a half-open breaker lets a single probe through and rejects other calls
+  until the probe is recorded,
+- a probe that is not recorded within `PROBE_TIMEOUT_MS` counts as failed, and
+  the breaker opens again with the next backoff step.
+
+Usage:
+    python3 scripts/simulate_circuit_breaker.py
+"""
+
+import contextlib
+import io
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import circuit_breaker  # noqa: E402
+from circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker  # noqa: E402
+
+# --- CONFIGURATION ---
+STEP_MS = 10 * 1000  # Interval of the client's calls
+SIMULATED_MS = 4 * 60 * 60 * 1000
+OUTAGE_MS = (60 * 1000, 3 * 60 * 60 * 1000)  # Start and end of the API outage
+BASE_MS = circuit_breaker.BASE_BACKOFF_MS
+MAX_MS = circuit_breaker.MAX_BACKOFF_MS
+PROBE_TIMEOUT_MS = circuit_breaker.PROBE_TIMEOUT_MS
+
+
+def expect(name, got, wanted, failed):
+    """Prints a result and records a failed check."""
+    ok = got == wanted
+    print(f"  {name}: {got}" + ("" if ok else f"  ERROR: expected {wanted}"))
+    if not ok:
+        failed.append(name)
+
+
+def check_outage(failed):
+    """A client calls every `STEP_MS` while the API is down during `OUTAGE_MS`."""
+    breaker = CircuitBreaker("owm")
+    states = [breaker.state]
+    calls = []
+    rejected = 0
+
+    def note():
+        if breaker.state != states[-1]:
+            states.append(breaker.state)
+
+    now_ms = 0
+    while now_ms < SIMULATED_MS:
+        if breaker.allow(now_ms):
+            note()
+            calls.append(now_ms)
+            if OUTAGE_MS[0] <= now_ms < OUTAGE_MS[1]:
+                breaker.record_failure("[Errno 113] EHOSTUNREACH", now_ms=now_ms)
+            else:
+                breaker.record_success()
+            note()
+        else:
+            rejected += 1
+        now_ms += STEP_MS
+
+    failed_calls = [t for t in calls if OUTAGE_MS[0] <= t < OUTAGE_MS[1]]
+    waits = [b - a for a, b in zip(failed_calls, failed_calls[1:])]
+    expected_waits = [min(BASE_MS << i, MAX_MS) for i in range(len(waits))]
+    recovered = next(t for t in calls if t >= OUTAGE_MS[1])
+    expected_states = [CLOSED, OPEN] + [HALF_OPEN, OPEN] * (len(failed_calls) - 1) + [HALF_OPEN, CLOSED]
+    print(
+        f"Outage of {(OUTAGE_MS[1] - OUTAGE_MS[0]) // 60000} min: {len(failed_calls)} failed calls, "
+        f"{rejected} rejected, recovered {(recovered - OUTAGE_MS[1]) // 1000} s after the outage"
+    )
+    expect("Waits between calls (s)", [w // 1000 for w in waits], [w // 1000 for w in expected_waits], failed)
+    expect("State transitions", states == expected_states, True, failed)
+    expect("Rejected calls", breaker.rejected, rejected, failed)
+    expect("Opened", breaker.opened, 1, failed)
+    expect("Recovery within the maximum backoff", recovered - OUTAGE_MS[1] <= MAX_MS, True, failed)
+    expect("Final state", breaker.state, CLOSED, failed)
+
+
+def check_retry_after(failed):
+    """A 429 with a Retry-After header, longer and then shorter than the backoff."""
+    print("\nRetry-After:")
+    breaker = CircuitBreaker("owm")
+    breaker.record_failure(429, retry_after_s=300, now_ms=0)
+    expect("Wait after 429 with Retry-After 300 s (ms)", breaker.retry_in_ms(0), 300 * 1000, failed)
+    expect("Call 1 ms before", breaker.allow(300 * 1000 - 1), False, failed)
+    expect("Probe at the Retry-After time", breaker.allow(300 * 1000), True, failed)
+    breaker.record_failure(429, retry_after_s=10, now_ms=300 * 1000)
+    expect("Wait after 429 with Retry-After 10 s (ms)", breaker.retry_in_ms(300 * 1000), 2 * BASE_MS, failed)
+
+
+def check_unauthorized(failed):
+    """An HTTP 401 waits for the maximum backoff at once, and a failed probe stays there."""
+    print("\nHTTP 401:")
+    breaker = CircuitBreaker("owm")
+    breaker.record_failure(401, now_ms=0)
+    expect("Wait after the first 401 (ms)", breaker.retry_in_ms(0), MAX_MS, failed)
+    expect("Probe after the maximum backoff", breaker.allow(MAX_MS), True, failed)
+    breaker.record_failure(500, now_ms=MAX_MS)
+    expect("Wait after the failed probe (ms)", breaker.retry_in_ms(MAX_MS), MAX_MS, failed)
+
+
+def check_single_probe(failed):
+    """Only one call gets through while the breaker is half-open."""
+    print("\nHalf-open:")
+    breaker = CircuitBreaker("owm")
+    breaker.record_failure(503, now_ms=0)
+    allowed = [breaker.allow(BASE_MS + i * 1000) for i in range(5)]
+    expect("Calls allowed while probing", allowed, [True, False, False, False, False], failed)
+    expect("State while probing", breaker.state, HALF_OPEN, failed)
+    expect("Rejected", breaker.rejected, 4, failed)
+    breaker.record_success()
+    expect("State after the successful probe", breaker.state, CLOSED, failed)
+    expect("Next call", breaker.allow(BASE_MS + 5000), True, failed)
+
+
+def check_probe_timeout(failed):
+    """A probe that is never recorded counts as failed after `PROBE_TIMEOUT_MS`."""
+    print("\nLost probe:")
+    breaker = CircuitBreaker("owm")
+    breaker.record_failure(503, now_ms=0)
+    breaker.allow(BASE_MS)
+    lost_ms = BASE_MS + PROBE_TIMEOUT_MS
+    expect("Call 1 ms before the probe timeout", breaker.allow(lost_ms - 1), False, failed)
+    expect("State before the probe timeout", breaker.state, HALF_OPEN, failed)
+    expect("Call at the probe timeout", breaker.allow(lost_ms), False, failed)
+    expect("State after the probe timeout", (breaker.state, breaker.last_status), (OPEN, "probe lost"), failed)
+    expect("Wait after the lost probe (ms)", breaker.retry_in_ms(lost_ms), 2 * BASE_MS, failed)
+    expect("Next probe", breaker.allow(lost_ms + 2 * BASE_MS), True, failed)
+
+
+def main() -> None:
+    """
+    Main function to run the checks and print the results.
+    """
+    failed = []
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        for check in (check_outage, check_retry_after, check_unauthorized, check_single_probe, check_probe_timeout):
+            check(failed)
+    # Without the breaker's own log lines
+    print("\n".join(line for line in output.getvalue().splitlines() if not line.startswith("Breaker '")))
+
+    if failed:
+        print(f"\nERROR: Checks failed: {', '.join(failed)}")
+        sys.exit(1)
+    print("\nAll circuit breaker checks passed.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+"""
+This script checks the day/night icon switching (`daylight.py`) on the host with a simulated clock.
+
+Three days are simulated with the real scheduler: the display tick every
+second, a weather fetch every 15 minutes and the day/night task. The fetch
+returns the sunrise and sunset of the current UTC day (shifting by 90 seconds
+a day) and an icon that, like OWM's data, lags the sun by up to 10 minutes.
+The display is simulated too: a tick costs `TICK_MS`, showing an icon from a
+file `ICON_FILE_MS` and a preloaded one `ICON_RAM_MS` (modelled values for a
+100x100 RGB565 icon read from flash, not measurements).
+
+The script checks that:
+- every sunrise and sunset is shown by the first display tick after it, and
+  no tick before it shows the new variant,
+- the icon is preloaded `daylight.PRELOAD_LEAD_MS` before each transition,
+  so the tick that shows it does not read a file,
+- a fetch shortly after a transition, with OWM's icon still in the old
+  variant, does not switch the icon back,
+and compares the switch delay and the tick latency with the icon switching
+disabled, where the new variant arrives with the next fetch.
+
+Usage:
+    python3 scripts/simulate_daylight.py
+"""
+
+import calendar
+import importlib
+import os
+import sys
+import types
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import power  # noqa: E402
+import scheduler  # noqa: E402
+from weather_state import DATA, ICON, WeatherState  # noqa: E402
+
+# --- CONFIGURATION ---
+# The display ticks are not aligned with the full seconds of UTC
+START_UTC_MS = calendar.timegm((2026, 3, 20, 0, 0, 0)) * 1000 + 437
+SIMULATED_DAYS = 3
+SUNRISE_S = 6 * 3600 + 12 * 60 + 34  # 06:12:34 UTC on the first day
+SUNSET_S = 18 * 3600 + 7 * 60 + 5  # 18:07:05 UTC
+SHIFT_PER_DAY_S = 90  # Sunrise earlier, sunset later every day
+OWM_LAG_MS = 10 * 60 * 1000
+FETCH_INTERVAL_MS = 15 * 60 * 1000
+FETCH_MS = 800
+TICK_MS = 15
+ICON_FILE_MS = 45
+ICON_RAM_MS = 1
+WEATHER_DATA = (12.5, 1012, 81, 4.1, "broken clouds", "Clouds")
+
+
+def sun_times(utc_ms):
+    """Sunrise and sunset (UTC seconds) of the UTC day of `utc_ms`, as OWM reports them."""
+    midnight_s = utc_ms // 86400000 * 86400
+    day = (midnight_s * 1000 - START_UTC_MS) // 86400000 + 1
+    return midnight_s + SUNRISE_S - day * SHIFT_PER_DAY_S, midnight_s + SUNSET_S + day * SHIFT_PER_DAY_S
+
+
+def transitions():
+    """All (time in UTC ms, is sunrise) of the simulated days."""
+    events = []
+    for day in range(SIMULATED_DAYS):
+        sunrise_s, sunset_s = sun_times(START_UTC_MS + day * 86400000)
+        events += [(sunrise_s * 1000, True), (sunset_s * 1000, False)]
+    return events
+
+
+def make_display(clock, shown):
+    """
+    A stand-in for `display.py` with the parts `daylight.py` uses.
+
+    `shown` receives (UTC ms, icon, from RAM, tick run time in ms) for every
+    tick that changes the icon.
+    """
+    display = types.ModuleType("display")
+    display.weather_state = WeatherState()
+    display.preloaded = None
+    display.preloads = []
+    display.current = None
+    display.tick_ms = []
+
+    def preload_weather_icon(icon_code):
+        display.preloads.append((START_UTC_MS + clock.now_ms, icon_code))
+        clock.advance(ICON_FILE_MS)
+        display.preloaded = icon_code
+        return True
+
+    def set_weather_icon(icon_code):
+        current = display.weather_state.snapshot()
+        if current[ICON] != icon_code:
+            display.weather_state.set_data(current[DATA], icon_code)
+
+    def display_handler():
+        started = clock.now_ms
+        clock.advance(TICK_MS)
+        icon_code = display.weather_state.snapshot()[ICON]
+        if icon_code != display.current:
+            from_ram = icon_code == display.preloaded
+            clock.advance(ICON_RAM_MS if from_ram else ICON_FILE_MS)
+            display.preloaded = None
+            display.current = icon_code
+            shown.append((START_UTC_MS + started, icon_code, from_ram, clock.now_ms - started))
+        display.tick_ms.append(clock.now_ms - started)
+
+    display.preload_weather_icon = preload_weather_icon
+    display.set_weather_icon = set_weather_icon
+    display.display_handler = display_handler
+    return display
+
+
+def simulate(enabled):
+    """
+    Runs the simulated days.
+
+    Returns:
+        tuple: (shown icons, preloads, display module)
+    """
+    clock = power.VirtualClock()
+    shown = []
+    display = make_display(clock, shown)
+    ntp = types.ModuleType("ntp")
+    ntp.last_offset_us = 0
+    ntp.unix_time_ms = lambda: START_UTC_MS + clock.now_ms
+    sys.modules["display"] = display
+    sys.modules["ntp"] = ntp
+    import daylight
+
+    daylight = importlib.reload(daylight)
+    daylight.DAYLIGHT_ICONS = enabled
+
+    sched = scheduler.Scheduler(clock)
+
+    def fetch():
+        now_ms = START_UTC_MS + clock.now_ms
+        clock.advance(FETCH_MS)
+        sunrise_s, sunset_s = sun_times(now_ms)
+        owm_is_day = daylight.is_day(now_ms - OWM_LAG_MS, sunrise_s * 1000, sunset_s * 1000)
+        icon_code = daylight.update(sunrise_s, sunset_s, "04d" if owm_is_day else "04n")
+        display.weather_state.set_data(WEATHER_DATA, icon_code)
+
+    sched.add("display", 1000, display.display_handler, delay_ms=0, coalesce=False)
+    sched.add("weather", FETCH_INTERVAL_MS, fetch, delay_ms=250)
+    daylight.start(sched)
+    while clock.now_ms < SIMULATED_DAYS * 86400000:
+        power.run_loop(sched, clock, max_iterations=1)
+    return shown, display.preloads, display
+
+
+def first_shown_after(shown, at_ms, icon_code):
+    for shown_ms, shown_icon, from_ram, tick_ms in shown:
+        if shown_icon == icon_code and shown_ms > at_ms - 1000:
+            return shown_ms, from_ram, tick_ms
+    return None
+
+
+def main() -> None:
+    """
+    Main function to run the simulation and print the results.
+    """
+    failed = []
+    events = transitions()
+
+    shown, preloads, display = simulate(enabled=True)
+    print(f"Day/night switching ({SIMULATED_DAYS} days, {len(events)} transitions):")
+    delays = []
+    for at_ms, sunrise in events:
+        icon_code = "04d" if sunrise else "04n"
+        first = first_shown_after(shown, at_ms, icon_code)
+        if first is None:
+            print(f"  ERROR: {icon_code} never shown after {at_ms}")
+            failed.append("transition missed")
+            continue
+        shown_ms, from_ram, tick_ms = first
+        delay_ms = shown_ms - at_ms
+        lead = [at_ms - t for t, code in preloads if code == icon_code and 0 < at_ms - t <= 2 * 60000]
+        print(
+            f"  {'sunrise' if sunrise else 'sunset '} {(at_ms // 1000) % 86400 // 3600:02d}:"
+            f"{(at_ms // 1000) % 3600 // 60:02d}:{(at_ms // 1000) % 60:02d}: shown after {delay_ms} ms "
+            f"({'preloaded' if from_ram else 'read from file'} {lead[0] // 1000 if lead else '-'} s before, "
+            f"tick {tick_ms} ms)"
+        )
+        delays.append(delay_ms)
+        if not 0 <= delay_ms <= 1000:
+            failed.append("timing")
+        if not from_ram or not lead:
+            failed.append("preload")
+    # The default icon, the first fetch, then one change per transition: no flicker back
+    if len(shown) != len(events) + 2:
+        print(f"  ERROR: {len(shown) - 2} icon changes for {len(events)} transitions")
+        failed.append("flicker")
+    max_tick = max(display.tick_ms)
+    print(f"  Longest display tick: {max_tick} ms")
+
+    shown, _, display = simulate(enabled=False)
+    late = []
+    for at_ms, sunrise in events:
+        first = first_shown_after(shown, at_ms, "04d" if sunrise else "04n")
+        if first:
+            late.append((first[0] - at_ms, first[2]))
+    print(
+        f"\nWithout day/night switching: shown after {min(d for d, _ in late) // 60000}-"
+        f"{max(d for d, _ in late) // 60000} min, with the next fetch "
+        f"(tick {max(t for _, t in late)} ms, reading the file)"
+    )
+
+    if failed:
+        print(f"\nERROR: Checks failed: {', '.join(sorted(set(failed)))}")
+        sys.exit(1)
+    print("\nAll day/night checks passed.")
+
+
+if __name__ == "__main__":
+    main()
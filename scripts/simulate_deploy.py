@@ -0,0 +1,326 @@
+"""
+This script runs the differential deploy (`deploy.py`) against simulated stations.
+
+A simulated station speaks the raw REPL protocol over a fake serial port and
+runs the received commands with CPython against a directory that stands in for
+its file system. It models what matters for a deploy over serial:
+- the running application: the first CTRL+Cs get lost (light sleep),
+- a 256-byte UART receive buffer: bytes written at once beyond it are dropped,
+- the serial transfer time at 115200 baud,
+- the application's watchdog, which resets the station after 30 s of serial
+  time without `watchdog.supervisor.feed()`,
+- an optional power loss after a number of received bytes.
+
+The script deploys the project sources (`--source`, so no mpy-cross is
+needed) to three stations in parallel and checks that:
+- a full deploy leaves exact copies of the files, removes a stale .mpy that
+  would duplicate a deployed module, and keeps the station's own data files,
+- a second deploy transfers nothing but the manifest check,
+- after a change, only the changed file is uploaded and a file dropped from
+  the build is removed,
+- `--verify` finds a file that was changed on the station by another tool,
+- a deploy interrupted by a power loss is completed by the next deploy.
+
+Usage:
+    python3 scripts/simulate_deploy.py
+"""
+
+import builtins
+import os
+import shutil
+import sys
+import tempfile
+import types
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import deploy  # noqa: E402
+
+# --- CONFIGURATION ---
+STATIONS = 3
+BAUDRATE = 115200
+UART_RX_BUFFER_BYTES = 256
+WDT_TIMEOUT_MS = 30000
+LOST_INTERRUPTS = 2
+TIMEOUT_S = 0.5
+
+
+class _DeviceReset(BaseException):
+    pass
+
+
+class SimulatedStation:
+    """
+    A MicroPython station behind a serial port, with the `read()`, `write()`
+    and `in_waiting` of `serial.Serial`.
+
+    Args:
+        root (str): Directory holding the station's file system.
+        power_loss_after (int, optional): Lose power after receiving this many bytes.
+    """
+
+    def __init__(self, root, power_loss_after=None):
+        self.root = root
+        self.power_loss_after = power_loss_after
+        self.received = 0
+        self.serial_ms = 0.0
+        self.last_feed_ms = 0.0
+        self.feeds = 0
+        self.dropped = 0
+        self.resets = 0
+        self.watchdog_resets = 0
+        self._out = bytearray()
+        self._boot()
+
+    # --- Serial Port ---
+
+    @property
+    def in_waiting(self):
+        return len(self._out)
+
+    def read(self, n=1):
+        data = bytes(self._out[:n])
+        del self._out[:n]
+        return data
+
+    def write(self, data):
+        if len(data) > UART_RX_BUFFER_BYTES:
+            self.dropped += len(data) - UART_RX_BUFFER_BYTES
+            data = data[:UART_RX_BUFFER_BYTES]
+        for byte in data:
+            self.received += 1
+            self._transfer(1)
+            if self.power_loss_after is not None and self.received >= self.power_loss_after:
+                self.power_loss_after = None
+                self._boot()
+                return len(data)
+            self._receive(byte)
+        return len(data)
+
+    def _emit(self, data):
+        self._out += data
+        self._transfer(len(data))
+
+    def _transfer(self, nbytes):
+        self.serial_ms += nbytes * 10 * 1000 / BAUDRATE  # 8N1: 10 bits per byte
+        if self._mode != "app" and self.serial_ms - self.last_feed_ms > WDT_TIMEOUT_MS:
+            self.watchdog_resets += 1
+            self._boot()
+
+    # --- REPL ---
+
+    def _boot(self):
+        self.resets += 1
+        self._mode = "app"
+        self._lost = LOST_INTERRUPTS
+        self._line = bytearray()
+        self._globals = {"__builtins__": self._builtins(), "__name__": "__main__"}
+
+    def _receive(self, byte):
+        if self._mode == "app":
+            if byte == 0x03:
+                if self._lost:
+                    self._lost -= 1
+                    return
+                self.last_feed_ms = self.serial_ms  # The application fed it last
+                self._mode = "friendly"
+                self._emit(b"Traceback (most recent call last):\r\nKeyboardInterrupt: \r\n>>> ")
+        elif self._mode == "friendly":
+            if byte == 0x01:
+                self._mode = "raw"
+                self._emit(b"\r\n" + deploy.RAW_REPL_BANNER)
+            elif byte == 0x03:
+                self._emit(b"\r\n>>> ")
+        elif byte == 0x01:
+            self._line = bytearray()
+            self._emit(b"\r\n" + deploy.RAW_REPL_BANNER)
+        elif byte == 0x02:
+            self._mode = "friendly"
+            self._emit(b"\r\n>>> ")
+        elif byte == 0x03:
+            self._line = bytearray()
+        elif byte == 0x04:
+            code = bytes(self._line)
+            self._line = bytearray()
+            self._emit(b"OK")
+            self._execute(code)
+        else:
+            self._line.append(byte)
+
+    def _execute(self, code):
+        out = []
+        self._globals["__builtins__"]["print"] = lambda *args, sep=" ", end="\n": out.append(
+            sep.join(str(a) for a in args) + end
+        )
+        err = ""
+        try:
+            exec(compile(code, "<stdin>", "exec"), self._globals)
+        except _DeviceReset:
+            self._boot()
+            return
+        except Exception as e:
+            err = f"Traceback (most recent call last):\r\n{type(e).__name__}: {e}\r\n"
+        self._emit("".join(out).replace("\n", "\r\n").encode() + b"\x04" + err.encode() + b"\x04>")
+
+    # --- Device Modules ---
+
+    def path(self, device_path):
+        return os.path.join(self.root, device_path.lstrip("/"))
+
+    def _builtins(self):
+        station = self
+        real_import = builtins.__import__
+
+        def feed():
+            station.feeds += 1
+            station.last_feed_ms = station.serial_ms
+
+        def reset():
+            raise _DeviceReset()
+
+        modules = {
+            "os": types.SimpleNamespace(
+                remove=lambda p: os.remove(station.path(p)),
+                rename=lambda a, b: os.rename(station.path(a), station.path(b)),
+                mkdir=lambda p: os.mkdir(station.path(p)),
+            ),
+            "sys": types.SimpleNamespace(modules={
+                "watchdog": types.SimpleNamespace(supervisor=types.SimpleNamespace(feed=feed)),
+            }),
+            "machine": types.SimpleNamespace(reset=reset),
+        }
+
+        def device_import(name, *args, **kwargs):
+            if name in modules:
+                return modules[name]
+            return real_import(name, *args, **kwargs)
+
+        def device_open(path, mode="r"):
+            return open(station.path(path), mode)
+
+        names = dict(vars(builtins))
+        names["__import__"] = device_import
+        names["open"] = device_open
+        return names
+
+
+def read_tree(root):
+    """Returns {device path: content} of the files below `root`."""
+    tree = {}
+    for directory, _, filenames in os.walk(root):
+        for filename in filenames:
+            path = os.path.join(directory, filename)
+            with open(path, "rb") as f:
+                tree["/" + os.path.relpath(path, root).replace(os.sep, "/")] = f.read()
+    return tree
+
+
+def matches(station, files):
+    """True if the station holds exact copies of `files`."""
+    tree = read_tree(station.root)
+    for path, local_path in files.items():
+        with open(local_path, "rb") as f:
+            if tree.get(path) != f.read():
+                return False
+    return True
+
+
+def run(stations, files, **options):
+    targets = [(f"station{i}", lambda s=s: s) for i, s in enumerate(stations)]
+    return deploy.deploy_all(targets, files, timeout_s=TIMEOUT_S, chunk_delay_s=0, **options)
+
+
+def main() -> None:
+    """
+    Main function to run the scenarios and print the results.
+    """
+    failed = []
+    work = tempfile.mkdtemp()
+    try:
+        files = deploy.collect_files(source=True)
+        total = sum(os.path.getsize(p) for p in files.values())
+        stations = []
+        for i in range(STATIONS):
+            root = os.path.join(work, f"station{i}")
+            os.makedirs(root)
+            with open(os.path.join(root, "display.mpy"), "wb") as f:  # Left over from an older deploy
+                f.write(b"M\x06")
+            with open(os.path.join(root, "history_0.bin"), "wb") as f:  # The station's own data
+                f.write(b"\0" * 64)
+            stations.append(SimulatedStation(root))
+
+        results = run(stations, files)
+        ok = all("error" not in r and len(r["uploaded"]) == len(files) for r in results.values())
+        ok &= all(matches(s, files) for s in stations)
+        ok &= all(not os.path.exists(s.path("/display.mpy")) and os.path.exists(s.path("/history_0.bin"))
+                  for s in stations)
+        station = stations[0]
+        print(
+            f"\nFull deploy of {len(files)} files ({total} bytes) to {STATIONS} stations: "
+            f"{station.received} bytes sent, {station.serial_ms / 1000:.1f} s at {BAUDRATE} baud, "
+            f"watchdog fed {station.feeds} times, {station.watchdog_resets} watchdog resets, "
+            f"{station.dropped} bytes dropped"
+        )
+        if not ok or any(s.watchdog_resets or s.dropped for s in stations):
+            failed.append("full deploy")
+
+        for s in stations:
+            s.received = s.serial_ms = s.last_feed_ms = 0
+        results = run(stations, files)
+        print(f"\nRepeated deploy: {len(results['station0']['uploaded'])} uploaded, "
+              f"{station.received} bytes sent, {station.serial_ms / 1000:.2f} s")
+        if any(r.get("uploaded") != [] for r in results.values()):
+            failed.append("repeated deploy")
+
+        # Change one module and drop another from the build
+        changed = os.path.join(work, "weather.py")
+        with open(files["/weather.py"], "rb") as f_in, open(changed, "wb") as f_out:
+            f_out.write(f_in.read() + b"\n# changed\n")
+        files = dict(files, **{"/weather.py": changed})
+        del files["/sensor.py"]
+        for s in stations:
+            s.received = s.serial_ms = s.last_feed_ms = 0
+        results = run(stations, files)
+        result = results["station0"]
+        print(f"\nOne module changed, one dropped: uploaded {result['uploaded']}, removed {result['removed']}, "
+              f"{station.received} bytes sent, {station.serial_ms / 1000:.2f} s")
+        if result["uploaded"] != ["/weather.py"] or "/sensor.py" not in result["removed"] \
+                or not all(matches(s, files) for s in stations):
+            failed.append("differential deploy")
+
+        # A file changed on the station behind the manifest's back
+        with open(station.path("/wifi.py"), "ab") as f:
+            f.write(b"# edited on the device\n")
+        plain = run(stations[:1], files)["station0"]["uploaded"]
+        verified = run(stations[:1], files, verify=True)["station0"]["uploaded"]
+        print(f"\nFile edited on the station: found without --verify: {plain}, with --verify: {verified}")
+        if plain or verified != ["/wifi.py"]:
+            failed.append("verify")
+
+        # Power loss in the middle of a deploy, then the next deploy
+        root = os.path.join(work, "station_power_loss")
+        os.makedirs(root)
+        station = SimulatedStation(root, power_loss_after=total // 2)
+        first = run([station], files)["station0"]
+        second = run([station], files)["station0"]
+        print(
+            f"\nPower loss during the first deploy: {first.get('error')}; "
+            f"second deploy uploaded {len(second.get('uploaded', []))} files, "
+            f"{'complete' if matches(station, files) else 'INCOMPLETE'}"
+        )
+        if "error" not in first or "error" in second or not matches(station, files):
+            failed.append("power loss")
+        leftovers = [p for p in read_tree(root) if p.endswith(".tmp")]
+        if leftovers:
+            print(f"  Temporary files left from the interrupted upload: {leftovers}")
+    finally:
+        shutil.rmtree(work)
+
+    if failed:
+        print(f"\nERROR: Checks failed: {', '.join(failed)}")
+        sys.exit(1)
+    print("\nAll deploy checks passed.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""
+This script runs the adaptive fetch policy (`fetch_policy.py`) against a simulated weather trace.
+
+The trace covers three days: a calm high-pressure period with a daily
+temperature cycle, a cold front passing on the second day (pressure falling
+by 9 hPa in 6 hours, temperature dropping, clouds and rain), and the clearing
+behind it. Pressure is rounded to whole hPa like the OWM data.
+
+The script prints the fetch times and intervals, the number of API calls
+compared with the fixed 15-minute interval, and how quickly the policy reacted
+to the front. It exits with an error if the policy exceeds the rate limit or
+samples the front more coarsely than the fixed interval.
+
+Usage:
+    python3 scripts/simulate_fetch_policy.py [--verbose]
+"""
+
+import math
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import fetch_policy  # noqa: E402
+
+# --- CONFIGURATION ---
+HOUR_MS = 60 * 60 * 1000
+DURATION_MS = 72 * HOUR_MS
+FIXED_INTERVAL_MS = 15 * 60 * 1000
+FRONT_START_MS = 30 * HOUR_MS  # The pressure starts falling
+FRONT_END_MS = 36 * HOUR_MS  # The front has passed
+# The policy needs some samples to see the trend; from then on it has to sample
+# at least as often as the fixed interval.
+REACTION_MS = 2 * HOUR_MS
+
+
+def weather_at(t_ms: int) -> tuple:
+    """
+    Returns the simulated weather at a point in time.
+
+    Args:
+        t_ms (int): Time since the start of the trace in milliseconds.
+
+    Returns:
+        tuple: (temperature in °C, pressure in hPa (whole), icon code).
+    """
+    hours = t_ms / HOUR_MS
+    night = (hours % 24) < 6 or (hours % 24) >= 20
+    suffix = "n" if night else "d"
+    # Daily cycle: minimum at 05:00, maximum at 17:00
+    temp = 14 + 6 * math.sin((hours % 24 - 11) / 24 * 2 * math.pi)
+    pressure = 1021.0
+
+    if FRONT_START_MS <= t_ms < FRONT_END_MS:
+        progress = (t_ms - FRONT_START_MS) / (FRONT_END_MS - FRONT_START_MS)
+        pressure -= 9 * progress
+        temp -= 5 * progress
+        icon = "04" if progress < 0.4 else "10"
+    elif t_ms >= FRONT_END_MS:
+        recovery = min((t_ms - FRONT_END_MS) / (12 * HOUR_MS), 1.0)
+        pressure = 1012.0 + 6 * recovery
+        temp -= 5 * (1 - recovery)
+        icon = "10" if recovery < 0.2 else ("03" if recovery < 0.5 else "01")
+    else:
+        icon = "01"
+    return round(temp, 2), float(round(pressure)), icon + suffix
+
+
+def simulate(verbose: bool) -> list:
+    """
+    Runs the policy over the trace, fetching whenever the interval has elapsed.
+
+    Args:
+        verbose (bool): Print every fetch.
+
+    Returns:
+        list: (time in ms, interval in ms) of every fetch.
+    """
+    policy = fetch_policy.FetchPolicy()
+    fetches = []
+    t_ms = 0
+    while t_ms < DURATION_MS:
+        temp, pressure, icon = weather_at(t_ms)
+        interval_ms = policy.update(t_ms, temp, pressure, icon)
+        fetches.append((t_ms, interval_ms))
+        if verbose:
+            print(f"  {t_ms / HOUR_MS:6.2f} h  {temp:5.1f} °C  {pressure:6.0f} hPa  {icon}  "
+                  f"{policy.describe()}")
+        t_ms += interval_ms
+    return fetches
+
+
+def main() -> None:
+    """
+    Main function to run the simulation and check the results.
+    """
+    verbose = "--verbose" in sys.argv
+    fetches = simulate(verbose)
+
+    fixed_calls = DURATION_MS // FIXED_INTERVAL_MS
+    front = [t for t, _ in fetches if FRONT_START_MS <= t < FRONT_END_MS]
+    calm = [t for t, _ in fetches if t < FRONT_START_MS]
+    detected = [t for t in front if t >= FRONT_START_MS + REACTION_MS]
+    max_gap_front = max(b - a for a, b in zip(detected, detected[1:]))
+    first_min = next(
+        (t for t, interval_ms in fetches
+         if t >= FRONT_START_MS and interval_ms == fetch_policy.MIN_FETCH_INTERVAL_MS),
+        None,
+    )
+    max_per_day = max(
+        sum(1 for t, _ in fetches if day * 24 * HOUR_MS <= t < (day + 1) * 24 * HOUR_MS)
+        for day in range(DURATION_MS // (24 * HOUR_MS))
+    )
+
+    print(f"Adaptive policy: {len(fetches)} fetches in {DURATION_MS // HOUR_MS} h "
+          f"(fixed 15-minute interval: {fixed_calls})")
+    print(f"  Calm period: {len(calm)} fetches in {FRONT_START_MS // HOUR_MS} h")
+    print(f"  During the front: {len(front)} fetches, largest gap after "
+          f"{REACTION_MS // HOUR_MS} h: {max_gap_front // 60000} min")
+    if first_min is not None:
+        print(f"  Shortest interval reached {(first_min - FRONT_START_MS) // 60000} min after the front started")
+    print(f"  Busiest day: {max_per_day} fetches (budget {fetch_policy.DAILY_CALL_BUDGET})")
+
+    ok = True
+    if max_per_day > fetch_policy.DAILY_CALL_BUDGET:
+        print("ERROR: The daily call budget was exceeded.")
+        ok = False
+    if max_gap_front > FIXED_INTERVAL_MS:
+        print("ERROR: The front was sampled more coarsely than with the fixed interval.")
+        ok = False
+    if len(calm) * FIXED_INTERVAL_MS >= FRONT_START_MS:
+        print("ERROR: The calm period did not use fewer fetches than the fixed interval.")
+        ok = False
+    if not ok:
+        sys.exit(1)
+    print("\nSimulation passed.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""
+This script simulates the flash-backed weather history (`history.py`) on the host, in a temporary directory.
+
+Weather samples are logged at an irregular interval of about 7 minutes for 90
+days, with smaller rings than on the station, so that every level wraps around
+its files several times. Every `RESET_EVERY_S` (an odd interval, so the resets
+fall at every time of the hour and day) the module state is dropped as on a
+reset and restored from the files.
+
+The script checks that:
+- a reset loses only the raw samples of the current hour that were not
+  written yet,
+- the hourly and daily means match means computed from the samples that
+  survived the resets, so the running hourly and daily aggregates are
+  restored after a reset,
+- after the rings wrapped, `last()` returns the newest records of each level
+  in order, at least `FILES_PER_LEVEL - 1` files of them, and `values()`
+  returns the same field values.
+
+Usage:
+    python3 scripts/simulate_history.py
+"""
+
+import contextlib
+import io
+import os
+import random
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import history  # noqa: E402
+
+# --- CONFIGURATION ---
+START_TS = 820000000 + 12 * 3600 + 34 * 60  # Some day at 12:34 (ESP32 epoch)
+DAYS = 90
+SAMPLE_INTERVAL_S = 7 * 60
+SAMPLE_JITTER_S = 90
+RESET_EVERY_S = 29 * 3600 + 47 * 60 + 13
+# Smaller rings: raw 3 x 32 records, hourly 3 x 64, daily 3 x 16
+LEVELS = {"raw": (2, None), "hourly": (4, 3600), "daily": (1, 86400)}
+
+
+def reset(samples):
+    """
+    Drops the module state as a reset does and restores it from the files.
+    Removes the samples that were not written yet from `samples`.
+
+    Returns:
+        list: The lost samples.
+    """
+    history._levels.clear()
+    history._aggregates.clear()
+    with contextlib.redirect_stdout(io.StringIO()):
+        history.init()
+    newest = history.last("raw", 1)[0][0]
+    lost = [s for s in samples if s[0] > newest]
+    del samples[len(samples) - len(lost):]
+    return lost
+
+
+def expected_means(samples, bucket_s):
+    """Means of records per time bucket, computed like `history._Aggregate` (count-weighted, rounded)."""
+    means = []
+    group = []
+    for record in samples + [None]:
+        if group and (record is None or record[0] // bucket_s != group[0][0] // bucket_s):
+            n = sum(r[6] for r in group)
+            means.append((
+                group[0][0] // bucket_s * bucket_s,
+                *((sum(r[i] * r[6] for r in group) + n // 2) // n for i in (1, 2, 3)),
+                group[-1][4],
+                (sum(r[5] * r[6] for r in group) + n // 2) // n,
+                n,
+            ))
+            group = []
+        if record is not None:
+            group.append(record)
+    return means
+
+
+def check_level(name, expected, failed):
+    """Compares the records kept in a level with the newest of the expected records."""
+    file_records = LEVELS[name][0] * history.RECORDS_PER_BLOCK
+    kept = history.last(name, 10 ** 6)
+    ok = kept == expected[-len(kept):] if kept else not expected
+    complete = len(kept) >= min(len(expected), (history.FILES_PER_LEVEL - 1) * file_records)
+    values_ok = list(history.values(name, 48, "temp")) == [r[1] for r in kept[-48:]]
+    print(
+        f"  {name:6}: {len(kept):4} of {len(expected):4} records kept, "
+        f"match: {ok}, enough: {complete}, values(): {values_ok}"
+    )
+    if not ok:
+        wrong = next(i for i, (a, b) in enumerate(zip(kept, expected[-len(kept):])) if a != b)
+        print(f"    first mismatch: {kept[wrong]} != {expected[-len(kept):][wrong]}")
+        failed.append(f"{name} records")
+    if not complete:
+        failed.append(f"{name} ring size")
+    if not values_ok:
+        failed.append(f"{name} values()")
+
+
+def main() -> None:
+    """
+    Main function to run the simulation and print the results.
+    """
+    failed = []
+    rng = random.Random(1)
+    history.HISTORY_DIR = tempfile.mkdtemp(prefix="history_")
+    history.LEVELS = LEVELS
+
+    samples = []  # The samples that are logged and not lost
+    resets = 0
+    max_lost = 0
+    ts = START_TS
+    next_reset = START_TS + RESET_EVERY_S
+    while ts < START_TS + DAYS * 86400:
+        data = (
+            rng.uniform(-15, 35), rng.uniform(960, 1045), rng.randint(20, 100), rng.uniform(0, 20),
+        )
+        icon = rng.choice(("01d", "02n", "10d", "13n"))
+        with contextlib.redirect_stdout(io.StringIO()):
+            history.append(data, icon, ts)
+        samples.append((
+            ts, round(data[0] * 100), round(data[1] * 10), data[2], history._encode_icon(icon),
+            round(data[3] * 100), 1,
+        ))
+        ts += SAMPLE_INTERVAL_S + rng.randint(-SAMPLE_JITTER_S, SAMPLE_JITTER_S)
+
+        if ts >= next_reset:
+            next_reset += RESET_EVERY_S
+            lost = reset(samples)
+            resets += 1
+            max_lost = max(max_lost, len(lost))
+            if lost and lost[0][0] // 3600 != lost[-1][0] // 3600:
+                print(f"ERROR: Reset {resets} lost samples of more than the current hour: {len(lost)}")
+                failed.append("samples lost")
+    reset(samples)
+
+    print(f"{len(samples)} samples over {DAYS} days, {resets} resets, at most {max_lost} samples lost per reset")
+    hourly = expected_means(samples, 3600)
+    daily = expected_means(hourly, 86400)
+    # The last hour and day are still running
+    check_level("raw", samples, failed)
+    check_level("hourly", hourly[:-1], failed)
+    check_level("daily", daily[:-1], failed)
+
+    if failed:
+        print(f"\nERROR: Checks failed: {', '.join(sorted(set(failed)))}")
+        sys.exit(1)
+    print("\nAll history checks passed.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+This script checks the power-managed main loop (`power.py`) on the host with `power.VirtualClock`.
+
+The station's periodic tasks are modeled with a fixed CPU time per run, which
+advances the virtual clock. They are registered with a `scheduler.Scheduler`
+on that clock, as `app.py` does, and `power.run_loop()` runs them for
+`SIMULATED_MS`. The result is compared with the previous main loop, which
+polled every 500 ms.
+
+The script checks that:
+- the sleep time reported by the clock is the simulated time minus the CPU
+  time of the tasks, so the loop never waits without sleeping,
+- every wake-up runs at least one task (no idle wake-ups) and every period
+  of a task is either run or counted as missed (the display ticks that fall
+  into a weather fetch),
+- the loop wakes up far less often than the 500 ms polling loop.
+
+Usage:
+    python3 scripts/simulate_power.py
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import power  # noqa: E402
+import scheduler  # noqa: E402
+
+# --- CONFIGURATION ---
+SIMULATED_MS = 60 * 60 * 1000
+POLL_INTERVAL_MS = 500  # The main loop before the power management
+TASKS = (
+    # name, period, CPU time per run (ms), run at start
+    ("display", 1000, 48, True),
+    ("system", 30000, 3, False),
+    ("weather", 900000, 1850, True),
+)
+
+
+def check(name, clock, sched, runs, wakeups, failed):
+    """Compares the clock's sleep time and the runs of a loop with the expected values."""
+    missed = {task: stats["missed"] for task, stats in sched.stats().items()}
+    cpu_ms = sum(runs[task] * work_ms for task, _, work_ms, _ in TASKS)
+    expected_runs = {
+        task: (SIMULATED_MS - (0 if at_start else period_ms)) // period_ms + 1
+        for task, period_ms, _, at_start in TASKS
+    }
+    awake = 100 * (clock.now_ms - clock.slept_ms) / clock.now_ms
+    print(
+        f"{name}: {clock.now_ms} ms simulated, {clock.slept_ms} ms asleep ({awake:.2f} % awake), "
+        f"{cpu_ms} ms CPU, {clock.sleep_count} sleeps, {wakeups} wake-ups"
+    )
+    print(f"  Runs: {runs}, missed: {missed} (periods: {expected_runs})")
+    if clock.slept_ms != clock.now_ms - cpu_ms:
+        print(f"  ERROR: Slept {clock.slept_ms} ms, expected {clock.now_ms - cpu_ms} ms")
+        failed.append(f"{name} sleep time")
+    if wakeups > clock.sleep_count + 1 or wakeups > sum(runs.values()):
+        failed.append(f"{name} idle wake-ups")
+    if any(abs(runs[task] + missed[task] - expected_runs[task]) > 1 for task in expected_runs):
+        failed.append(f"{name} runs")
+
+
+def counting(sched):
+    """Counts the wake-ups of the loop (calls of `run_due()` that ran a task)."""
+    wakeups = [0]
+    run_due = sched.run_due
+
+    def counted():
+        count = run_due()
+        if count:
+            wakeups[0] += 1
+        return count
+
+    sched.run_due = counted
+    return wakeups
+
+
+def main() -> None:
+    """
+    Main function to run the simulations and print the results.
+    """
+    failed = []
+    clock = power.VirtualClock()
+    runs = {task: 0 for task, _, _, _ in TASKS}
+
+    def work(task, work_ms):
+        runs[task] += 1
+        clock.advance(work_ms)
+
+    sched = scheduler.Scheduler(clock)
+    for task, period_ms, work_ms, at_start in TASKS:
+        sched.add(task, period_ms, lambda t=task, w=work_ms: work(t, w), delay_ms=0 if at_start else None)
+    wakeups = counting(sched)
+    # Stepped one wake-up at a time to count the wake-ups
+    while clock.now_ms < SIMULATED_MS:
+        power.run_loop(sched, clock, max_iterations=1)
+    check("run_loop", clock, sched, runs, wakeups[0], failed)
+
+    sleeps = clock.sleep_count
+    polls = SIMULATED_MS // POLL_INTERVAL_MS
+    print(f"\nPolling every {POLL_INTERVAL_MS} ms: {polls} wake-ups, {polls / sleeps:.1f}x as many")
+    if sleeps >= polls:
+        failed.append("wake-ups")
+
+    if failed:
+        print(f"\nERROR: Checks failed: {', '.join(failed)}")
+        sys.exit(1)
+    print("\nAll power loop checks passed.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+This script checks the task scheduler (`scheduler.py`) on the host with `power.VirtualClock`.
+
+A task's callback can reschedule another task of the same `run_due()` pass,
+as the watchdog and the display page timers do. Two such passes are set up on
+the virtual clock, and the tasks then run for `SIMULATED_MS`:
+- a non-coalescing task is due within the coalescing window, so it is held
+  back, and a coalescable task that runs after it reschedules it,
+- a task runs and a later task of the same pass reschedules it.
+
+The script checks that:
+- after the pass, the rescheduled task has exactly one live heap entry,
+- it then runs once per new period, at its new phase.
+
+Usage:
+    python3 scripts/simulate_scheduler.py
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import power  # noqa: E402
+import scheduler  # noqa: E402
+
+# --- CONFIGURATION ---
+SIMULATED_MS = 60 * 1000
+PERIOD_MS = 5000
+NEW_PERIOD_MS = 2000
+PASS_MS = 1000  # Time of the pass in which the task is rescheduled
+
+
+def live_entries(sched, task):
+    """Counts the heap entries of a task that are not stale."""
+    return sum(1 for _, _, t, gen in sched._heap if t is task and gen == t._gen and not t.cancelled)
+
+
+def check(name, sched, clock, target, failed):
+    """Runs the pass and the following periods and compares the runs of `target`."""
+    clock.sleep_ms(PASS_MS)
+    sched.run_due()
+    entries = live_entries(sched, target)
+    runs_before = target.runs
+    while clock.now_ms < SIMULATED_MS:
+        power.run_loop(sched, clock, max_iterations=1)
+    runs = target.runs - runs_before
+    # Rescheduled at PASS_MS to one new period later
+    expected = (SIMULATED_MS - PASS_MS) // NEW_PERIOD_MS
+    print(
+        f"{name}: {entries} live entries after the pass, "
+        f"{runs} runs in {SIMULATED_MS - PASS_MS} ms (expected {expected})"
+    )
+    if entries != 1:
+        failed.append(f"{name} heap entries")
+    if runs != expected:
+        failed.append(f"{name} runs")
+
+
+def main() -> None:
+    """
+    Main function to run the checks and print the results.
+    """
+    failed = []
+
+    # Held back: "display" is due and starts the pass, "sensor" is due 100 ms
+    # later and may not run early, "page" is coalesced and reschedules "sensor".
+    clock = power.VirtualClock()
+    sched = scheduler.Scheduler(clock)
+    sched.add("display", PERIOD_MS, lambda: None, delay_ms=PASS_MS)
+    held = sched.add("sensor", PERIOD_MS, lambda: None, delay_ms=PASS_MS + 100, coalesce=False)
+    sched.add("page", 60 * PERIOD_MS, lambda: sched.reschedule(held, NEW_PERIOD_MS), delay_ms=PASS_MS + 300)
+    check("Held-back task", sched, clock, held, failed)
+
+    # Already run: "display" runs first, "page" runs later in the pass and reschedules it.
+    clock = power.VirtualClock()
+    sched = scheduler.Scheduler(clock)
+    ran = sched.add("display", PERIOD_MS, lambda: None, delay_ms=PASS_MS)
+    sched.add("page", 60 * PERIOD_MS, lambda: sched.reschedule(ran, NEW_PERIOD_MS), delay_ms=PASS_MS + 300)
+    check("Task run in the pass", sched, clock, ran, failed)
+
+    if failed:
+        print(f"\nERROR: Checks failed: {', '.join(failed)}")
+        sys.exit(1)
+    print("\nAll scheduler checks passed.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,303 @@
+"""
+This script checks the local sensor pipeline (`sensor.py`) on the host against a fake I2C bus.
+
+The fake bus emulates a BME280: chip ID, calibration data (the example values
+of the datasheet, plus typical humidity coefficients), forced-mode
+measurements that take a configurable time, the "measuring" status bit and the
+data registers. It can add noise to the raw values and fail for a while, like
+a loose cable.
+
+The script checks that:
+- the integer compensation matches the floating-point formulas of the
+  datasheet over the whole measurement range,
+- the sampler never reads the data registers while a measurement is running,
+  and never spends more than one short I2C transfer per scheduler callback,
+- the moving average reduces the noise of the readings,
+- bus errors turn the readings stale instead of stopping the loop, and the
+  readings recover once the bus works again,
+- a sensor whose "measuring" bit never clears is polled for at most
+  `MEASURE_TIMEOUT_FACTOR` times the measurement time, counted as an error,
+  and triggered again after the normal interval.
+
+Usage:
+    python3 scripts/simulate_sensor.py
+"""
+
+import importlib
+import os
+import random
+import statistics
+import struct
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import power  # noqa: E402
+import scheduler  # noqa: E402
+import sensor  # noqa: E402
+
+# --- CONFIGURATION ---
+# Calibration example from the BME280 datasheet (section 8.2), humidity from a real sensor
+CALIB_TP = (27504, 26435, -1000, 36477, -10685, 3024, 2855, 140, -7, 15500, -14600, 6000)
+CALIB_H = {"h1": 75, "h2": 362, "h3": 0, "h4": 313, "h5": 50, "h6": 30}
+EXAMPLE_ADC_T = 519888  # 25.08 °C
+EXAMPLE_ADC_P = 415148  # 100653 Pa
+EXAMPLE_ADC_H = 30000
+I2C_BITS_PER_BYTE = 9  # 8 data bits and the ACK
+I2C_FREQ = 400000
+MAX_BUS_US_PER_CALLBACK = 1000
+SIMULATED_MS = 30 * 60 * 1000
+
+
+class FakeBME280Bus:
+    """
+    A fake I2C bus with one BME280 at address 0x76.
+
+    Args:
+        clock (power.VirtualClock): Time source for the measurement duration.
+        measure_ms (int): How long a forced measurement takes.
+        noise (int): Maximum random offset of the raw temperature value.
+    """
+
+    ADDRESS = 0x76
+
+    def __init__(self, clock, measure_ms=8, noise=0):
+        self.clock = clock
+        self.measure_ms = measure_ms
+        self.noise = noise
+        self.regs = bytearray(256)
+        self.regs[0xD0] = 0x60
+        self.regs[0x88:0xA0] = struct.pack("<HhhHhhhhhhhh", *CALIB_TP)
+        h = CALIB_H
+        self.regs[0xA1] = h["h1"]
+        self.regs[0xE1:0xE3] = struct.pack("<h", h["h2"])
+        self.regs[0xE3] = h["h3"]
+        self.regs[0xE4] = (h["h4"] >> 4) & 0xFF
+        self.regs[0xE5] = (h["h4"] & 0x0F) | ((h["h5"] & 0x0F) << 4)
+        self.regs[0xE6] = (h["h5"] >> 4) & 0xFF
+        self.regs[0xE7] = h["h6"] & 0xFF
+        self.adc = (EXAMPLE_ADC_T, EXAMPLE_ADC_P, EXAMPLE_ADC_H)
+        self.failing = False
+        self.done_ms = None
+        self.triggers = 0
+        self.early_reads = 0
+        self.bytes = 0
+
+    def set_raw(self, adc_t, adc_p, adc_h):
+        """Sets the raw values of the next measurements."""
+        self.adc = (adc_t, adc_p, adc_h)
+
+    def _check(self, address, nbytes):
+        if self.failing or address != self.ADDRESS:
+            raise OSError(19)  # ENODEV
+        self.bytes += nbytes + 2  # Address and register bytes
+
+    def _measuring(self):
+        return self.done_ms is not None and self.clock.ticks_ms() < self.done_ms
+
+    def readfrom_mem(self, address, reg, nbytes):
+        buf = bytearray(nbytes)
+        self.readfrom_mem_into(address, reg, buf)
+        return bytes(buf)
+
+    def readfrom_mem_into(self, address, reg, buf):
+        self._check(address, len(buf))
+        if reg == 0xF3:
+            self.regs[0xF3] = 0x08 if self._measuring() else 0
+        elif reg == 0xF7 and self._measuring():
+            self.early_reads += 1
+        buf[:] = self.regs[reg:reg + len(buf)]
+
+    def writeto_mem(self, address, reg, buf):
+        self._check(address, len(buf))
+        self.regs[reg] = buf[0]
+        if reg == 0xF4 and buf[0] & 0x03 == 0x01:
+            self.triggers += 1
+            self.done_ms = self.clock.ticks_ms() + self.measure_ms
+            adc_t, adc_p, adc_h = self.adc
+            if self.noise:
+                adc_t += random.randint(-self.noise, self.noise)
+            self.regs[0xF7:0xFA] = (adc_p << 4).to_bytes(3, "big")
+            self.regs[0xFA:0xFD] = (adc_t << 4).to_bytes(3, "big")
+            self.regs[0xFD:0xFF] = adc_h.to_bytes(2, "big")
+
+
+def reference(adc_t, adc_p, adc_h):
+    """The floating-point compensation of the datasheet (section 8.1), in °C, Pa and %RH."""
+    t1, t2, t3, p1, p2, p3, p4, p5, p6, p7, p8, p9 = CALIB_TP
+    h = CALIB_H
+    var1 = (adc_t / 16384.0 - t1 / 1024.0) * t2
+    var2 = ((adc_t / 131072.0 - t1 / 8192.0) ** 2) * t3
+    t_fine = int(var1 + var2)
+    temp = (var1 + var2) / 5120.0
+
+    var1 = t_fine / 2.0 - 64000.0
+    var2 = var1 * var1 * p6 / 32768.0
+    var2 = var2 + var1 * p5 * 2.0
+    var2 = var2 / 4.0 + p4 * 65536.0
+    var1 = (p3 * var1 * var1 / 524288.0 + p2 * var1) / 524288.0
+    var1 = (1.0 + var1 / 32768.0) * p1
+    p = 1048576.0 - adc_p
+    p = (p - var2 / 4096.0) * 6250.0 / var1
+    var1 = p9 * p * p / 2147483648.0
+    var2 = p * p8 / 32768.0
+    pressure = p + (var1 + var2 + p7) / 16.0
+
+    v = t_fine - 76800.0
+    v = (adc_h - (h["h4"] * 64.0 + h["h5"] / 16384.0 * v)) * (
+        h["h2"] / 65536.0 * (1.0 + h["h6"] / 67108864.0 * v * (1.0 + h["h3"] / 67108864.0 * v))
+    )
+    v = v * (1.0 - h["h1"] * v / 524288.0)
+    humidity = min(max(v, 0.0), 100.0)
+    return temp, pressure, humidity
+
+
+def check_compensation():
+    """Compares the integer compensation with the reference over the measurement range."""
+    clock = power.VirtualClock()
+    bus = FakeBME280Bus(clock, measure_ms=0)
+    device = sensor.BME280(bus, bus.ADDRESS)
+
+    bus.set_raw(EXAMPLE_ADC_T, EXAMPLE_ADC_P, EXAMPLE_ADC_H)
+    device.trigger()
+    temp, pressure, humidity = device.read()
+    print(f"Datasheet example: {temp / 100:.2f} °C, {pressure} Pa, {humidity / 100:.2f} %RH")
+    ok = temp == 2508 and abs(pressure - 100653) <= 1
+
+    worst = [0.0, 0.0, 0.0]
+    rng = random.Random(1)
+    for _ in range(2000):
+        raw = (rng.randint(380000, 600000), rng.randint(250000, 550000), rng.randint(15000, 50000))
+        bus.set_raw(*raw)
+        device.trigger()
+        got = device.read()
+        want = reference(*raw)
+        worst[0] = max(worst[0], abs(got[0] / 100 - want[0]))
+        worst[1] = max(worst[1], abs(got[1] - want[1]))
+        worst[2] = max(worst[2], abs(got[2] / 100 - want[2]))
+    print(
+        f"Largest difference to the float formulas: {worst[0]:.3f} °C, "
+        f"{worst[1]:.2f} Pa, {worst[2]:.3f} %RH"
+    )
+    return ok and worst[0] <= 0.01 and worst[1] <= 1.5 and worst[2] <= 0.05
+
+
+def run_sampler(bus_options, events=()):
+    """
+    Runs the sampler in the scheduler loop for `SIMULATED_MS`.
+
+    Args:
+        bus_options (dict): Keyword arguments of `FakeBME280Bus`.
+        events (tuple): (time in ms, callable taking the bus) run during the simulation.
+
+    Returns:
+        tuple: (bus, per-sample temperatures, averaged temperatures, longest bus time of a callback in µs,
+                stale periods seen)
+    """
+    importlib.reload(sensor)
+    clock = power.VirtualClock()
+    sched = scheduler.Scheduler(clock)
+    bus = FakeBME280Bus(clock, **bus_options)
+    sched.add("display", 1000, lambda: None, delay_ms=0, coalesce=False)
+    if not sensor.start(sched, bus):
+        raise SystemExit("ERROR: The sampler did not find the fake sensor.")
+
+    # Measure the bus time of each sensor callback
+    task = sensor._task
+    step = task.callback
+    longest = [0]
+
+    def timed_step():
+        before = bus.bytes
+        step()
+        bus_us = (bus.bytes - before) * I2C_BITS_PER_BYTE * 1000000 // I2C_FREQ
+        longest[0] = max(longest[0], bus_us)
+
+    task.callback = timed_step
+
+    pending = sorted(events)
+    raw, averaged = [], []
+    last_seq = 0
+    stale_seen = 0
+    while clock.ticks_ms() < SIMULATED_MS:
+        while pending and pending[0][0] <= clock.ticks_ms():
+            pending.pop(0)[1](bus)
+        power.run_loop(sched, clock, max_iterations=1)
+        if sensor.seq != last_seq:
+            last_seq = sensor.seq
+            raw.append(sensor._temp._ring[(sensor._temp._index - 1) % sensor.AVERAGE_SAMPLES] / 100)
+            if sensor._temp.count == sensor.AVERAGE_SAMPLES:
+                averaged.append(sensor.reading()[0])
+        elif sensor.reading() is None and sensor.samples:
+            stale_seen += 1
+    return bus, raw, averaged, longest[0], stale_seen
+
+
+def main() -> None:
+    """
+    Main function to run the checks and print the results.
+    """
+    random.seed(2)
+    failed = []
+
+    if not check_compensation():
+        failed.append("compensation")
+
+    bus, raw, averaged, longest_us, _ = run_sampler({"noise": 400})
+    expected = SIMULATED_MS // sensor.SAMPLE_INTERVAL_MS
+    raw_sd = statistics.pstdev(raw)
+    avg_sd = statistics.pstdev(averaged)
+    print(
+        f"\nNoisy sensor: {len(raw)} samples in {SIMULATED_MS // 60000} min "
+        f"(expected {expected}), {bus.early_reads} reads while measuring, "
+        f"longest callback {longest_us} µs on the bus"
+    )
+    print(f"  Temperature noise: {raw_sd:.3f} °C per sample, {avg_sd:.3f} °C averaged")
+    if abs(len(raw) - expected) > 1 or bus.early_reads:
+        failed.append("sampling")
+    if longest_us > MAX_BUS_US_PER_CALLBACK:
+        failed.append("callback bus time")
+    if avg_sd > 0.6 * raw_sd:
+        failed.append("moving average")
+
+    # Slower than the datasheet maximum: the sampler has to poll the status bit.
+    measure_ms = sensor.BME280.measurement_time_ms() + 5
+    bus, raw, _, _, _ = run_sampler({"measure_ms": measure_ms})
+    print(
+        f"\nSlow sensor ({measure_ms} ms per measurement): {len(raw)} samples, "
+        f"{bus.early_reads} reads while measuring"
+    )
+    if bus.early_reads or not raw:
+        failed.append("slow sensor")
+
+    # The bus fails for five minutes
+    events = ((600000, lambda b: setattr(b, "failing", True)),
+              (900000, lambda b: setattr(b, "failing", False)))
+    bus, raw, _, _, stale_seen = run_sampler({}, events)
+    print(
+        f"\nBus failing for 5 min: {sensor.errors} errors, stale for {stale_seen} loop "
+        f"iterations, {len(raw)} samples, reading at the end: {sensor.reading()}"
+    )
+    if not sensor.errors or not stale_seen or sensor.reading() is None:
+        failed.append("bus errors")
+
+    # The sensor hangs: the measuring bit never clears
+    bus, raw, _, _, _ = run_sampler({"measure_ms": SIMULATED_MS})
+    intervals = SIMULATED_MS // sensor.SAMPLE_INTERVAL_MS
+    max_runs = intervals * (2 + sensor.MEASURE_TIMEOUT_FACTOR * sensor.BME280.measurement_time_ms()
+                            // sensor.RETRY_DELAY_MS)
+    print(
+        f"\nSensor stuck measuring: {bus.triggers} triggers in {intervals} intervals, "
+        f"{sensor.errors} errors, {sensor._task.runs} callbacks (at most {max_runs}), {len(raw)} samples"
+    )
+    if abs(bus.triggers - intervals) > 1 or sensor.errors < intervals - 1 or sensor._task.runs > max_runs or raw:
+        failed.append("stuck sensor")
+
+    if failed:
+        print(f"\nERROR: Checks failed: {', '.join(failed)}")
+        sys.exit(1)
+    print("\nAll sensor checks passed.")
+
+
+if __name__ == "__main__":
+    main()
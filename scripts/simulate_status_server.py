@@ -0,0 +1,261 @@
+"""
+This script checks the status endpoint (`status_server.py`) on CPython against the simulated station modules.
+
+The server runs on asyncio as on the station. Its data comes from the real
+`scheduler`, `weather` (circuit breaker), `ntp`, `watchdog` (supervisor with a
+fake watchdog and RTC) and `sensor` modules (on the fake BME280 bus of
+`simulate_sensor.py`), and from stand-ins for the LVGL `display` module and the
+`wifi` module. Every optional part is enabled and filled with long values, as
+after 30 days of uptime: all scheduled tasks (multi-location mode included)
+with large counters, the four UI pages, a long weather description and
+location name, a failing weather API and a watchdog reset with a task name.
+
+The script checks that:
+- `GET /status` returns every section with the simulated values, and that
+  this full response fits into `MAX_RESPONSE_BYTES` with a margin,
+- other paths get a 404 and other methods or an oversized request a 400,
+- with `MAX_CONNECTIONS` clients that do not send their request, the next one
+  gets a 503 at once, and the server serves again after the request timeout,
+- a status larger than `MAX_RESPONSE_BYTES` is refused with a 500.
+
+Usage:
+    python3 scripts/simulate_status_server.py
+"""
+
+import asyncio
+import contextlib
+import io
+import json
+import os
+import sys
+import time
+import types
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import ntp  # noqa: E402
+import power  # noqa: E402
+import scheduler  # noqa: E402
+import sensor  # noqa: E402
+import status_server  # noqa: E402
+import watchdog  # noqa: E402
+import weather  # noqa: E402
+from simulate_sensor import FakeBME280Bus  # noqa: E402
+from weather_state import WeatherState  # noqa: E402
+
+# --- CONFIGURATION ---
+UPTIME_MS = 30 * 24 * 60 * 60 * 1000
+MIN_MARGIN_BYTES = 256  # Room for values that grow longer than the simulated ones
+REQUEST_TIMEOUT_S = 0.5  # Shortened for the test
+WEATHER_DATA = (-12.75, 1013, 100, 12.35, "thunderstorm with heavy drizzle", "Thunderstorm")
+LOCATION = "Frankfurt am Main"
+TASKS = (
+    # name, period, run time (ms)
+    ("display", 1000, 48),
+    ("weather", 15 * 60 * 1000, 1850),
+    ("wifi_check", 30000, 3),
+    ("ntp_sync", 6 * 60 * 60 * 1000, 210),
+    ("page_rotate", 30000, 1),
+    ("location_rotate", 20000, 2),
+    ("page_wipe", 40, 9),
+    ("daylight", 24 * 60 * 60 * 1000, 46),
+)
+PAGES = ("weather", "forecast", "history", "system")
+
+
+class FakeWDT:
+    def feed(self):
+        pass
+
+
+class FakeRTC:
+    def __init__(self, data=b""):
+        self._data = data
+
+    def memory(self, data=None):
+        if data is None:
+            return self._data
+        self._data = bytes(data)
+
+
+def fake_display(clock):
+    """A stand-in for `display.py` with the parts the status server reads."""
+    display = types.ModuleType("display")
+    display.weather_state = WeatherState()
+    display.weather_state.set_data(WEATHER_DATA, "11n", LOCATION)
+    display.render_stats = types.SimpleNamespace(count=UPTIME_MS // 1000, total_us=41234 * (UPTIME_MS // 1000),
+                                                 max_us=187654, last_us=40321)
+    display.flush_stats = types.SimpleNamespace(summary=lambda: {
+        "frames": UPTIME_MS // 1000, "stripes": 10, "render_us": 31234, "flush_us": 28765,
+        "frame_us": 40321, "overlap_us": 19678,
+    })
+    display.page_stats = lambda: dict(
+        {"active": "forecast"},
+        **{name: {"built": True, "builds": 1234, "build_ms": 187, "heap_bytes": 12345} for name in PAGES},
+    )
+    return display
+
+
+def fake_wifi():
+    wifi = types.ModuleType("wifi")
+    wifi.wlan = types.SimpleNamespace(status=lambda name: -87)
+    wifi.is_connected = lambda: True
+    return wifi
+
+
+def simulated_station():
+    """
+    Sets up the station modules as after `UPTIME_MS` of operation.
+
+    Returns:
+        scheduler.Scheduler: The scheduler with all tasks registered.
+    """
+    clock = power.VirtualClock()
+    sched = scheduler.Scheduler(clock)
+    for name, period_ms, run_ms in TASKS:
+        sched.add(name, period_ms, lambda run_ms=run_ms: clock.advance(run_ms))
+    with contextlib.redirect_stdout(io.StringIO()):
+        sensor.start(sched, FakeBME280Bus(clock))
+        # A watchdog reset while the weather fetch hung, recorded in RTC memory
+        rtc = FakeRTC()
+        previous = watchdog.Supervisor(sched, FakeWDT(), rtc, None, "power on")
+        hung = next(task for _, _, task, _ in sched._heap if task.name == "weather")
+        previous.task_started(hung, 123456)
+        watchdog.supervisor = watchdog.Supervisor(sched, FakeWDT(), rtc, None, "watchdog reset")
+        sched.monitor = watchdog.supervisor
+        while clock.now_ms < 10 * 60 * 1000:
+            power.run_loop(sched, clock, max_iterations=1)
+        for _ in range(3):
+            weather.breaker.record_failure("[Errno 113] EHOSTUNREACH")
+
+    # The counters after 30 days
+    clock.sleep_ms(UPTIME_MS - clock.now_ms)
+    for _, _, task, _ in sched._heap:
+        task.runs = UPTIME_MS // task.period_ms
+        task.missed = task.runs // 1000
+        task.max_late_ms = 12345
+        task.max_run_ms = 12345
+        task.total_run_ms = task.runs * 1234
+        task.last_run_ms = UPTIME_MS - 1
+    weather.breaker.successes = 2880
+    sup = watchdog.supervisor
+    sup.ticks = UPTIME_MS // 1000
+    sup.late_ticks = sup.feeds = 12345
+    sup.max_latency_ms = 12345
+    sup.strikes = {"weather": 3}
+    sup.cancelled = ["page_wipe"]
+
+    ntp.last_offset_us = -1234567
+    ntp.last_delay_us = 123456
+    ntp.last_server = "0.pool.ntp.org"
+    ntp.drift_ppb = -12345
+    sys.modules["display"] = fake_display(clock)
+    sys.modules["wifi"] = fake_wifi()
+    return sched
+
+
+async def request(port, data):
+    """Sends raw request bytes. Returns (status code, body bytes)."""
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(data)
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    head, _, body = response.partition(b"\r\n\r\n")
+    return int(head.split()[1]), body
+
+
+async def run_checks(sched, failed):
+    status_server.REQUEST_TIMEOUT_S = REQUEST_TIMEOUT_S
+    with contextlib.redirect_stdout(io.StringIO()):
+        server = await status_server.start(sched, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    get = b"GET /status HTTP/1.1\r\nHost: station\r\n\r\n"
+
+    # The full status
+    code, body = await request(port, get)
+    status = json.loads(body) if code == 200 else {}
+    margin = status_server.MAX_RESPONSE_BYTES - len(body)
+    print(f"GET /status: {code}, {len(body)} bytes (limit {status_server.MAX_RESPONSE_BYTES}, margin {margin})")
+    for section, size in sorted(((k, len(json.dumps(v))) for k, v in status.items()), key=lambda x: -x[1]):
+        print(f"  {section:10} {size:5} bytes")
+    if code != 200 or margin < MIN_MARGIN_BYTES:
+        failed.append("full status size")
+    expected = {
+        ("weather", "description"): WEATHER_DATA[4],
+        ("weather", "location"): LOCATION,
+        ("wifi", "rssi"): -87,
+        ("ntp", "offset_us"): ntp.last_offset_us,
+        ("render", "pages"): sys.modules["display"].page_stats(),
+        ("breaker", "last_status"): "[Errno 113] EHOSTUNREACH",
+        ("sensor", "address"): FakeBME280Bus.ADDRESS,
+        ("uptime_ms",): UPTIME_MS,
+    }
+    for path, value in expected.items():
+        got = status
+        for key in path:
+            got = got.get(key, {}) if isinstance(got, dict) else None
+        if got != value:
+            print(f"  ERROR: {'.'.join(path)} is {got!r}, expected {value!r}")
+            failed.append("status fields")
+    names = {name for name, _, _ in TASKS} | {"sensor"}
+    if set(status.get("tasks", {})) != names or status.get("watchdog", {}).get("last_reset", {}).get("task") != "weather":
+        failed.append("tasks and watchdog")
+
+    # Other paths, methods and oversized requests
+    results = {
+        "GET /other": await request(port, b"GET /other HTTP/1.1\r\n\r\n"),
+        "POST /status": await request(port, b"POST /status HTTP/1.1\r\n\r\n"),
+        "oversized request": await request(port, b"GET /status HTTP/1.1\r\nX-Pad: " + b"a" * 600 + b"\r\n\r\n"),
+    }
+    print("\n" + ", ".join(f"{name}: {code}" for name, (code, _) in results.items()))
+    if [code for code, _ in results.values()] != [404, 400, 400]:
+        failed.append("bad requests")
+
+    # Clients that connect but do not send a request hold all slots
+    idle = [await asyncio.open_connection("127.0.0.1", port) for _ in range(status_server.MAX_CONNECTIONS)]
+    await asyncio.sleep(0.05)
+    started = time.monotonic()
+    code, _ = await request(port, get)
+    busy_ms = int((time.monotonic() - started) * 1000)
+    await asyncio.sleep(REQUEST_TIMEOUT_S + 0.1)
+    code_after, _ = await request(port, get)
+    for _, writer in idle:
+        writer.close()
+    print(
+        f"\n{status_server.MAX_CONNECTIONS} idle clients: next request {code} after {busy_ms} ms; "
+        f"after the request timeout: {code_after}"
+    )
+    if code != 503 or busy_ms > 500 or code_after != 200:
+        failed.append("connection cap")
+
+    # A status that does not fit
+    display = sys.modules["display"]
+    display.weather_state.set_data(WEATHER_DATA[:4] + ("x" * status_server.MAX_RESPONSE_BYTES,) + WEATHER_DATA[5:])
+    code, body = await request(port, get)
+    print(f"\nStatus over {status_server.MAX_RESPONSE_BYTES} bytes: {code} {body.decode()}")
+    if code != 500:
+        failed.append("response cap")
+    print(f"Server counters: {status_server.stats}")
+
+    server.close()
+    await server.wait_closed()
+
+
+def main() -> None:
+    """
+    Main function to run the checks and print the results.
+    """
+    failed = []
+    sched = simulated_station()
+    asyncio.run(run_checks(sched, failed))
+
+    if failed:
+        print(f"\nERROR: Checks failed: {', '.join(sorted(set(failed)))}")
+        sys.exit(1)
+    print("\nAll status endpoint checks passed.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,385 @@
+"""
+This script checks the watchdog supervisor (`watchdog.py`) on the host with a simulated clock.
+
+The simulated station runs the UI tick every second, the weather fetch every
+15 minutes and the Wi-Fi check every 30 seconds on the real scheduler. The
+tasks "run" by advancing the virtual clock. A fake `machine.WDT` resets the
+station when it was not fed for `watchdog.WDT_TIMEOUT_MS`, a fake RTC keeps its
+memory across resets, and a reset boots a fresh scheduler and supervisor.
+
+The script checks that:
+- in normal operation (with a fetch that briefly delays a tick) the watchdog
+  never fires and no task is postponed,
+- a weather fetch that keeps running over its budget is postponed with a
+  growing delay and finally cancelled, while the UI keeps ticking,
+- a fetch that hangs is ended by the watchdog within `WDT_TIMEOUT_MS`, and the
+  next boot reports the hanging task,
+- UI ticks that are late again and again lead to a supervisor reset before the
+  watchdog fires, with the data saved first and the cause reported after the
+  reboot. The supervisor resets with `machine.reset()`, which stops the
+  watchdog, not with a soft reset, which would leave it running,
+- during a Wi-Fi outage of 10 minutes, the real reconnect of the Wi-Fi check
+  (`system_tasks.check_wifi()` with three networks out of reach) stays within
+  its budget, so the check is neither postponed nor cancelled and the station
+  is back online shortly after the outage. Without the reconnect timeout the
+  check runs over its budget; it is then postponed, but never cancelled (which
+  would keep the station offline until a reboot),
+- a boot with the watchdog still running (after a soft reset) and no Wi-Fi
+  reaches the main loop before the watchdog fires: the Wi-Fi connection gives
+  up after `watchdog.BOOT_WIFI_TIMEOUT_MS` and the NTP sync after
+  `ntp.NTP_TIMEOUT_MS`. Without the cap, the retries of all networks would run
+  past the watchdog timeout and reset the station on every boot.
+
+Usage:
+    python3 scripts/simulate_watchdog.py
+"""
+
+import contextlib
+import io
+import os
+import sys
+import types
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import ntp  # noqa: E402
+import power  # noqa: E402
+import scheduler  # noqa: E402
+import system_tasks  # noqa: E402
+import watchdog  # noqa: E402
+import wifi  # noqa: E402
+
+# --- CONFIGURATION ---
+TICK_MS = 20  # Run time of a UI tick
+WIFI_CHECK_MS = 5
+WEATHER_INTERVAL_MS = 15 * 60 * 1000
+HANG_MS = 10 * 60 * 1000
+WIFI_NETWORKS = 3  # Credentials in secrets.py
+OUTAGE_MS = (60 * 1000, 11 * 60 * 1000)  # Start and end of the Wi-Fi outage
+RESET_CAUSES = {"power on": 1, "hard reset": 2, "watchdog reset": 3, "soft reset": 5}
+
+
+class SimulatedReset(BaseException):
+    """Raised when the simulated station resets; the scheduler does not catch it."""
+
+    def __init__(self, cause):
+        super().__init__(cause)
+        self.cause = cause
+
+
+class WatchdogClock(power.VirtualClock):
+    """A virtual clock that resets the station when the watchdog was not fed in time."""
+
+    def __init__(self, timeout_ms):
+        super().__init__()
+        self.timeout_ms = timeout_ms
+        self.last_feed_ms = 0
+        self.longest_gap_ms = 0
+
+    def feed(self):
+        self.longest_gap_ms = max(self.longest_gap_ms, self.now_ms - self.last_feed_ms)
+        self.last_feed_ms = self.now_ms
+
+    def _check(self):
+        if self.now_ms - self.last_feed_ms > self.timeout_ms:
+            self.now_ms = self.last_feed_ms + self.timeout_ms
+            raise SimulatedReset("watchdog reset")
+
+    def sleep_ms(self, ms):
+        super().sleep_ms(ms)
+        self._check()
+
+    def advance(self, ms):
+        super().advance(ms)
+        self._check()
+
+
+class FakeWDT:
+    def __init__(self, clock):
+        self._clock = clock
+
+    def feed(self):
+        self._clock.feed()
+
+
+class FakeRTC:
+    """RTC memory that survives resets, like on the ESP32."""
+
+    def __init__(self):
+        self._data = b""
+
+    def memory(self, data=None):
+        if data is None:
+            return self._data
+        self._data = bytes(data)
+
+
+class Pin:
+    OUT = 1
+
+    def __init__(self, pin, mode):
+        pass
+
+    def value(self, value):
+        pass
+
+
+def fake_machine(clock, rtc, cause):
+    """A stand-in for the `machine` module with the parts `watchdog.start()` uses."""
+
+    def reset():
+        raise SimulatedReset("hard reset")
+
+    def soft_reset():
+        raise SimulatedReset("soft reset")
+
+    return types.SimpleNamespace(
+        PWRON_RESET=1, HARD_RESET=2, WDT_RESET=3, DEEPSLEEP_RESET=4, SOFT_RESET=5,
+        reset_cause=lambda: RESET_CAUSES[cause],
+        RTC=lambda: rtc,
+        WDT=lambda timeout: FakeWDT(clock),
+        reset=reset,
+        soft_reset=soft_reset,
+        Pin=Pin,
+    )
+
+
+def fake_wifi(clock):
+    """
+    Installs a fake network stack and three credentials for `wifi.py`, on the
+    virtual clock. Returns the link state: the networks are in reach while
+    `link.up` is True.
+    """
+    link = types.SimpleNamespace(up=False)
+
+    class WLAN:
+        PM_POWERSAVE = 2
+
+        def __init__(self, interface):
+            self.connected = False
+
+        def active(self, active):
+            pass
+
+        def connect(self, ssid, password):
+            clock.advance(5)
+            self.connected = link.up
+
+        def isconnected(self):
+            return self.connected and link.up
+
+        def disconnect(self):
+            self.connected = False
+
+        def ifconfig(self):
+            return ("192.168.1.50",)
+
+    sys.modules["network"] = types.SimpleNamespace(STA_IF=0, WLAN=WLAN)
+    sys.modules["secrets"] = types.SimpleNamespace(secrets={
+        "wifi_credentials": [{"ssid": f"net{i}", "password": ""} for i in range(WIFI_NETWORKS)],
+    })
+    wifi.time = types.SimpleNamespace(
+        ticks_ms=clock.ticks_ms,
+        ticks_diff=clock.ticks_diff,
+        sleep=lambda s: clock.advance(int(s * 1000)),
+        sleep_ms=clock.advance,
+    )
+    wifi.status_led = None
+    wifi.wlan = None
+    return link
+
+
+def boot(rtc, cause, weather_ms, tick_ms=TICK_MS, real_wifi=False):
+    """
+    Boots the simulated station and starts the supervisor with `watchdog.start()`.
+    With `real_wifi`, the Wi-Fi check is `system_tasks.check_wifi()` on a fake
+    network stack (see `fake_wifi()`), connected at the start.
+
+    Returns:
+        tuple: (clock, scheduler, supervisor, saved), where `saved` counts the
+               calls of the `before_reset` hook.
+    """
+    clock = WatchdogClock(watchdog.WDT_TIMEOUT_MS)
+    sched = scheduler.Scheduler(clock)
+    saved = [0]
+
+    def display():
+        clock.advance(tick_ms)
+
+    def weather():
+        clock.advance(weather_ms)
+
+    def wifi_check():
+        clock.advance(WIFI_CHECK_MS)
+
+    sched.add("display", 1000, display, delay_ms=0, coalesce=False)
+    sched.weather_task = sched.add("weather", WEATHER_INTERVAL_MS, weather, delay_ms=250)
+    if real_wifi:
+        sched.link = fake_wifi(clock)
+        sched.link.up = True
+        wifi.wlan = sys.modules["network"].WLAN(0)
+        wifi.wlan.connected = True
+        wifi_check = system_tasks.check_wifi
+    sched.wifi_task = sched.add("wifi_check", system_tasks.WLAN_CHECK_INTERVAL_MS, wifi_check)
+
+    def before_reset():
+        saved[0] += 1
+
+    sys.modules["machine"] = fake_machine(clock, rtc, cause)
+    with contextlib.redirect_stdout(io.StringIO()):
+        supervisor = watchdog.start(sched, before_reset)
+    return clock, sched, supervisor, saved
+
+
+def boot_without_wifi(timeout_ms):
+    """
+    Runs the blocking boot steps (Wi-Fi, NTP) with the watchdog still running
+    from before a soft reset, while no network is in reach.
+
+    Args:
+        timeout_ms (int): Passed to `wifi.connect_wifi()`, None for no limit.
+
+    Returns:
+        tuple: (time the steps took in ms, reset cause or None)
+    """
+    clock = WatchdogClock(watchdog.WDT_TIMEOUT_MS)
+    fake_wifi(clock)  # No network in reach
+    sys.modules["machine"] = types.SimpleNamespace(Pin=Pin)
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            wifi.connect_wifi(timeout_ms=timeout_ms)
+            clock.advance(ntp.NTP_TIMEOUT_MS)  # No NTP server answers without Wi-Fi either
+    except SimulatedReset as e:
+        return clock.now_ms, e.cause
+    return clock.now_ms, None
+
+
+def run(clock, sched, duration_ms):
+    """Runs the loop for `duration_ms` of virtual time. Returns the reset cause or None."""
+    try:
+        while clock.now_ms < duration_ms:
+            power.run_loop(sched, clock, max_iterations=1)
+    except SimulatedReset as e:
+        return e.cause
+    return None
+
+
+def main() -> None:
+    """
+    Main function to run the scenarios and print the results.
+    """
+    failed = []
+
+    # Normal operation: a fetch takes 1.5 s and delays one tick every 15 minutes
+    rtc = FakeRTC()
+    clock, sched, sup, _ = boot(rtc, "power on", weather_ms=1500)
+    reset = run(clock, sched, 60 * 60 * 1000)
+    print(
+        f"Normal operation (1 h): {sup.ticks} ticks, {sup.late_ticks} late, "
+        f"max latency {sup.max_latency_ms} ms, longest time without feed "
+        f"{clock.longest_gap_ms} ms, reset: {reset}"
+    )
+    if reset or sup.postponed or sup.cancelled or sup.late_ticks > 5:
+        failed.append("normal operation")
+
+    # The fetch keeps running for 20 s, over its budget but within the watchdog timeout
+    rtc = FakeRTC()
+    clock, sched, sup, _ = boot(rtc, "power on", weather_ms=20000)
+    reset = run(clock, sched, 6 * 60 * 60 * 1000)
+    runs = sched.weather_task.runs
+    print(
+        f"\nSlow fetch (20 s, budget {watchdog.TASK_BUDGETS_MS['weather']} ms, 6 h): "
+        f"{runs} runs, postponed {sup.postponed} times, cancelled: {sup.cancelled}, "
+        f"{sup.ticks} ticks ({sup.late_ticks} late), reset: {reset}"
+    )
+    if reset or sup.cancelled != ["weather"] or runs != watchdog.CANCEL_AFTER_STRIKES:
+        failed.append("slow task")
+
+    # The fetch hangs: the watchdog resets the station, the next boot names the task
+    rtc = FakeRTC()
+    clock, sched, sup, _ = boot(rtc, "power on", weather_ms=HANG_MS)
+    reset = run(clock, sched, 60 * 60 * 1000)
+    frozen_ms = clock.now_ms - clock.last_feed_ms
+    clock, sched, sup, _ = boot(rtc, reset, weather_ms=800)
+    print(
+        f"\nHanging fetch: {reset} after {frozen_ms} ms without a UI tick; "
+        f"after reboot: {watchdog.format_reset(sup.last_reset)}"
+    )
+    if reset != "watchdog reset" or sup.last_reset["task"] != "weather" or frozen_ms > watchdog.WDT_TIMEOUT_MS:
+        failed.append("hanging task")
+    if run(clock, sched, 10 * 60 * 1000):
+        failed.append("recovery after watchdog reset")
+
+    # Every UI tick takes 700 ms: the supervisor resets before the watchdog does
+    rtc = FakeRTC()
+    clock, sched, sup, saved = boot(rtc, "power on", weather_ms=800, tick_ms=700)
+    reset = run(clock, sched, 60 * 60 * 1000)
+    late_ticks = sup.late_ticks
+    clock, sched, sup, _ = boot(rtc, reset, weather_ms=800)
+    print(
+        f"\nSlow UI tick (700 ms): {reset} after {late_ticks} late ticks, data saved: {saved[0]}; "
+        f"after reboot: {watchdog.format_reset(sup.last_reset)} "
+        f"(last latency {sup.last_reset['detail_ms']} ms, {sup.last_reset['resets']} resets)"
+    )
+    if reset != "hard reset" or not saved[0] or sup.last_reset["cause"] != "supervisor reset":
+        failed.append("late ticks")
+
+    # A Wi-Fi outage with the real reconnect: with the reconnect timeout, without it
+    # (postponed, not cancelled) and without it in the old supervisor (cancelled)
+    for name, timeout_ms, never_cancel in (
+        ("reconnect timeout", system_tasks.WLAN_RECONNECT_TIMEOUT_MS, watchdog.NEVER_CANCEL),
+        ("no reconnect timeout", None, watchdog.NEVER_CANCEL),
+        ("no reconnect timeout, cancellable", None, ()),
+    ):
+        saved_timeout, saved_never_cancel = system_tasks.WLAN_RECONNECT_TIMEOUT_MS, watchdog.NEVER_CANCEL
+        system_tasks.WLAN_RECONNECT_TIMEOUT_MS, watchdog.NEVER_CANCEL = timeout_ms, never_cancel
+        clock, sched, sup, _ = boot(FakeRTC(), "power on", weather_ms=1500, real_wifi=True)
+        with contextlib.redirect_stdout(io.StringIO()):
+            reset = run(clock, sched, OUTAGE_MS[0])
+            sched.link.up = False
+            reset = reset or run(clock, sched, OUTAGE_MS[1])
+            sched.link.up = True
+            reconnected_ms = None
+            while not reset and clock.now_ms < OUTAGE_MS[1] + 30 * 60 * 1000:
+                reset = run(clock, sched, clock.now_ms + 1000)
+                if reconnected_ms is None and wifi.is_connected():
+                    reconnected_ms = clock.now_ms - OUTAGE_MS[1]
+        system_tasks.WLAN_RECONNECT_TIMEOUT_MS, watchdog.NEVER_CANCEL = saved_timeout, saved_never_cancel
+        task = sched.wifi_task
+        print(
+            f"\nWi-Fi outage of {(OUTAGE_MS[1] - OUTAGE_MS[0]) // 60000} min ({name}): {task.runs} checks, "
+            f"longest {task.max_run_ms} ms (budget {watchdog.TASK_BUDGETS_MS['wifi_check']} ms), "
+            f"postponed {sup.postponed} times, cancelled: {sup.cancelled}, "
+            f"online again after: {reconnected_ms} ms, reset: {reset}"
+        )
+        if reset or (never_cancel and (sup.cancelled or reconnected_ms is None)):
+            failed.append(f"Wi-Fi outage ({name})")
+        if timeout_ms and (sup.postponed or task.max_run_ms > watchdog.TASK_BUDGETS_MS["wifi_check"]):
+            failed.append(f"Wi-Fi reconnect budget ({name})")
+        if not timeout_ms and task.max_run_ms <= watchdog.TASK_BUDGETS_MS["wifi_check"]:
+            failed.append(f"Wi-Fi reconnect duration ({name})")
+
+    # A boot with the watchdog still running and no Wi-Fi, with and without the boot budget
+    boot_ms, reset = boot_without_wifi(watchdog.BOOT_WIFI_TIMEOUT_MS)
+    uncapped_ms, uncapped_reset = boot_without_wifi(None)
+    print(
+        f"\nBoot without Wi-Fi ({WIFI_NETWORKS} networks, watchdog running): Wi-Fi and NTP took "
+        f"{boot_ms} ms (watchdog timeout {watchdog.WDT_TIMEOUT_MS} ms), reset: {reset}; "
+        f"without the boot budget: {uncapped_reset} after {uncapped_ms} ms"
+    )
+    if reset or boot_ms >= watchdog.WDT_TIMEOUT_MS:
+        failed.append("boot budget")
+
+    # A power cycle clears the RTC memory
+    clock, sched, sup, _ = boot(FakeRTC(), "power on", weather_ms=800)
+    if sup.last_reset["task"] is not None or sup.last_reset["cause"] != "power on":
+        failed.append("power on")
+
+    if failed:
+        print(f"\nERROR: Checks failed: {', '.join(failed)}")
+        sys.exit(1)
+    print("\nAll watchdog checks passed.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+"""
+This script stress-tests the weather state handoff (`weather_state.py`) on the host.
+
+A writer thread publishes weather states whose fields all derive from one
+counter, so a reader can tell whether a snapshot mixes two updates. Several
+reader threads take snapshots as fast as they can. The thread switch interval
+is set to a few microseconds, so the threads are interrupted in the middle of
+reads and writes.
+
+For comparison, the same is done with plain module globals (the way
+`display.py` used to keep the state), which shows the torn reads the two-slot
+buffer prevents.
+
+Usage:
+    python3 scripts/stress_weather_state.py [--seconds N]
+"""
+
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import weather_state  # noqa: E402
+
+# --- CONFIGURATION ---
+READERS = 4
+DEFAULT_SECONDS = 3
+SWITCH_INTERVAL_S = 5e-6
+
+
+def make_state(k):
+    """Returns a weather state in which every field encodes the update number `k`."""
+    data = (k, k, k, k, f"desc {k}", f"main {k}")
+    return data, f"icon {k}", f"location {k}"
+
+
+def is_consistent(snapshot):
+    """Checks that all fields of a snapshot come from the same update."""
+    data = snapshot[weather_state.DATA]
+    k = data[0]
+    if k is None:
+        return all(v is None for v in data)
+    return (
+        data == make_state(k)[0]
+        and snapshot[weather_state.ICON] == f"icon {k}"
+        and snapshot[weather_state.LOCATION] == f"location {k}"
+        and snapshot[weather_state.UPDATED_MS] == k
+        and snapshot[weather_state.STALE] == (k % 3 == 0)
+    )
+
+
+class Globals:
+    """
+    The unsynchronized variant: one attribute per field, written and read one
+    after another, with other code running in between (CPython switches
+    threads only between such steps, so the fields are accessed in a loop).
+    """
+
+    FIELDS = ("data", "icon", "location", "updated_ms", "stale")
+
+    def __init__(self):
+        self.seq = 0
+        self.data = weather_state.EMPTY_DATA
+        self.icon = weather_state.DEFAULT_ICON
+        self.location = ""
+        self.updated_ms = None
+        self.stale = False
+
+    def write(self, k):
+        data, icon, location = make_state(k)
+        for name, value in zip(self.FIELDS, (data, icon, location, k, k % 3 == 0)):
+            setattr(self, name, value)
+        self.seq += 1
+
+    def read_into(self, out):
+        for i, name in enumerate(self.FIELDS):
+            out[i] = getattr(self, name)
+        return self.seq
+
+
+def write_buffered(state, k):
+    data, icon, location = make_state(k)
+    # One update with all fields, like `_publish()` does for the display tasks
+    state._publish(data, icon, location, k, k % 3 == 0)
+
+
+def run(target, write, seconds):
+    """
+    Runs one writer and `READERS` readers against `target` for `seconds`.
+
+    Returns:
+        tuple: (writes, reads, torn reads, sequence went backwards)
+    """
+    stop = threading.Event()
+    counts = {"writes": 0, "reads": 0, "torn": 0, "backwards": 0}
+    lock = threading.Lock()
+
+    def writer():
+        k = 1
+        while not stop.is_set():
+            write(target, k)
+            k += 1
+        counts["writes"] = k - 1
+
+    def reader():
+        snapshot = [None] * weather_state.FIELD_COUNT
+        reads = torn = backwards = 0
+        last_seq = -1
+        while not stop.is_set():
+            seq = target.read_into(snapshot)
+            reads += 1
+            if not is_consistent(snapshot):
+                torn += 1
+            if seq < last_seq:
+                backwards += 1
+            last_seq = seq
+        with lock:
+            counts["reads"] += reads
+            counts["torn"] += torn
+            counts["backwards"] += backwards
+
+    threads = [threading.Thread(target=writer)]
+    threads += [threading.Thread(target=reader) for _ in range(READERS)]
+    for t in threads:
+        t.start()
+    time.sleep(seconds)
+    stop.set()
+    for t in threads:
+        t.join()
+    return counts["writes"], counts["reads"], counts["torn"], counts["backwards"]
+
+
+def main() -> None:
+    """
+    Main function to run the stress test and check the results.
+    """
+    seconds = DEFAULT_SECONDS
+    if "--seconds" in sys.argv:
+        seconds = float(sys.argv[sys.argv.index("--seconds") + 1])
+    sys.setswitchinterval(SWITCH_INTERVAL_S)
+
+    state = weather_state.WeatherState()
+    writes, reads, torn, backwards = run(state, write_buffered, seconds)
+    print(f"Two-slot buffer: {writes} writes, {reads} reads, {torn} torn, "
+          f"{state.retries} retried, sequence went backwards {backwards} times")
+
+    plain = Globals()
+    g_writes, g_reads, g_torn, _ = run(plain, Globals.write, seconds)
+    print(f"Plain globals:   {g_writes} writes, {g_reads} reads, {g_torn} torn")
+
+    if torn or backwards:
+        print("ERROR: The two-slot buffer returned inconsistent snapshots.")
+        sys.exit(1)
+    if not state.retries:
+        print("WARNING: No read was interrupted by a write; increase --seconds.")
+    print("\nStress test passed.")
+
+
+if __name__ == "__main__":
+    main()
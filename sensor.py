@@ -0,0 +1,360 @@
+"""
+This module samples a local BME280 temperature, humidity and pressure sensor.
+
+The sensor is read in forced mode by a scheduler task with two phases, so the
+task never waits for the measurement:
+
+1. "trigger": set the oversampling and start one measurement, then schedule
+   the read for when the measurement is complete (at most about 10 ms with the
+   default oversampling),
+2. "read": read the raw values (one 8-byte I2C transfer), compensate them and
+   add them to a moving average, then schedule the next trigger.
+
+If the sensor is still measuring in phase 2, the read is retried shortly
+after, for up to `MEASURE_TIMEOUT_FACTOR` times the maximum measurement time.
+A measurement that takes longer is counted as an error and the next one is
+started after the normal interval. I2C errors are counted and the readings
+turn stale, but never stop the scheduler loop.
+
+The moving averages use preallocated ring buffers of integers (0.01 °C, Pa,
+0.01 %RH). `reading()` returns the averaged values, with the pressure reduced
+to sea level (with `ALTITUDE_M`), so they can be shown next to the
+OpenWeatherMap values. `seq` advances with every new sample, so the UI can
+skip unchanged readings.
+
+The module does not import `machine` until `start()` is called without a
+bus, so it can be run on a host with a fake I2C bus (see
+`scripts/simulate_sensor.py`).
+"""
+
+import struct
+from array import array
+
+# --- Configuration ---
+SENSOR_ENABLED = True
+I2C_ID = 0
+I2C_SDA = 25
+I2C_SCL = 26
+I2C_FREQ = 400000
+ADDRESSES = (0x76, 0x77)  # SDO to GND or to VCC
+ALTITUDE_M = 0  # Altitude of the station, for the sea-level pressure
+
+# --- Sampling ---
+SAMPLE_INTERVAL_MS = 10000
+AVERAGE_SAMPLES = 6  # Moving average over one minute
+STALE_AFTER_SAMPLES = 3  # Readings turn stale after this many missed samples
+RETRY_DELAY_MS = 2  # If the measurement is not complete yet
+MEASURE_TIMEOUT_FACTOR = 2  # Give up a measurement after twice its maximum duration
+
+# Oversampling factors (1, 2, 4, 8 or 16; 0 skips the value) and the sensor's
+# own IIR filter coefficient (0 = off; the moving average does the smoothing).
+OVERSAMPLING_T = 2
+OVERSAMPLING_P = 4
+OVERSAMPLING_H = 1
+IIR_FILTER = 0
+
+# --- BME280 Registers ---
+_REG_CALIB_TP = 0x88  # 24 bytes: T1..T3, P1..P9
+_REG_CALIB_H1 = 0xA1
+_REG_CHIP_ID = 0xD0
+_REG_CALIB_H2 = 0xE1  # 7 bytes: H2..H6
+_REG_CTRL_HUM = 0xF2
+_REG_STATUS = 0xF3
+_REG_CTRL_MEAS = 0xF4
+_REG_CONFIG = 0xF5
+_REG_DATA = 0xF7  # 8 bytes: pressure, temperature, humidity
+_CHIP_ID = 0x60
+_STATUS_MEASURING = 0x08
+_MODE_FORCED = 0x01
+_OVERSAMPLING_CODES = {0: 0, 1: 1, 2: 2, 4: 3, 8: 4, 16: 5}
+
+
+def _s8(value):
+    return value - 256 if value > 127 else value
+
+
+class BME280:
+    """
+    Minimal BME280 driver for forced-mode measurements.
+
+    The compensation uses the integer formulas of the datasheet (section 4.2.3).
+
+    Args:
+        i2c (machine.I2C): The bus, or any object with `readfrom_mem`,
+                           `readfrom_mem_into` and `writeto_mem`.
+        address (int): I2C address of the sensor.
+
+    Raises:
+        OSError: If there is no BME280 at the address.
+    """
+
+    def __init__(self, i2c, address):
+        self.i2c = i2c
+        self.address = address
+        if i2c.readfrom_mem(address, _REG_CHIP_ID, 1)[0] != _CHIP_ID:
+            raise OSError("no BME280 at 0x{:02x}".format(address))
+
+        (self.t1, self.t2, self.t3, self.p1, self.p2, self.p3, self.p4, self.p5,
+         self.p6, self.p7, self.p8, self.p9) = struct.unpack(
+            "<HhhHhhhhhhhh", i2c.readfrom_mem(address, _REG_CALIB_TP, 24)
+        )
+        self.h1 = i2c.readfrom_mem(address, _REG_CALIB_H1, 1)[0]
+        h = i2c.readfrom_mem(address, _REG_CALIB_H2, 7)
+        self.h2 = struct.unpack_from("<h", h, 0)[0]
+        self.h3 = h[2]
+        self.h4 = (_s8(h[3]) << 4) | (h[4] & 0x0F)
+        self.h5 = (_s8(h[5]) << 4) | (h[4] >> 4)
+        self.h6 = _s8(h[6])
+
+        self._data = bytearray(8)
+        self._reg = bytearray(1)
+        self._ctrl_meas = (
+            (_OVERSAMPLING_CODES[OVERSAMPLING_T] << 5)
+            | (_OVERSAMPLING_CODES[OVERSAMPLING_P] << 2)
+            | _MODE_FORCED
+        )
+        self._ctrl_hum = bytes([_OVERSAMPLING_CODES[OVERSAMPLING_H]])
+        i2c.writeto_mem(address, _REG_CONFIG, bytes([IIR_FILTER << 2]))
+
+    @staticmethod
+    def measurement_time_ms():
+        """Returns the maximum duration of a measurement (datasheet section 9.1), rounded up."""
+        us = 1250 + 2300 * OVERSAMPLING_T
+        if OVERSAMPLING_P:
+            us += 2300 * OVERSAMPLING_P + 575
+        if OVERSAMPLING_H:
+            us += 2300 * OVERSAMPLING_H + 575
+        return (us + 999) // 1000
+
+    def trigger(self):
+        """Starts one forced-mode measurement. Returns immediately."""
+        # ctrl_hum only takes effect after a write to ctrl_meas.
+        self.i2c.writeto_mem(self.address, _REG_CTRL_HUM, self._ctrl_hum)
+        self._reg[0] = self._ctrl_meas
+        self.i2c.writeto_mem(self.address, _REG_CTRL_MEAS, self._reg)
+
+    def measuring(self):
+        """Returns True while a measurement is in progress."""
+        self.i2c.readfrom_mem_into(self.address, _REG_STATUS, self._reg)
+        return bool(self._reg[0] & _STATUS_MEASURING)
+
+    def read(self):
+        """
+        Reads and compensates the last measurement.
+
+        Returns:
+            tuple: (temperature in 0.01 °C, pressure in Pa, humidity in 0.01 %RH).
+        """
+        d = self._data
+        self.i2c.readfrom_mem_into(self.address, _REG_DATA, d)
+        adc_p = (d[0] << 12) | (d[1] << 4) | (d[2] >> 4)
+        adc_t = (d[3] << 12) | (d[4] << 4) | (d[5] >> 4)
+        adc_h = (d[6] << 8) | d[7]
+
+        # Temperature
+        var1 = (((adc_t >> 3) - (self.t1 << 1)) * self.t2) >> 11
+        var2 = (((((adc_t >> 4) - self.t1) * ((adc_t >> 4) - self.t1)) >> 12) * self.t3) >> 14
+        t_fine = var1 + var2
+        temp = (t_fine * 5 + 128) >> 8
+
+        # Pressure (64-bit variant; long integers, in Pa/256)
+        var1 = t_fine - 128000
+        var2 = var1 * var1 * self.p6
+        var2 += (var1 * self.p5) << 17
+        var2 += self.p4 << 35
+        var1 = ((var1 * var1 * self.p3) >> 8) + ((var1 * self.p2) << 12)
+        var1 = (((1 << 47) + var1) * self.p1) >> 33
+        if var1 == 0:
+            pressure = 0
+        else:
+            p = ((((1048576 - adc_p) << 31) - var2) * 3125) // var1
+            var1 = (self.p9 * (p >> 13) * (p >> 13)) >> 25
+            var2 = (self.p8 * p) >> 19
+            p = ((p + var1 + var2) >> 8) + (self.p7 << 4)
+            pressure = (p + 128) >> 8
+
+        # Humidity, in 1/1024 %RH
+        v = t_fine - 76800
+        v = ((((adc_h << 14) - (self.h4 << 20) - (self.h5 * v)) + 16384) >> 15) * (
+            ((((((v * self.h6) >> 10) * (((v * self.h3) >> 11) + 32768)) >> 10) + 2097152)
+             * self.h2 + 8192) >> 14
+        )
+        v -= ((((v >> 15) * (v >> 15)) >> 7) * self.h1) >> 4
+        v = min(max(v, 0), 419430400)
+        humidity = ((v >> 12) * 100 + 512) >> 10
+
+        return temp, pressure, humidity
+
+
+class MovingAverage:
+    """
+    Moving average over the last `size` integer samples, in a preallocated ring.
+
+    Args:
+        size (int): Number of samples.
+    """
+
+    def __init__(self, size):
+        self._ring = array("i", [0] * size)
+        self._sum = 0
+        self._index = 0
+        self.count = 0
+
+    def add(self, value):
+        ring = self._ring
+        if self.count == len(ring):
+            self._sum -= ring[self._index]
+        else:
+            self.count += 1
+        ring[self._index] = value
+        self._sum += value
+        self._index = (self._index + 1) % len(ring)
+
+    def value(self):
+        """Returns the rounded mean, or None if there are no samples."""
+        if not self.count:
+            return None
+        return (self._sum + self.count // 2) // self.count
+
+    def clear(self):
+        self._sum = 0
+        self._index = 0
+        self.count = 0
+
+
+# --- Sampler State ---
+device = None
+seq = 0  # Advances with every new sample
+samples = 0
+errors = 0
+_sched = None
+_task = None
+_clock = None
+_phase_read = False
+_triggered_ms = None
+_last_sample_ms = None
+_temp = MovingAverage(AVERAGE_SAMPLES)
+_pressure = MovingAverage(AVERAGE_SAMPLES)
+_humidity = MovingAverage(AVERAGE_SAMPLES)
+
+
+def _open_bus():
+    from machine import I2C, Pin
+
+    return I2C(I2C_ID, sda=Pin(I2C_SDA), scl=Pin(I2C_SCL), freq=I2C_FREQ)
+
+
+def start(sched, i2c=None):
+    """
+    Looks for a BME280 and registers the sampling task.
+
+    Args:
+        sched (scheduler.Scheduler): The application's scheduler.
+        i2c (optional): The I2C bus. Defaults to the bus of `I2C_ID` on `I2C_SDA`/`I2C_SCL`.
+
+    Returns:
+        bool: True if a sensor was found.
+    """
+    global device, _sched, _task, _phase_read
+    if not SENSOR_ENABLED:
+        return False
+    if i2c is None:
+        i2c = _open_bus()
+    for address in ADDRESSES:
+        try:
+            device = BME280(i2c, address)
+            break
+        except OSError:
+            continue
+    if device is None:
+        print("No BME280 sensor found, showing OWM data only.")
+        return False
+
+    _sched = sched
+    _phase_read = False
+    _task = sched.add("sensor", SAMPLE_INTERVAL_MS, sample_step, delay_ms=0, coalesce=False)
+    print(
+        f"✓ BME280 at 0x{device.address:02x} registered ({SAMPLE_INTERVAL_MS // 1000}s interval, "
+        f"average of {AVERAGE_SAMPLES})."
+    )
+    return True
+
+
+def sample_step():
+    """
+    Scheduled task: alternately starts a measurement and reads its result.
+    Never waits for the sensor.
+    """
+    global _phase_read, _triggered_ms, samples, errors, seq, _last_sample_ms
+    measure_ms = device.measurement_time_ms()
+    try:
+        if not _phase_read:
+            device.trigger()
+            _phase_read = True
+            _triggered_ms = _sched.now_ms()
+            _sched.reschedule(_task, SAMPLE_INTERVAL_MS, delay_ms=measure_ms)
+            return
+
+        if not device.measuring():
+            temp, pressure, humidity = device.read()
+        elif _sched.now_ms() - _triggered_ms < MEASURE_TIMEOUT_FACTOR * measure_ms:
+            _sched.reschedule(_task, SAMPLE_INTERVAL_MS, delay_ms=RETRY_DELAY_MS)
+            return
+        else:
+            errors += 1
+            print(f"ERROR: BME280 measurement not complete after {_sched.now_ms() - _triggered_ms} ms")
+            temp = None
+    except OSError as e:
+        errors += 1
+        print(f"ERROR: BME280 read failed: {e}")
+        temp = None
+
+    _phase_read = False
+    _sched.reschedule(_task, SAMPLE_INTERVAL_MS, delay_ms=SAMPLE_INTERVAL_MS - measure_ms)
+    if temp is None:
+        return
+    _temp.add(temp)
+    _pressure.add(pressure)
+    _humidity.add(humidity)
+    samples += 1
+    _last_sample_ms = _sched.now_ms()
+    seq += 1
+
+
+def is_stale():
+    """Returns True if no sample was taken for `STALE_AFTER_SAMPLES` intervals."""
+    if _last_sample_ms is None:
+        return True
+    return _sched.now_ms() - _last_sample_ms > STALE_AFTER_SAMPLES * SAMPLE_INTERVAL_MS
+
+
+def reading():
+    """
+    Returns the averaged local values, for showing them next to the OWM data.
+
+    Returns:
+        tuple or None: (temperature in °C, sea-level pressure in hPa, humidity in %),
+                       or None if there is no sensor or the readings are stale.
+    """
+    if device is None or is_stale():
+        return None
+    pressure = _pressure.value() / 100
+    if ALTITUDE_M:
+        pressure /= (1 - ALTITUDE_M / 44330) ** 5.255
+    return _temp.value() / 100, pressure, _humidity.value() / 100
+
+
+def stats():
+    """
+    Returns the sampler counters for instrumentation.
+
+    Returns:
+        dict: {"address", "samples", "errors", "stale", "reading"}
+    """
+    return {
+        "address": device.address if device else None,
+        "samples": samples,
+        "errors": errors,
+        "stale": is_stale() if _sched else True,
+        "reading": reading() if _sched else None,
+    }
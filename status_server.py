@@ -0,0 +1,244 @@
+"""
+This module serves the device status as JSON over HTTP, for fleet monitoring.
+
+A small asyncio server runs next to the scheduler loop (see
+`power.run_loop_async()`). `GET /status` returns the current weather data,
+heap usage, the run times of the scheduled tasks (display tick, weather fetch,
+Wi-Fi check, NTP sync), the render statistics, the Wi-Fi RSSI, the last NTP
+offset, the local sensor readings, the weather API circuit breaker state and
+the watchdog's tick latency and last reset cause.
+
+The server is built to never get in the way of the 1-second UI tick:
+- at most `MAX_CONNECTIONS` clients are served at a time; others get a 503,
+- requests are read in small chunks up to `MAX_REQUEST_BYTES` and must arrive
+  within `REQUEST_TIMEOUT_S`,
+- responses larger than `MAX_RESPONSE_BYTES` are refused.
+
+The status is collected from the modules that are already loaded, so the
+server neither imports the network modules early nor depends on LVGL. On
+CPython it can be run against simulated `display`, `wifi` and `ntp` modules.
+
+Usage:
+    curl http://<station-ip>:8080/status
+"""
+
+import asyncio
+import gc
+import json
+import sys
+
+import weather_state
+
+try:
+    from time import ticks_diff, ticks_ms
+except ImportError:  # CPython, for running on a host
+    from time import monotonic
+
+    def ticks_ms():
+        return int(monotonic() * 1000)
+
+    def ticks_diff(new, old):
+        return new - old
+
+# --- Configuration ---
+STATUS_PORT = 8080
+MAX_CONNECTIONS = 2
+MAX_REQUEST_BYTES = 512  # Request line and headers
+MAX_RESPONSE_BYTES = 4096  # The full status is about 2.7 KB (scripts/simulate_status_server.py)
+REQUEST_TIMEOUT_S = 3
+READ_CHUNK_BYTES = 128
+
+# --- Server State ---
+_sched = None
+_active = 0
+stats = {"served": 0, "rejected": 0, "errors": 0}
+
+
+def _weather_status():
+    display = sys.modules.get("display")
+    if display is None:
+        return None
+    state = [None] * weather_state.FIELD_COUNT
+    seq = display.weather_state.read_into(state)
+    data = state[weather_state.DATA]
+    age_s = None
+    if state[weather_state.UPDATED_MS] is not None:
+        age_s = ticks_diff(ticks_ms(), state[weather_state.UPDATED_MS]) // 1000
+    return {
+        "temp": data[0],
+        "pressure": data[1],
+        "humidity": data[2],
+        "wind": data[3],
+        "description": data[4],
+        "icon": state[weather_state.ICON],
+        "location": state[weather_state.LOCATION],
+        "age_s": age_s,
+        "stale": state[weather_state.STALE],
+        "seq": seq,
+    }
+
+
+def _render_status():
+    display = sys.modules.get("display")
+    if display is None:
+        return None
+    rs = display.render_stats
+    return {
+        "frames": rs.count,
+        "avg_us": rs.total_us // rs.count if rs.count else 0,
+        "max_us": rs.max_us,
+        "last_us": rs.last_us,
+        "flush": display.flush_stats.summary(),
+        "pages": display.page_stats(),
+    }
+
+
+def _wifi_status():
+    wifi = sys.modules.get("wifi")
+    if wifi is None or not wifi.is_connected():
+        return {"connected": False, "rssi": None}
+    try:
+        rssi = wifi.wlan.status("rssi")
+    except (AttributeError, ValueError, OSError):
+        rssi = None
+    return {"connected": True, "rssi": rssi}
+
+
+def _ntp_status():
+    ntp = sys.modules.get("ntp")
+    if ntp is None:
+        return None
+    return {
+        "offset_us": ntp.last_offset_us,
+        "delay_us": ntp.last_delay_us,
+        "server": ntp.last_server,
+        "drift_ppb": ntp.drift_ppb,
+    }
+
+
+def collect_status():
+    """
+    Collects the device status.
+
+    Returns:
+        dict: The status document served at `/status`.
+    """
+    status = {
+        "uptime_ms": _sched.now_ms() if _sched else None,
+        "heap": {
+            "free": gc.mem_free() if hasattr(gc, "mem_free") else None,
+            "alloc": gc.mem_alloc() if hasattr(gc, "mem_alloc") else None,
+        },
+        "weather": _weather_status(),
+        "render": _render_status(),
+        "tasks": _sched.stats() if _sched else {},
+        "wifi": _wifi_status(),
+        "ntp": _ntp_status(),
+        "server": stats,
+    }
+    sensor = sys.modules.get("sensor")
+    if sensor is not None and sensor.device is not None:
+        status["sensor"] = sensor.stats()
+    weather = sys.modules.get("weather")
+    if weather is not None:
+        status["breaker"] = weather.breaker.stats()
+    watchdog = sys.modules.get("watchdog")
+    if watchdog is not None and watchdog.supervisor is not None:
+        status["watchdog"] = watchdog.supervisor.stats()
+    return status
+
+
+async def _read_request(reader):
+    """Reads the request head in small chunks and returns the request line."""
+    head = b""
+    while b"\r\n\r\n" not in head and b"\n\n" not in head:
+        chunk = await reader.read(READ_CHUNK_BYTES)
+        if not chunk:
+            break
+        head += chunk
+        if len(head) > MAX_REQUEST_BYTES:
+            return None
+    return head.split(b"\n", 1)[0].strip()
+
+
+def _response(status_line, body, extra_headers=""):
+    return (
+        f"HTTP/1.1 {status_line}\r\n"
+        "Content-Type: application/json\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        f"{extra_headers}"
+        "Connection: close\r\n\r\n"
+    ).encode() + body
+
+
+async def _handle(reader, writer):
+    """Serves one connection."""
+    global _active
+    if _active >= MAX_CONNECTIONS:
+        stats["rejected"] += 1
+        try:
+            # Consume the request, so closing the socket does not reset the connection.
+            await asyncio.wait_for(reader.read(READ_CHUNK_BYTES), 0.2)
+        except (asyncio.TimeoutError, OSError):
+            pass
+        busy = _response("503 Service Unavailable", b'{"error":"busy"}', "Retry-After: 1\r\n")
+        try:
+            await _send(writer, busy)
+        except OSError:
+            pass
+        return
+
+    _active += 1
+    try:
+        try:
+            request_line = await asyncio.wait_for(_read_request(reader), REQUEST_TIMEOUT_S)
+        except asyncio.TimeoutError:
+            request_line = None
+
+        parts = request_line.split() if request_line else []
+        if len(parts) < 2 or parts[0] != b"GET":
+            response = _response("400 Bad Request", b'{"error":"bad request"}')
+        elif parts[1] not in (b"/", b"/status"):
+            response = _response("404 Not Found", b'{"error":"not found"}')
+        else:
+            # Without the blanks after "," and ":" (about 10 % smaller)
+            body = json.dumps(collect_status(), separators=(",", ":")).encode()
+            if len(body) > MAX_RESPONSE_BYTES:
+                response = _response("500 Internal Server Error", b'{"error":"response too large"}')
+            else:
+                response = _response("200 OK", body)
+                stats["served"] += 1
+        await _send(writer, response)
+    except Exception as e:
+        stats["errors"] += 1
+        print(f"ERROR in status server: {e}")
+    finally:
+        _active -= 1
+
+
+async def _send(writer, data):
+    try:
+        writer.write(data)
+        await writer.drain()
+    finally:
+        writer.close()
+        await writer.wait_closed()
+
+
+async def start(sched, host="0.0.0.0", port=STATUS_PORT):
+    """
+    Starts the status server on the running event loop.
+
+    Args:
+        sched (scheduler.Scheduler): The application's scheduler, for the task timings.
+        host (str): Address to listen on.
+        port (int): TCP port.
+
+    Returns:
+        The asyncio server object.
+    """
+    global _sched
+    _sched = sched
+    server = await asyncio.start_server(_handle, host, port, backlog=MAX_CONNECTIONS)
+    print(f"✓ Status server listening on port {port} (GET /status)")
+    return server
@@ -1,57 +1,71 @@
 """
-This module runs periodic, non-critical system maintenance tasks.
+This module defines periodic, non-critical system maintenance tasks.
 
-It uses a non-blocking, "virtual timer" approach by checking `utime.ticks_ms()`
-in the main loop. This is suitable for tasks that are not time-critical,
-such as checking the Wi-Fi connection and re-syncing the NTP time.
+The tasks (checking the Wi-Fi connection and re-syncing the NTP time) are
+registered with the application's `scheduler.Scheduler`, which runs them at
+their deadlines. They are not time-critical, so they may be coalesced with
+other wake-ups and are spread with a small random jitter. The NTP interval
+adapts to the RTC drift measured by `ntp`, which is imported by the first sync.
 """
 
-import utime
-
-import ntp
 import wifi
 
-# --- Configuration for Virtual Timers ---
+# --- Task Intervals ---
 WLAN_CHECK_INTERVAL_MS = 30000  # 30 seconds
-NTP_SYNC_INTERVAL_MS = 6 * 60 * 60 * 1000  # 6 hours (6 hours * 60 min/hr * 60 sec/min * 1000 ms/sec)
+WLAN_RECONNECT_WAIT_S = 5  # Per network; the next check tries again
+# Over all networks. With the LED flashes and pauses of `wifi.connect_wifi()`
+# (up to 3.5 s) a reconnect stays within the task's watchdog budget.
+WLAN_RECONNECT_TIMEOUT_MS = 10000
+NTP_SYNC_INTERVAL_MS = 6 * 60 * 60 * 1000  # Initial interval until a drift estimate exists (6 hours)
+NTP_SYNC_JITTER_MS = 5 * 60 * 1000  # +/- 5 minutes, spreads the load on the NTP pool
+
+# --- Registered Tasks ---
+_sched = None
+_ntp_task = None
+
+
+def check_wifi():
+    """Checks if the Wi-Fi connection is still active and reconnects if it was lost."""
+    if not wifi.is_connected():
+        print("System Task: WiFi connection lost. Attempting reconnection...")
+        # Re-run the full connection function to handle all cases (e.g., multiple SSIDs),
+        # with a single attempt per network and a total timeout, so the task stays
+        # within its watchdog budget
+        wifi.connect_wifi(
+            max_retries=1, max_wait_s=WLAN_RECONNECT_WAIT_S, timeout_ms=WLAN_RECONNECT_TIMEOUT_MS
+        )
 
-# --- State Variables for Virtual Timers ---
-wlan_check_last_ms = 0
-ntp_sync_last_ms = 0
 
+def sync_ntp():
+    """Re-synchronizes the device's RTC with an NTP server."""
+    import ntp
 
-def run_system_tasks():
+    if wifi.is_connected():
+        print("System Task: Performing NTP sync...")
+        try:
+            ntp.set_rtc_from_ntp()
+        except Exception as e:
+            print(f"System Task: NTP sync failed: {e}")
+            return
+        interval_ms = ntp.next_sync_interval_ms()
+        if interval_ms and _ntp_task and interval_ms != _ntp_task.period_ms:
+            print(f"System Task: Next NTP sync in {interval_ms // 60000} min (drift {ntp.drift_ppb} ppb).")
+            _sched.reschedule(_ntp_task, interval_ms)
+    else:
+        print("System Task: Skipping NTP sync, WLAN is disconnected.")
+
+
+def register_system_tasks(sched):
     """
-    Executes periodic system maintenance tasks using a non-blocking software timer approach.
+    Registers the system maintenance tasks with the scheduler.
+
+    The NTP sync is not run immediately, since `app.py` synchronizes the time
+    once during startup.
 
-    This function should be called frequently within the main application loop.
-    It checks if predefined intervals have passed for tasks like Wi-Fi monitoring
-    and NTP synchronization, and executes them if necessary.
+    Args:
+        sched (scheduler.Scheduler): The application's scheduler.
     """
-    global wlan_check_last_ms
-    global ntp_sync_last_ms
-
-    current_ms = utime.ticks_ms()
-
-    # --- Task 1: Periodic WLAN Check ---
-    # Checks if the Wi-Fi connection is still active and attempts to reconnect if lost.
-    if utime.ticks_diff(current_ms, wlan_check_last_ms) >= WLAN_CHECK_INTERVAL_MS:
-        if not wifi.is_connected():
-            print("System Task: WiFi connection lost. Attempting reconnection...")
-            # Re-run the full connection function to handle all cases (e.g., multiple SSIDs)
-            wifi.connect_wifi()
-        wlan_check_last_ms = current_ms
-
-    # --- Task 2: Periodic NTP Synchronization ---
-    # Re-synchronizes the device's RTC with an NTP server at a longer interval.
-    if utime.ticks_diff(current_ms, ntp_sync_last_ms) >= NTP_SYNC_INTERVAL_MS:
-        if wifi.is_connected():
-            print("System Task: Performing 6-hour NTP sync...")
-            try:
-                ntp.set_rtc_from_ntp()
-            except Exception as e:
-                print(f"System Task: NTP sync failed: {e}")
-        else:
-            print("System Task: Skipping NTP sync, WLAN is disconnected.")
-        # Update the timestamp regardless of success to avoid rapid retries on failure
-        ntp_sync_last_ms = current_ms
\ No newline at end of file
+    global _sched, _ntp_task
+    _sched = sched
+    sched.add("wifi_check", WLAN_CHECK_INTERVAL_MS, check_wifi)
+    _ntp_task = sched.add("ntp_sync", NTP_SYNC_INTERVAL_MS, sync_ntp, jitter_ms=NTP_SYNC_JITTER_MS)
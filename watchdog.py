@@ -0,0 +1,290 @@
+"""
+This module supervises the main loop with the hardware watchdog.
+
+Every task runs in the one scheduler loop, so a task that blocks (a stalled
+socket, a Wi-Fi reconnect that takes too long) also stops the clock on the
+screen. The `Supervisor` is attached to the scheduler (`Scheduler.monitor`)
+and measures the latency of each UI tick: how late it started plus how long it
+ran. It feeds `machine.WDT` only after ticks that finish within
+`TICK_DEADLINE_MS`, and escalates step by step:
+
+1. A task that runs longer than its budget (`TASK_BUDGETS_MS`, the time it
+   may hold up the UI tick) gets a strike and is postponed: its next run is
+   two periods away after the first strike, four after the second, and so on.
+   After `CANCEL_AFTER_STRIKES` consecutive strikes it is cancelled until the
+   next boot, except for the tasks in `NEVER_CANCEL`, which stay postponed by
+   at most 2 ** `CANCEL_AFTER_STRIKES` periods. A run within the budget clears
+   the strikes.
+2. If `RESET_AFTER_LATE_TICKS` UI ticks in a row are late anyway (e.g. the
+   tick itself got slow), the supervisor resets the station with
+   `machine.reset()`. A soft reset would keep the watchdog armed through the
+   next boot, where nothing feeds it until `start()`.
+3. If a task never returns, the watchdog is not fed and resets the chip after
+   `WDT_TIMEOUT_MS`. This bounds the worst-case freeze.
+
+Before each task runs, its name is written to RTC memory, which survives
+resets (but not a power cycle). After a reset, `start()` reports
+the cause and the task that was running, e.g. "watchdog reset while 'weather'
+was running", and `last_reset` keeps it for the status endpoint.
+
+The supervisor takes the watchdog, the RTC and the reset function as
+arguments, so it can be run on a host (see `scripts/simulate_watchdog.py`).
+Note that the ESP32's watchdog cannot be stopped once started: after stopping
+the program with CTRL+C, the station resets after `WDT_TIMEOUT_MS`, and a soft
+reset (CTRL+D) boots with the watchdog still running. The blocking boot steps
+before `start()` are therefore capped at `BOOT_WIFI_TIMEOUT_MS` for the Wi-Fi
+connection plus `ntp.NTP_TIMEOUT_MS` for the time sync, well below
+`WDT_TIMEOUT_MS`.
+"""
+
+import struct
+
+# --- Configuration ---
+WATCHDOG_ENABLED = True
+UI_TASK = "display"
+TICK_DEADLINE_MS = 500  # Latency of a UI tick (start delay + run time) that still counts as on time
+WDT_TIMEOUT_MS = 30000  # Must exceed the largest task budget
+RESET_AFTER_LATE_TICKS = 10  # At one tick per second, well before the watchdog fires
+
+# --- Task Budgets ---
+# How long a task may run (and hold up the UI tick) before it gets a strike
+DEFAULT_TASK_BUDGET_MS = 3000
+TASK_BUDGETS_MS = {
+    "weather": 12000,  # HTTP timeout of 10 s plus parsing
+    "wifi_check": 15000,  # Reconnect timeout (system_tasks.WLAN_RECONNECT_TIMEOUT_MS) plus LED flashes
+}
+CANCEL_AFTER_STRIKES = 4
+# Only postponed, never cancelled: without the Wi-Fi check the station stays offline until a reboot
+NEVER_CANCEL = ("wifi_check",)
+
+# --- Boot Budget ---
+# Time the Wi-Fi connection may take at boot, over all networks and retries
+# (see `app.py`). Together with the NTP sync it must stay below WDT_TIMEOUT_MS.
+BOOT_WIFI_TIMEOUT_MS = 20000
+
+# --- RTC Memory Layout ---
+# magic, version, state, resets, uptime (ms), detail (ms), strikes, task name
+_RECORD = "<2sBBHIIH16s"
+_RECORD_SIZE = struct.calcsize(_RECORD)
+_MAGIC = b"WD"
+_VERSION = 1
+_STATE_IDLE = 0
+_STATE_RUNNING = 1  # A task was running; if the watchdog fired, it hung
+_STATE_RESET = 2  # The supervisor reset the station
+
+_RESET_CAUSES = (
+    ("PWRON_RESET", "power on"),
+    ("HARD_RESET", "hard reset"),
+    ("WDT_RESET", "watchdog reset"),
+    ("DEEPSLEEP_RESET", "deep sleep wake-up"),
+    ("SOFT_RESET", "soft reset"),
+)
+
+
+class Supervisor:
+    """
+    Monitors the scheduled tasks, feeds the watchdog and records the running task.
+
+    Args:
+        sched (scheduler.Scheduler): The scheduler to supervise.
+        wdt: Object with `feed()`, e.g. `machine.WDT`.
+        rtc: Object with `memory([data])`, e.g. `machine.RTC()`.
+        reset (callable): Called for a supervisor reset, e.g. `machine.reset`.
+        reset_cause (str): How the station last started ("watchdog reset", "power on", ...).
+        before_reset (callable, optional): Called before a supervisor reset, e.g. to
+                                           save data.
+
+    Attributes:
+        last_reset (dict): The previous reset: {"cause", "task", "uptime_s", "detail_ms", "resets"}.
+    """
+
+    def __init__(self, sched, wdt, rtc, reset, reset_cause, before_reset=None):
+        self._sched = sched
+        self._wdt = wdt
+        self._rtc = rtc
+        self._reset = reset
+        self._before_reset = before_reset
+        self._record = bytearray(_RECORD_SIZE)
+        self._names = {}  # Task -> encoded name, so the breadcrumbs do not allocate
+        self._tick_late_ms = 0
+        self._late_in_row = 0
+        self.strikes = {}  # Task name -> consecutive strikes
+        self.ticks = 0
+        self.late_ticks = 0
+        self.max_latency_ms = 0
+        self.feeds = 0
+        self.postponed = 0
+        self.cancelled = []
+        self.last_reset = self._read_last_reset(reset_cause)
+        self._resets = self.last_reset["resets"]
+        self._write(_STATE_IDLE, b"", 0, 0)
+
+    # --- RTC Memory ---
+
+    def _read_last_reset(self, reset_cause):
+        data = self._rtc.memory()
+        result = {"cause": reset_cause, "task": None, "uptime_s": None, "detail_ms": None, "resets": 0}
+        if len(data) < _RECORD_SIZE:
+            return result
+        magic, version, state, resets, uptime_ms, detail_ms, _, name = struct.unpack_from(_RECORD, data)
+        if magic != _MAGIC or version != _VERSION:
+            return result
+        result["resets"] = resets
+        if state == _STATE_RESET:
+            result["cause"] = "supervisor reset"
+        elif state != _STATE_RUNNING or reset_cause != "watchdog reset":
+            return result
+        result["task"] = name.rstrip(b"\0").decode()
+        result["uptime_s"] = uptime_ms // 1000
+        result["detail_ms"] = detail_ms
+        return result
+
+    def _write(self, state, name, detail_ms, strikes):
+        struct.pack_into(
+            _RECORD, self._record, 0, _MAGIC, _VERSION, state, self._resets & 0xFFFF,
+            self._sched.now_ms() & 0xFFFFFFFF, min(max(detail_ms, 0), 0xFFFFFFFF), strikes, name,
+        )
+        self._rtc.memory(self._record)
+
+    def _name(self, task):
+        name = self._names.get(task)
+        if name is None:
+            name = task.name.encode()[:16]
+            self._names[task] = name
+        return name
+
+    # --- Scheduler Monitor ---
+
+    def task_started(self, task, late_ms):
+        """Called by the scheduler before a task runs."""
+        if task.name == UI_TASK:
+            self._tick_late_ms = late_ms
+        self._write(_STATE_RUNNING, self._name(task), late_ms, self.strikes.get(task.name, 0))
+
+    def task_finished(self, task, run_ms):
+        """Called by the scheduler after a task has run."""
+        if task.name == UI_TASK:
+            self._tick_done(task, self._tick_late_ms + run_ms)
+        else:
+            self._check_budget(task, run_ms)
+        self._write(_STATE_IDLE, b"", 0, 0)
+
+    def _tick_done(self, task, latency_ms):
+        self.ticks += 1
+        if latency_ms > self.max_latency_ms:
+            self.max_latency_ms = latency_ms
+        if latency_ms <= TICK_DEADLINE_MS:
+            self._late_in_row = 0
+            self._wdt.feed()
+            self.feeds += 1
+            return
+
+        self.late_ticks += 1
+        self._late_in_row += 1
+        if self._late_in_row >= RESET_AFTER_LATE_TICKS:
+            print(f"ERROR: Watchdog: {self._late_in_row} late UI ticks in a row "
+                  f"(last {latency_ms} ms), resetting.")
+            self._resets += 1
+            self._write(_STATE_RESET, self._name(task), latency_ms, 0)
+            if self._before_reset:
+                try:
+                    self._before_reset()
+                except Exception as e:
+                    print(f"ERROR: Watchdog: before_reset failed: {e}")
+            self._reset()
+
+    def _check_budget(self, task, run_ms):
+        budget_ms = TASK_BUDGETS_MS.get(task.name, DEFAULT_TASK_BUDGET_MS)
+        if run_ms <= budget_ms:
+            self.strikes.pop(task.name, None)
+            return
+
+        strikes = self.strikes.get(task.name, 0) + 1
+        self.strikes[task.name] = strikes
+        if strikes >= CANCEL_AFTER_STRIKES and task.name not in NEVER_CANCEL:
+            self._sched.cancel(task)
+            self.cancelled.append(task.name)
+            print(f"ERROR: Watchdog: Task '{task.name}' ran {run_ms} ms (budget {budget_ms} ms) "
+                  f"{strikes} times in a row, cancelled.")
+            return
+        delay_ms = task.period_ms << min(strikes, CANCEL_AFTER_STRIKES)
+        self._sched.reschedule(task, task.period_ms, delay_ms=delay_ms)
+        self.postponed += 1
+        print(f"Watchdog: Task '{task.name}' ran {run_ms} ms (budget {budget_ms} ms), "
+              f"postponed by {delay_ms // 1000} s.")
+
+    def feed(self):
+        """
+        Feeds the watchdog outside the scheduler loop.
+
+        After CTRL+C the loop no longer runs, but the watchdog does. Tools that
+        hold the REPL for longer (e.g. `scripts/deploy.py`) call this between
+        their steps.
+        """
+        self._wdt.feed()
+
+    def stats(self):
+        """
+        Returns the supervisor counters for instrumentation.
+
+        Returns:
+            dict: {"ticks", "late_ticks", "max_latency_ms", "feeds", "postponed",
+                   "cancelled", "strikes", "last_reset"}
+        """
+        return {
+            "ticks": self.ticks,
+            "late_ticks": self.late_ticks,
+            "max_latency_ms": self.max_latency_ms,
+            "feeds": self.feeds,
+            "postponed": self.postponed,
+            "cancelled": self.cancelled,
+            "strikes": self.strikes,
+            "last_reset": self.last_reset,
+        }
+
+
+def reset_cause_name(machine):
+    """Returns the name of `machine.reset_cause()`."""
+    cause = machine.reset_cause()
+    for attr, name in _RESET_CAUSES:
+        if getattr(machine, attr, None) == cause:
+            return name
+    return str(cause)
+
+
+def format_reset(last_reset):
+    """Formats the previous reset for the log, e.g. "watchdog reset while 'weather' was running"."""
+    text = last_reset["cause"]
+    if last_reset["task"]:
+        text += f" while '{last_reset['task']}' was running (after {last_reset['uptime_s']} s)"
+    return text
+
+
+supervisor = None
+
+
+def start(sched, before_reset=None):
+    """
+    Reports the previous reset, attaches the supervisor to the scheduler and
+    starts the hardware watchdog.
+
+    Args:
+        sched (scheduler.Scheduler): The application's scheduler, with its tasks registered.
+        before_reset (callable, optional): Called before a supervisor reset.
+
+    Returns:
+        Supervisor: The supervisor, or None if `WATCHDOG_ENABLED` is False.
+    """
+    global supervisor
+    import machine
+
+    rtc = machine.RTC()
+    cause = reset_cause_name(machine)
+    if not WATCHDOG_ENABLED:
+        return None
+    wdt = machine.WDT(timeout=WDT_TIMEOUT_MS)
+    supervisor = Supervisor(sched, wdt, rtc, machine.reset, cause, before_reset)
+    sched.monitor = supervisor
+    print(f"✓ Watchdog started ({WDT_TIMEOUT_MS // 1000}s timeout, UI tick deadline "
+          f"{TICK_DEADLINE_MS} ms). Last reset: {format_reset(supervisor.last_reset)}")
+    return supervisor
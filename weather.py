@@ -1,19 +1,162 @@
 """
 This module is responsible for fetching and processing weather data from the OpenWeatherMap API.
+
+Besides the single configured city, several locations can be fetched with one
+request to OWM's group endpoint. That response is parsed as a stream, one city
+object at a time, so the full JSON document never has to be held in memory.
+
+Requests go through `http_client`, which keeps the connection to the API host
+open and caches its DNS lookup between fetches.
+
+The HTTP client and the configuration from `secrets.py` are loaded on the first
+fetch, not on import.
+
+All requests pass through a circuit breaker (`breaker`). After a failed request
+(network error, HTTP 401/429/5xx) further requests are skipped without touching
+the network until the backoff has passed, honouring the server's `Retry-After`.
+
+The API host can be replaced with `weather_base_url` in `secrets.py`, e.g. to
+point a fleet of stations at the caching proxy in `scripts/owm_proxy.py`.
+With `"weather_format": "compact"`, the station asks that proxy for the
+compact binary payload (`weather_codec.py`) instead of OWM's JSON. It is read
+into a buffer that is allocated once and decoded in place.
 """
 
-import urequests
+import json
 
-from secrets import secrets
+from circuit_breaker import CircuitBreaker
 
 # OpenWeatherMap API endpoint and configuration
+# Scheme and host of the API, or of a proxy with the same paths ("weather_base_url" in secrets.py)
+API_BASE_URL = "http://api.openweathermap.org"
 # The API_URL is formatted with city, country code, API key, units (metric), and language (English).
-API_URL = "http://api.openweathermap.org/data/2.5/weather?q={},{}&appid={}&units=metric&lang=en"
+API_URL = "/data/2.5/weather?q={},{}&appid={}&units=metric&lang=en"
+# The GROUP_API_URL is formatted with a comma-separated list of city IDs and the API key.
+GROUP_API_URL = "/data/2.5/group?id={}&appid={}&units=metric&lang=en"
+GROUP_MAX_CITIES = 20  # Limit of the OWM group endpoint
+# Payload format: "json" (OWM's JSON) or "compact" (needs a server that produces it,
+# see weather_codec.py), set with "weather_format" in secrets.py
+PAYLOAD_FORMAT = "json"
+COMPACT_PARAM = "&mode=compact"
+
+# API key and location, loaded from the secrets.py file by load_config()
+API_KEY = None
+CITY = None
+COUNTRY_CODE = None
+# Optional list of OWM city IDs for multi-location mode
+CITY_IDS = None
+
+# Circuit breaker shared by all requests to the API
+breaker = CircuitBreaker("owm")
+
+# Receive buffer of the compact format, allocated on first use
+_payload_buf = None
+
+# Sunrise and sunset of the last single-city response (UTC, seconds since 1970),
+# or None if the response had none (the compact payload does not carry them)
+sunrise = None
+sunset = None
+
+
+def load_config():
+    """
+    Loads the API key and the locations from `secrets.py` on first use.
+
+    Returns:
+        list: The configured OWM city IDs for multi-location mode (may be empty).
+    """
+    global API_BASE_URL, API_KEY, CITY, COUNTRY_CODE, CITY_IDS, PAYLOAD_FORMAT
+    if CITY_IDS is None:
+        from secrets import secrets
+
+        API_BASE_URL = secrets.get("weather_base_url", API_BASE_URL).rstrip("/")
+        PAYLOAD_FORMAT = secrets.get("weather_format", PAYLOAD_FORMAT)
+        API_KEY = secrets["openweather_api_key"]
+        CITY = secrets["city"]
+        COUNTRY_CODE = secrets["country_code"]
+        CITY_IDS = secrets.get("city_ids", [])
+    return CITY_IDS
+
+
+def _extract(data):
+    """
+    Extracts the displayed values from an OWM current weather object.
+
+    Args:
+        data (dict): A parsed OWM current weather object.
+
+    Returns:
+        tuple: (temperature, pressure, humidity, wind_speed, description, main_weather, icon_code).
+    """
+    main = data.get("main", {})
+    weather_info = data.get("weather", [{}])[0]
+    return (
+        main.get("temp"),
+        main.get("pressure"),
+        main.get("humidity"),
+        data.get("wind", {}).get("speed"),
+        weather_info.get("description"),
+        weather_info.get("main"),
+        weather_info.get("icon"),
+    )
+
+
+def _read_compact(response):
+    """
+    Reads a compact payload into the preallocated buffer and decodes it.
+
+    Returns:
+        list: One record per location: (temperature, pressure, humidity, wind_speed,
+              description, main_weather, icon_code, name).
+    """
+    global _payload_buf
+    import weather_codec
+
+    if _payload_buf is None:
+        _payload_buf = bytearray(weather_codec.MAX_PAYLOAD_BYTES)
+    length = response.raw.readinto(_payload_buf)
+    offset = weather_codec.HEADER_SIZE
+    records = []
+    for _ in range(weather_codec.record_count(_payload_buf, length)):
+        record, offset = weather_codec.decode_record(_payload_buf, offset, length)
+        records.append(record)
+    return records
+
+
+def _format_timings(url):
+    """Formats the phase timings of the last request for the log output."""
+    import http_client
 
-# API key and location are loaded from the secrets.py file
-API_KEY = secrets["openweather_api_key"]
-CITY = secrets["city"]
-COUNTRY_CODE = secrets["country_code"]
+    t = http_client.last_timings(url)
+    return (
+        f"(dns {t.get('dns_ms', 0)} ms, connect {t.get('connect_ms', 0)} ms, "
+        f"first byte {t.get('first_byte_ms', 0)} ms, body {t.get('body_ms', 0)} ms, "
+        f"{'reused' if t.get('reused') else 'new'} connection)"
+    )
+
+
+def _set_sun_times(data):
+    """Keeps the sunrise and sunset of an OWM current weather object (see `daylight.py`)."""
+    global sunrise, sunset
+    sun = data.get("sys", {}) if data else {}
+    sunrise = sun.get("sunrise")
+    sunset = sun.get("sunset")
+
+
+def _retry_after_s(response):
+    """Returns the Retry-After header in seconds, or None if it is missing or a date."""
+    try:
+        return int(response.headers.get("retry-after", ""))
+    except ValueError:
+        return None
+
+
+def _breaker_allows():
+    """Checks the circuit breaker and logs skipped requests."""
+    if breaker.allow():
+        return True
+    print(f"Skipping weather fetch, breaker open (retry in {breaker.retry_in_ms() // 1000} s).")
+    return False
 
 
 def get_data():
@@ -22,55 +165,171 @@ def get_data():
 
     Constructs the API request URL using the configured city, country code,
     and API key. It then sends a GET request, parses the JSON response,
-    and extracts relevant weather information.
+    and extracts relevant weather information. The sunrise and sunset of the
+    response are kept in `sunrise` and `sunset`.
 
     Returns:
         A tuple containing the following weather data:
         (temperature, pressure, humidity, wind_speed, description, main_weather, icon_code).
         Returns (None, None, None, None, None, None, None) if an error occurs
-        during the API call or data parsing.
+        during the API call or data parsing, or if the circuit breaker is open.
     """
-    url = API_URL.format(CITY, COUNTRY_CODE, API_KEY)
+    import http_client
+
+    if not _breaker_allows():
+        return (None,) * 7
 
     response = None  # Initialize response to None
     try:
+        # Everything after allow() is inside the try, so the call is always recorded
+        load_config()
+        url = API_BASE_URL + API_URL.format(CITY, COUNTRY_CODE, API_KEY)
+        compact = PAYLOAD_FORMAT == "compact"
+        if compact:
+            url += COMPACT_PARAM
         print(f"Fetching weather data from: {url}")
-        response = urequests.get(url)
+        response = http_client.get(url)
 
         if response.status_code == 200:
-            data = response.json()
-
-            # Extract relevant data from the JSON response
-            temp = data.get("main", {}).get("temp")
-            pressure = data.get("main", {}).get("pressure")
-            humidity = data.get("main", {}).get("humidity")
-            wind_speed = data.get("wind", {}).get("speed")
-
-            weather_info = data.get("weather", [{}])[0]
-            description = weather_info.get("description")
-            main_weather = weather_info.get("main")
-            icon_code = weather_info.get("icon")
-
-            print("Weather data fetched successfully.")
-            return (
-                temp,
-                pressure,
-                humidity,
-                wind_speed,
-                description,
-                main_weather,
-                icon_code,
-            )
+            if compact:
+                result = _read_compact(response)[0][:7]
+                _set_sun_times(None)
+            else:
+                data = response.json()
+                result = _extract(data)
+                _set_sun_times(data)
+                del data
+            print(f"Weather data fetched successfully. {_format_timings(url)}")
+            breaker.record_success()
+            return result
 
         else:
             print(
                 f"Error fetching weather data: HTTP Status Code {response.status_code}"
             )
+            breaker.record_failure(response.status_code, _retry_after_s(response))
             return (None,) * 7
 
     except Exception as e:
         print(f"An error occurred while fetching weather data: {e}")
+        breaker.record_failure(str(e))
         return (None,) * 7
     finally:
         if response:
-            response.close()
\ No newline at end of file
+            response.close()
+
+
+def _iter_list_items(stream, chunk_size=256):
+    """
+    Yields the raw bytes of each object in the "list" array of a group response.
+
+    The stream is scanned in small chunks while tracking string and nesting state,
+    so only one city object is buffered at a time.
+
+    Args:
+        stream: A readable stream positioned at the start of the JSON body.
+        chunk_size (int): Number of bytes read per call.
+
+    Yields:
+        bytes: The JSON text of one list item.
+    """
+    stack = []  # Open containers: 0x7B '{' or 0x5B '['
+    in_string = False
+    escape = False
+    item = None
+
+    while True:
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            return
+        start = 0
+        for i in range(len(chunk)):
+            c = chunk[i]
+            if in_string:
+                if escape:
+                    escape = False
+                elif c == 0x5C:  # backslash
+                    escape = True
+                elif c == 0x22:  # quote
+                    in_string = False
+                continue
+            if c == 0x22:
+                in_string = True
+            elif c == 0x7B or c == 0x5B:
+                # An object directly inside the top-level object's array is a list item.
+                if c == 0x7B and len(stack) == 2 and stack[1] == 0x5B:
+                    item = bytearray()
+                    start = i
+                stack.append(c)
+            elif c == 0x7D or c == 0x5D:
+                stack.pop()
+                if item is not None and len(stack) == 2:
+                    item.extend(chunk[start:i + 1])
+                    yield bytes(item)
+                    item = None
+        if item is not None:
+            item.extend(chunk[start:])
+
+
+def get_group_data(city_ids=None):
+    """
+    Fetches the current weather for several locations with one API request.
+
+    Uses the OWM group endpoint and stream-parses the response into one compact
+    record per location.
+
+    Args:
+        city_ids (list, optional): OWM city IDs. Defaults to `CITY_IDS` from `secrets.py`.
+
+    Returns:
+        list: One record per location, in the order of the response:
+              (temperature, pressure, humidity, wind_speed, description, main_weather,
+              icon_code, name). Empty if an error occurs or the circuit breaker is open.
+    """
+    import http_client
+
+    if not _breaker_allows():
+        return []
+
+    records = []
+    response = None
+    try:
+        # Configuration errors are recorded too (see get_data())
+        configured_ids = load_config()
+        if city_ids is None:
+            city_ids = configured_ids
+        ids = ",".join(str(city_id) for city_id in city_ids[:GROUP_MAX_CITIES])
+        url = API_BASE_URL + GROUP_API_URL.format(ids, API_KEY)
+        compact = PAYLOAD_FORMAT == "compact"
+        if compact:
+            url += COMPACT_PARAM
+        print(f"Fetching weather data for {len(city_ids)} locations...")
+        response = http_client.get(url)
+
+        if response.status_code != 200:
+            print(
+                f"Error fetching group weather data: HTTP Status Code {response.status_code}"
+            )
+            breaker.record_failure(response.status_code, _retry_after_s(response))
+            return []
+
+        if compact:
+            records = _read_compact(response)
+        else:
+            for raw in _iter_list_items(response.raw):
+                data = json.loads(raw)
+                records.append(_extract(data) + (data.get("name"),))
+                del data, raw
+            response.raw.read()  # Consume the closing brackets so the connection can be reused
+
+        print(f"Weather data fetched for {len(records)} locations. {_format_timings(url)}")
+        breaker.record_success()
+        return records
+
+    except Exception as e:
+        print(f"An error occurred while fetching group weather data: {e}")
+        breaker.record_failure(str(e))
+        return []
+    finally:
+        if response:
+            response.close()
@@ -0,0 +1,156 @@
+"""
+This module encodes and decodes the compact binary weather payload.
+
+The OWM JSON for one city is about 600 bytes of text, of which the station
+uses a handful of values. The compact payload carries just these values as
+scaled integers in a fixed record, with the icon and the weather group as
+indexes into fixed tables, followed by the description and the location name:
+
+    header   "<2sBB"      magic b"WX", format version, number of records
+    record   "<hHBHBBBB"  temperature (0.01 °C), pressure (hPa),
+                          humidity (%), wind speed (0.01 m/s), icon index,
+                          weather group index, description length, name length
+             followed by the description and the name (UTF-8)
+
+A missing value is stored as the largest value of its field (-32768 for the
+temperature) and decodes as None. A single-city response has one record, a
+group response one per city. One city takes about 40 bytes.
+
+The station decodes each record with one `struct.unpack_from()` from the
+buffer the response was read into (see `weather.py`); the proxy in
+`scripts/owm_proxy.py` encodes it with `encode()`.
+"""
+
+import struct
+
+MAGIC = b"WX"
+VERSION = 1
+HEADER = "<2sBB"
+HEADER_SIZE = struct.calcsize(HEADER)
+RECORD = "<hHBHBBBB"
+RECORD_SIZE = struct.calcsize(RECORD)
+MAX_TEXT_BYTES = 40  # Description and name are cut to this length
+MAX_RECORDS = 20  # Limit of the OWM group endpoint
+MAX_PAYLOAD_BYTES = HEADER_SIZE + MAX_RECORDS * (RECORD_SIZE + 2 * MAX_TEXT_BYTES)
+
+# --- Tables ---
+# OWM icon codes and weather groups, see https://openweathermap.org/weather-conditions
+ICONS = (
+    "01d", "01n", "02d", "02n", "03d", "03n", "04d", "04n", "09d", "09n",
+    "10d", "10n", "11d", "11n", "13d", "13n", "50d", "50n",
+)
+GROUPS = (
+    "Thunderstorm", "Drizzle", "Rain", "Snow", "Mist", "Smoke", "Haze", "Dust",
+    "Fog", "Sand", "Ash", "Squall", "Tornado", "Clear", "Clouds",
+)
+
+_MISSING_I16 = -32768
+_MISSING_U16 = 0xFFFF
+_MISSING_U8 = 0xFF
+
+
+def _scaled(value, scale, missing, low, high):
+    if value is None:
+        return missing
+    return min(max(int(round(value * scale)), low), high)
+
+
+def _text(value):
+    """Returns `value` as UTF-8, cut at a character boundary to `MAX_TEXT_BYTES`."""
+    data = (value or "").encode("utf-8")
+    if len(data) <= MAX_TEXT_BYTES:
+        return data
+    cut = MAX_TEXT_BYTES
+    while cut and data[cut] & 0xC0 == 0x80:
+        cut -= 1
+    return data[:cut]
+
+
+def encode(records):
+    """
+    Encodes weather records into a compact payload.
+
+    Args:
+        records (list): Tuples (temperature, pressure, humidity, wind_speed,
+                        description, main_weather, icon_code, name), as returned by
+                        `weather.get_group_data()`.
+
+    Returns:
+        bytes: The payload.
+    """
+    parts = [struct.pack(HEADER, MAGIC, VERSION, len(records))]
+    for temp, pressure, humidity, wind, description, main, icon, name in records:
+        description = _text(description)
+        name = _text(name)
+        parts.append(struct.pack(
+            RECORD,
+            _scaled(temp, 100, _MISSING_I16, -32767, 32767),
+            _scaled(pressure, 1, _MISSING_U16, 0, 0xFFFE),
+            _scaled(humidity, 1, _MISSING_U8, 0, 0xFE),
+            _scaled(wind, 100, _MISSING_U16, 0, 0xFFFE),
+            ICONS.index(icon) if icon in ICONS else _MISSING_U8,
+            GROUPS.index(main) if main in GROUPS else _MISSING_U8,
+            len(description),
+            len(name),
+        ))
+        parts.append(description)
+        parts.append(name)
+    return b"".join(parts)
+
+
+def record_count(buf, length):
+    """
+    Checks the header of a payload.
+
+    Args:
+        buf (bytearray): The buffer holding the payload.
+        length (int): Number of valid bytes in the buffer.
+
+    Returns:
+        int: The number of records.
+
+    Raises:
+        ValueError: If the payload is truncated or not a compact payload.
+    """
+    if length < HEADER_SIZE or buf[0:2] != MAGIC or buf[2] != VERSION:
+        raise ValueError("not a compact weather payload")
+    return buf[3]
+
+
+def decode_record(buf, offset, length):
+    """
+    Decodes the record at `offset`.
+
+    Args:
+        buf (bytearray): The buffer holding the payload.
+        offset (int): Start of the record.
+        length (int): Number of valid bytes in the buffer.
+
+    Returns:
+        tuple: ((temperature, pressure, humidity, wind_speed, description,
+                main_weather, icon_code, name), offset of the next record).
+
+    Raises:
+        ValueError: If the record is truncated.
+    """
+    if offset + RECORD_SIZE > length:
+        raise ValueError("truncated compact weather payload")
+    temp, pressure, humidity, wind, icon, group, desc_len, name_len = struct.unpack_from(
+        RECORD, buf, offset
+    )
+    start = offset + RECORD_SIZE
+    end = start + desc_len + name_len
+    if end > length:
+        raise ValueError("truncated compact weather payload")
+    mv = memoryview(buf)
+    record = (
+        None if temp == _MISSING_I16 else temp / 100,
+        None if pressure == _MISSING_U16 else pressure,
+        None if humidity == _MISSING_U8 else humidity,
+        None if wind == _MISSING_U16 else wind / 100,
+        str(mv[start:start + desc_len], "utf-8") if desc_len else None,
+        GROUPS[group] if group < len(GROUPS) else "",
+        ICONS[icon] if icon < len(ICONS) else None,
+        str(mv[start + desc_len:end], "utf-8") if name_len else None,
+    )
+    return record, end
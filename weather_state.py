@@ -0,0 +1,126 @@
+"""
+This module hands the weather state from the fetch tasks to the UI tick.
+
+The state consists of several values that belong together: the weather data
+tuple, its icon code, the location name and the freshness of the data. If a
+reader could see some of them from one fetch and some from the next, the
+display would show, for example, new values with the old icon.
+
+`WeatherState` keeps two slots and a sequence counter. A writer fills the slot
+that is not current and then advances the sequence, which makes it current.
+A reader copies the current slot and checks that the sequence did not change
+while it was copying; otherwise it copies again. Neither side takes a lock, and
+reading only copies references into a list the reader provides, so the
+per-second UI tick does not allocate. Readers compare the sequence with the
+one they last saw to skip work when nothing has changed.
+
+There must be only one writer at a time (all writers run in the scheduler
+loop); any number of readers may run in between, e.g. from an interrupt, an
+asyncio task or a second thread.
+
+Usage:
+    state = WeatherState()
+    state.set_data(owm_data, icon_code)          # writer
+    seq = state.read_into(snapshot)              # reader
+    if seq != last_seq:
+        redraw(snapshot[DATA], snapshot[ICON])
+"""
+
+# --- Slot Fields ---
+DATA = 0  # (temperature, pressure, humidity, wind_speed, description, main_weather)
+ICON = 1  # OWM icon code
+LOCATION = 2  # Location name (multi-location mode), or ""
+UPDATED_MS = 3  # ticks_ms of the last successful fetch, or None
+STALE = 4  # True if the fetches since then have failed
+FIELD_COUNT = 5
+
+EMPTY_DATA = (None,) * 6
+DEFAULT_ICON = "01d"
+
+
+class WeatherState:
+    """
+    Two-slot weather state with a sequence counter.
+
+    Attributes:
+        seq (int): Number of published updates. The current slot is `seq & 1`.
+        retries (int): Reads that had to be repeated because a write came in between.
+    """
+
+    def __init__(self):
+        self.seq = 0
+        self.retries = 0
+        self._slots = (
+            [EMPTY_DATA, DEFAULT_ICON, "", None, False],
+            [EMPTY_DATA, DEFAULT_ICON, "", None, False],
+        )
+
+    def _publish(self, data, icon_code, location, updated_ms, stale):
+        """Fills the back slot and makes it current."""
+        slot = self._slots[(self.seq + 1) & 1]
+        slot[DATA] = data
+        slot[ICON] = icon_code
+        slot[LOCATION] = location
+        slot[UPDATED_MS] = updated_ms
+        slot[STALE] = stale
+        self.seq += 1
+
+    def set_data(self, data, icon_code=None, location=None):
+        """
+        Publishes new weather data.
+
+        Args:
+            data (tuple): (temperature, pressure, humidity, wind_speed, description, main_weather).
+            icon_code (str, optional): The icon code. Keeps the current one if None.
+            location (str, optional): The location name. Keeps the current one if None.
+        """
+        current = self._slots[self.seq & 1]
+        self._publish(
+            data,
+            icon_code or current[ICON],
+            current[LOCATION] if location is None else location,
+            current[UPDATED_MS],
+            current[STALE],
+        )
+
+    def set_status(self, ok, now_ms):
+        """
+        Publishes the outcome of a weather fetch.
+
+        Args:
+            ok (bool): True if the fetch succeeded; the data is then fresh as of `now_ms`.
+            now_ms (int): Current time in ticks_ms.
+        """
+        current = self._slots[self.seq & 1]
+        if ok:
+            updated_ms, stale = now_ms, False
+        else:
+            updated_ms, stale = current[UPDATED_MS], True
+        if updated_ms == current[UPDATED_MS] and stale == current[STALE]:
+            return  # Nothing changed, readers need not redraw
+        self._publish(current[DATA], current[ICON], current[LOCATION], updated_ms, stale)
+
+    def read_into(self, out):
+        """
+        Copies a consistent snapshot of the current slot.
+
+        Args:
+            out (list): A list of `FIELD_COUNT` items that receives the fields.
+
+        Returns:
+            int: The sequence number of the snapshot.
+        """
+        while True:
+            seq = self.seq
+            slot = self._slots[seq & 1]
+            for i in range(FIELD_COUNT):
+                out[i] = slot[i]
+            if self.seq == seq:
+                return seq
+            self.retries += 1
+
+    def snapshot(self):
+        """Returns a consistent copy of the current slot as a new list (allocates)."""
+        out = [None] * FIELD_COUNT
+        self.read_into(out)
+        return out
@@ -3,15 +3,13 @@ This module handles the Wi-Fi connection for the ESP32.
 
 It provides a robust connection function with retries and status LED feedback.
 A global `wlan` object is used to allow other modules to check the connection status.
+
+The network stack, the status LED pin and the credentials from `secrets.py` are
+only loaded on the first connection attempt, so importing this module is cheap.
 """
 
 import time
 
-import network
-from machine import Pin
-
-from secrets import secrets
-
 # --- Global WLAN object ---
 # This object holds the Wi-Fi station interface once initialized.
 wlan = None
@@ -19,7 +17,20 @@ wlan = None
 # --- LED Configuration ---
 # Pin number for the status LED. This is typically the onboard LED.
 LED_PIN = 2
-status_led = Pin(LED_PIN, Pin.OUT)
+status_led = None  # Created on first use by _led()
+
+# --- Power Saving ---
+# When enabled, modem sleep is (re-)applied after every successful connection.
+modem_sleep_enabled = False
+
+
+def _led():
+    """Returns the status LED pin, configuring it on first use."""
+    global status_led
+    if status_led is None:
+        from machine import Pin
+        status_led = Pin(LED_PIN, Pin.OUT)
+    return status_led
 
 
 def flash_led(duration_ms: int, cycles: int, delay_ms: int) -> None:
@@ -31,14 +42,33 @@ def flash_led(duration_ms: int, cycles: int, delay_ms: int) -> None:
         cycles (int): The number of times the LED should flash.
         delay_ms (int): The delay in milliseconds between flashes.
     """
+    led = _led()
     for _ in range(cycles):
-        status_led.value(1)  # Turn LED on
+        led.value(1)  # Turn LED on
         time.sleep_ms(duration_ms)
-        status_led.value(0)  # Turn LED off
+        led.value(0)  # Turn LED off
         time.sleep_ms(delay_ms)
 
 
-def connect_wifi(max_retries: int = 3, retry_delay_s: int = 5, max_wait_s: int = 10):
+def _time_left_ms(started, timeout_ms):
+    """Returns the time left of `timeout_ms` since `started`, or None without a timeout."""
+    if timeout_ms is None:
+        return None
+    return max(timeout_ms - time.ticks_diff(time.ticks_ms(), started), 0)
+
+
+def _retry_pause(retry_delay_s, started, timeout_ms):
+    """Waits between two attempts, at most until the timeout."""
+    left_ms = _time_left_ms(started, timeout_ms)
+    if left_ms is None:
+        time.sleep(retry_delay_s)
+    else:
+        time.sleep_ms(min(retry_delay_s * 1000, left_ms))
+
+
+def connect_wifi(
+    max_retries: int = 3, retry_delay_s: int = 5, max_wait_s: int = 10, timeout_ms: int = None
+):
     """
     Connects to a Wi-Fi network with retries for robustness.
 
@@ -49,20 +79,32 @@ def connect_wifi(max_retries: int = 3, retry_delay_s: int = 5, max_wait_s: int =
         max_retries (int): The maximum number of connection attempts for each credential.
         retry_delay_s (int): The delay in seconds between retries for the same credential.
         max_wait_s (int): The maximum time to wait for a single connection attempt to succeed.
+        timeout_ms (int, optional): Give up after this many milliseconds in total, over all
+                                    credentials and retries (e.g. to finish the boot within
+                                    the watchdog timeout).
 
     Returns:
         network.WLAN: The `network.WLAN` object if successfully connected, otherwise `None`.
     """
     global wlan
+    import network
+    from secrets import secrets
+
     wlan = network.WLAN(network.STA_IF)  # Create a station interface
     wlan.active(True)  # Activate the interface
+    started = time.ticks_ms()
 
     for credential in secrets["wifi_credentials"]:
+        if _time_left_ms(started, timeout_ms) == 0:
+            print(f"Giving up on WiFi after {timeout_ms} ms.")
+            break
         ssid = credential["ssid"]
         password = credential["password"]
         print(f"Attempting to connect to '{ssid}'...")
 
         for attempt in range(max_retries):
+            if _time_left_ms(started, timeout_ms) == 0:
+                break
             print(f"  Attempt {attempt + 1}/{max_retries} for '{ssid}'...")
 
             try:
@@ -70,25 +112,27 @@ def connect_wifi(max_retries: int = 3, retry_delay_s: int = 5, max_wait_s: int =
             except OSError as e:
                 print(f"    Connection command failed: {e}")
                 if attempt < max_retries - 1:
-                    time.sleep(retry_delay_s)
+                    _retry_pause(retry_delay_s, started, timeout_ms)
                 continue  # Skip to the next retry for this credential
 
             # Wait for connection, providing visual feedback with the LED
             wait_cycles = int(max_wait_s * 1000 / 200)  # Calculate LED flash cycles
             for _ in range(wait_cycles):
-                if wlan.isconnected():
+                if wlan.isconnected() or _time_left_ms(started, timeout_ms) == 0:
                     break
                 flash_led(50, 1, 150)  # Short flash while waiting
 
             if wlan.isconnected():
                 print(f"WiFi connected successfully to '{ssid}'. IP: {wlan.ifconfig()[0]}")
                 flash_led(500, 3, 500)  # Long flashes for success
-                status_led.value(0)  # Ensure LED is off after success
+                _led().value(0)  # Ensure LED is off after success
+                if modem_sleep_enabled:
+                    _apply_modem_sleep()
                 return wlan
             else:
                 print(f"    Connection attempt to '{ssid}' failed.")
                 if attempt < max_retries - 1:
-                    time.sleep(retry_delay_s)
+                    _retry_pause(retry_delay_s, started, timeout_ms)
 
         # If all retries for the current credential failed, disconnect and try the next one
         wlan.disconnect()
@@ -96,7 +140,7 @@ def connect_wifi(max_retries: int = 3, retry_delay_s: int = 5, max_wait_s: int =
 
     print("Failed to connect to any WiFi network after trying all credentials.")
     flash_led(100, 5, 100)  # Rapid flashes for complete failure
-    status_led.value(0)  # Ensure LED is off after failure
+    _led().value(0)  # Ensure LED is off after failure
     wlan = None  # Reset wlan object on complete failure
     return None
 
@@ -110,4 +154,30 @@ def is_connected() -> bool:
     """
     if wlan is None:
         return False
-    return wlan.isconnected()
\ No newline at end of file
+    return wlan.isconnected()
+
+
+def _apply_modem_sleep() -> bool:
+    """Switches the active interface to the power-saving modem sleep mode."""
+    try:
+        wlan.config(pm=wlan.PM_POWERSAVE)
+        return True
+    except (AttributeError, ValueError, OSError) as e:
+        print(f"Could not enable WiFi modem sleep: {e}")
+        return False
+
+
+def enable_modem_sleep() -> bool:
+    """
+    Enables Wi-Fi modem sleep, so the radio only wakes up for AP beacons.
+
+    The setting is remembered and re-applied after reconnections.
+
+    Returns:
+        bool: True if modem sleep is active on the current connection, False otherwise.
+    """
+    global modem_sleep_enabled
+    modem_sleep_enabled = True
+    if wlan is None:
+        return False
+    return _apply_modem_sleep()